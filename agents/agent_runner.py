@@ -1,6 +1,13 @@
 import openai
 from infra.config import Config
 
+ASSISTANT_INSTRUCTIONS = (
+    "You are a research assistant that helps with analyzing academic papers. "
+    "You can summarize research papers in different styles and compare two papers "
+    "based on their methods, goals, and findings using the registered functions. "
+    "Use the tools available to complete the user's request accurately and concisely."
+)
+
 
 class AssistantRegistrar:
     @staticmethod
@@ -10,13 +17,18 @@ class AssistantRegistrar:
                 "type": "function",
                 "function": {
                     "name": "summarize_pdf",
-                    "description": "Summarizes a research paper PDF given its local path.",
+                    "description": "Summarizes a research paper PDF given its local path, or only some of its sections.",
                     "parameters": {
                         "type": "object",
                         "properties": {
                             "path": {
                                 "type": "string",
                                 "description": "The full path to the PDF file on disk"
+                            },
+                            "sections": {
+                                "type": "array",
+                                "items": {"type": "string"},
+                                "description": "Only summarize these sections, e.g. [\"methods\"] or [\"evaluation\", \"results\"]. Omit to summarize the whole paper."
                             }
                         },
                         "required": ["path"]
@@ -43,6 +55,11 @@ class AssistantRegistrar:
                                 "type": "string",
                                 "description": "Style of the comparison (default, layman, detailed)",
                                 "default": "default"
+                            },
+                            "sections": {
+                                "type": "array",
+                                "items": {"type": "string"},
+                                "description": "Only compare these sections of both papers, e.g. [\"evaluation\"]. Omit to compare the whole papers."
                             }
                         },
                         "required": ["file_path_1", "file_path_2"]
@@ -123,12 +140,7 @@ class AssistantRegistrar:
 
             assistant = openai.beta.assistants.create(
                 name="Research Paper Assistant",
-                instructions=(
-                    "You are a research assistant that helps with analyzing academic papers. "
-                    "You can summarize research papers in different styles and compare two papers "
-                    "based on their methods, goals, and findings using the registered functions. "
-                    "Use the tools available to complete the user's request accurately and concisely."
-                ),
+                instructions=ASSISTANT_INSTRUCTIONS,
                 tools=tools,
                 model=model
             )
@@ -0,0 +1,278 @@
+import json
+import os
+import random
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+from infra.config import Config
+from infra.tracing import tracer
+
+MAX_EJECTION_SECONDS = 600
+MAX_BACKOFF_SECONDS = 8
+RETRYABLE_STATUS = (408, 409, 429)  # Plus every 5xx, like the SDK's own retries
+
+
+def is_retryable(error: BaseException) -> bool:
+    """
+    True for failures of the endpoint (connection errors, timeouts, 429 and 5xx responses).
+    Other 4xx responses (invalid request, context length exceeded, auth) would fail the same
+    way anywhere, so they are not retried and do not count against the endpoint.
+    """
+    import openai
+
+    if isinstance(error, (openai.APIConnectionError, ConnectionError, TimeoutError)):
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code in RETRYABLE_STATUS or error.status_code >= 500
+    return False
+
+
+def _retry_after(error: BaseException) -> Optional[float]:
+    # Seconds the server asked us to wait (429/503 Retry-After header), if any
+    response = getattr(error, "response", None)
+    try:
+        return float(response.headers.get("retry-after")) if response is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+class Endpoint:
+    """
+    One OpenAI-compatible endpoint in an EndpointPool, with its live load and health.
+    """
+
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        api_key: Optional[str] = None,
+        model: Optional[str] = None,
+        remote_model: Optional[str] = None,
+        weight: float = 1.0,
+        max_concurrency: int = 0,
+        name: Optional[str] = None,
+    ):
+        self.base_url = base_url
+        self.api_key = api_key
+        self.model = model.lower() if model else None  # Logical model it serves (None = any)
+        self.remote_model = remote_model  # Model name the server expects, if it differs
+        self.weight = max(float(weight), 1e-6)
+        self.max_concurrency = int(max_concurrency)  # 0 = unlimited
+        self.name = name or base_url or "openai"
+        self.client = None  # SDK client, attached by the pool's client factory
+
+        self.outstanding = 0
+        self.requests = 0
+        self.errors = 0
+        self.consecutive_failures = 0
+        self.ejections = 0
+        self.ejected_until = 0.0
+        self.latency_ewma: Optional[float] = None
+
+    @classmethod
+    def from_dict(cls, entry: dict) -> "Endpoint":
+        api_key = entry.get("api_key")
+        if not api_key and entry.get("api_key_env"):
+            api_key = os.getenv(entry["api_key_env"])  # Keeps secrets out of LLM_ENDPOINTS
+        return cls(
+            base_url=entry.get("base_url"),
+            api_key=api_key or Config.OPENAI_API_KEY,
+            model=entry.get("model"),
+            remote_model=entry.get("remote_model"),
+            weight=entry.get("weight", 1.0),
+            max_concurrency=entry.get("max_concurrency", 0),
+            name=entry.get("name"),
+        )
+
+    def serves(self, model: Optional[str]) -> bool:
+        return self.model is None or model is None or self.model == model.lower()
+
+    @property
+    def ejected(self) -> bool:
+        return self.ejected_until > time.time()
+
+    @property
+    def has_capacity(self) -> bool:
+        return self.max_concurrency <= 0 or self.outstanding < self.max_concurrency
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "base_url": self.base_url,
+            "model": self.model,
+            "weight": self.weight,
+            "max_concurrency": self.max_concurrency,
+            "outstanding": self.outstanding,
+            "requests": self.requests,
+            "errors": self.errors,
+            "ejected": self.ejected,
+            "ejections": self.ejections,
+            "latency_ewma": round(self.latency_ewma, 4) if self.latency_ewma is not None else None,
+        }
+
+
+class EndpointPool:
+    """
+    Balances chat completion requests across several OpenAI-compatible endpoints (API keys,
+    organizations or self-hosted servers).
+
+    - Least outstanding requests, scaled by weight: each request goes to the endpoint with the
+      lowest (outstanding + 1) / weight that is below its max_concurrency; when every endpoint is
+      at its limit the caller waits for a slot.
+    - Health: every failed request counts against its endpoint. After `eject_after` consecutive
+      failures the endpoint is ejected for `eject_seconds` (doubling on every repeat ejection,
+      up to 10 minutes); one success brings it back to full health. If every endpoint serving a
+      model is ejected, the one due back first still takes requests rather than failing outright.
+    - Failover: `call` retries a failed request on another endpoint, up to `attempts` times,
+      pausing `backoff` seconds (doubling, or the server's Retry-After) between attempts. Only
+      connection errors, timeouts, 429 and 5xx responses are retried and count as endpoint
+      failures; other errors (e.g. a 400 for an over-long prompt) are raised at once.
+
+    Endpoints are configured with LLM_ENDPOINTS, a JSON list (or the path of a JSON file) of
+    {"base_url", "api_key" | "api_key_env", "model", "remote_model", "weight", "max_concurrency", "name"}.
+    """
+
+    def __init__(
+        self,
+        endpoints: List[Endpoint],
+        client_factory: Optional[Callable[[Endpoint], object]] = None,
+        eject_after: Optional[int] = None,
+        eject_seconds: Optional[float] = None,
+        attempts: Optional[int] = None,
+        backoff: Optional[float] = None,
+    ):
+        if not endpoints:
+            raise ValueError("EndpointPool needs at least one endpoint")
+        self.endpoints = endpoints
+        self.eject_after = eject_after or Config.LLM_ENDPOINT_EJECT_AFTER
+        self.eject_seconds = Config.LLM_ENDPOINT_EJECT_SECONDS if eject_seconds is None else eject_seconds
+        self.attempts = attempts or Config.LLM_MAX_RETRIES + 1
+        self.backoff = Config.LLM_ENDPOINT_BACKOFF if backoff is None else backoff
+        self._condition = threading.Condition()
+        self._turn = 0
+        if client_factory is not None:
+            for endpoint in endpoints:
+                endpoint.client = client_factory(endpoint)
+
+    @classmethod
+    def from_config(cls, value: Optional[str] = None, client_factory: Optional[Callable[[Endpoint], object]] = None) -> Optional["EndpointPool"]:
+        """
+        Builds the pool from LLM_ENDPOINTS (JSON text or a path to a JSON file); None when unset.
+        """
+        value = (value if value is not None else Config.LLM_ENDPOINTS or "").strip()
+        if not value:
+            return None
+        if not value.startswith("["):
+            with open(value, "r") as f:
+                value = f.read()
+        return cls([Endpoint.from_dict(entry) for entry in json.loads(value)], client_factory)
+
+    # --- Scheduling ----------------------------------------------------------------
+
+    def acquire(self, model: Optional[str] = None, exclude: tuple = (), timeout: Optional[float] = None) -> Endpoint:
+        """
+        Reserves a slot on the best endpoint for `model`, waiting while all of them are at capacity.
+
+        Raises:
+            ValueError: If no endpoint serves `model`.
+            TimeoutError: If no slot frees up within `timeout` seconds (default LLM_TIMEOUT).
+        """
+        candidates = [e for e in self.endpoints if e.serves(model)]
+        if not candidates:
+            raise ValueError(f"No endpoint in LLM_ENDPOINTS serves model '{model}'")
+
+        deadline = time.monotonic() + (Config.LLM_TIMEOUT if timeout is None else timeout)
+        with self._condition:
+            while True:
+                endpoint = self._pick(candidates, exclude)
+                if endpoint is not None:
+                    endpoint.outstanding += 1
+                    endpoint.requests += 1
+                    return endpoint
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(f"All endpoints for model '{model}' are at their concurrency limit")
+                self._condition.wait(remaining)
+
+    def _pick(self, candidates: List[Endpoint], exclude: tuple) -> Optional[Endpoint]:
+        # Prefer healthy endpoints not tried yet for this request, then any healthy one
+        healthy = [e for e in candidates if not e.ejected] or [min(candidates, key=lambda e: e.ejected_until)]
+        pool = [e for e in healthy if e.name not in exclude] or healthy
+        available = [e for e in pool if e.has_capacity]
+        if not available:
+            return None
+
+        # Rotate the start so ties spread evenly instead of always hitting the first endpoint
+        self._turn = (self._turn + 1) % len(available)
+        rotated = available[self._turn:] + available[:self._turn]
+        return min(rotated, key=lambda e: (e.outstanding + 1) / e.weight)
+
+    def release(self, endpoint: Endpoint, error: Optional[BaseException] = None, latency: Optional[float] = None, cancelled: bool = False):
+        """
+        Frees the slot taken by `acquire` and records the outcome for health tracking.
+        A cancelled request (e.g. a hedge that lost, or a request rejected as invalid) only
+        frees its slot: it says nothing about the endpoint's health or latency.
+        """
+        with self._condition:
+            endpoint.outstanding -= 1
+            if error is None and not cancelled:
+                endpoint.consecutive_failures = 0
+                endpoint.ejections = 0
+                if latency is not None:
+                    endpoint.latency_ewma = latency if endpoint.latency_ewma is None else 0.8 * endpoint.latency_ewma + 0.2 * latency
+            elif error is not None:
+                endpoint.errors += 1
+                endpoint.consecutive_failures += 1
+                if endpoint.consecutive_failures >= self.eject_after and not endpoint.ejected:
+                    endpoint.ejections += 1
+                    duration = min(self.eject_seconds * 2 ** (endpoint.ejections - 1), MAX_EJECTION_SECONDS)
+                    endpoint.ejected_until = time.time() + duration
+                    print(f"[WARN] LLM endpoint '{endpoint.name}' ejected for {duration:.0f}s after {endpoint.consecutive_failures} failures: {error}")
+            self._condition.notify_all()
+
+    def open(self, model: Optional[str], request: Callable[[Endpoint], object], exclude: tuple = (), claimed: Optional[list] = None):
+        """
+        Runs `request(endpoint)` with failover, and returns (result, endpoint) with the slot
+        still held; the caller must `release` it (used for streams that outlive the call).
+        Endpoints named in `exclude` are only used when no other one is available. The name of
+        every endpoint acquired is appended to `claimed` before its request is sent, so a
+        concurrent duplicate of the request (a hedge) can avoid it.
+        """
+        tried = tuple(exclude)
+        last_error: Optional[BaseException] = None
+        for attempt in range(self.attempts):
+            if last_error is not None:
+                self._wait_before_retry(attempt, last_error)
+            endpoint = self.acquire(model, exclude=tried)
+            if claimed is not None:
+                claimed.append(endpoint.name)
+            tracer.current().set(endpoint=endpoint.name)
+            try:
+                return request(endpoint), endpoint
+            except Exception as e:
+                if not is_retryable(e):
+                    self.release(endpoint, cancelled=True)  # The request's fault, not the endpoint's
+                    raise
+                self.release(endpoint, e)
+                tried += (endpoint.name,)
+                last_error = e
+        raise last_error
+
+    def _wait_before_retry(self, attempt: int, error: BaseException):
+        delay = self.backoff * 2 ** (attempt - 1) * random.uniform(0.5, 1.0)  # Jitter spreads out retries of concurrent calls
+        retry_after = _retry_after(error)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        time.sleep(min(delay, MAX_BACKOFF_SECONDS))
+
+    def call(self, model: Optional[str], request: Callable[[Endpoint], object], exclude: tuple = ()):
+        """
+        Runs `request(endpoint)` on the best endpoint, failing over to another one on errors.
+        """
+        started = time.perf_counter()
+        result, endpoint = self.open(model, request, exclude)
+        self.release(endpoint, latency=time.perf_counter() - started)
+        return result
+
+    def stats(self) -> List[dict]:
+        with self._condition:
+            return [endpoint.to_dict() for endpoint in self.endpoints]
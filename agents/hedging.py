@@ -0,0 +1,169 @@
+import queue
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Optional
+from infra.config import Config
+from infra.tracing import tracer
+
+
+class HedgeCancelled(Exception):
+    """
+    Raised inside an attempt that lost the race, once it notices its cancel event.
+    """
+
+
+class Hedger:
+    """
+    Request hedging for LLM calls: when a call is still running after the latency percentile
+    learned from recent calls of the same model, a duplicate attempt is started and whichever
+    finishes first wins; the other one is cancelled.
+
+    - Delay: LLM_HEDGE_PERCENTILE of the last LLM_HEDGE_WINDOW call latencies per model (never
+      below LLM_HEDGE_MIN_DELAY). Nothing is hedged until LLM_HEDGE_MIN_SAMPLES calls are seen.
+    - Spend cap: hedges are limited to LLM_HEDGE_BUDGET extra requests per call (0.05 = at
+      most 5% more requests); calls over the budget just wait for their first attempt.
+    - Cancellation is cooperative: an attempt receives a threading.Event and should stop (and
+      close its HTTP stream) once it is set. Tokens of losers that completed anyway are counted
+      as `wasted_tokens`.
+
+    Usage:
+        result = hedger.run("gpt-4", lambda cancel, index: call(cancel), tokens=lambda r: r.usage.total_tokens)
+    """
+
+    def __init__(
+        self,
+        percentile: Optional[float] = None,
+        min_samples: Optional[int] = None,
+        min_delay: Optional[float] = None,
+        budget: Optional[float] = None,
+        window: Optional[int] = None,
+    ):
+        self.percentile = Config.LLM_HEDGE_PERCENTILE if percentile is None else percentile
+        self.min_samples = Config.LLM_HEDGE_MIN_SAMPLES if min_samples is None else min_samples
+        self.min_delay = Config.LLM_HEDGE_MIN_DELAY if min_delay is None else min_delay
+        self.budget = Config.LLM_HEDGE_BUDGET if budget is None else budget
+        self.window = window or Config.LLM_HEDGE_WINDOW
+        self._latencies: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+        self._stats = {"calls": 0, "hedged": 0, "hedge_wins": 0, "over_budget": 0, "cancelled": 0, "wasted_tokens": 0}
+
+    # --- Policy --------------------------------------------------------------------
+
+    def observe(self, model: str, latency: float):
+        with self._lock:
+            self._latencies.setdefault(model, deque(maxlen=self.window)).append(latency)
+
+    def delay(self, model: str) -> Optional[float]:
+        """
+        Seconds to wait before hedging a call to `model`; None while there are too few samples.
+        """
+        with self._lock:
+            latencies = sorted(self._latencies.get(model, ()))
+        if not latencies or len(latencies) < self.min_samples:
+            return None
+        index = min(len(latencies) - 1, int(round(self.percentile / 100 * (len(latencies) - 1))))
+        return max(self.min_delay, latencies[index])
+
+    def _take_budget(self) -> bool:
+        with self._lock:
+            if self._stats["hedged"] + 1 > self.budget * self._stats["calls"]:
+                self._stats["over_budget"] += 1
+                return False
+            self._stats["hedged"] += 1
+            return True
+
+    # --- Execution -----------------------------------------------------------------
+
+    def run(self, model: str, attempt: Callable[[threading.Event, int], object], tokens: Optional[Callable[[object], int]] = None):
+        """
+        Runs `attempt(cancel_event, index)` and, if it is slow, a hedged duplicate (index 1).
+
+        Returns:
+            The result of the first attempt to succeed; if both fail, the primary's error is raised.
+        """
+        with self._lock:
+            self._stats["calls"] += 1
+
+        started = time.perf_counter()
+        delay = self.delay(model)
+        if delay is None:
+            # Still learning this model's latencies: run inline
+            result = attempt(threading.Event(), 0)
+            self.observe(model, time.perf_counter() - started)
+            return result
+
+        outcomes: queue.Queue = queue.Queue()
+        cancels = [threading.Event(), threading.Event()]
+        finished = threading.Event()
+
+        def launch(index: int):
+            def target():
+                try:
+                    outcome = (index, attempt(cancels[index], index), None)
+                except BaseException as e:
+                    outcome = (index, None, e)
+                if finished.is_set():
+                    self._discard(outcome, tokens)
+                else:
+                    outcomes.put(outcome)
+            threading.Thread(target=target, daemon=True, name=f"llm-hedge-{index}").start()
+
+        launch(0)
+        running = 1
+        errors: Dict[int, BaseException] = {}
+        try:
+            while True:
+                try:
+                    timeout = None if running == 2 or delay is None else max(0.0, started + delay - time.perf_counter())
+                    index, result, error = outcomes.get(timeout=timeout)
+                except queue.Empty:
+                    delay = None
+                    if self._take_budget():
+                        tracer.current().set(hedged=True)
+                        launch(1)
+                        running = 2
+                    continue
+
+                if error is None:
+                    self.observe(model, time.perf_counter() - started)
+                    if running == 2:
+                        tracer.current().set(hedge_won=index == 1)
+                    if index == 1:
+                        with self._lock:
+                            self._stats["hedge_wins"] += 1
+                    return result
+
+                errors[index] = error
+                if len(errors) == running and delay is None:
+                    raise errors.get(0, error)
+                # The primary failed before the hedge delay: fail now rather than hedging a broken call
+                if running == 1:
+                    raise error
+        finally:
+            finished.set()
+            for cancel in cancels:
+                cancel.set()
+            # Outcomes that raced with the winner are discarded here instead of in their thread
+            while not outcomes.empty():
+                self._discard(outcomes.get_nowait(), tokens)
+
+    def _discard(self, outcome: tuple, tokens: Optional[Callable[[object], int]]):
+        _, result, error = outcome
+        with self._lock:
+            if isinstance(error, HedgeCancelled):
+                self._stats["cancelled"] += 1
+            elif error is None and tokens is not None:
+                try:
+                    self._stats["wasted_tokens"] += tokens(result) or 0
+                except Exception:
+                    pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            models = list(self._latencies)
+        stats["hedge_rate"] = round(stats["hedged"] / stats["calls"], 4) if stats["calls"] else 0.0
+        stats["win_rate"] = round(stats["hedge_wins"] / stats["hedged"], 4) if stats["hedged"] else 0.0
+        stats["delays"] = {model: self.delay(model) for model in models}
+        return stats
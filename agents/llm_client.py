@@ -1,13 +1,148 @@
+import threading
+import time
+from types import SimpleNamespace
 from infra.config import Config
-from infra.models import SUPPORTED_MODELS
-from typing import Optional
-from openai import OpenAI
+from infra.tracing import span, tracer
+from infra.models import SUPPORTED_MODELS, stage_models
+from typing import Dict, Iterator, List, Optional, Tuple
+from openai import DEFAULT_CONNECTION_LIMITS, DefaultHttpxClient, OpenAI, Timeout
+
+# httpx.Limits, taken from the SDK so we build the same type the SDK's transport expects
+Limits = type(DEFAULT_CONNECTION_LIMITS)
+
+# Providers served through the OpenAI chat completions interface ("replay" records/replays it offline)
+OPENAI_COMPATIBLE_PROVIDERS = {"openai", "replay"}
 
 class LLMClient:
-    def __init__(self, provider: Optional[str] = None, model: Optional[str] = None):
+    # Process-wide registries, so TLS sessions and keep-alive connections survive across
+    # services: SDK clients keyed by (provider, base_url, api_key), LLMClients by (provider, model, base_url)
+    _sdk_clients: Dict[Tuple, OpenAI] = {}
+    _shared: Dict[Tuple, "LLMClient"] = {}
+    _registry_lock = threading.Lock()
+    _pool = None  # EndpointPool built from LLM_ENDPOINTS on first use (False when unset)
+    _hedger = None  # Hedger shared by all clients when LLM_HEDGE is on (see agents/hedging.py)
+
+    @classmethod
+    def shared(cls, provider: Optional[str] = None, model: Optional[str] = None, base_url: Optional[str] = None) -> "LLMClient":
+        """
+        Returns the process-wide LLMClient for (provider, model, base_url), creating it on first use.
+        LLMClient is stateless between calls and safe to share across threads.
+        """
+        key = (
+            (provider or Config.LLM_PROVIDER).lower(),
+            (model or Config.OPENAI_MODEL).lower(),
+            base_url or Config.OPENAI_BASE_URL
+        )
+        with cls._registry_lock:
+            client = cls._shared.get(key)
+        if client is None:
+            client = cls(*key)
+            with cls._registry_lock:
+                client = cls._shared.setdefault(key, client)
+        return client
+
+    @classmethod
+    def for_stage(cls, stage: str, llm: Optional["LLMClient"] = None, provider: Optional[str] = None, model: Optional[str] = None) -> "LLMClient":
+        """
+        Returns the client for one pipeline stage (see infra.models.PIPELINE_STAGES): the shared
+        client for the stage's MODEL_<STAGE> setting when one is configured, otherwise `llm`
+        (or the shared client for provider/model).
+
+        Raises:
+            ValueError: If a MODEL_<STAGE> setting is not a supported model of the provider.
+        """
+        provider = provider or getattr(llm, "provider", None) or Config.LLM_PROVIDER
+        routed = stage_models(provider).get(stage)
+        if routed is None:
+            return llm or cls.shared(provider, model)
+        if llm is not None and getattr(llm, "model", None) == SUPPORTED_MODELS[provider.lower()][routed]["id"]:
+            return llm
+        return cls.shared(provider, routed, getattr(llm, "base_url", None))
+
+    @classmethod
+    def _sdk_client(cls, provider: str, base_url: Optional[str] = None, api_key: Optional[str] = None, max_retries: Optional[int] = None):
+        """
+        Returns the pooled SDK client for an endpoint, built with the configured pool limits and timeouts.
+        The "replay" provider gets a ReplayClient (see agents/replay_client.py) with the same interface.
+        """
+        if provider == "replay":
+            key = (provider, base_url, Config.REPLAY_MODE, Config.REPLAY_CASSETTE)
+        else:
+            api_key = api_key or Config.OPENAI_API_KEY
+            key = (provider, base_url, api_key, max_retries)
+
+        with cls._registry_lock:
+            if key not in cls._sdk_clients:
+                if provider == "replay":
+                    from agents.replay_client import ReplayClient
+
+                    cls._sdk_clients[key] = ReplayClient(
+                        Config.REPLAY_CASSETTE,
+                        mode=Config.REPLAY_MODE,
+                        upstream=cls._build_openai(base_url) if Config.REPLAY_MODE == "record" else None,
+                        latency_scale=Config.REPLAY_LATENCY_SCALE,
+                        rate_limit_rate=Config.REPLAY_RATE_LIMIT_RATE,
+                        synthetic_tokens=Config.REPLAY_SYNTHETIC_TOKENS,
+                        strict=Config.REPLAY_STRICT,
+                    )
+                else:
+                    cls._sdk_clients[key] = cls._build_openai(base_url, api_key, max_retries)
+            return cls._sdk_clients[key]
+
+    @staticmethod
+    def _build_openai(base_url: Optional[str] = None, api_key: Optional[str] = None, max_retries: Optional[int] = None) -> OpenAI:
+        timeout = Timeout(Config.LLM_TIMEOUT, connect=Config.LLM_CONNECT_TIMEOUT)
+        return OpenAI(
+            api_key=api_key or Config.OPENAI_API_KEY,
+            base_url=base_url,
+            timeout=timeout,
+            max_retries=Config.LLM_MAX_RETRIES if max_retries is None else max_retries,
+            http_client=DefaultHttpxClient(
+                timeout=timeout,
+                event_hooks={"request": [LLMClient._count_http_request]},
+                limits=Limits(
+                    max_connections=Config.LLM_POOL_MAX_CONNECTIONS,
+                    max_keepalive_connections=Config.LLM_POOL_MAX_KEEPALIVE,
+                    keepalive_expiry=Config.LLM_KEEPALIVE_EXPIRY,
+                ),
+            ),
+        )
+
+    @classmethod
+    def close_shared(cls):
+        """
+        Closes all pooled connections and forgets shared clients (e.g. between tests or on shutdown).
+        """
+        with cls._registry_lock:
+            for client in cls._sdk_clients.values():
+                client.close()
+            cls._sdk_clients.clear()
+            cls._shared.clear()
+            cls._pool = None
+            cls._hedger = None
+
+    @classmethod
+    def endpoint_pool(cls):
+        """
+        Returns the process-wide EndpointPool from LLM_ENDPOINTS (see agents/endpoint_pool.py), or None when unset.
+        """
+        if cls._pool is None:
+            from agents.endpoint_pool import EndpointPool
+
+            # Failover across endpoints replaces the SDK's own retries against a single one
+            pool = EndpointPool.from_config(client_factory=lambda e: cls._sdk_client("openai", e.base_url, e.api_key, max_retries=0))
+            with cls._registry_lock:
+                if cls._pool is None:
+                    cls._pool = pool or False
+        return cls._pool or None
+
+    def __init__(self, provider: Optional[str] = None, model: Optional[str] = None, base_url: Optional[str] = None):
         self._provider = (provider or Config.LLM_PROVIDER).lower()
         self._model = (model or Config.OPENAI_MODEL).lower()
+        self._base_url = base_url or Config.OPENAI_BASE_URL
         self._client = self._init_client()
+        # Clients on the default endpoint are balanced across LLM_ENDPOINTS when it is set
+        self._pooled = self._provider == "openai" and self._base_url == Config.OPENAI_BASE_URL
 
         model_data = SUPPORTED_MODELS.get(self._provider, {}).get(self._model)
 
@@ -21,9 +156,131 @@ class LLMClient:
             "output": model_data["output_cost_per_1k"]
         }
     
+    @staticmethod
+    def _count_http_request(request):
+        # Runs on the calling thread for every HTTP attempt, so SDK retries show up on the open span
+        tracer.current().add("http_requests")
+
+    @staticmethod
+    def _trace_usage(call, usage):
+        """
+        Copies provider-reported usage and retry counts onto an LLM call span.
+        """
+        if usage:
+            call.set(prompt_tokens=usage.prompt_tokens, completion_tokens=usage.completion_tokens, total_tokens=usage.total_tokens)
+        if call.attrs.get("http_requests"):
+            call.set(retries=call.attrs["http_requests"] - 1)
+
+    @classmethod
+    def endpoint_stats(cls) -> list:
+        """
+        Load, errors and health of every endpoint in LLM_ENDPOINTS (empty when unset).
+        """
+        pool = cls.endpoint_pool()
+        return pool.stats() if pool else []
+
+    @classmethod
+    def hedger(cls):
+        """
+        Returns the process-wide Hedger, or None when LLM_HEDGE is off.
+        """
+        if not Config.LLM_HEDGE:
+            return None
+        if cls._hedger is None:
+            from agents.hedging import Hedger
+
+            with cls._registry_lock:
+                if cls._hedger is None:
+                    cls._hedger = Hedger()
+        return cls._hedger
+
+    @classmethod
+    def hedge_stats(cls) -> dict:
+        """
+        How often calls were hedged and how often the hedge won (empty when LLM_HEDGE is off).
+        """
+        hedger = cls.hedger()
+        return hedger.stats() if hedger else {}
+
+    def _create(self, **kwargs):
+        """
+        Sends one chat.completions request for this client's model, through the endpoint pool when
+        one is configured (balancing and failover), otherwise to the single default endpoint.
+        Plain completions are hedged when LLM_HEDGE is on; tool calls are not.
+        """
+        hedger = LLMClient.hedger()
+        if hedger is not None and not kwargs.get("tools"):
+            return self._hedged_create(hedger, **kwargs)
+
+        pool = LLMClient.endpoint_pool() if self._pooled else None
+        if pool is None:
+            return self._client.chat.completions.create(model=self._model, **kwargs)
+        return pool.call(self._model, lambda endpoint: endpoint.client.chat.completions.create(model=endpoint.remote_model or self._model, **kwargs))
+
+    def _hedged_create(self, hedger, **kwargs):
+        """
+        `_create` through the Hedger. Each attempt streams, so the losing one can be cancelled
+        between chunks (closing its connection stops generation); with an endpoint pool the hedge
+        goes to a different endpoint than the first attempt when one is available. A cancelled
+        attempt frees its endpoint without counting as a success or a failure.
+        """
+        from agents.hedging import HedgeCancelled
+
+        used = []  # Endpoints taken by earlier attempts, recorded as soon as they are acquired
+
+        def attempt(cancel: threading.Event, index: int):
+            stream, release, _ = self._open_stream(exclude=tuple(used), claimed=used, stream_options={"include_usage": True}, **kwargs)
+            error = None
+            cancelled = False
+            try:
+                parts, usage = [], None
+                for event in stream:
+                    if cancel.is_set():
+                        raise HedgeCancelled()
+                    if event.usage:
+                        usage = event.usage
+                    if event.choices and event.choices[0].delta.content:
+                        parts.append(event.choices[0].delta.content)
+            except HedgeCancelled:
+                cancelled = True
+                raise
+            except Exception as e:
+                error = e
+                raise
+            finally:
+                stream.close()
+                release(error, cancelled=cancelled)
+
+            text = "".join(parts)
+            if usage is None:
+                prompt = "\n".join(str(m.get("content") or "") for m in kwargs.get("messages", []))
+                usage = SimpleNamespace(**self._estimate_usage(prompt, text))
+            message = SimpleNamespace(content=text, tool_calls=None)
+            return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=usage)
+
+        return hedger.run(self._model, attempt, tokens=lambda response: response.usage.total_tokens)
+
+    def _open_stream(self, exclude: tuple = (), claimed: Optional[list] = None, **kwargs):
+        """
+        Like `_create` for streams: returns (stream, release, endpoint name), where
+        `release(error, cancelled=False)` frees the endpoint slot once the stream is finished.
+        The endpoint's name is appended to `claimed` as soon as it is picked, before the
+        request is sent.
+        """
+        pool = LLMClient.endpoint_pool() if self._pooled else None
+        if pool is None:
+            if claimed is not None:
+                claimed.append(self._base_url)
+            stream = self._client.chat.completions.create(model=self._model, stream=True, **kwargs)
+            return stream, lambda error=None, cancelled=False: None, self._base_url
+
+        started = time.perf_counter()
+        stream, endpoint = pool.open(self._model, lambda endpoint: endpoint.client.chat.completions.create(model=endpoint.remote_model or self._model, stream=True, **kwargs), exclude, claimed)
+        return stream, lambda error=None, cancelled=False: pool.release(endpoint, error, None if error or cancelled else time.perf_counter() - started, cancelled=cancelled), endpoint.name
+
     def _init_client(self):
-        if self._provider.lower() == "openai":
-            return OpenAI(api_key=Config.OPENAI_API_KEY)
+        if self._provider.lower() in OPENAI_COMPATIBLE_PROVIDERS:
+            return LLMClient._sdk_client(self._provider.lower(), self._base_url)
 
         raise NotImplementedError(f"LLM provider '{self._provider}' is not supported yet.")
 
@@ -36,7 +293,63 @@ class LLMClient:
 
         Returns:
             dict: {
-                "text": str,  # The generated message
+                "text": str,  # The generated message ("" when the request failed)
+                "usage": {
+                    "prompt_tokens": int,
+                    "completion_tokens": int,
+                    "total_tokens": int
+                },
+                "error": str  # only when the request failed
+            }
+        """
+        if self._provider.lower() in OPENAI_COMPATIBLE_PROVIDERS:
+            with span("llm.chat_completion", model=self._model, provider=self._provider) as call:
+                try:
+                    response = self._create(
+                        messages = [
+                            {"role": "user", "content": prompt}
+                        ],
+                        temperature=0.3,
+                    )
+                    message_text = response.choices[0].message.content.strip()
+                    usage = response.usage
+                    LLMClient._trace_usage(call, usage)
+
+                    return {
+                        "text": message_text,
+                        "usage": {
+                            "prompt_tokens": usage.prompt_tokens,
+                            "completion_tokens": usage.completion_tokens,
+                            "total_tokens": usage.total_tokens
+                        }
+                    }
+                except Exception as e:
+                    call.fail(e)
+                    print(f"[ERROR] OpenAI chat completion failed: {e}")
+                    return {
+                        "text": "",
+                        "usage": {
+                            "prompt_tokens": 0,
+                            "completion_tokens": 0,
+                            "total_tokens": 0
+                        },
+                        "error": f"{type(e).__name__}: {e}"
+                    }
+            
+        raise NotImplementedError(f"chat_completion is not implemented for provider '{self._provider}'")
+
+    def chat_with_tools(self, messages: List[dict], tools: List[dict]) -> dict:
+        """
+        Sends a full conversation plus function-calling tool schemas and returns the assistant turn.
+
+        Args:
+            messages (List[dict]): Chat history in OpenAI message format.
+            tools (List[dict]): Tool schemas (see AssistantRegistrar.register_tools).
+
+        Returns:
+            dict: {
+                "message": dict,  # Assistant message, ready to append to `messages`
+                "tool_calls": List[dict],  # [{"id": str, "name": str, "arguments": str}]
                 "usage": {
                     "prompt_tokens": int,
                     "completion_tokens": int,
@@ -44,39 +357,158 @@ class LLMClient:
                 }
             }
         """
-        if self._provider.lower() == "openai":
+        if self._provider.lower() not in OPENAI_COMPATIBLE_PROVIDERS:
+            raise NotImplementedError(f"chat_with_tools is not implemented for provider '{self._provider}'")
+
+        with span("llm.chat_with_tools", model=self._model, provider=self._provider, tools=len(tools or [])) as call:
+            response = self._create(
+                messages=messages,
+                tools=tools or None,
+                temperature=0.3,
+            )
+            LLMClient._trace_usage(call, response.usage)
+        choice = response.choices[0].message
+        tool_calls = [
+            {"id": call.id, "name": call.function.name, "arguments": call.function.arguments}
+            for call in (choice.tool_calls or [])
+        ]
+
+        message = {"role": "assistant", "content": choice.content or ""}
+        if tool_calls:
+            message["tool_calls"] = [
+                {"id": call["id"], "type": "function", "function": {"name": call["name"], "arguments": call["arguments"]}}
+                for call in tool_calls
+            ]
+
+        usage = response.usage
+        return {
+            "message": message,
+            "tool_calls": tool_calls,
+            "usage": {
+                "prompt_tokens": usage.prompt_tokens if usage else 0,
+                "completion_tokens": usage.completion_tokens if usage else 0,
+                "total_tokens": usage.total_tokens if usage else 0
+            }
+        }
+
+    def stream_chat_completion(self, prompt: str, cancel_event: Optional[threading.Event] = None) -> Iterator[dict]:
+        """
+        Streams a completion from the current LLM provider, yielding text as it arrives.
+
+        Setting `cancel_event` (or closing the generator) closes the underlying HTTP
+        stream, so the provider stops generating and billing further tokens.
+
+        Args:
+            prompt (str): The prompt to send to the language model.
+            cancel_event (threading.Event, optional): Set it to abort the stream early.
+
+        Yields:
+            dict: {"type": "delta", "text": str} for every text fragment, followed by a single
+            {
+                "type": "done",
+                "text": str,  # The full generated message
+                "usage": {
+                    "prompt_tokens": int,
+                    "completion_tokens": int,
+                    "total_tokens": int
+                },
+                "cancelled": bool,
+                "error": str | None  # Set when the stream failed; "text" is then only what arrived before
+            }
+        """
+        if self._provider.lower() not in OPENAI_COMPATIBLE_PROVIDERS:
+            raise NotImplementedError(f"stream_chat_completion is not implemented for provider '{self._provider}'")
+
+        parts = []
+        usage = None
+        cancelled = False
+        stream = None
+        error = None
+
+        started = time.perf_counter()
+
+        # The span stays open across yields, so it covers the whole stream including consumer time
+        with span("llm.stream_chat_completion", model=self._model, provider=self._provider) as call:
             try:
-                response = self._client.chat.completions.create(
-                    model = self._model,
-                    messages = [
+                stream, release, _ = self._open_stream(
+                    messages=[
                         {"role": "user", "content": prompt}
                     ],
                     temperature=0.3,
+                    stream_options={"include_usage": True},
                 )
-                message_text = response.choices[0].message.content.strip()
-                usage = response.usage
 
-                return {
-                    "text": message_text,
-                    "usage": {
-                        "prompt_tokens": usage.prompt_tokens,
-                        "completion_tokens": usage.completion_tokens,
-                        "total_tokens": usage.total_tokens
-                    }
-                }
+                for event in stream:
+                    if cancel_event is not None and cancel_event.is_set():
+                        cancelled = True
+                        break
+
+                    if event.usage:
+                        usage = {
+                            "prompt_tokens": event.usage.prompt_tokens,
+                            "completion_tokens": event.usage.completion_tokens,
+                            "total_tokens": event.usage.total_tokens
+                        }
+
+                    if event.choices and event.choices[0].delta.content:
+                        if not parts:
+                            call.set(ttft=round(time.perf_counter() - started, 6))
+                        delta = event.choices[0].delta.content
+                        parts.append(delta)
+                        yield {"type": "delta", "text": delta}
+
+            except GeneratorExit:
+                # Closed by the consumer mid-stream (daemon client gone, Stop, Ctrl-C): the prompt
+                # was still billed, and the truncated stream says nothing about the endpoint
+                cancelled = True
+                call.set(cancelled=True, **(usage or self._estimate_usage(prompt, "".join(parts).strip())))
+                raise
+
             except Exception as e:
-                print(f"[ERROR] OpenAI chat completion failed: {e}")
-                return {
-                    "text": "",
-                    "usage": {
-                        "prompt_tokens": 0,
-                        "completion_tokens": 0,
-                        "total_tokens": 0
-                    }
-                }
-            
-        raise NotImplementedError(f"chat_completion is not implemented for provider '{self._provider}'")
-    
+                error = e
+                call.fail(e)
+                print(f"[ERROR] OpenAI streaming completion failed: {e}")
+
+            finally:
+                if stream is not None:
+                    stream.close()
+                    release(error, cancelled=cancelled)
+
+            text = "".join(parts).strip()
+            usage = usage or self._estimate_usage(prompt, text)
+            call.set(cancelled=cancelled, **usage)
+            if call.attrs.get("http_requests"):
+                call.set(retries=call.attrs["http_requests"] - 1)
+
+            yield {
+                "type": "done",
+                "text": text,
+                "usage": usage,
+                "cancelled": cancelled,
+                "error": f"{type(error).__name__}: {error}" if error else None
+            }
+
+    @staticmethod
+    def _estimate_usage(prompt: str, text: str) -> dict:
+        """
+        Estimates token usage locally when the provider did not report it
+        (e.g. the stream was cancelled before the final usage event).
+        """
+        from utils.token_counter import TokenCounter
+
+        try:
+            prompt_tokens = TokenCounter.count_tokens(prompt) or 0
+            completion_tokens = (TokenCounter.count_tokens(text) or 0) if text else 0
+        except Exception as e:
+            print(f"[WARN] Could not estimate token usage: {e}")
+            prompt_tokens, completion_tokens = 0, 0
+
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens
+        }
+
     @staticmethod
     def health_check(provider: str, model: str) -> dict:
         """
@@ -94,9 +526,9 @@ class LLMClient:
                 "message": str
             }
         """
-        if provider.lower() == "openai":
+        if provider.lower() in OPENAI_COMPATIBLE_PROVIDERS:
             try:
-                client = OpenAI(api_key=Config.OPENAI_API_KEY)  # Initialize OpenAI client
+                client = LLMClient._sdk_client(provider.lower(), Config.OPENAI_BASE_URL)  # Reuses the pooled connection
 
                 response = client.chat.completions.create(
                     model=model,
@@ -106,14 +538,14 @@ class LLMClient:
                 )
 
                 return {
-                    "provider": "openai",
+                    "provider": provider.lower(),
                     "model": model,
                     "status": "ok",
                     "message": "LLM responded successfully."
                 }
             except Exception as e:
                 return {
-                    "provider": "openai",
+                    "provider": provider.lower(),
                     "model": model,
                     "status": "fail",
                     "message": str(e)
@@ -126,6 +558,18 @@ class LLMClient:
             "message": f"Health check not implemented for provider '{provider}'"
         }
     
+    @property
+    def provider(self) -> str:
+        return self._provider
+
+    @property
+    def model(self) -> str:
+        return self._model
+
+    @property
+    def base_url(self) -> Optional[str]:
+        return self._base_url
+
     @property
     def costs(self):
         """
@@ -0,0 +1,71 @@
+from typing import List, Optional
+from agents.agent_runner import ASSISTANT_INSTRUCTIONS, AssistantRegistrar
+from agents.llm_client import LLMClient
+from agents.tool_registry import ToolContext, ToolRegistry, default_registry
+from utils.message_utils import extract_style_from_text
+
+
+class LocalAgent:
+    """
+    In-process function-calling agent built on chat completions.
+
+    Unlike ThreadExecutor (Assistants API), there is no thread/run state on the server and
+    nothing to poll: each round is one chat completion request, and tool calls are dispatched
+    locally through a ToolRegistry as soon as the response arrives.
+    """
+
+    def __init__(
+        self,
+        provider: Optional[str] = None,
+        model: Optional[str] = None,
+        llm: Optional[LLMClient] = None,
+        tools: Optional[List[dict]] = None,
+        registry: Optional[ToolRegistry] = None,
+        max_rounds: int = 8,
+    ):
+        self.provider = provider
+        self.model = model
+        self.llm = llm or LLMClient.shared(provider, model)
+        self.tools = tools if tools is not None else AssistantRegistrar.register_tools()
+        self.registry = registry or default_registry
+        self.max_rounds = max_rounds
+        self.messages: List[dict] = [{"role": "system", "content": ASSISTANT_INSTRUCTIONS}]
+        self.usage = {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+
+    def run(self, message: str) -> str:
+        """
+        Sends a user message and runs tool rounds until the model answers in plain text.
+
+        Args:
+            message (str): The user request, optionally tagged with [style=...].
+
+        Returns:
+            str: The assistant's final reply.
+        """
+        self.messages.append({"role": "user", "content": message})
+        context = ToolContext(
+            provider=self.provider,
+            model=self.model,
+            style_resolver=lambda: extract_style_from_text(message)
+        )
+
+        for _ in range(self.max_rounds):
+            response = self.llm.chat_with_tools(self.messages, self.tools)
+            self._add_usage(response["usage"])
+            self.messages.append(response["message"])
+
+            if not response["tool_calls"]:
+                return response["message"]["content"]
+
+            for output in self.registry.dispatch_all(response["tool_calls"], context):
+                self.messages.append({
+                    "role": "tool",
+                    "tool_call_id": output["tool_call_id"],
+                    "content": output["output"]
+                })
+
+        return "[ERROR] Agent stopped after reaching the maximum number of tool rounds."
+
+    def _add_usage(self, usage: dict):
+        for key in self.usage:
+            self.usage[key] += usage.get(key, 0)
@@ -0,0 +1,333 @@
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from typing import Dict, Iterator, List, Optional
+from openai.types.chat import ChatCompletion, ChatCompletionChunk
+
+
+class ReplayRateLimitError(Exception):
+    """
+    Raised when a replayed (or simulated) request hits a rate limit, mirroring a provider 429.
+    """
+    status_code = 429
+
+
+class ReplayClient:
+    """
+    Drop-in stand-in for the OpenAI SDK client (`client.chat.completions.create(...)`)
+    behind the "replay" provider, for deterministic offline tests and benchmarks.
+
+    Modes:
+        - "record": forwards requests to a real SDK client and appends every
+          request/response pair (with usage and latency) to a JSONL cassette.
+        - "replay": answers from the cassette. Identical requests are replayed in
+          recorded order; misses fall back to synthetic output unless `strict`.
+        - "synthetic": ignores recorded responses and generates plausible text of
+          `synthetic_tokens` tokens, deterministically seeded by the request.
+
+    `latency_scale` replays the recorded latency distribution (0 disables sleeping,
+    1 is real time); `rate_limit_rate` injects ReplayRateLimitError at random.
+
+    Cassette line format:
+        {"key": str, "request": dict, "response": dict | null, "error": dict | null,
+         "latency": float, "ttft": float | null}
+    """
+
+    SYNTHETIC_BASE_LATENCY = 0.3  # Seconds, used when the cassette has no recorded latencies
+    SYNTHETIC_TOKENS_PER_SEC = 50.0
+
+    def __init__(
+        self,
+        cassette: str,
+        mode: str = "replay",
+        upstream=None,
+        latency_scale: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        synthetic_tokens: int = 200,
+        strict: bool = False,
+        seed: int = 0,
+    ):
+        if mode not in ("record", "replay", "synthetic"):
+            raise ValueError(f"Unknown replay mode '{mode}'")
+        if mode == "record" and upstream is None:
+            raise ValueError("Record mode needs an upstream client")
+
+        self.cassette = cassette
+        self.mode = mode
+        self.upstream = upstream
+        self.latency_scale = latency_scale
+        self.rate_limit_rate = rate_limit_rate
+        self.synthetic_tokens = synthetic_tokens
+        self.strict = strict
+        self.stats = {"requests": 0, "hits": 0, "misses": 0, "recorded": 0, "rate_limited": 0}
+
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._entries: Dict[str, List[dict]] = {}
+        self._cursors: Dict[str, int] = {}
+        self._latencies: List[float] = []
+        self._load()
+
+        # Mirror the SDK surface: client.chat.completions.create(...)
+        self.chat = type("Chat", (), {})()
+        self.chat.completions = type("Completions", (), {})()
+        self.chat.completions.create = self.create
+
+    # --- Cassette ------------------------------------------------------------------
+
+    def _load(self):
+        if not os.path.exists(self.cassette):
+            return
+
+        with open(self.cassette, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                self._entries.setdefault(entry["key"], []).append(entry)
+                if entry.get("latency") is not None:
+                    self._latencies.append(entry["latency"])
+
+    def _append(self, entry: dict):
+        with self._lock:
+            os.makedirs(os.path.dirname(self.cassette) or ".", exist_ok=True)
+            with open(self.cassette, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+            self._entries.setdefault(entry["key"], []).append(entry)
+            self._latencies.append(entry["latency"])
+            self.stats["recorded"] += 1
+
+    @staticmethod
+    def request_key(request: dict) -> str:
+        """
+        Stable hash of everything that determines the response (model, messages, tools, limits).
+        """
+        relevant = {k: request.get(k) for k in ("model", "messages", "tools", "max_tokens", "temperature")}
+        return hashlib.sha256(json.dumps(relevant, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+    def _lookup(self, key: str) -> Optional[dict]:
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                return None
+            cursor = self._cursors.get(key, 0)
+            self._cursors[key] = cursor + 1
+            return entries[cursor % len(entries)]
+
+    # --- SDK surface -------------------------------------------------------------
+
+    def create(self, **request):
+        with self._lock:
+            self.stats["requests"] += 1
+            rate_limited = self.rate_limit_rate and self._random.random() < self.rate_limit_rate
+            if rate_limited:
+                self.stats["rate_limited"] += 1
+
+        if rate_limited:
+            self._sleep(self._sample_latency(0) * 0.1)
+            raise ReplayRateLimitError("Simulated rate limit (429)")
+
+        if self.mode == "record":
+            return self._record(request)
+
+        key = self.request_key(request)
+        entry = self._lookup(key) if self.mode == "replay" else None
+
+        with self._lock:
+            self.stats["hits" if entry else "misses"] += 1
+
+        if entry is None:
+            if self.mode == "replay" and self.strict:
+                raise KeyError(f"No recorded response for request {key[:12]} in {self.cassette}")
+            entry = self._synthesize(key, request)
+
+        if entry.get("error"):
+            self._sleep(entry["latency"])
+            error = entry["error"]
+            if error.get("status") == 429:
+                raise ReplayRateLimitError(error.get("message", "Recorded rate limit (429)"))
+            raise RuntimeError(error.get("message", "Recorded provider error"))
+
+        if request.get("stream"):
+            include_usage = bool((request.get("stream_options") or {}).get("include_usage"))
+            return ReplayStream(self._iter_chunks(entry, include_usage))
+
+        self._sleep(entry["latency"])
+        return ChatCompletion.model_validate(entry["response"])
+
+    def close(self):
+        if self.upstream is not None:
+            self.upstream.close()
+
+    # --- Recording -----------------------------------------------------------------
+
+    def _record(self, request: dict):
+        key = self.request_key(request)
+        recorded_request = {k: v for k, v in request.items() if k != "stream_options"}
+        started = time.monotonic()
+
+        try:
+            response = self.upstream.chat.completions.create(**request)
+        except Exception as e:
+            status = getattr(e, "status_code", None)
+            self._append({
+                "key": key, "request": recorded_request, "response": None,
+                "error": {"status": status, "message": str(e)},
+                "latency": time.monotonic() - started, "ttft": None
+            })
+            raise
+
+        if not request.get("stream"):
+            self._append({
+                "key": key, "request": recorded_request,
+                "response": response.model_dump(exclude_none=True), "error": None,
+                "latency": time.monotonic() - started, "ttft": None
+            })
+            return response
+
+        return ReplayStream(self._record_stream(key, recorded_request, response, started), close=response.close)
+
+    def _record_stream(self, key: str, request: dict, stream, started: float) -> Iterator:
+        parts, usage, ttft = [], None, None
+        complete = False
+        try:
+            for chunk in stream:
+                if chunk.usage:
+                    usage = chunk.usage.model_dump()
+                if chunk.choices and chunk.choices[0].delta.content:
+                    if ttft is None:
+                        ttft = time.monotonic() - started
+                    parts.append(chunk.choices[0].delta.content)
+                yield chunk
+            complete = True
+        finally:
+            # Cancelled streams are not recorded: they would replay as truncated answers
+            if complete:
+                content = "".join(parts)
+                self._append({
+                    "key": key, "request": request,
+                    "response": self._completion(request, content, usage or self._estimate_usage(request, content)),
+                    "error": None, "latency": time.monotonic() - started, "ttft": ttft
+                })
+
+    # --- Synthesis -----------------------------------------------------------------
+
+    _FILLER = (
+        "the proposed method improves results on standard benchmarks while reducing "
+        "computational cost and the authors evaluate robustness across datasets"
+    ).split()
+
+    def _synthesize(self, key: str, request: dict) -> dict:
+        rng = random.Random(key)
+        prompt_words = [
+            word.strip(".,;:()[]\"'").lower()
+            for message in request.get("messages", [])
+            for word in str(message.get("content") or "").split()
+        ]
+        vocabulary = [w for w in prompt_words if len(w) > 3 and w.isalpha()] or self._FILLER
+
+        target_tokens = self.synthetic_tokens
+        if request.get("max_tokens"):
+            target_tokens = min(target_tokens, request["max_tokens"])
+        target_words = max(1, int(target_tokens * 0.75))  # ~0.75 words per token
+
+        sentences, words = [], 0
+        while words < target_words:
+            length = min(rng.randint(8, 16), target_words - words)
+            sentence = [rng.choice(vocabulary) for _ in range(length)]
+            sentences.append(" ".join(sentence).capitalize() + ".")
+            words += length
+
+        content = " ".join(sentences)
+        usage = self._estimate_usage(request, content)
+        latency = self._sample_latency(usage["completion_tokens"])
+        return {
+            "key": key, "request": request,
+            "response": self._completion(request, content, usage), "error": None,
+            "latency": latency, "ttft": latency * 0.2
+        }
+
+    def _sample_latency(self, completion_tokens: int) -> float:
+        with self._lock:
+            if self._latencies:
+                return self._random.choice(self._latencies)
+        return self.SYNTHETIC_BASE_LATENCY + completion_tokens / self.SYNTHETIC_TOKENS_PER_SEC
+
+    @staticmethod
+    def _estimate_usage(request: dict, content: str) -> dict:
+        # ~4 characters per token; good enough for cost and throughput estimates, needs no tokenizer
+        prompt_chars = sum(len(str(m.get("content") or "")) for m in request.get("messages", []))
+        prompt_tokens = max(1, prompt_chars // 4)
+        completion_tokens = max(1, len(content) // 4) if content else 0
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens
+        }
+
+    @staticmethod
+    def _completion(request: dict, content: str, usage: dict) -> dict:
+        return {
+            "id": "chatcmpl-replay",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "replay"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": usage,
+        }
+
+    # --- Streaming -----------------------------------------------------------------
+
+    def _iter_chunks(self, entry: dict, include_usage: bool) -> Iterator[ChatCompletionChunk]:
+        response = entry["response"]
+        message = response["choices"][0]["message"]
+        words = (message.get("content") or "").split(" ")
+
+        latency = entry.get("latency") or 0.0
+        ttft = entry.get("ttft") if entry.get("ttft") is not None else latency * 0.2
+        per_chunk = max(0.0, latency - ttft) / max(1, len(words))
+
+        def chunk(delta: Optional[dict], finish_reason: Optional[str] = None, usage: Optional[dict] = None) -> ChatCompletionChunk:
+            return ChatCompletionChunk.model_validate({
+                "id": response.get("id", "chatcmpl-replay"),
+                "object": "chat.completion.chunk",
+                "created": response.get("created", int(time.time())),
+                "model": response.get("model", "replay"),
+                "choices": [] if delta is None else [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+                "usage": usage,
+            })
+
+        self._sleep(ttft)
+        for i, word in enumerate(words):
+            if i:
+                self._sleep(per_chunk)
+            yield chunk({"content": word if i == 0 else " " + word})
+
+        yield chunk({}, "stop")
+        if include_usage:
+            yield chunk(None, usage=response.get("usage"))
+
+    def _sleep(self, seconds: Optional[float]):
+        if self.latency_scale and seconds:
+            time.sleep(seconds * self.latency_scale)
+
+
+class ReplayStream:
+    """
+    Iterable with the SDK Stream's `close()`, so callers can cancel replayed streams the same way.
+    """
+
+    def __init__(self, chunks: Iterator, close=None):
+        self._chunks = chunks
+        self._close = close
+
+    def __iter__(self):
+        return self._chunks
+
+    def close(self):
+        self._chunks.close()
+        if self._close:
+            self._close()
@@ -1,182 +1,32 @@
 import argparse
-import openai
-import time
-from infra.config import Config
-from agents.agent_runner import AssistantRegistrar
-from agents.llm_client import LLMClient
-#from tools.prototype_figure_analyzer import FigureAnalyzer
-from domain.paper import Paper
-from services.search_service import SearchService
-from rich import print
+import builtins
 import sys
+from infra.config import Config
 
+# Heavy modules (openai, pdfplumber, tiktoken, rich, services.*) are imported inside the
+# code paths that use them, so local-only commands start fast and never create a thread.
+# Searches are answered by the resident daemon (services/daemon.py) when one is running.
+# Cold-start budget: see benchmarks/import_time.py.
 
-class ThreadExecutor:
-    def __init__(self, assistant_id: str, provider: str = None, model: str = None):
-        self.provider = provider
-        self.model = model
-        self.assistant_id = assistant_id
-        self.thread = openai.beta.threads.create()
-        openai.api_key = Config.OPENAI_API_KEY
-
-    def send_message(self, message: str):
-        openai.beta.threads.messages.create(
-            thread_id=self.thread.id,
-            role="user",
-            content=message
-        )
-
-    def run(self):
-        return openai.beta.threads.runs.create(
-            thread_id=self.thread.id,
-            assistant_id=self.assistant_id,
-        )
-
-    def wait_for_completion(self, run_id: str):
-        tool_handled = False
-
-        while True:
-            run = openai.beta.threads.runs.retrieve(thread_id=self.thread.id, run_id=run_id)
-
-            if run.status == "completed":
-                return run
-
-            elif run.status == "requires_action" and not tool_handled:
-                self.handle_tool_calls(run)
-                tool_handled = True  # Prevents re-processing
-                time.sleep(1)        # Wait briefly before next run check
 
-            elif run.status in {"queued", "in_progress"}:
-                time.sleep(1)
-                continue
-
-            else:
-                raise Exception(f"[ERROR] Unexpected run status: {run.status}")
-
-
-    def handle_tool_calls(self, run):
-        from services.summarizer import SummarizerService
-        from domain.paper import Paper
-        from tools.cache_manager import CacheManager
-        from infra.config import Config
-        from utils.message_utils import extract_style_from_messages
-
-        tool_calls = run.required_action.submit_tool_outputs.tool_calls
-        outputs = []
-
-        for tool_call in tool_calls:
-            func_name = tool_call.function.name
-            args = eval(tool_call.function.arguments)
-
-            if func_name == "summarize_pdf":
-                path = args["path"]
-                # Extract optional style from message if included like: [style=layman]
-                style = args.get("style") or extract_style_from_messages(self.thread.id)
-
-
-                print(f"\n📄 Summarizing file: {path}")
-                file_hash = CacheManager.get_file_hash(path)
-
-                # 🔍 Check cache
-                if CacheManager.is_cached(file_hash, style):
-                    print("✅ Loaded summary from cache!")
-                    result = CacheManager.load_cached_summary(file_hash, style)
-                else:
-                    result = SummarizerService.summarize_paper(path, style, provider=self.provider, model=self.model)
-
-                    # 💾 Save to cache
-                    CacheManager.save_summary(file_hash, style, result)
-                    print("💾 Summary saved to cache.")
-
-                # 📊 Token + cost output
-                usage = result.get("total_usage", {})
-                prompt_tokens = usage.get("prompt_tokens", 0)
-                completion_tokens = usage.get("completion_tokens", 0)
-                total_tokens = usage.get("total_tokens", 0)
-
-                model = Config.OPENAI_MODEL
-                cost = result.get("cost", 0.0)
-
-                print(f"📊 Token Usage: {total_tokens} tokens")
-                print(f"💸 Estimated Cost ({model}): ${cost:.6f}")
-
-                outputs.append({
-                    "tool_call_id": tool_call.id,
-                    "output": result["final_summary"]
-                })
-            
-            elif func_name == "compare_papers":
-                path1 = args["file_path_1"]
-                path2 = args["file_path_2"]
-                style = args.get("style") or extract_style_from_messages(self.thread.id)
-
-
-                print(f"\n Comparing files:\n- {path1}\n- {path2}")
-                combined_key = CacheManager.get_combined_hash(path1, path2)
-
-                # Check cache
-                if CacheManager.is_cached(combined_key, style):
-                    print("Loaded comparison from cache!")
-                    result = CacheManager.load_cached_summary(combined_key, style)
-                else:
-                    result = SummarizerService.compare_papers(path1, path2, style, provider=self.provider, model=self.model)
-                    CacheManager.save_summary(combined_key, style, result)
-                    print("Comparison saved to cache.")
-
-                usage = result.get("total_usage", {})
-                prompt_tokens = usage.get("prompt_tokens", 0)
-                completion_tokens = usage.get("completion_tokens", 0)
-                total_tokens = usage.get("total_tokens", 0)
-
-                model = Config.OPENAI_MODEL
-                cost = result.get("cost", 0.0)
-
-                print(f"📊 Token Usage: {total_tokens} tokens")
-                print(f"💸 Estimated Cost ({model}): ${cost:.6f}")
-
-                outputs.append({
-                    "tool_call_id": tool_call.id,
-                    "output": result["comparison"]
-                })
-            
-            elif func_name == "search_by_author":
-                from services.author_search import AuthorSearch
-
-                name = args["name"]
-                folder = args["folder"]
-
-                results = AuthorSearch.search_by_author(name, folder)
-                if not results:
-                    output = f"No papers found for author '{name}'."
-                else:
-                    output = f"📚 Found {len(results)} papers by '{name}':\n\n"
-                    for r in results:
-                        output += f"📄 {r['title']}\n👥 {', '.join(r['authors'])}\n📁 {r['path']}\n\n"
-
-                outputs.append({
-                    "tool_call_id": tool_call.id,
-                    "output": output
-                })
-                
-
-        openai.beta.threads.runs.submit_tool_outputs(
-            thread_id=self.thread.id,
-            run_id=run.id,
-            tool_outputs=outputs
-        )
+def print(*args, **kwargs):
+    # Scripts that pipe the output skip the rich import entirely
+    if not sys.stdout.isatty():
+        return builtins.print(*args, **kwargs)
 
+    from rich import print as rich_print
+    rich_print(*args, **kwargs)
 
 
-    def get_final_response(self):
-        messages = openai.beta.threads.messages.list(thread_id=self.thread.id)
-        for msg in reversed(messages.data):
-            if msg.role == "assistant":
-                return msg.content[0].text.value
-        return None
+def __getattr__(name: str):
+    # Backwards-compatible `from agents.run_thread import ThreadExecutor` without an eager SDK import
+    if name == "ThreadExecutor":
+        from agents.thread_executor import ThreadExecutor
+        return ThreadExecutor
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
-# CLI Entry Point
-if __name__ == "__main__":
+def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(description="Run assistant thread to summarize or compare papers.")
     parser.add_argument("--file", type=str, help="Path to PDF to summarize or compare (required).")
     parser.add_argument("--file2", type=str, help="Second PDF for comparison (if running compare_papers).")
@@ -190,40 +40,67 @@ if __name__ == "__main__":
     parser.add_argument("--search-author", type=str, help="Search local PDFs for papers by this author")
     parser.add_argument("--folder", type=str, help="Folder path for searching PDFs")
     parser.add_argument("--search-title", type=str, help="Search papers by title (local + Arxiv fallback)")
+    parser.add_argument("--dry-run", action="store_true", help="Estimate requests, tokens, cost and wall time for --file (and --file2) without calling the LLM")
+    parser.add_argument("--runtime", choices=["local", "assistants"], default="local", help="Agent runtime: in-process function calling (local) or OpenAI Assistants threads")
+    parser.add_argument("--trace", nargs="?", const="traces/run_thread.jsonl", help="Write per-stage spans to this JSONL file (plus .prom metrics) and print a summary table")
+    parser.add_argument("--profile", nargs="?", const="profiles", help="Write cProfile stats per stage and tracemalloc stats per paper to this folder")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if not args.trace and not args.profile:
+        return run(args)
+
+    profiler = None
+    if args.profile:
+        from infra.profiling import Profiler
+        profiler = Profiler(args.profile).start()
+
+    if args.trace:
+        from infra.tracing import enable_cli_tracing, finish_cli_tracing
+        metrics_path = enable_cli_tracing(args.trace)
+
+    try:
+        return run(args)
+    finally:
+        if profiler:
+            written = profiler.stop()
+            print(f"\n🔬 Profiles: {', '.join(written)}")
+        if args.trace:
+            summary = finish_cli_tracing(metrics_path)
+            print(f"\n⏱ Trace: {args.trace} (metrics: {metrics_path})\n")
+            builtins.print(summary)
+
+
+def run(args):
+    # Local-only commands first: no SDK import, no network, no thread
+    if args.health_check:
+        from agents.llm_client import LLMClient
 
+        result = LLMClient.health_check(args.provider, args.model)
+        print(f"\n🔧 LLM Health Check:\nProvider: {result['provider']}\nModel: {result['model']}\nStatus: {result['status']}\nMessage: {result['message']}")
+        return
 
+    if args.dry_run:
+        if not args.file:
+            print("[ERROR] --dry-run needs --file (and --file2 for a comparison).")
+            return 1
 
+        from services.planner import PlannerService
 
+        if args.file2:
+            plan = PlannerService.plan_comparison(args.file, args.file2, args.style, args.provider, args.model)
+        else:
+            plan = PlannerService.plan_summary(args.file, args.style, args.provider, args.model)
+        print(f"\n🧮 Dry run ({plan['kind']}, nothing was sent to the LLM):\n")
+        builtins.print(PlannerService.format_plan(plan))
+        return
 
-
-    args = parser.parse_args()
-
-    tools = AssistantRegistrar.register_tools()
-    assistant_id = AssistantRegistrar.get_or_create_assistant(Config.OPENAI_MODEL, tools)
-    executor = ThreadExecutor(assistant_id, provider=args.provider, model=args.model)
-
-    # Build message
-    if args.message:
-        message = args.message
-
-    elif args.file and args.file2:
-        message = f"Compare these two papers: {args.file} and {args.file2} [style={args.style}]"
-
-    elif args.file:
-        message = f"Summarize this paper: {args.file} [style={args.style}]"
-
-    else:
-        message = "Summarize this paper: sample_papers/sample_test_paper.pdf"
-    
-    if args.health_check:
-        result = LLMClient.health_check(args.provider, args.model)
-        print(f"\n🔧 LLM Health Check:\nProvider: {result['provider']}\nModel: {result['model']}\nStatus: {result['status']}\nMessage: {result['message']}")
-        exit()
-    
     # if args.explain_term:
     #     term = args.explain_term.strip()
     #     paper = Paper.from_pdf(args.file)
-        
+
     #     from services.explainer import TermExplainer
     #     result = TermExplainer.explain_term(term, paper.raw_text)
 
@@ -231,12 +108,14 @@ if __name__ == "__main__":
     #     print(f"🔍 Source: {result['source']}")
     #     sys.exit(0)
 
-
-
     if args.search_author and args.folder:
-        from services.author_search import AuthorSearch
+        from services.daemon import DaemonClient
 
-        results = AuthorSearch.search_by_author(args.search_author, args.folder)
+        if DaemonClient.available():
+            results = DaemonClient().call("search_by_author", name=args.search_author, folder=args.folder)
+        else:
+            from services.author_search import AuthorSearch
+            results = AuthorSearch.search_by_author(args.search_author, args.folder)
 
         if not results:
             print(f"No papers found for author: {args.search_author}")
@@ -244,13 +123,18 @@ if __name__ == "__main__":
             print(f"\n📚 Found {len(results)} papers by '{args.search_author}':\n")
             for r in results:
                 print(f"📄 {r['title']}")
-                print(f"👥 Authors: {', '.join(r['authors'])}")
+                print(f"👥 Authors: {', '.join(r.get('authors', []))}")
                 print(f"📁 Path: {r['path']}\n")
+        return
 
-        exit()
-    
     if args.search_title:
-        results = SearchService.search_by_title(args.search_title)
+        from services.daemon import DaemonClient
+
+        if DaemonClient.available():
+            results = DaemonClient().call("search_by_title", query=args.search_title)
+        else:
+            from services.search_service import SearchService
+            results = SearchService.search_by_title(args.search_title)
 
         if not results:
             print(f"\n⚠️  No matching titles found for: '{args.search_title}'")
@@ -259,13 +143,11 @@ if __name__ == "__main__":
             for i, result in enumerate(results, 1):
                 print(f"[{i}] {result['title']} — {', '.join(result['authors'])}")
                 print(f"     [score: {result['score']}]  📄 {result['path']}\n")
+        return
 
-        exit(0)
-
-
-    
     #Experimental feature to analyze figures and tables
     # if args.file and args.highlight_figures:
+    #     from tools.prototype_figure_analyzer import FigureAnalyzer
 
     #     print(f"\n🔎 Analyzing figures in: {args.file}")
     #     analyzer = FigureAnalyzer(args.file)
@@ -281,15 +163,50 @@ if __name__ == "__main__":
     #             print()
     #     exit()
 
+    # Build message
+    if args.message:
+        message = args.message
 
+    elif args.file and args.file2:
+        message = f"Compare these two papers: {args.file} and {args.file2} [style={args.style}]"
+
+    elif args.file:
+        message = f"Summarize this paper: {args.file} [style={args.style}]"
+
+    else:
+        message = "Summarize this paper: sample_papers/sample_test_paper.pdf"
+
+    from tools.usage_ledger import UsageLedger
+    UsageLedger.install()
 
-    # Run assistant thread
-    executor.send_message(message)
-    run = executor.run()
-    executor.wait_for_completion(run.id)
-    response = executor.get_final_response()
+    # Run the agent
+    if args.runtime == "local":
+        from agents.local_agent import LocalAgent
+
+        response = LocalAgent(provider=args.provider, model=args.model).run(message)
+    else:
+        from agents.agent_runner import AssistantRegistrar
+        from agents.thread_executor import ThreadExecutor
+
+        tools = AssistantRegistrar.register_tools()
+        assistant_id = AssistantRegistrar.get_or_create_assistant(Config.OPENAI_MODEL, tools)
+        executor = ThreadExecutor(assistant_id, provider=args.provider, model=args.model)
+
+        executor.send_message(message)
+        executor.run_until_complete()
+        response = executor.get_final_response()
+
+        timings = executor.timings
+        print(
+            f"\n⏱ Run: {timings['total']:.2f}s total — queued {timings['queued']:.2f}s, "
+            f"in progress {timings['in_progress']:.2f}s, tools {timings['tool']:.2f}s "
+            f"({timings['tool_rounds']} rounds)"
+        )
 
     print("\n🧠 Assistant Reply:\n")
     print(response)
 
 
+# CLI Entry Point
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,183 @@
+import openai
+import time
+from infra.config import Config
+from rich import print
+
+
+class ThreadExecutor:
+    TERMINAL_FAILURES = {"failed", "cancelled", "expired", "incomplete"}
+
+    def __init__(self, assistant_id: str, provider: str = None, model: str = None):
+        self.provider = provider
+        self.model = model
+        self.assistant_id = assistant_id
+        self.thread = openai.beta.threads.create()
+        openai.api_key = Config.OPENAI_API_KEY
+        self._reset_timings()
+
+    def send_message(self, message: str):
+        openai.beta.threads.messages.create(
+            thread_id=self.thread.id,
+            role="user",
+            content=message
+        )
+
+    def run(self):
+        return openai.beta.threads.runs.create(
+            thread_id=self.thread.id,
+            assistant_id=self.assistant_id,
+        )
+
+    def run_until_complete(self):
+        """
+        Starts a run and blocks until it completes, servicing any number of tool-action rounds.
+
+        Uses the streaming run-events API so status changes arrive as they happen; if streaming
+        is unavailable it falls back to `run()` + `wait_for_completion()` (adaptive polling).
+        Per-phase timings are recorded in `self.timings`.
+        """
+        self._reset_timings()
+        try:
+            stream = openai.beta.threads.runs.create(
+                thread_id=self.thread.id,
+                assistant_id=self.assistant_id,
+                stream=True,
+            )
+        except Exception as e:
+            print(f"[WARN] Run streaming unavailable, falling back to polling: {e}")
+            run = self.run()
+            return self.wait_for_completion(run.id)
+
+        while True:
+            run = None
+            for event in stream:
+                data = getattr(event, "data", None)
+                status = getattr(data, "status", None)
+                if getattr(data, "object", None) != "thread.run" or status is None:
+                    continue  # message/step deltas
+
+                self._enter_status(status)
+                run = data
+
+                if status in {"completed", "requires_action"} or status in self.TERMINAL_FAILURES:
+                    break
+            stream.close()
+
+            if run is None:
+                raise Exception("[ERROR] Run stream ended without a run status")
+
+            if run.status == "completed":
+                self._finish_timings()
+                return run
+
+            if run.status != "requires_action":
+                raise Exception(f"[ERROR] Unexpected run status: {run.status}")
+
+            outputs = self._collect_tool_outputs(run)
+            self._enter_status("in_progress")
+            stream = openai.beta.threads.runs.submit_tool_outputs(
+                thread_id=self.thread.id,
+                run_id=run.id,
+                tool_outputs=outputs,
+                stream=True,
+            )
+
+    def wait_for_completion(self, run_id: str):
+        """
+        Polls a run until it completes, with adaptive backoff: the interval starts at
+        Config.RUN_POLL_MIN_INTERVAL and grows to Config.RUN_POLL_MAX_INTERVAL while the
+        status is unchanged, resetting whenever the run makes progress.
+
+        Every requires_action round is serviced (runs may ask for tools several times).
+        """
+        delay = Config.RUN_POLL_MIN_INTERVAL
+        handled_calls = set()
+        last_status = None
+
+        while True:
+            run = openai.beta.threads.runs.retrieve(thread_id=self.thread.id, run_id=run_id)
+            self._enter_status(run.status)
+
+            if run.status != last_status:
+                delay = Config.RUN_POLL_MIN_INTERVAL
+                last_status = run.status
+
+            if run.status == "completed":
+                self._finish_timings()
+                return run
+
+            elif run.status == "requires_action":
+                call_ids = frozenset(call.id for call in run.required_action.submit_tool_outputs.tool_calls)
+
+                # The status can lag behind our submission; only service new tool calls
+                if call_ids not in handled_calls:
+                    handled_calls.add(call_ids)
+                    self.handle_tool_calls(run)
+                    self._enter_status("in_progress")
+                    delay = Config.RUN_POLL_MIN_INTERVAL
+                    continue
+
+            elif run.status not in {"queued", "in_progress"}:
+                raise Exception(f"[ERROR] Unexpected run status: {run.status}")
+
+            time.sleep(delay)
+            delay = min(delay * 2, Config.RUN_POLL_MAX_INTERVAL)
+
+    def _reset_timings(self):
+        self.timings = {"queued": 0.0, "in_progress": 0.0, "tool": 0.0, "tool_rounds": 0, "total": 0.0}
+        self._run_started = time.monotonic()
+        self._status = None
+        self._status_since = self._run_started
+
+    def _enter_status(self, status: str):
+        """
+        Attributes the time since the last status change to the phase the run was in.
+        """
+        if status == self._status:
+            return
+
+        now = time.monotonic()
+        if self._status in self.timings:
+            self.timings[self._status] += now - self._status_since
+
+        self._status = status
+        self._status_since = now
+
+    def _finish_timings(self):
+        self._enter_status("completed")
+        self.timings["total"] = time.monotonic() - self._run_started
+
+    def handle_tool_calls(self, run):
+        outputs = self._collect_tool_outputs(run)
+
+        openai.beta.threads.runs.submit_tool_outputs(
+            thread_id=self.thread.id,
+            run_id=run.id,
+            tool_outputs=outputs
+        )
+
+    def _collect_tool_outputs(self, run) -> list:
+        from agents.tool_registry import ToolContext, default_registry
+        from utils.message_utils import extract_style_from_messages
+
+        # Time spent executing tools locally is tracked separately from the run's server phases
+        self._enter_status("tool")
+        self.timings["tool_rounds"] += 1
+
+        tool_calls = run.required_action.submit_tool_outputs.tool_calls
+        context = ToolContext(
+            provider=self.provider,
+            model=self.model,
+            style_resolver=lambda: extract_style_from_messages(self.thread.id)
+        )
+        return default_registry.dispatch_all(
+            [{"id": call.id, "name": call.function.name, "arguments": call.function.arguments} for call in tool_calls],
+            context
+        )
+
+    def get_final_response(self):
+        messages = openai.beta.threads.messages.list(thread_id=self.thread.id)
+        for msg in reversed(messages.data):
+            if msg.role == "assistant":
+                return msg.content[0].text.value
+        return None
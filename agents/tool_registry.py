@@ -0,0 +1,256 @@
+import copy
+import json
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional
+from rich import print
+
+
+class ToolContext:
+    """
+    Per-conversation state handed to every tool handler.
+
+    Args:
+        provider (str, optional): LLM provider for services invoked by tools.
+        model (str, optional): Model for services invoked by tools.
+        style_resolver (Callable[[], str], optional): Lazily resolves the conversation's
+            default style (e.g. from a [style=...] tag) when a tool call omits it.
+        cancel_event (threading.Event, optional): Set when the call should stop (e.g. it
+            timed out); handlers pass it on to the services they run.
+    """
+
+    def __init__(self, provider: Optional[str] = None, model: Optional[str] = None, style_resolver: Optional[Callable[[], str]] = None, stream_output: bool = True, cancel_event: Optional[threading.Event] = None):
+        self.provider = provider
+        self.model = model
+        self.stream_output = stream_output  # Disabled when tools run concurrently so output does not interleave
+        self.cancel_event = cancel_event
+        self._style_resolver = style_resolver
+
+    def for_call(self, cancel_event: threading.Event) -> "ToolContext":
+        """
+        A copy of this context for one tool call, with its own cancel event.
+        """
+        context = copy.copy(self)
+        context.cancel_event = cancel_event
+        return context
+
+    def resolve_style(self, args: dict) -> str:
+        if args.get("style"):
+            return args["style"]
+        if self._style_resolver:
+            return self._style_resolver()
+        return "default"
+
+
+class ToolRegistry:
+    """
+    Maps tool names (as registered with the assistant) to Python handlers.
+
+    Handlers take (args: dict, context: ToolContext) and return the tool output string.
+    """
+
+    def __init__(self):
+        self._handlers: Dict[str, Callable[[dict, ToolContext], str]] = {}
+
+    def register(self, name: str) -> Callable:
+        def decorator(handler: Callable[[dict, ToolContext], str]):
+            self._handlers[name] = handler
+            return handler
+        return decorator
+
+    def names(self) -> list:
+        return list(self._handlers)
+
+    def dispatch(self, name: str, arguments, context: Optional[ToolContext] = None) -> str:
+        """
+        Runs the handler registered for `name`.
+
+        Args:
+            name (str): Tool name from the model's tool call.
+            arguments (str | dict): JSON-encoded (or already decoded) tool arguments.
+            context (ToolContext, optional): Conversation state for the handler.
+
+        Returns:
+            str: The tool output to send back to the model.
+        """
+        handler = self._handlers.get(name)
+        if handler is None:
+            return f"Unknown tool '{name}'."
+
+        from infra.tracing import span
+
+        args = json.loads(arguments or "{}") if isinstance(arguments, str) else dict(arguments or {})
+        with span("tool", tool=name):
+            return handler(args, context or ToolContext())
+
+    def dispatch_all(self, tool_calls: List[dict], context: Optional[ToolContext] = None, max_workers: Optional[int] = None, timeout: Optional[float] = None) -> List[dict]:
+        """
+        Runs all tool calls of one model step concurrently on a bounded thread pool.
+
+        Each call is isolated: an exception or a timeout becomes that call's output
+        instead of failing the whole step. A call's timeout starts when a worker picks it up;
+        on timeout its context's cancel event is set so the handler stops making LLM calls.
+
+        Args:
+            tool_calls (List[dict]): [{"id": str, "name": str, "arguments": str | dict}]
+            context (ToolContext, optional): Conversation state for the handlers.
+            max_workers (int, optional): Pool size. Defaults to Config.TOOL_MAX_WORKERS.
+            timeout (float, optional): Seconds per call. Defaults to Config.TOOL_CALL_TIMEOUT.
+
+        Returns:
+            List[dict]: [{"tool_call_id": str, "output": str}] in the same order as `tool_calls`.
+        """
+        from infra.config import Config
+
+        context = context or ToolContext()
+        max_workers = max_workers or Config.TOOL_MAX_WORKERS
+        timeout = timeout if timeout is not None else Config.TOOL_CALL_TIMEOUT
+
+        if len(tool_calls) > 1:
+            context.stream_output = False
+
+        outputs: Dict[str, str] = {}
+        started: Dict[str, float] = {}
+        cancel_events = {call["id"]: threading.Event() for call in tool_calls}
+
+        def run_call(call: dict) -> str:
+            started[call["id"]] = time.monotonic()
+            return self.dispatch(call["name"], call["arguments"], context.for_call(cancel_events[call["id"]]))
+
+        pool = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(tool_calls) or 1)))
+        try:
+            pending = {pool.submit(run_call, call): call for call in tool_calls}
+
+            while pending:
+                done, _ = wait(pending, timeout=0.05, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    call = pending.pop(future)
+                    try:
+                        outputs[call["id"]] = future.result()
+                    except Exception as e:
+                        print(f"[ERROR] Tool '{call['name']}' failed: {e}")
+                        outputs[call["id"]] = f"Tool '{call['name']}' failed: {e}"
+
+                now = time.monotonic()
+                for future, call in list(pending.items()):
+                    began = started.get(call["id"])
+                    if timeout and began is not None and now - began > timeout:
+                        print(f"[ERROR] Tool '{call['name']}' timed out after {timeout:.0f}s")
+                        outputs[call["id"]] = f"Tool '{call['name']}' timed out after {timeout:.0f}s."
+                        cancel_events[call["id"]].set()
+                        pending.pop(future)
+        finally:
+            # Timed-out calls wind down in the background once they see their cancel event
+            for event in cancel_events.values():
+                event.set()
+            pool.shutdown(wait=False, cancel_futures=True)
+
+        return [{"tool_call_id": call["id"], "output": outputs[call["id"]]} for call in tool_calls]
+
+
+default_registry = ToolRegistry()
+
+
+def _print_token(text: str):
+    # Plain stdout so streamed fragments are not re-parsed by rich markup
+    import sys
+    sys.stdout.write(text)
+    sys.stdout.flush()
+
+
+def _print_usage(result: dict):
+    from infra.config import Config
+
+    usage = result.get("total_usage", {})
+    total_tokens = usage.get("total_tokens", 0)
+    cost = result.get("cost", 0.0)
+
+    print(f"📊 Token Usage: {total_tokens} tokens")
+    print(f"💸 Estimated Cost ({Config.OPENAI_MODEL}): ${cost:.6f}")
+
+
+@default_registry.register("summarize_pdf")
+def summarize_pdf(args: dict, context: ToolContext) -> str:
+    from services.summarizer import SummarizerService
+    from tools.cache_manager import CacheManager
+
+    path = args["path"]
+    # Extract optional style from message if included like: [style=layman]
+    style = context.resolve_style(args)
+    sections = args.get("sections") or None
+    cache_key = CacheManager.style_key(style, sections)
+
+    print(f"\n📄 Summarizing file: {path}" + (f" (sections: {', '.join(sections)})" if sections else ""))
+    file_hash = CacheManager.get_file_hash(path)
+
+    # 🔍 Check cache
+    if CacheManager.is_cached(file_hash, cache_key):
+        print("✅ Loaded summary from cache!")
+        result = CacheManager.load_cached_summary(file_hash, cache_key)
+    else:
+        if context.stream_output:
+            print("\n📑 Summary (streaming):\n")
+        result = SummarizerService.summarize_paper(path, style, provider=context.provider, model=context.model, on_token=_print_token if context.stream_output else None, cancel_event=context.cancel_event, sections=sections)
+        print()
+
+        # 💾 Save to cache (partial or failed summaries are not cached)
+        if SummarizerService.is_complete(result):
+            CacheManager.save_summary(file_hash, cache_key, result)
+            print("💾 Summary saved to cache.")
+        elif result.get("error"):
+            print(f"[ERROR] Summary incomplete, not cached: {result['error']}")
+
+    _print_usage(result)
+    return result["final_summary"]
+
+
+@default_registry.register("compare_papers")
+def compare_papers(args: dict, context: ToolContext) -> str:
+    from services.summarizer import SummarizerService
+    from tools.cache_manager import CacheManager
+
+    path1 = args["file_path_1"]
+    path2 = args["file_path_2"]
+    style = context.resolve_style(args)
+    sections = args.get("sections") or None
+    cache_key = CacheManager.style_key(style, sections)
+
+    print(f"\n Comparing files:\n- {path1}\n- {path2}" + (f"\n(sections: {', '.join(sections)})" if sections else ""))
+    combined_key = CacheManager.get_combined_hash(path1, path2)
+
+    # Check cache
+    if CacheManager.is_cached(combined_key, cache_key):
+        print("Loaded comparison from cache!")
+        result = CacheManager.load_cached_summary(combined_key, cache_key)
+    else:
+        if context.stream_output:
+            print("\n📊 Comparison (streaming):\n")
+        result = SummarizerService.compare_papers(path1, path2, style, provider=context.provider, model=context.model, on_token=_print_token if context.stream_output else None, cancel_event=context.cancel_event, sections=sections)
+        print()
+        if SummarizerService.is_complete(result):
+            CacheManager.save_summary(combined_key, cache_key, result)
+            print("Comparison saved to cache.")
+        elif result.get("error"):
+            print(f"[ERROR] Comparison incomplete, not cached: {result['error']}")
+
+    _print_usage(result)
+    return result["comparison"]
+
+
+@default_registry.register("search_by_author")
+def search_by_author(args: dict, context: ToolContext) -> str:
+    from services.author_search import AuthorSearch
+
+    name = args["name"]
+    folder = args["folder"]
+
+    results = AuthorSearch.search_by_author(name, folder)
+    if not results:
+        return f"No papers found for author '{name}'."
+
+    output = f"📚 Found {len(results)} papers by '{name}':\n\n"
+    for r in results:
+        output += f"📄 {r['title']}\n👥 {', '.join(r.get('authors', []))}\n📁 {r['path']}\n\n"
+    return output
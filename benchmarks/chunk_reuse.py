@@ -0,0 +1,136 @@
+import argparse
+import json
+import os
+import random
+import sys
+from typing import Dict, List
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.corpus import SECTIONS, _paragraph, _sentence
+
+# Revisions as arXiv authors make them: each edit is applied at a random place in the paper
+EDITS = ("insert_paragraph", "delete_paragraph", "edit_sentence", "append_paragraph", "mixed")
+
+
+def generate_document(rng: random.Random, paragraphs: int = 60) -> str:
+    """
+    Plain-text paper: numbered section headings, each followed by several paragraphs.
+    """
+    per_section = max(1, paragraphs // len(SECTIONS))
+    blocks = []
+    for number, section in enumerate(SECTIONS, start=1):
+        blocks.append(f"{number} {section}")
+        blocks += [_paragraph(rng) for _ in range(per_section)]
+    return "\n\n".join(blocks)
+
+
+def edit_document(text: str, edit: str, rng: random.Random) -> str:
+    """
+    Returns a revised copy of `text` with one edit of kind `edit` (three random ones for "mixed").
+    """
+    if edit == "mixed":
+        for kind in rng.sample(EDITS[:-1], 3):
+            text = edit_document(text, kind, rng)
+        return text
+
+    blocks = text.split("\n\n")
+    position = rng.randrange(1, len(blocks))
+    if edit == "insert_paragraph":
+        blocks.insert(position, _paragraph(rng))
+    elif edit == "delete_paragraph":
+        del blocks[position]
+    elif edit == "edit_sentence":
+        sentences = blocks[position].split(". ")
+        sentences[rng.randrange(len(sentences))] = _sentence(rng).rstrip(".")
+        blocks[position] = ". ".join(sentences)
+    elif edit == "append_paragraph":
+        blocks.append(_paragraph(rng))
+    else:
+        raise ValueError(f"Unknown edit: {edit}")
+    return "\n\n".join(blocks)
+
+
+def reuse_ratio(before: List, after: List) -> Dict[str, float]:
+    """
+    Share of the revised version's chunks (and of their tokens) whose exact text was already a chunk before,
+    i.e. whose cached compression is reused.
+    """
+    seen = {chunk.text for chunk in before}
+    reused = [chunk for chunk in after if chunk.text in seen]
+    tokens = sum(chunk.token_count for chunk in after)
+    return {
+        "chunks_reused": round(len(reused) / len(after), 3) if after else 0.0,
+        "tokens_reused": round(sum(chunk.token_count for chunk in reused) / tokens, 3) if tokens else 0.0,
+    }
+
+
+def run(documents: int = 20, paragraphs: int = 60, max_tokens: int = 500, seed: int = 0) -> dict:
+    """
+    Chunks each synthetic document and a revision of it for every edit kind, in every chunking
+    mode, and reports the average reuse ratio per mode and edit.
+
+    Returns:
+        dict: {"meta": {...}, "modes": {mode: {edit: {"chunks_reused", "tokens_reused", "chunks"}} or {"error": str}}}
+    """
+    from tools.text_chunker import TextChunker
+
+    rng = random.Random(seed)
+    pairs = []
+    for _ in range(documents):
+        original = generate_document(rng, paragraphs)
+        pairs += [(edit, original, edit_document(original, edit, rng)) for edit in EDITS]
+
+    modes: Dict[str, dict] = {}
+    for mode in ("fixed", "structure", "content"):
+        results: Dict[str, List[dict]] = {edit: [] for edit in EDITS}
+        chunk_counts: List[int] = []
+        for edit, original, revised in pairs:
+            before = TextChunker.chunk_text(original, max_tokens, mode=mode)
+            after = TextChunker.chunk_text(revised, max_tokens, mode=mode)
+            if not before or not after:
+                break
+            results[edit].append(reuse_ratio(before, after))
+            chunk_counts.append(len(before))
+        else:
+            modes[mode] = {
+                edit: {
+                    "chunks_reused": round(sum(r["chunks_reused"] for r in ratios) / len(ratios), 3),
+                    "tokens_reused": round(sum(r["tokens_reused"] for r in ratios) / len(ratios), 3),
+                    "chunks": round(sum(chunk_counts) / len(chunk_counts), 1),
+                }
+                for edit, ratios in results.items()
+            }
+            continue
+        modes[mode] = {"error": "chunking produced no chunks (tokenizer unavailable?)"}
+
+    return {
+        "meta": {"documents": documents, "paragraphs": paragraphs, "max_tokens": max_tokens, "seed": seed},
+        "modes": modes,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure how many chunks of a revised paper are unchanged, per chunking mode.")
+    parser.add_argument("--documents", type=int, default=20, help="Synthetic documents (each revised once per edit kind)")
+    parser.add_argument("--paragraphs", type=int, default=60, help="Paragraphs per document")
+    parser.add_argument("--max-tokens", type=int, default=500, help="Maximum tokens per chunk")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=str, help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    report = run(args.documents, args.paragraphs, args.max_tokens, args.seed)
+
+    for mode, results in report["modes"].items():
+        if "error" in results:
+            print(f"[SKIP] {mode}: {results['error']}")
+            continue
+        print(f"\n♻️  {mode} chunking")
+        for edit, result in results.items():
+            print(f"   {edit:<18} {result['chunks_reused']:>6.1%} of chunks, {result['tokens_reused']:>6.1%} of tokens reused")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
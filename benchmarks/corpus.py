@@ -0,0 +1,188 @@
+import argparse
+import os
+import random
+import textwrap
+from typing import List
+
+# Synthetic research-style PDFs for benchmarks: title block, abstract, numbered sections,
+# one or two text columns, figures with captions, running header/footer with page numbers.
+
+PAGE_WIDTH, PAGE_HEIGHT = 595, 842  # A4 in points
+MARGIN = 56
+FONT_SIZE = 9
+LINE_HEIGHT = 11.5
+COLUMN_GAP = 18
+
+SECTIONS = ["Introduction", "Related Work", "Method", "Experiments", "Results", "Discussion", "Conclusion"]
+
+VOCABULARY = (
+    "model models learning neural network networks training data dataset datasets attention transformer "
+    "encoder decoder layer layers representation representations benchmark benchmarks accuracy performance "
+    "baseline baselines method approach propose proposed results evaluation evaluate loss gradient optimization "
+    "parameters inference latency throughput memory efficient scalable robust generalization task tasks "
+    "language vision graph reinforcement policy reward agent embedding embeddings retrieval generation "
+    "pretraining fine-tuning supervised unsupervised contrastive objective architecture analysis ablation "
+    "significant improvement state-of-the-art empirical theoretical framework pipeline sampling distribution"
+).split()
+
+FIRST_NAMES = ["Ada", "Alan", "Grace", "Claude", "Barbara", "Donald", "Edsger", "Frances", "John", "Margaret", "Tim", "Yoshua"]
+LAST_NAMES = ["Lovelace", "Turing", "Hopper", "Shannon", "Liskov", "Knuth", "Dijkstra", "Allen", "McCarthy", "Hamilton", "Lee", "Bengio"]
+
+
+def _sentence(rng: random.Random) -> str:
+    words = [rng.choice(VOCABULARY) for _ in range(rng.randint(10, 24))]
+    return " ".join(words).capitalize() + "."
+
+
+def _paragraph(rng: random.Random) -> str:
+    return " ".join(_sentence(rng) for _ in range(rng.randint(3, 7)))
+
+
+class _Layout:
+    """
+    Flows wrapped lines into columns and pages, reserving space for figures.
+    """
+
+    def __init__(self, doc, title: str, columns: int, max_pages: int):
+        self.doc = doc
+        self.title = title
+        self.columns = columns
+        self.max_pages = max_pages
+        self.column_width = (PAGE_WIDTH - 2 * MARGIN - (columns - 1) * COLUMN_GAP) / columns
+        self.chars_per_line = int(self.column_width / (FONT_SIZE * 0.5))
+        self.page = None
+        self.column = 0
+        self.y = 0.0
+        self.top = MARGIN + 20
+        self.full = False
+        self.new_page()
+
+    def new_page(self):
+        if len(self.doc) >= self.max_pages:
+            self.full = True
+            return
+        self.page = self.doc.new_page(width=PAGE_WIDTH, height=PAGE_HEIGHT)
+        number = len(self.doc)
+        # Running header/footer, repeated on every page like real papers
+        self.page.insert_text((MARGIN, MARGIN - 18), self.title[:90], fontsize=7)
+        self.page.insert_text((PAGE_WIDTH / 2 - 10, PAGE_HEIGHT - MARGIN + 24), f"Page {number}", fontsize=7)
+        self.column = 0
+        self.top = MARGIN
+        self.y = self.top
+
+    def _x(self) -> float:
+        return MARGIN + self.column * (self.column_width + COLUMN_GAP)
+
+    def _advance(self, height: float) -> bool:
+        if self.y + height <= PAGE_HEIGHT - MARGIN:
+            return True
+        if self.column + 1 < self.columns:
+            self.column += 1
+            self.y = self.top
+        else:
+            self.new_page()
+        return not self.full
+
+    def line(self, text: str, fontsize: float = FONT_SIZE):
+        if not self._advance(LINE_HEIGHT):
+            return
+        self.page.insert_text((self._x(), self.y + fontsize), text, fontsize=fontsize)
+        self.y += LINE_HEIGHT
+
+    def paragraph(self, text: str):
+        for wrapped in textwrap.wrap(text, self.chars_per_line):
+            self.line(wrapped)
+        self.y += LINE_HEIGHT / 2
+
+    def full_width(self, text: str, fontsize: float):
+        # Title block spans all columns on the first page
+        chars = int((PAGE_WIDTH - 2 * MARGIN) / (fontsize * 0.5))
+        for wrapped in textwrap.wrap(text, chars):
+            self.page.insert_text((MARGIN, self.y + fontsize), wrapped, fontsize=fontsize)
+            self.y += fontsize * 1.3
+        self.top = self.y + LINE_HEIGHT
+        self.y = self.top
+
+    def figure(self, number: int, caption: str):
+        import fitz
+
+        height = 90
+        if not self._advance(height + 3 * LINE_HEIGHT):
+            return
+        x = self._x()
+        rect = fitz.Rect(x, self.y, x + self.column_width, self.y + height)
+        self.page.draw_rect(rect, color=(0.2, 0.2, 0.2), fill=(0.85, 0.88, 0.95))
+        self.y += height + 4
+        self.paragraph(f"Figure {number}: {caption}")
+
+
+def generate_paper(path: str, pages: int = 8, columns: int = 2, figures_per_page: float = 0.5, seed: int = 0) -> dict:
+    """
+    Writes one synthetic research paper PDF.
+
+    Args:
+        path (str): Output PDF path.
+        pages (int): Number of pages to fill.
+        columns (int): Text columns per page (1 or 2).
+        figures_per_page (float): Average number of figures per page.
+        seed (int): Seed for deterministic content.
+
+    Returns:
+        dict: {"path": str, "title": str, "authors": List[str], "pages": int, "figures": int}
+    """
+    import fitz
+
+    rng = random.Random(seed)
+    title = " ".join(rng.choice(VOCABULARY) for _ in range(rng.randint(5, 9))).title()
+    authors = [f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}" for _ in range(rng.randint(1, 4))]
+
+    doc = fitz.open()
+    layout = _Layout(doc, title, columns, pages)
+    layout.full_width(title, 16)
+    layout.full_width(", ".join(authors), 10)
+    layout.full_width("Abstract. " + _paragraph(rng), FONT_SIZE)
+
+    figures = 0
+    section = 0
+    while not layout.full:
+        heading = SECTIONS[section % len(SECTIONS)]
+        section += 1
+        layout.y += LINE_HEIGHT / 2
+        layout.line(f"{section} {heading}", fontsize=11)
+
+        for _ in range(rng.randint(3, 6)):
+            layout.paragraph(_paragraph(rng))
+            if layout.full:
+                break
+            if rng.random() < figures_per_page / 4:
+                figures += 1
+                layout.figure(figures, _sentence(rng))
+
+    doc.save(path)
+    doc.close()
+    return {"path": path, "title": title, "authors": authors, "pages": pages, "figures": figures}
+
+
+def generate_corpus(folder: str, count: int = 4, pages: int = 8, columns: int = 2, figures_per_page: float = 0.5, seed: int = 0) -> List[dict]:
+    """
+    Writes `count` synthetic papers to `folder` (see generate_paper). Same arguments, same bytes.
+    """
+    os.makedirs(folder, exist_ok=True)
+    return [
+        generate_paper(os.path.join(folder, f"synthetic_{i:03d}.pdf"), pages, columns, figures_per_page, seed + i)
+        for i in range(count)
+    ]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate synthetic research-style PDFs for benchmarks.")
+    parser.add_argument("folder", type=str, help="Output folder")
+    parser.add_argument("--count", type=int, default=4)
+    parser.add_argument("--pages", type=int, default=8)
+    parser.add_argument("--columns", type=int, choices=[1, 2], default=2)
+    parser.add_argument("--figures", type=float, default=0.5, help="Average figures per page")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    for paper in generate_corpus(args.folder, args.count, args.pages, args.columns, args.figures, args.seed):
+        print(f"📄 {paper['path']} — {paper['pages']} pages, {paper['figures']} figures")
@@ -0,0 +1,131 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# Cold-start scenarios for the CLI entry points.
+# budget_ms: median import cost (excluding interpreter startup) allowed before the check fails.
+# forbidden: modules that must not be imported on this path at all.
+SCENARIOS = {
+    "run_thread_import": {
+        "code": "import agents.run_thread",
+        "budget_ms": 40,
+        "forbidden": ["openai", "pdfplumber", "pdfminer", "tiktoken", "rich", "fitz"],
+    },
+    "search_title": {
+        "code": "from agents.run_thread import main; main(['--search-title', 'deep learning'])",
+        "budget_ms": 60,
+        "forbidden": ["openai", "pdfplumber", "pdfminer", "tiktoken", "rich", "fitz"],
+    },
+    "search_author_cached": {
+        "code": "from agents.run_thread import main; main(['--search-author', 'ryan marinelli', '--folder', '.'])",
+        "budget_ms": 60,
+        "forbidden": ["openai", "pdfplumber", "pdfminer", "tiktoken", "rich"],
+    },
+}
+
+
+def parse_importtime(stderr: str) -> Dict[str, int]:
+    """
+    Parses `-X importtime` output into {module: cumulative_us} for top-level imports.
+    """
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        # Nested imports are indented; only top-level entries add up to the total
+        if name.startswith(" ") and not name.startswith("  "):
+            modules[name.strip()] = int(cumulative)
+    return modules
+
+
+def run_once(code: str) -> Dict[str, int]:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        env={**os.environ, "PYTHONPATH": ROOT},
+    )
+    return parse_importtime(result.stderr)
+
+
+def measure(code: str, repeat: int = 5) -> dict:
+    """
+    Measures the median import cost of `code`, excluding modules the interpreter loads at startup.
+    """
+    startup = set(run_once("pass"))
+    totals: List[float] = []
+    modules: Dict[str, int] = {}
+
+    for _ in range(repeat):
+        modules = {name: us for name, us in run_once(code).items() if name not in startup}
+        totals.append(sum(modules.values()) / 1000)
+
+    slowest = sorted(modules.items(), key=lambda item: item[1], reverse=True)[:10]
+    return {
+        "median_ms": round(statistics.median(totals), 2),
+        "min_ms": round(min(totals), 2),
+        "modules": sorted(modules),
+        "slowest": [{"module": name, "cumulative_ms": round(us / 1000, 2)} for name, us in slowest],
+    }
+
+
+def loaded_modules(code: str) -> List[str]:
+    probe = f"{code}\nimport sys, json\nprint('\\n' + json.dumps(sorted(sys.modules)))"
+    result = subprocess.run(
+        [sys.executable, "-c", probe],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        env={**os.environ, "PYTHONPATH": ROOT},
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def check(scenarios: Dict[str, dict], repeat: int = 5) -> dict:
+    report = {}
+    for name, scenario in scenarios.items():
+        result = measure(scenario["code"], repeat)
+        loaded = loaded_modules(scenario["code"])
+        leaked = sorted({
+            forbidden for forbidden in scenario["forbidden"]
+            if any(m == forbidden or m.startswith(forbidden + ".") for m in loaded)
+        })
+        result.update({
+            "budget_ms": scenario["budget_ms"],
+            "forbidden_loaded": leaked,
+            "ok": result["median_ms"] <= scenario["budget_ms"] and not leaked,
+        })
+        result.pop("modules")
+        report[name] = result
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure CLI cold-start import time against a regression budget.")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per scenario (median is reported).")
+    parser.add_argument("--output", type=str, help="Write the JSON report to this file.")
+    args = parser.parse_args()
+
+    report = check(SCENARIOS, args.repeat)
+
+    for name, result in report.items():
+        status = "OK " if result["ok"] else "FAIL"
+        print(f"[{status}] {name}: {result['median_ms']:.1f} ms (budget {result['budget_ms']} ms)")
+        if result["forbidden_loaded"]:
+            print(f"       heavy modules loaded: {', '.join(result['forbidden_loaded'])}")
+        for entry in result["slowest"][:3]:
+            print(f"       {entry['cumulative_ms']:>7.1f} ms  {entry['module']}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    sys.exit(0 if all(r["ok"] for r in report.values()) else 1)
@@ -0,0 +1,305 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.corpus import generate_corpus
+from infra.config import Config
+
+# The fake LLM answers every request with this JSON, so metadata extraction parses it too
+STUB_RESPONSE = json.dumps({
+    "title": "Synthetic Paper",
+    "authors": ["Ada Lovelace"],
+    "summary": " ".join(["The method improves accuracy on standard benchmarks."] * 12),
+})
+
+
+def _time_runs(fn: Callable[[], int], repeat: int) -> dict:
+    """
+    Runs `fn` `repeat` times; `fn` returns the number of items it processed.
+    """
+    runs: List[float] = []
+    items = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        items = fn()
+        runs.append(time.perf_counter() - started)
+
+    seconds = statistics.median(runs)
+    return {
+        "seconds": round(seconds, 6),
+        "min_seconds": round(min(runs), 6),
+        "items": items,
+        "throughput": round(items / seconds, 2) if seconds > 0 else None,
+    }
+
+
+@contextmanager
+def _isolated(workdir: str, base_url: str):
+    """
+    Points every on-disk store the pipeline writes (summary, chunk and compression caches,
+    paper, dedup and author indexes, usage ledger) and the LLM endpoint at throwaway
+    locations for the run, so benchmarks never touch the user's data.
+    """
+    import domain.paper_index as paper_index
+    import tools.author_cache as author_cache
+    import tools.cache_manager as cache_manager
+    import tools.dedup_index as dedup_index
+    from agents.llm_client import LLMClient
+    from tools.pdf_parser import PDFParser
+    from tools.usage_ledger import UsageLedger
+
+    saved = {
+        "cache_dir": cache_manager.CACHE_DIR,
+        "index_file": paper_index.PAPER_INDEX_FILE,
+        "dedup_file": dedup_index.DEDUP_INDEX_FILE,
+        "author_file": author_cache.CACHE_FILE,
+        "ledger": UsageLedger._installed is not None,
+        "config": {name: getattr(Config, name) for name in ("LLM_PROVIDER", "OPENAI_MODEL", "OPENAI_API_KEY", "OPENAI_BASE_URL", "USAGE_LEDGER_PATH")},
+    }
+    cache_dir = os.path.join(workdir, "cache")
+    cache_manager.CACHE_DIR = cache_dir  # Chunk and compression caches live under it too
+    paper_index.PAPER_INDEX_FILE = os.path.join(cache_dir, "paper_index.json")
+    dedup_index.DEDUP_INDEX_FILE = os.path.join(cache_dir, "dedup_index.json")
+    author_cache.CACHE_FILE = os.path.join(cache_dir, "author_index.json")
+    Config.USAGE_LEDGER_PATH = os.path.join(cache_dir, "usage.db")
+    os.makedirs(cache_dir, exist_ok=True)
+    _reset_store_caches()
+    PDFParser._cache.clear()
+    if saved["ledger"]:
+        UsageLedger.uninstall()
+        UsageLedger.install()
+
+    Config.LLM_PROVIDER = "openai"
+    Config.OPENAI_MODEL = "gpt-3.5-turbo"
+    Config.OPENAI_API_KEY = Config.OPENAI_API_KEY or "benchmark-key"
+    Config.OPENAI_BASE_URL = base_url
+    LLMClient.close_shared()
+    try:
+        yield
+    finally:
+        LLMClient.close_shared()
+        cache_manager.CACHE_DIR = saved["cache_dir"]
+        paper_index.PAPER_INDEX_FILE = saved["index_file"]
+        dedup_index.DEDUP_INDEX_FILE = saved["dedup_file"]
+        author_cache.CACHE_FILE = saved["author_file"]
+        for name, value in saved["config"].items():
+            setattr(Config, name, value)
+        _reset_store_caches()
+        PDFParser._cache.clear()
+        UsageLedger.uninstall()
+        if saved["ledger"]:
+            UsageLedger.install()
+
+
+def _reset_store_caches():
+    """
+    Drops the in-memory copies of the on-disk indexes so they reload from the current paths.
+    """
+    from domain.paper_index import PaperIndex
+    from tools.author_cache import AuthorCache
+    from tools.dedup_index import DedupIndex
+
+    PaperIndex._cache_stamp = None
+    AuthorCache._cache, AuthorCache._cache_stamp = None, None
+    DedupIndex._cache, DedupIndex._buckets, DedupIndex._cache_stamp = None, {}, None
+
+
+def run_stages(papers: List[dict], repeat: int = 3, token_delay: float = 0.0, stages: Optional[List[str]] = None) -> Dict[str, dict]:
+    """
+    Measures every pipeline stage over the corpus.
+
+    Args:
+        papers (List[dict]): Output of benchmarks.corpus.generate_corpus.
+        repeat (int): Runs per stage; the median is reported.
+        token_delay (float): Seconds between streamed tokens from the fake LLM server.
+        stages (List[str], optional): Subset of stage names to run.
+
+    Returns:
+        Dict[str, dict]: {stage: {"seconds", "min_seconds", "items", "unit", "throughput"} or {"error": str}}
+    """
+    from agents.llm_client import LLMClient
+    from tools.stub_llm_server import StubLLMServer
+
+    workdir = tempfile.mkdtemp(prefix="bench_")
+    results: Dict[str, dict] = {}
+    paths = [paper["path"] for paper in papers]
+    state: Dict[str, object] = {}
+
+    def parse() -> int:
+        from tools.pdf_parser import PDFParser
+        state["texts"] = [PDFParser.extract_info(path, cache=False).raw_text for path in paths]
+        return sum(paper["pages"] for paper in papers)
+
+    def tokenize() -> int:
+        from utils.token_counter import TokenCounter
+        return sum(TokenCounter.count_tokens(text) for text in state["texts"])
+
+    def chunk() -> int:
+        from tools.text_chunker import TextChunker
+        chunks = [c for text in state["texts"] for c in TextChunker.chunk_text(text)]
+        if not chunks:
+            raise RuntimeError("chunker produced no chunks")
+        return len(chunks)
+
+    def hashing() -> int:
+        from tools.cache_manager import CacheManager
+        for path in paths:
+            CacheManager.get_file_hash(path)
+        return sum(os.path.getsize(path) for path in paths) // 1024
+
+    def index_insert() -> int:
+        import domain.paper_index as paper_index
+        if os.path.exists(paper_index.PAPER_INDEX_FILE):
+            os.remove(paper_index.PAPER_INDEX_FILE)
+        for i in range(200):
+            paper = papers[i % len(papers)]
+            paper_index.PaperIndex.add_paper(f"{paper['title']} {i}", paper["authors"], paper["path"])
+        return 200
+
+    def index_query() -> int:
+        from services.search_service import SearchService
+        for paper in papers * 25:
+            SearchService.search_by_title(paper["title"])
+        return len(papers) * 25
+
+    def cache_hit() -> int:
+        from tools.cache_manager import CacheManager
+        file_hash = CacheManager.get_file_hash(paths[0])
+        CacheManager.save_summary(file_hash, "bench", {"final_summary": STUB_RESPONSE})
+        for _ in range(100):
+            if CacheManager.is_cached(file_hash, "bench"):
+                CacheManager.load_cached_summary(file_hash, "bench")
+        return 100
+
+    def summarize() -> int:
+        from services.summarizer import SummarizerService
+        llm = LLMClient.shared()
+        for path in paths:
+            result = SummarizerService.summarize_paper(path, "default", llm, on_token=lambda text: None)
+            if not SummarizerService.is_complete(result):
+                raise RuntimeError(f"summary failed for {path}: {result.get('error') or 'incomplete result'}")
+        return len(paths)
+
+    def compare() -> int:
+        from services.summarizer import SummarizerService
+        result = SummarizerService.compare_papers(paths[0], paths[-1], "default", LLMClient.shared())
+        if not SummarizerService.is_complete(result):
+            raise RuntimeError(f"comparison failed: {result.get('error') or 'incomplete result'}")
+        return 1
+
+    plan = [
+        ("parse", parse, "pages"),
+        ("tokenize", tokenize, "tokens"),
+        ("chunk", chunk, "chunks"),
+        ("hash", hashing, "KiB"),
+        ("index_insert", index_insert, "inserts"),
+        ("index_query", index_query, "queries"),
+        ("cache_hit", cache_hit, "lookups"),
+        ("summarize", summarize, "papers"),
+        ("compare", compare, "comparisons"),
+    ]
+
+    try:
+        with StubLLMServer([{"content": STUB_RESPONSE, "token_delay": token_delay}]) as server:
+            with _isolated(workdir, server.base_url):
+                for name, fn, unit in plan:
+                    if stages and name not in stages:
+                        continue
+                    try:
+                        result = _time_runs(fn, repeat)
+                        result["unit"] = unit
+                    except Exception as e:
+                        result = {"error": f"{type(e).__name__}: {e}"}
+                    results[name] = result
+                results["summarize_llm_requests"] = {"items": len(server.requests), "unit": "requests"}
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return results
+
+
+def compare_to_baseline(current: Dict[str, dict], baseline: Dict[str, dict], tolerance: float = 0.2, min_delta: float = 0.005) -> List[str]:
+    """
+    Returns the regressions of `current` against `baseline`: stages that got more than
+    `tolerance` (relative) and `min_delta` seconds (absolute noise floor) slower, or that now fail.
+    """
+    regressions = []
+    for name, before in baseline.items():
+        if "seconds" not in before or name not in current:
+            continue
+        after = current[name]
+        if "error" in after:
+            regressions.append(f"{name}: now fails ({after['error']})")
+            continue
+        delta = after["seconds"] - before["seconds"]
+        if delta > min_delta and after["seconds"] > before["seconds"] * (1 + tolerance):
+            regressions.append(f"{name}: {before['seconds'] * 1000:.1f} ms -> {after['seconds'] * 1000:.1f} ms (+{delta / before['seconds']:.0%})")
+    return regressions
+
+
+def run(count: int = 4, pages: int = 8, columns: int = 2, figures: float = 0.5, repeat: int = 3, token_delay: float = 0.0, stages: Optional[List[str]] = None) -> dict:
+    corpus_dir = tempfile.mkdtemp(prefix="bench_corpus_")
+    try:
+        papers = generate_corpus(corpus_dir, count, pages, columns, figures)
+        return {
+            "meta": {
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "corpus": {"count": count, "pages": pages, "columns": columns, "figures_per_page": figures},
+                "repeat": repeat,
+                "token_delay": token_delay,
+            },
+            "stages": run_stages(papers, repeat, token_delay, stages),
+        }
+    finally:
+        shutil.rmtree(corpus_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the paper pipeline on a synthetic corpus against a local fake LLM server.")
+    parser.add_argument("--count", type=int, default=4, help="Papers in the synthetic corpus")
+    parser.add_argument("--pages", type=int, default=8, help="Pages per paper")
+    parser.add_argument("--columns", type=int, choices=[1, 2], default=2)
+    parser.add_argument("--figures", type=float, default=0.5, help="Average figures per page")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per stage (median is reported)")
+    parser.add_argument("--token-delay", type=float, default=0.0, help="Seconds between streamed tokens from the fake LLM")
+    parser.add_argument("--stages", type=str, help="Comma-separated subset of stages")
+    parser.add_argument("--output", type=str, help="Write the JSON report to this file")
+    parser.add_argument("--baseline", type=str, help="Fail if any stage regressed against this JSON report")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative slowdown against the baseline")
+    args = parser.parse_args()
+
+    report = run(args.count, args.pages, args.columns, args.figures, args.repeat, args.token_delay, args.stages.split(",") if args.stages else None)
+
+    for name, result in report["stages"].items():
+        if "error" in result:
+            print(f"[SKIP] {name}: {result['error']}")
+        elif "seconds" in result:
+            print(f"[ OK ] {name}: {result['seconds'] * 1000:.1f} ms ({result['throughput']} {result['unit']}/s)")
+        else:
+            print(f"[INFO] {name}: {result['items']} {result['unit']}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+        regressions = compare_to_baseline(report["stages"], baseline["stages"], args.tolerance)
+        for regression in regressions:
+            print(f"[FAIL] {regression}")
+        sys.exit(1 if regressions else 0)
@@ -1,23 +1,31 @@
 from tools.pdf_parser import PDFParser
+from domain.section_index import SectionIndex
 from domain.text_chunk import Chunk
 from typing import Optional, List
 from tools.text_chunker import TextChunker
-from services.metadata_extractor import extract_metadata_with_llm
 
 
 class Paper:
-    def __init__(self, title: str, authors: list[str], source: str, raw_text: str):
+    def __init__(self, title: str, authors: list[str], source: str, raw_text: str, metadata_usage: Optional[dict] = None, normalization: Optional[dict] = None, page_starts: Optional[list] = None, figure_references: Optional[dict] = None, captions: Optional[dict] = None):
         self._title = title
         self._authors = authors
         self._source = source
         self._raw_text = raw_text
+        self._metadata_usage = metadata_usage or {}
+        self._normalization = normalization or {}
+        self._page_starts = page_starts or []
+        self._figure_references = figure_references or {}
+        self._captions = captions or {}
         self._chunks: Optional[List[Chunk]] = []
+        self._section_index: List[dict] = []
     
     @classmethod
-    def from_pdf(cls, pdf_path: str, metadata: dict = None) -> Optional["Paper"]:
-        parsed_file = PDFParser.extract_info(pdf_path)
+    def from_pdf(cls, pdf_path: str, metadata: dict = None, parsed=None) -> Optional["Paper"]:
+        # `parsed` lets a caller that already extracted the PDF (e.g. for near-duplicate lookup) skip a second parse
+        parsed_file = parsed or PDFParser.extract_info(pdf_path)
         raw_text = parsed_file.raw_text
 
+        metadata_usage = None
         if metadata:
             title = metadata.get("title", "")
             authors = metadata.get("authors", [])
@@ -25,13 +33,17 @@ class Paper:
             from utils.token_counter import TokenCounter
             from services.metadata_extractor import extract_metadata_with_llm
 
-            metadata_chunk = TokenCounter.get_token_chunk(raw_text, token_limit=800)
-            metadata = extract_metadata_with_llm(metadata_chunk)
+            from infra.tracing import span
+
+            with span("extract_metadata"):
+                metadata_chunk = TokenCounter.get_token_chunk(raw_text, token_limit=800)
+                metadata = extract_metadata_with_llm(metadata_chunk)
 
             title = metadata.get("title", "")
             authors = metadata.get("authors", [])
+            metadata_usage = {"model": metadata.get("model"), **metadata.get("usage", {})}
 
-        return cls(title=title, authors=authors, source=pdf_path, raw_text=raw_text)
+        return cls(title=title, authors=authors, source=pdf_path, raw_text=raw_text, metadata_usage=metadata_usage, normalization=parsed_file.normalization, page_starts=parsed_file.page_starts, figure_references=parsed_file.figure_references, captions=parsed_file.captions)
     
     def chunk_text(self, max_tokens: int = 500, overlap: int = 50) -> Optional[List[Chunk]]:
         """
@@ -41,7 +53,8 @@ class Paper:
         :return: A list of Chunk objects.
         """
         if self._raw_text:
-            self._chunks = TextChunker.chunk_text(self._raw_text, max_tokens, overlap)
+            self._chunks = TextChunker.chunk_text(self._raw_text, max_tokens, overlap, page_starts=self._page_starts)
+            self._section_index = SectionIndex.build(self._chunks)
             return self._chunks
         return None
 
@@ -59,6 +72,7 @@ class Paper:
             "authors": self._authors,
             "source": self._source,
             "chunks": [chunk.to_dict() for chunk in self._chunks] if self._chunks else [],
+            "sections": self._section_index,
         }
 
     @property
@@ -77,6 +91,48 @@ class Paper:
     def raw_text(self) -> str:
         return self._raw_text
 
+    @property
+    def metadata_usage(self) -> dict:
+        """
+        Token usage (and "model") of the LLM metadata extraction; empty when metadata was given.
+        """
+        return self._metadata_usage
+
+    @property
+    def normalization(self) -> dict:
+        """
+        Text normalization stats, including "tokens_before" and "tokens_after" (see tools/text_normalizer.py).
+        """
+        return self._normalization
+
+    @property
+    def page_starts(self) -> list:
+        """
+        (offset in raw_text, page number) where each page starts, for chunk page spans.
+        """
+        return self._page_starts
+
+    @property
+    def figure_references(self) -> dict:
+        """
+        Lines mentioning each figure/table, found while the PDF was parsed (see PDFParser.extract_info).
+        """
+        return self._figure_references
+
+    @property
+    def captions(self) -> dict:
+        """
+        Caption of each figure/table, found while the PDF was parsed.
+        """
+        return self._captions
+
+    @property
+    def section_index(self) -> List[dict]:
+        """
+        Section name -> chunk range entries, built when the paper is chunked (see domain/section_index.py).
+        """
+        return self._section_index
+
     @property
     def chunks(self) -> Optional[List[Chunk]]:
         return self._chunks
\ No newline at end of file
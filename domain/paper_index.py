@@ -7,20 +7,28 @@ from difflib import SequenceMatcher
 PAPER_INDEX_FILE = "cache/paper_index.json"
 
 class PaperIndex:
+    # In-memory copy of the index, reused until the file changes on disk
+    _cache = None
+    _cache_stamp = None
+
     @staticmethod
     def _load_index() -> list[dict]:
         if not os.path.exists(PAPER_INDEX_FILE):
             return []
-        with open(PAPER_INDEX_FILE, "r") as f:
-            return json.load(f)
+
+        stat = os.stat(PAPER_INDEX_FILE)
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        if PaperIndex._cache_stamp != stamp:
+            with open(PAPER_INDEX_FILE, "r") as f:
+                PaperIndex._cache = json.load(f)
+            PaperIndex._cache_stamp = stamp
+
+        # Callers annotate entries (e.g. "score"), so hand out copies
+        return [dict(entry) for entry in PaperIndex._cache]
     
     @staticmethod
     def load_all() -> list:
-        if not os.path.exists(PAPER_INDEX_FILE):
-            return []
-
-        with open(PAPER_INDEX_FILE, "r") as f:
-            return json.load(f)
+        return PaperIndex._load_index()
 
     @staticmethod
     def fuzzy_match_title(query: str, threshold: float = 0.6) -> list[dict]:
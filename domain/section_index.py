@@ -0,0 +1,144 @@
+# domain/section_index.py
+
+import re
+from typing import Dict, List, Optional
+from domain.text_chunk import Chunk
+
+# Names papers use for the same part; a request for any name matches sections titled with any other
+SECTION_ALIASES = {
+    "abstract": ("abstract",),
+    "introduction": ("introduction", "motivation", "overview"),
+    "related work": ("related work", "background", "prior work", "literature review", "preliminaries"),
+    "methods": ("method", "methodology", "approach", "proposed", "model", "architecture", "framework", "algorithm", "design"),
+    "evaluation": ("evaluation", "experiment", "experimental setup", "result", "benchmark", "ablation", "empirical"),
+    "discussion": ("discussion", "limitation", "threats to validity", "future work"),
+    "conclusion": ("conclusion", "concluding remarks", "summary"),
+    "references": ("references", "bibliography"),
+    "appendix": ("appendix", "appendices", "supplementary"),
+}
+
+WORD_PATTERN = re.compile(r"[a-z]+")
+
+
+class SectionIndex:
+    """
+    Maps a paper's section names to the ranges of its chunks, so a request about one part
+    ("summarize the methods", "compare their evaluation") only compresses that part.
+
+    Built from the section labels of structure-aware chunks (see TextChunker.chunk_structured).
+    A requested name matches a section whose title contains it or one of its aliases
+    ("methods" matches "Methodology" and "Our Approach"). Sections following a match whose
+    titles match none of the known aliases (e.g. "Training Setup" after "Method") are taken
+    to be its subsections and selected with it.
+    """
+
+    @staticmethod
+    def build(chunks: List[Chunk]) -> List[dict]:
+        """
+        Args:
+            chunks (List[Chunk]): Chunks in paper order.
+
+        Returns:
+            List[dict]: One entry per run of consecutive chunks with the same section, in order:
+            [{"name": str, "chunks": [start, end], "pages": [first, last] | None, "tokens": int}]
+            with `end` exclusive (positions in `chunks`).
+        """
+        entries: List[dict] = []
+        for position, chunk in enumerate(chunks):
+            name = chunk.section or ""
+            if entries and entries[-1]["name"] == name:
+                entry = entries[-1]
+            else:
+                entry = {"name": name, "chunks": [position, position], "pages": None, "tokens": 0}
+                entries.append(entry)
+            entry["chunks"][1] = position + 1
+            entry["tokens"] += chunk.token_count
+            if chunk.page_span:
+                first, last = chunk.page_span
+                entry["pages"] = [entry["pages"][0] if entry["pages"] else first, last]
+        return entries
+
+    @staticmethod
+    def names(chunks: List[Chunk]) -> List[str]:
+        """
+        Distinct section names, in paper order.
+        """
+        return list(dict.fromkeys(entry["name"] for entry in SectionIndex.build(chunks) if entry["name"]))
+
+    @staticmethod
+    def select(chunks: List[Chunk], sections: List[str]) -> dict:
+        """
+        Picks the chunks of the requested sections.
+
+        Args:
+            chunks (List[Chunk]): Chunks in paper order.
+            sections (List[str]): Requested section names, e.g. ["methods", "evaluation"].
+
+        Returns:
+            dict: {
+                "kept": List[Chunk],  # In paper order
+                "matched": List[str],  # Section names in the paper that were selected
+                "missing": List[str],  # Requested names that matched no section
+                "tokens_skipped": int
+            }
+        """
+        entries = SectionIndex.build(chunks)
+        requested = [name for name in (s.strip() for s in sections) if name]
+        selected: Dict[int, dict] = {}
+        missing = []
+
+        for name in requested:
+            terms = SectionIndex._terms(name)
+            found = False
+            following = False
+            for position, entry in enumerate(entries):
+                group = SectionIndex._group(entry["name"])
+                if SectionIndex._matches(entry["name"], terms):
+                    selected[position] = entry
+                    found = following = True
+                elif following and group is None and entry["name"]:
+                    selected[position] = entry  # Subsection of the match
+                else:
+                    following = False
+            if not found:
+                missing.append(name)
+
+        kept = [chunk for position in sorted(selected) for chunk in chunks[slice(*entries[position]["chunks"])]]
+        return {
+            "kept": kept,
+            "matched": list(dict.fromkeys(entries[position]["name"] for position in sorted(selected))),
+            "missing": missing,
+            "tokens_skipped": sum(chunk.token_count for chunk in chunks) - sum(chunk.token_count for chunk in kept),
+        }
+
+    @staticmethod
+    def _terms(name: str) -> List[str]:
+        """
+        The requested name plus the aliases of every group it belongs to.
+        """
+        name = SectionIndex._normalize(name)
+        terms = [name]
+        for group, aliases in SECTION_ALIASES.items():
+            if name == SectionIndex._normalize(group) or name in (SectionIndex._normalize(alias) for alias in aliases):
+                terms += [SectionIndex._normalize(alias) for alias in aliases]
+        return list(dict.fromkeys(terms))
+
+    @staticmethod
+    def _group(title: str) -> Optional[str]:
+        """
+        The alias group a section title belongs to, if any.
+        """
+        for group, aliases in SECTION_ALIASES.items():
+            if SectionIndex._matches(title, [SectionIndex._normalize(alias) for alias in aliases]):
+                return group
+        return None
+
+    @staticmethod
+    def _matches(title: str, terms: List[str]) -> bool:
+        # Terms must start at a word, with plurals folded ("Methods" ~ "method", "Experimental" ~ "experiment")
+        words = " " + SectionIndex._normalize(title)
+        return any(term and f" {term}" in words for term in terms)
+
+    @staticmethod
+    def _normalize(text: str) -> str:
+        return " ".join(word[:-1] if len(word) > 4 and word.endswith("s") else word for word in WORD_PATTERN.findall(text.lower()))
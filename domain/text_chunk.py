@@ -1,8 +1,13 @@
+from typing import Optional, Tuple
+
+
 class Chunk:
-    def __init__(self, index: int, text: str, token_count: int):
+    def __init__(self, index: int, text: str, token_count: int, section: Optional[str] = None, page_span: Optional[Tuple[int, int]] = None):
         self._index = index
         self._text = text
         self._token_count = token_count
+        self._section = section
+        self._page_span = page_span
     
     def __str__(self):
         return f"[Chunk {self.index}] Tokens: {self.token_count}\nText: {self.text[:100]}..."
@@ -12,6 +17,8 @@ class Chunk:
             "index": self.index,
             "text": self.text,
             "token_count": self.token_count,
+            "section": self.section,
+            "page_span": list(self.page_span) if self.page_span else None,
         }
     
     @property
@@ -24,4 +31,18 @@ class Chunk:
     
     @property
     def token_count(self) -> int:
-        return self._token_count
\ No newline at end of file
+        return self._token_count
+
+    @property
+    def section(self) -> Optional[str]:
+        """
+        Heading of the paper section the chunk starts in (None for fixed token windows).
+        """
+        return self._section
+
+    @property
+    def page_span(self) -> Optional[Tuple[int, int]]:
+        """
+        First and last page (1-based) the chunk's text comes from, when page positions are known.
+        """
+        return self._page_span
@@ -7,8 +7,66 @@ class Config:
     LLM_PROVIDER = os.getenv("LLM_PROVIDER")
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
     OPENAI_MODEL = os.getenv("OPENAI_MODEL")
+    OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL")  # Optional OpenAI-compatible endpoint (e.g. a local server)
     EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL")
+    MODEL_METADATA = os.getenv("MODEL_METADATA")  # Per-stage model routing (see LLMClient.for_stage); unset = run's model
+    MODEL_COMPRESSION = os.getenv("MODEL_COMPRESSION")  # Chunk compression, the bulk of the tokens
+    MODEL_REDUCTION = os.getenv("MODEL_REDUCTION")  # Tree reduction of compressed sections
+    MODEL_SUMMARY = os.getenv("MODEL_SUMMARY")  # Final styled summary
+    MODEL_COMPARISON = os.getenv("MODEL_COMPARISON")  # Final comparison of two papers
+    MODEL_FIGURES = os.getenv("MODEL_FIGURES")  # Figure/table explanations
     MAX_TOKENS_PER_REQUEST = int(os.getenv("MAX_TOKENS_PER_REQUEST", "3000"))
     MAX_SUMMARY_TOKENS = int(os.getenv("MAX_SUMMARY_TOKENS", "800"))
     MAX_EMBED_TOKENS = int(os.getenv("MAX_EMBED_TOKENS", "8000"))
+    TEXT_NORMALIZE = os.getenv("TEXT_NORMALIZE", "true").lower() == "true"  # Strip headers/footers, dehyphenate, fix ligatures after parsing
+    CHUNKING = os.getenv("CHUNKING", "structure").lower()  # "structure": whole paragraphs per section; "content": content-defined, compressions cached per chunk; "fixed": token windows
+    CHUNK_FILTER = os.getenv("CHUNK_FILTER", "true").lower() == "true"  # Skip references/acknowledgments/boilerplate chunks before compression
+    CHUNK_FILTER_THRESHOLD = float(os.getenv("CHUNK_FILTER_THRESHOLD", "0.5"))  # Skip chunks scoring below this (1.0 = average chunk)
+    DEDUP = os.getenv("DEDUP", "true").lower() == "true"  # Reuse cached compression/summary of near-duplicate papers, skip repeated chunks
+    DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.8"))  # Minimum estimated Jaccard similarity to count as a near-duplicate
+    FIGURE_BATCH = os.getenv("FIGURE_BATCH", "true").lower() == "true"  # Explain all figure captions in a few JSON-answer requests instead of one each
+    FIGURE_BATCH_WORKERS = int(os.getenv("FIGURE_BATCH_WORKERS", "4"))  # Caption batches explained at once
+    FIGURE_EXPLANATION_TOKENS = int(os.getenv("FIGURE_EXPLANATION_TOKENS", "150"))  # Answer tokens reserved per caption when packing batches
+    REDUCTION_MAX_TOKENS = int(os.getenv("REDUCTION_MAX_TOKENS", "12000"))  # Compressed text above this is merged in rounds
+    REDUCTION_FAN_IN = int(os.getenv("REDUCTION_FAN_IN", "4"))  # Compressed sections merged per reduction call
+    LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "120"))  # Seconds per LLM request
+    LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "5"))  # Seconds to establish a connection
+    LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+    LLM_POOL_MAX_CONNECTIONS = int(os.getenv("LLM_POOL_MAX_CONNECTIONS", "32"))  # Per endpoint, shared process-wide
+    LLM_POOL_MAX_KEEPALIVE = int(os.getenv("LLM_POOL_MAX_KEEPALIVE", "16"))
+    LLM_ENDPOINTS = os.getenv("LLM_ENDPOINTS")  # JSON list of OpenAI-compatible endpoints (or a path to one) to balance across
+    LLM_ENDPOINT_EJECT_AFTER = int(os.getenv("LLM_ENDPOINT_EJECT_AFTER", "3"))  # Consecutive failures before an endpoint is ejected
+    LLM_ENDPOINT_EJECT_SECONDS = float(os.getenv("LLM_ENDPOINT_EJECT_SECONDS", "30"))  # First ejection; doubles on repeats
+    LLM_ENDPOINT_BACKOFF = float(os.getenv("LLM_ENDPOINT_BACKOFF", "0.5"))  # First pause between failover attempts; doubles on repeats
+    LLM_HEDGE = os.getenv("LLM_HEDGE", "false").lower() == "true"  # Duplicate slow LLM calls and keep the first response
+    LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "95"))  # Hedge calls slower than this latency percentile
+    LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))  # Calls per model observed before hedging starts
+    LLM_HEDGE_MIN_DELAY = float(os.getenv("LLM_HEDGE_MIN_DELAY", "1.0"))  # Never hedge earlier than this many seconds
+    LLM_HEDGE_BUDGET = float(os.getenv("LLM_HEDGE_BUDGET", "0.05"))  # Max extra requests from hedging, as a fraction of calls
+    LLM_HEDGE_WINDOW = int(os.getenv("LLM_HEDGE_WINDOW", "200"))  # Recent latencies per model the percentile is taken over
+    LLM_KEEPALIVE_EXPIRY = float(os.getenv("LLM_KEEPALIVE_EXPIRY", "60"))  # Seconds an idle connection is kept
+    REPLAY_MODE = os.getenv("REPLAY_MODE", "replay")  # "replay" provider: record | replay | synthetic
+    REPLAY_CASSETTE = os.getenv("REPLAY_CASSETTE", "benchmarks/cassettes/llm.jsonl")
+    REPLAY_LATENCY_SCALE = float(os.getenv("REPLAY_LATENCY_SCALE", "0"))  # 0 = instant, 1 = recorded latency
+    REPLAY_RATE_LIMIT_RATE = float(os.getenv("REPLAY_RATE_LIMIT_RATE", "0"))  # Probability of a simulated 429
+    REPLAY_SYNTHETIC_TOKENS = int(os.getenv("REPLAY_SYNTHETIC_TOKENS", "200"))  # Output length in synthetic mode
+    REPLAY_STRICT = os.getenv("REPLAY_STRICT", "false").lower() == "true"  # Fail on cassette misses instead of synthesizing
+    USAGE_LEDGER = os.getenv("USAGE_LEDGER", "true").lower() == "true"  # Record every LLM call (tools/usage_ledger.py)
+    USAGE_LEDGER_PATH = os.getenv("USAGE_LEDGER_PATH", "cache/usage.db")
+    PROFILE_MEMORY = os.getenv("PROFILE_MEMORY", "true").lower() == "true"  # tracemalloc per paper under --profile
+    PROFILE_TRACEMALLOC_FRAMES = int(os.getenv("PROFILE_TRACEMALLOC_FRAMES", "5"))  # More frames = more overhead
+    BULK_CONCURRENCY = int(os.getenv("BULK_CONCURRENCY", "1"))  # Papers summarized at once by main.py
+    LLM_RPM_LIMIT = int(os.getenv("LLM_RPM_LIMIT", "0"))  # Provider requests per minute (0 = unlimited), used by --dry-run
+    LLM_TPM_LIMIT = int(os.getenv("LLM_TPM_LIMIT", "0"))  # Provider tokens per minute (0 = unlimited), used by --dry-run
+    PLANNER_REQUEST_LATENCY = float(os.getenv("PLANNER_REQUEST_LATENCY", "0.8"))  # Seconds per LLM request before output starts
+    PLANNER_TOKENS_PER_SECOND = float(os.getenv("PLANNER_TOKENS_PER_SECOND", "60"))  # Output tokens per second per request
+    PLANNER_COMPRESSION_RATIO = float(os.getenv("PLANNER_COMPRESSION_RATIO", "0.35"))  # Compressed / original chunk tokens
+    PLANNER_SUMMARY_TOKENS = int(os.getenv("PLANNER_SUMMARY_TOKENS", "400"))  # Expected final summary/comparison length
+    TOOL_MAX_WORKERS = int(os.getenv("TOOL_MAX_WORKERS", "4"))  # Concurrent tool calls per agent step
+    TOOL_CALL_TIMEOUT = float(os.getenv("TOOL_CALL_TIMEOUT", "600"))  # Seconds per tool call
+    RUN_POLL_MIN_INTERVAL = float(os.getenv("RUN_POLL_MIN_INTERVAL", "0.05"))  # Seconds, first Assistants run poll
+    RUN_POLL_MAX_INTERVAL = float(os.getenv("RUN_POLL_MAX_INTERVAL", "2.0"))  # Seconds, backoff ceiling
+    DAEMON_ADDRESS = os.getenv("DAEMON_ADDRESS", "cache/daemon.sock")  # Unix socket path or host:port
+    DAEMON_WORKERS = int(os.getenv("DAEMON_WORKERS", "2"))  # Concurrent summarize/compare jobs in the daemon
+    DAEMON_TOKEN = os.getenv("DAEMON_TOKEN")  # Shared secret every daemon request must carry; required to listen beyond loopback
     DEBUG_MODE = os.getenv("DEBUG_MODE", "false").lower() == "true"
\ No newline at end of file
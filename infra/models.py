@@ -1,3 +1,5 @@
+from infra.config import Config
+
 SUPPORTED_MODELS = {
     "openai": {
         "gpt-3.5-turbo": {
@@ -12,6 +14,12 @@ SUPPORTED_MODELS = {
             "input_cost_per_1k": 0.03,
             "output_cost_per_1k": 0.06
         },
+        "gpt-4-0125-preview": {
+            "id": "gpt-4-0125-preview",
+            "max_tokens": 128000,
+            "input_cost_per_1k": 0.01,
+            "output_cost_per_1k": 0.03
+        },
         "gpt-4-turbo": {
             "id": "gpt-4-turbo",
             "max_tokens": 128000,
@@ -21,3 +29,35 @@ SUPPORTED_MODELS = {
     },
     # More models to come later
 }
+
+# Offline record/replay provider (agents/replay_client.py): same models and prices as OpenAI,
+# so replayed runs report realistic costs
+SUPPORTED_MODELS["replay"] = SUPPORTED_MODELS["openai"]
+
+# Pipeline stages that can run on their own model via Config.MODEL_<STAGE> (see LLMClient.for_stage)
+PIPELINE_STAGES = ("metadata", "compression", "reduction", "summary", "comparison", "figures")
+
+
+def stage_models(provider: str) -> dict:
+    """
+    Returns the per-stage model overrides from Config, validated against SUPPORTED_MODELS.
+
+    Args:
+        provider (str): Provider the run uses; overrides must be models of the same provider.
+
+    Returns:
+        dict: {stage: model key} for every stage with a MODEL_<STAGE> setting.
+
+    Raises:
+        ValueError: If an override names a model the provider does not support.
+    """
+    overrides = {
+        stage: getattr(Config, f"MODEL_{stage.upper()}").strip().lower()
+        for stage in PIPELINE_STAGES
+        if getattr(Config, f"MODEL_{stage.upper()}", None)
+    }
+    models = SUPPORTED_MODELS.get((provider or "").lower(), {})
+    invalid = [f"MODEL_{stage.upper()}={model}" for stage, model in overrides.items() if model not in models]
+    if invalid:
+        raise ValueError(f"Unsupported stage model(s) for provider '{provider}': {', '.join(invalid)} (supported: {', '.join(models)})")
+    return overrides
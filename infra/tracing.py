@@ -0,0 +1,337 @@
+import itertools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional
+
+
+class Span:
+    """
+    One timed pipeline stage or LLM call. Attributes (tokens, model, cache hit, retries,
+    chunk index, ...) are set while the span is open and exported when it ends.
+    """
+
+    __slots__ = ("name", "span_id", "parent_id", "attrs", "start", "end", "error", "thread")
+
+    def __init__(self, name: str, span_id: int, parent_id: Optional[int], attrs: dict):
+        self.name = name
+        self.span_id = span_id
+        self.parent_id = parent_id
+        self.attrs = attrs
+        self.start = time.time()
+        self.end: Optional[float] = None
+        self.error: Optional[str] = None
+        self.thread = threading.current_thread().name
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def add(self, key: str, amount: float = 1):
+        self.attrs[key] = self.attrs.get(key, 0) + amount
+
+    def fail(self, error: Exception):
+        # For errors the caller handles itself (the span would otherwise look successful)
+        self.error = f"{type(error).__name__}: {error}"
+
+    @property
+    def duration(self) -> float:
+        return (self.end or time.time()) - self.start
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start": round(self.start, 6),
+            "duration": round(self.duration, 6),
+            "thread": self.thread,
+            "error": self.error,
+            **self.attrs,
+        }
+
+
+class _NoopSpan:
+    # Handed out when tracing is off, so instrumented code never has to check
+    name = None
+    attrs: dict = {}
+
+    def set(self, **attrs):
+        pass
+
+    def add(self, key: str, amount: float = 1):
+        pass
+
+    def fail(self, error: Exception):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Tracer:
+    """
+    Collects spans around pipeline stages and LLM calls.
+
+    Off by default and close to free when off. When enabled, every finished span is
+    appended to a JSONL trace file (if given) and aggregated into per-stage latency,
+    token, cache and retry metrics, exported as Prometheus text or a summary table.
+
+    Listeners (see `add_listener`) see every span start/end even without a trace file,
+    e.g. infra/profiling.py attaches per-stage profilers this way.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.path: Optional[str] = None
+        self._file = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._ids = itertools.count(1)
+        self._listeners: List[tuple] = []
+        self._durations: Dict[str, List[float]] = {}
+        self._errors: Dict[str, int] = {}
+        self._tokens: Dict[tuple, int] = {}  # (model, "prompt" | "completion") -> tokens
+        self._cache: Dict[str, int] = {"hit": 0, "miss": 0}
+        self._retries: Dict[str, int] = {}
+        self._hedges: Dict[tuple, int] = {}  # (model, "won" | "lost") -> hedged LLM calls
+
+    # --- Setup ---------------------------------------------------------------------
+
+    def enable(self, path: Optional[str] = None):
+        """
+        Starts recording spans; with `path`, finished spans are appended to that JSONL file.
+        """
+        with self._lock:
+            if path:
+                os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+                self._file = open(path, "a", encoding="utf-8")
+            self.path = path
+            self.enabled = True
+
+    def disable(self):
+        with self._lock:
+            self.enabled = False
+            if self._file:
+                self._file.close()
+                self._file = None
+
+    def reset(self):
+        with self._lock:
+            self._durations.clear()
+            self._errors.clear()
+            self._tokens.clear()
+            self._cache.update(hit=0, miss=0)
+            self._retries.clear()
+            self._hedges.clear()
+
+    def add_listener(self, on_start: Optional[Callable[[Span], None]] = None, on_end: Optional[Callable[[Span], None]] = None) -> tuple:
+        listener = (on_start, on_end)
+        with self._lock:
+            self._listeners.append(listener)
+        return listener
+
+    def remove_listener(self, listener: tuple):
+        with self._lock:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+    @property
+    def active(self) -> bool:
+        return self.enabled or bool(self._listeners)
+
+    # --- Spans ---------------------------------------------------------------------
+
+    def _stack(self) -> list:
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    def current(self):
+        """
+        Returns the innermost open span on this thread (a no-op span when there is none).
+        """
+        if not self.active:
+            return NOOP_SPAN
+        stack = self._stack()
+        return stack[-1] if stack else NOOP_SPAN
+
+    @contextmanager
+    def span(self, name: str, **attrs) -> Iterator[Span]:
+        """
+        Times the enclosed block as a span named `name`, nested under the current span.
+        """
+        if not self.active:
+            yield NOOP_SPAN
+            return
+
+        stack = self._stack()
+        span = Span(name, next(self._ids), stack[-1].span_id if stack else None, attrs)
+        stack.append(span)
+        for on_start, _ in list(self._listeners):
+            if on_start:
+                on_start(span)
+
+        try:
+            yield span
+        except BaseException as e:
+            # GeneratorExit is a normal early stop (e.g. a cancelled stream), not a failure
+            if not isinstance(e, GeneratorExit):
+                span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            span.end = time.time()
+            # Generators can finish on another thread or out of order; remove by identity
+            if span in stack:
+                stack.remove(span)
+            for _, on_end in list(self._listeners):
+                if on_end:
+                    on_end(span)
+            if self.enabled:
+                self._record(span)
+
+    def _record(self, span: Span):
+        attrs = span.attrs
+        with self._lock:
+            self._durations.setdefault(span.name, []).append(span.duration)
+            if span.error:
+                self._errors[span.name] = self._errors.get(span.name, 0) + 1
+
+            model = attrs.get("model")
+            if model:
+                for kind in ("prompt", "completion"):
+                    tokens = attrs.get(f"{kind}_tokens")
+                    if tokens:
+                        self._tokens[(model, kind)] = self._tokens.get((model, kind), 0) + tokens
+                if attrs.get("retries"):
+                    self._retries[model] = self._retries.get(model, 0) + attrs["retries"]
+                if attrs.get("hedged"):
+                    key = (model, "won" if attrs.get("hedge_won") else "lost")
+                    self._hedges[key] = self._hedges.get(key, 0) + 1
+
+            if "cache_hit" in attrs:
+                self._cache["hit" if attrs["cache_hit"] else "miss"] += 1
+
+            if self._file:
+                self._file.write(json.dumps(span.to_dict(), default=str) + "\n")
+                self._file.flush()
+
+    # --- Export --------------------------------------------------------------------
+
+    def stats(self) -> Dict[str, dict]:
+        """
+        Per-span-name aggregates: {name: {"count", "total", "mean", "p50", "p95", "max", "errors"}} (seconds).
+        """
+        with self._lock:
+            durations = {name: sorted(values) for name, values in self._durations.items()}
+            errors = dict(self._errors)
+
+        def percentile(values: List[float], q: float) -> float:
+            return values[min(len(values) - 1, int(round(q * (len(values) - 1))))]
+
+        return {
+            name: {
+                "count": len(values),
+                "total": sum(values),
+                "mean": sum(values) / len(values),
+                "p50": percentile(values, 0.5),
+                "p95": percentile(values, 0.95),
+                "max": values[-1],
+                "errors": errors.get(name, 0),
+            }
+            for name, values in durations.items()
+        }
+
+    def prometheus(self) -> str:
+        """
+        Renders the aggregated metrics in the Prometheus text exposition format.
+        """
+        lines = [
+            "# HELP research_span_duration_seconds Time spent per pipeline stage or LLM call.",
+            "# TYPE research_span_duration_seconds summary",
+        ]
+        stats = self.stats()
+        for name, s in sorted(stats.items()):
+            lines.append(f'research_span_duration_seconds{{span="{name}",quantile="0.5"}} {s["p50"]:.6f}')
+            lines.append(f'research_span_duration_seconds{{span="{name}",quantile="0.95"}} {s["p95"]:.6f}')
+            lines.append(f'research_span_duration_seconds_sum{{span="{name}"}} {s["total"]:.6f}')
+            lines.append(f'research_span_duration_seconds_count{{span="{name}"}} {s["count"]}')
+
+        lines += ["# HELP research_span_errors_total Spans that ended with an exception.", "# TYPE research_span_errors_total counter"]
+        for name, s in sorted(stats.items()):
+            lines.append(f'research_span_errors_total{{span="{name}"}} {s["errors"]}')
+
+        with self._lock:
+            tokens = dict(self._tokens)
+            cache = dict(self._cache)
+            retries = dict(self._retries)
+            hedges = dict(self._hedges)
+
+        lines += ["# HELP research_llm_tokens_total Tokens reported by the LLM provider.", "# TYPE research_llm_tokens_total counter"]
+        for (model, kind), count in sorted(tokens.items()):
+            lines.append(f'research_llm_tokens_total{{model="{model}",kind="{kind}"}} {count}')
+
+        lines += ["# HELP research_llm_retries_total HTTP retries of LLM requests.", "# TYPE research_llm_retries_total counter"]
+        for model, count in sorted(retries.items()):
+            lines.append(f'research_llm_retries_total{{model="{model}"}} {count}')
+
+        lines += ["# HELP research_llm_hedges_total Hedged LLM calls, by whether the duplicate request won.", "# TYPE research_llm_hedges_total counter"]
+        for (model, result), count in sorted(hedges.items()):
+            lines.append(f'research_llm_hedges_total{{model="{model}",result="{result}"}} {count}')
+
+        lines += ["# HELP research_cache_lookups_total Summary cache lookups.", "# TYPE research_cache_lookups_total counter"]
+        for result, count in sorted(cache.items()):
+            lines.append(f'research_cache_lookups_total{{result="{result}"}} {count}')
+
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.prometheus())
+
+    def summary_table(self) -> str:
+        """
+        Plain-text table of per-stage latency and tokens, slowest total first.
+        """
+        stats = self.stats()
+        if not stats:
+            return "No spans recorded."
+
+        with self._lock:
+            tokens = sum(self._tokens.values())
+            cache = dict(self._cache)
+
+        rows = [f"{'Stage':<28}{'Count':>7}{'Total s':>10}{'Mean ms':>10}{'p95 ms':>10}{'Errors':>8}"]
+        for name, s in sorted(stats.items(), key=lambda item: item[1]["total"], reverse=True):
+            rows.append(f"{name:<28}{s['count']:>7}{s['total']:>10.2f}{s['mean'] * 1000:>10.1f}{s['p95'] * 1000:>10.1f}{s['errors']:>8}")
+        rows.append(f"LLM tokens: {tokens}  |  cache hits/misses: {cache['hit']}/{cache['miss']}")
+        return "\n".join(rows)
+
+
+tracer = Tracer()
+
+
+def span(name: str, **attrs):
+    """
+    Shortcut for `tracer.span(...)` on the process-wide tracer.
+    """
+    return tracer.span(name, **attrs)
+
+
+def enable_cli_tracing(path: str) -> str:
+    """
+    Enables tracing for a CLI run and returns the path of the Prometheus file written next to the trace.
+    """
+    tracer.enable(path)
+    return os.path.splitext(path)[0] + ".prom"
+
+
+def finish_cli_tracing(metrics_path: str) -> str:
+    """
+    Writes the Prometheus metrics file, stops tracing and returns the summary table.
+    """
+    tracer.write_prometheus(metrics_path)
+    tracer.disable()
+    return tracer.summary_table()
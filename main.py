@@ -1,31 +1,184 @@
-from domain.paper import Paper
-from services.summarizer import SummarizerService
-from tools.cost_tracker import CostTracker
+import argparse
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from infra.config import Config
+from services.daemon import DaemonClient
+from tools.cache_manager import CacheManager
+
+
+def summarize_with_progress(path: str, style: str, provider: str = None, model: str = None, daemon: DaemonClient = None, cancel_event: threading.Event = None, sections: list = None) -> dict:
+    """
+    Summarizes one paper, printing a progress line for every pipeline event.
+    Runs on the resident daemon when one is given, otherwise in-process.
+    """
+    name = os.path.basename(path)
+    if daemon is not None:
+        events = daemon.stream("summarize_pdf", path=path, style=style, provider=provider, model=model, sections=sections)
+    else:
+        from services.summarizer import SummarizerService
+        events = SummarizerService.iter_summarize_paper(path, style, provider=provider, model=model, stream=False, cancel_event=cancel_event, sections=sections)
+    result = {}
+
+    for event in events:
+        kind = event["event"]
+
+        if kind == "parsed":
+            print(f"[{name}] parsed: {event['title'] or 'untitled'} ({event['elapsed']:.2f}s)")
+            normalization = event.get("normalization") or {}
+            if normalization:
+                print(f"[{name}] normalized text: {normalization['tokens_before']} -> {normalization['tokens_after']} tokens")
+        elif kind == "near_duplicate":
+            print(f"[{name}] near-duplicate of {os.path.basename(event['path'])} ({event['similarity']:.0%} similar), reusing its {event['reused']}")
+        elif kind == "chunked":
+            print(f"[{name}] {event['chunks']} chunks, {event['tokens']} tokens")
+        elif kind == "sections":
+            print(f"[{name}] sections {', '.join(event['matched']) or 'none'}: {event['kept']} chunks kept ({event['tokens_skipped']} tokens skipped)")
+            if event["missing"]:
+                print(f"[{name}] no section matches {', '.join(event['missing'])}")
+        elif kind == "filtered":
+            print(f"[{name}] skipped {event['skipped']} low-value chunks ({event['tokens_skipped']} tokens)")
+        elif kind == "chunk_compressed" and event.get("error"):
+            print(f"[{name}] chunk {event['index'] + 1}/{event['total']} failed: {event['error']}")
+        elif kind == "chunk_compressed" and event.get("cached"):
+            print(f"[{name}] chunk {event['index'] + 1}/{event['total']} unchanged, reusing its cached compression")
+        elif kind == "chunk_compressed":
+            print(
+                f"[{name}] chunk {event['index'] + 1}/{event['total']} compressed: "
+                f"{event['usage'].get('total_tokens', 0)} tokens in {event['latency']:.2f}s"
+            )
+        elif kind == "merged" and event.get("error"):
+            print(f"[{name}] merge round {event['round']} failed, passing sections on unmerged: {event['error']}")
+        elif kind == "merged":
+            print(f"[{name}] merge round {event['round']}: {event['sections']} sections left ({event['latency']:.2f}s)")
+        elif kind == "reduced":
+            print(f"[{name}] compression done ({event['source']}, {event['elapsed']:.2f}s)")
+        elif kind == "final":
+            result = event["result"]
+
+    return result
+
+
+def summarize_cached(path: str, style: str, provider: str = None, model: str = None, daemon: DaemonClient = None, cancel_event: threading.Event = None, sections: list = None) -> dict:
+    """
+    Loads the cached summary of a paper (or of the given sections of it), or summarizes and caches it.
+    """
+    file_hash = CacheManager.get_file_hash(path)
+    cache_key = CacheManager.style_key(style, sections)
+
+    if CacheManager.is_cached(file_hash, cache_key):
+        print(f"[{os.path.basename(path)}] loaded from cache")
+        return CacheManager.load_cached_summary(file_hash, cache_key)
+
+    from services.summarizer import SummarizerService
+
+    result = summarize_with_progress(path, style, provider, model, daemon, cancel_event, sections)
+    if result.get("error"):
+        print(f"[{os.path.basename(path)}] [ERROR] summary incomplete: {result['error']}")
+    if SummarizerService.is_complete(result):
+        CacheManager.save_summary(file_hash, cache_key, result)
+    return result
+
 
 if __name__ == "__main__":
-    path = "docs/sample_test_paper.pdf"
-    paper = Paper.from_pdf(path)
-    paper.chunk_text()
+    parser = argparse.ArgumentParser(description="Summarize every PDF in a folder, reporting per-chunk progress.")
+    parser.add_argument("folder", nargs="?", default="docs", help="Folder containing PDFs to summarize.")
+    parser.add_argument("--style", type=str, default="default", help="Summary style.")
+    parser.add_argument("--provider", type=str, help="LLM provider (openai, gemini, claude, etc.)")
+    parser.add_argument("--model", type=str, help="Model to use (gpt-4, pro, claude-2, etc.)")
+    parser.add_argument("--sections", nargs="+", help="Only summarize these sections (e.g. --sections methods evaluation)")
+    parser.add_argument("--concurrency", type=int, default=Config.BULK_CONCURRENCY, help="Papers summarized at once")
+    parser.add_argument("--dry-run", action="store_true", help="Estimate requests, tokens, cost and wall time without calling the LLM")
+    parser.add_argument("--trace", nargs="?", const="traces/bulk.jsonl", help="Write per-stage spans to this JSONL file (plus .prom metrics) and print a summary table")
+    parser.add_argument("--profile", nargs="?", const="profiles", help="Write cProfile stats per stage and tracemalloc stats per paper to this folder")
+    args = parser.parse_args()
+
+    paths = sorted(
+        os.path.join(args.folder, name)
+        for name in os.listdir(args.folder)
+        if name.lower().endswith(".pdf")
+    )
+
+    if args.dry_run:
+        from services.planner import PlannerService
+
+        plan = PlannerService.plan_bulk(paths, args.style, args.provider, args.model, args.concurrency, sections=args.sections)
+        print(f"\n🧮 Dry run: {len(paths)} papers in {args.folder} (nothing was sent to the LLM)\n")
+        print(PlannerService.format_plan(plan))
+        raise SystemExit(0)
 
-    result = SummarizerService.summarize_paper(paper.chunks, style="default")
+    profiler = None
+    if args.profile:
+        from infra.profiling import Profiler
+        profiler = Profiler(args.profile).start()
 
-    summary = result["final_summary"]
-    usage = result["total_usage"]
+    if args.trace:
+        from infra.tracing import enable_cli_tracing
+        metrics_path = enable_cli_tracing(args.trace)
 
-    model = Config.OPENAI_MODEL
-    tokens = usage.get("total_tokens", 0)
+    daemon = DaemonClient() if DaemonClient.available() else None
+    if daemon is None:
+        from tools.usage_ledger import UsageLedger
+        UsageLedger.install()  # The daemon records its own calls
+    total_tokens = 0
+    total_cost = 0.0
+    done = 0
+    cancel_event = threading.Event()
+    local = threading.local()
 
-    # We'll just assume 50% input / 50% output as an estimate for now
-    prompt_tokens = tokens // 2
-    completion_tokens = tokens - prompt_tokens
+    def process(path: str) -> dict:
+        # A daemon connection carries one request at a time, so every worker opens its own
+        worker_daemon = None
+        if daemon is not None:
+            worker_daemon = getattr(local, "daemon", None) or DaemonClient()
+            local.daemon = worker_daemon
+        return summarize_cached(path, args.style, args.provider, args.model, worker_daemon, cancel_event, args.sections)
 
-    cost = CostTracker.estimate_cost(model, prompt_tokens, completion_tokens)
+    def report(path: str, result: dict):
+        global total_tokens, total_cost, done
+        total_tokens += result.get("total_usage", {}).get("total_tokens", 0)
+        total_cost += result.get("cost", 0.0)
+        done += 1
 
-    print("\n📄 Final Summary:\n")
-    print(summary)
+        print(f"\n📄 {result.get('title') or path}\n")
+        print(result.get("final_summary", ""))
+        print()
+
+    try:
+        if args.concurrency <= 1:
+            for path in paths:
+                report(path, summarize_cached(path, args.style, args.provider, args.model, daemon, sections=args.sections))
+        else:
+            with ThreadPoolExecutor(max_workers=args.concurrency, thread_name_prefix="bulk") as pool:
+                futures = {pool.submit(process, path): path for path in paths}
+                try:
+                    for future in as_completed(futures):
+                        report(futures[future], future.result())
+                except KeyboardInterrupt:
+                    cancel_event.set()
+                    pool.shutdown(wait=True, cancel_futures=True)
+                    raise
+
+    except KeyboardInterrupt:
+        # Ctrl-C closes the running event generator (or cancels the workers), so no further chunks are sent
+        print("\n⏹ Stopped early.")
 
     print("\n📊 Token Usage:")
-    print(f"Total Tokens: {tokens}")
-    print(f"Estimated Cost ({model}): ${cost:.6f}")
+    print(f"Papers: {done}/{len(paths)}")
+    print(f"Total Tokens: {total_tokens}")
+    print(f"Estimated Cost: ${total_cost:.6f}")
+
+    if profiler:
+        written = profiler.stop()
+        print(f"\n🔬 Profiles: {', '.join(written)}")
+        if daemon is not None:
+            print("Note: papers summarized by the daemon are profiled in the daemon process, not here.")
+
+    if args.trace:
+        from infra.tracing import finish_cli_tracing
 
+        summary = finish_cli_tracing(metrics_path)
+        print(f"\n⏱ Trace: {args.trace} (metrics: {metrics_path})\n")
+        print(summary)
+        if daemon is not None:
+            print("Note: papers summarized by the daemon are traced in the daemon process (see its `metrics` method).")
@@ -0,0 +1,349 @@
+import argparse
+import hmac
+import ipaddress
+import json
+import os
+import socket
+import threading
+import time
+from contextlib import closing
+from typing import Iterator, List, Optional, Tuple
+from infra.config import Config
+
+
+def _parse_address(address: str) -> Tuple[str, object]:
+    """
+    "host:port" -> TCP, anything else is a Unix socket path.
+    """
+    host, _, port = address.rpartition(":")
+    if host and port.isdigit() and "/" not in address:
+        return "tcp", (host, int(port))
+    return "unix", address
+
+
+def _is_loopback(host: str) -> bool:
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host.strip("[]")).is_loopback
+    except ValueError:
+        return False  # Host names other than localhost may resolve anywhere
+
+
+class ResearchDaemon:
+    """
+    Long-running local service that keeps LLM clients, tokenizer encodings and JSON
+    indexes warm, and serves summarize/compare/search requests over a local socket.
+
+    Protocol (newline-delimited JSON, any number of requests per connection):
+        request:  {"method": str, "params": dict, "stream": bool}
+        response: zero or more {"event": dict} lines (when "stream" is true),
+                  then exactly one {"result": ...} or {"error": str} line.
+
+    Methods: ping, stats, metrics, summarize_pdf, compare_papers, search_by_author, search_by_title.
+
+    Security: the daemon reads any PDF path it is given and spends LLM credits on it. The Unix
+    socket is only accessible to its owner; a TCP address must be loopback unless a token
+    (DAEMON_TOKEN) is set, in which case every request must carry it as "token". The protocol
+    is not encrypted, so do not expose a TCP daemon beyond a trusted network even with a token.
+    """
+
+    def __init__(self, address: Optional[str] = None, workers: Optional[int] = None, token: Optional[str] = None):
+        self.address = address or Config.DAEMON_ADDRESS
+        self.token = token if token is not None else Config.DAEMON_TOKEN
+        # Job queue: bounds concurrent LLM-heavy jobs; searches are never queued behind them
+        self._jobs = threading.BoundedSemaphore(workers or Config.DAEMON_WORKERS)
+        self._clients = {}
+        self._clients_lock = threading.Lock()
+        self._started = time.time()
+        self._requests = 0
+        self._requests_lock = threading.Lock()
+        self._server = None
+
+    def warm_up(self):
+        """
+        Loads tokenizer encodings and indexes once so the first request does not pay for them.
+        """
+        from domain.paper_index import PaperIndex
+        from tools.author_cache import AuthorCache
+        from utils.token_counter import TokenCounter
+
+        PaperIndex.load_all()
+        AuthorCache.get_by_author("")
+        try:
+            TokenCounter.count_tokens("warm up")
+        except Exception as e:
+            print(f"[WARN] Tokenizer warm-up failed: {e}")
+
+    def _llm(self, provider: Optional[str], model: Optional[str]):
+        from agents.llm_client import LLMClient
+
+        # Shared process-wide, so daemon jobs reuse the same pooled connections
+        llm = LLMClient.shared(provider, model)
+        with self._clients_lock:
+            self._clients[(provider, model)] = llm
+        return llm
+
+    # --- Methods -----------------------------------------------------------------
+
+    def ping(self) -> str:
+        return "pong"
+
+    def stats(self) -> dict:
+        from agents.llm_client import LLMClient
+
+        return {
+            "uptime": round(time.time() - self._started, 1),
+            "requests": self._requests,
+            "llm_clients": len(self._clients),
+            "llm_endpoints": LLMClient.endpoint_stats(),
+            "llm_hedging": LLMClient.hedge_stats(),
+            "pid": os.getpid(),
+        }
+
+    def metrics(self) -> str:
+        """
+        Per-stage latency, token, retry and cache metrics in Prometheus text format.
+        """
+        from infra.tracing import tracer
+        return tracer.prometheus()
+
+    def search_by_title(self, query: str, threshold: float = 0.4) -> list:
+        from services.search_service import SearchService
+        return SearchService.search_by_title(query, threshold)
+
+    def search_by_author(self, name: str, folder: str = "") -> list:
+        from services.author_search import AuthorSearch
+        return AuthorSearch.search_by_author(name, folder)
+
+    def summarize_pdf(self, path: str, style: str = "default", provider: Optional[str] = None, model: Optional[str] = None, sections: Optional[List[str]] = None) -> Iterator[dict]:
+        from services.summarizer import SummarizerService
+        from tools.cache_manager import CacheManager
+
+        file_hash = CacheManager.get_file_hash(path)
+        cache_key = CacheManager.style_key(style, sections)
+        if CacheManager.is_cached(file_hash, cache_key):
+            yield {"event": "final", "result": CacheManager.load_cached_summary(file_hash, cache_key), "cached": True}
+            return
+
+        with self._jobs:
+            events = SummarizerService.iter_summarize_paper(path, style, self._llm(provider, model), sections=sections)
+            with closing(events):
+                for event in events:
+                    if event["event"] == "final" and SummarizerService.is_complete(event["result"]):
+                        CacheManager.save_summary(file_hash, cache_key, event["result"])
+                    yield event
+
+    def compare_papers(self, file_path_1: str, file_path_2: str, style: str = "default", provider: Optional[str] = None, model: Optional[str] = None, sections: Optional[List[str]] = None) -> Iterator[dict]:
+        from services.summarizer import SummarizerService
+        from tools.cache_manager import CacheManager
+
+        combined_key = CacheManager.get_combined_hash(file_path_1, file_path_2)
+        cache_key = CacheManager.style_key(style, sections)
+        if CacheManager.is_cached(combined_key, cache_key):
+            yield {"event": "final", "result": CacheManager.load_cached_summary(combined_key, cache_key), "cached": True}
+            return
+
+        with self._jobs:
+            events = SummarizerService.iter_compare_papers(file_path_1, file_path_2, style, self._llm(provider, model), sections=sections)
+            with closing(events):
+                for event in events:
+                    if event["event"] == "final" and SummarizerService.is_complete(event["result"]):
+                        CacheManager.save_summary(combined_key, cache_key, event["result"])
+                    yield event
+
+    METHODS = {"ping", "stats", "metrics", "search_by_title", "search_by_author", "summarize_pdf", "compare_papers"}
+    STREAMING_METHODS = {"summarize_pdf", "compare_papers"}
+
+    # --- Server ------------------------------------------------------------------
+
+    def handle(self, request: dict, send):
+        """
+        Executes one request, calling `send(dict)` for every response line.
+        """
+        with self._requests_lock:
+            self._requests += 1
+        method = request.get("method")
+        params = request.get("params") or {}
+
+        if self.token and not hmac.compare_digest(str(request.get("token") or ""), self.token):
+            send({"error": "Unauthorized: missing or invalid daemon token"})
+            return
+
+        if method not in self.METHODS:
+            send({"error": f"Unknown method '{method}'"})
+            return
+
+        try:
+            if method in self.STREAMING_METHODS:
+                events = getattr(self, method)(**params)
+                with closing(events):
+                    for event in events:
+                        if event["event"] == "final":
+                            send({"result": event["result"]})
+                        elif request.get("stream"):
+                            send({"event": event})
+            else:
+                send({"result": getattr(self, method)(**params)})
+        except (BrokenPipeError, ConnectionResetError):
+            raise
+        except Exception as e:
+            print(f"[ERROR] Daemon request '{method}' failed: {e}")
+            send({"error": str(e)})
+
+    def serve_forever(self):
+        import socketserver
+
+        daemon = self
+        kind, address = _parse_address(self.address)
+        if kind == "tcp" and not _is_loopback(address[0]) and not self.token:
+            raise ValueError(f"Refusing to listen on {self.address} without authentication; bind to 127.0.0.1 or set DAEMON_TOKEN")
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                def send(payload: dict):
+                    self.wfile.write((json.dumps(payload) + "\n").encode("utf-8"))
+                    self.wfile.flush()
+
+                for line in self.rfile:
+                    if not line.strip():
+                        continue
+                    try:
+                        daemon.handle(json.loads(line), send)
+                    except (BrokenPipeError, ConnectionResetError):
+                        return  # Client went away; closing() above stops the running job
+
+        if kind == "unix":
+            if os.path.exists(address):
+                os.remove(address)
+            os.makedirs(os.path.dirname(address) or ".", exist_ok=True)
+            server_class = type("Server", (socketserver.ThreadingMixIn, socketserver.UnixStreamServer), {"daemon_threads": True})
+        else:
+            server_class = type("Server", (socketserver.ThreadingMixIn, socketserver.TCPServer), {"daemon_threads": True, "allow_reuse_address": True})
+
+        if kind == "unix":
+            previous = os.umask(0o177)  # Socket is created owner-only, with no window where others can connect
+            try:
+                self._server = server_class(address, Handler)
+            finally:
+                os.umask(previous)
+        else:
+            self._server = server_class(address, Handler)
+        print(f"Research daemon listening on {self.address}")
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+            if kind == "unix" and os.path.exists(address):
+                os.remove(address)
+
+    def shutdown(self):
+        if self._server:
+            self._server.shutdown()
+
+
+class DaemonClient:
+    """
+    Thin client for ResearchDaemon. Keeps one connection open for repeated requests.
+    """
+
+    def __init__(self, address: Optional[str] = None, timeout: Optional[float] = None, token: Optional[str] = None):
+        self.address = address or Config.DAEMON_ADDRESS
+        self.timeout = timeout
+        self.token = token if token is not None else Config.DAEMON_TOKEN
+        self._sock = None
+        self._file = None
+
+    @staticmethod
+    def available(address: Optional[str] = None) -> bool:
+        """
+        Cheap check whether a daemon is listening (no request is sent).
+        """
+        kind, target = _parse_address(address or Config.DAEMON_ADDRESS)
+        if kind == "unix" and not os.path.exists(target):
+            return False
+        try:
+            with closing(DaemonClient._connect(kind, target, timeout=0.2)):
+                return True
+        except OSError:
+            return False
+
+    @staticmethod
+    def _connect(kind: str, target, timeout: Optional[float] = None) -> socket.socket:
+        if kind == "unix":
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        else:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.settimeout(timeout)
+        sock.connect(target)
+        sock.settimeout(None)
+        return sock
+
+    def _ensure_connected(self):
+        if self._sock is None:
+            self._sock = self._connect(*_parse_address(self.address), timeout=self.timeout)
+            self._file = self._sock.makefile("rwb")
+
+    def close(self):
+        if self._sock is not None:
+            self._file.close()
+            self._sock.close()
+            self._sock = None
+            self._file = None
+
+    def stream(self, method: str, **params) -> Iterator[dict]:
+        """
+        Sends a request and yields progress events, ending with {"event": "final", "result": ...}.
+        Closing the generator early drops the connection, which stops the job on the daemon.
+        """
+        self._ensure_connected()
+        request = {"method": method, "params": params, "stream": True}
+        if self.token:
+            request["token"] = self.token
+        self._file.write((json.dumps(request) + "\n").encode("utf-8"))
+        self._file.flush()
+
+        finished = False
+        try:
+            for line in self._file:
+                response = json.loads(line)
+                if "event" in response:
+                    yield response["event"]
+                    continue
+                finished = True
+                if "error" in response:
+                    raise RuntimeError(f"Daemon error: {response['error']}")
+                yield {"event": "final", "result": response["result"]}
+                return
+            raise ConnectionError("Daemon closed the connection")
+        finally:
+            if not finished:
+                self.close()
+
+    def call(self, method: str, **params):
+        """
+        Sends a request and returns its result.
+        """
+        result = None
+        for event in self.stream(method, **params):
+            if event["event"] == "final":
+                result = event["result"]
+        return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the research assistant as a resident local service.")
+    parser.add_argument("--address", type=str, default=Config.DAEMON_ADDRESS, help="Unix socket path or host:port (loopback only unless DAEMON_TOKEN is set)")
+    parser.add_argument("--workers", type=int, default=Config.DAEMON_WORKERS, help="Concurrent summarize/compare jobs")
+    parser.add_argument("--trace", type=str, help="Also append every span to this JSONL file")
+    args = parser.parse_args()
+
+    from infra.tracing import tracer
+    from tools.usage_ledger import UsageLedger
+
+    tracer.enable(args.trace)  # Aggregates are always kept for the `metrics` method
+    UsageLedger.install()
+
+    daemon = ResearchDaemon(args.address, args.workers)
+    daemon.warm_up()
+    daemon.serve_forever()
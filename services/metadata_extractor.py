@@ -1,7 +1,6 @@
 from typing import Optional
-from agents.llm_client import LLMClient
 
-def extract_metadata_with_llm(text: str, llm: Optional[LLMClient] = None) -> dict:
+def extract_metadata_with_llm(text: str, llm: Optional["LLMClient"] = None) -> dict:
     """
     Uses the LLM to extract metadata like title and authors from the top portion of the paper.
 
@@ -12,10 +11,15 @@ def extract_metadata_with_llm(text: str, llm: Optional[LLMClient] = None) -> dic
     Returns:
         dict: {
             "title": str,
-            "authors": list[str]
+            "authors": list[str],
+            "model": str,  # Model that answered (MODEL_METADATA when set)
+            "usage": dict
         }
     """
-    llm = llm or LLMClient()
+    from agents.llm_client import LLMClient
+
+    llm = LLMClient.for_stage("metadata", llm)
+    response = {"usage": {}}
 
     prompt = (
         "You are a research assistant. Your task is to extract metadata from the beginning of a research paper.\n"
@@ -34,12 +38,16 @@ def extract_metadata_with_llm(text: str, llm: Optional[LLMClient] = None) -> dic
 
         return {
             "title": metadata.get("title", "").strip(),
-            "authors": metadata.get("authors", [])
+            "authors": metadata.get("authors", []),
+            "model": llm.model,
+            "usage": response["usage"]
         }
 
     except Exception as e:
         print(f"[ERROR] Failed to extract metadata via LLM: {e}")
         return {
             "title": "",
-            "authors": []
+            "authors": [],
+            "model": getattr(llm, "model", None),
+            "usage": response["usage"]
         }
@@ -0,0 +1,433 @@
+import heapq
+import math
+import os
+import time
+from typing import Dict, List, Optional
+from infra.config import Config
+from infra.models import SUPPORTED_MODELS, stage_models
+from tools.cost_tracker import CostTracker
+from utils.message_utils import build_comparison_prompt, build_compressed_summary_prompt, build_compression_prompt, build_reduction_prompt
+
+# Mirrors the live pipeline: Paper.chunk_text defaults, the metadata prompt budget in Paper.from_pdf
+CHUNK_MAX_TOKENS = 500
+CHUNK_OVERLAP = 50
+METADATA_PROMPT_TOKENS = 800
+METADATA_COMPLETION_TOKENS = 60  # {"title": ..., "authors": [...]}
+MESSAGE_OVERHEAD_TOKENS = 7  # Chat formatting billed per single-message request
+FULL_TEXT_INSTRUCTION = "Summarize the following research paper text concisely, preserving all technical detail:\n\n"
+METADATA_INSTRUCTION_TOKENS = 90  # Fixed part of the prompt in services/metadata_extractor.py
+
+
+class PlannerService:
+    """
+    Dry-run planner: parses and tokenizes papers locally and simulates the requests
+    `SummarizerService` would send (metadata, chunk compression, final prompt), without
+    calling the LLM.
+
+    Token counts use the model's tokenizer when it is available and ~4 characters per
+    token otherwise. Completion lengths and latency come from the PLANNER_* settings,
+    wall time from the concurrency and the provider rate limits (LLM_RPM_LIMIT, LLM_TPM_LIMIT).
+    Every request is priced at its stage's model (MODEL_<STAGE> routing, see LLMClient.for_stage).
+    Cached results, near-duplicate reuse and section selection are decided by the same
+    SummarizerService helpers the live run uses.
+    """
+
+    _encodings: Dict[str, object] = {}  # model -> tiktoken encoding, or None when unavailable
+
+    @staticmethod
+    def plan_summary(path: str, style: str = "default", provider: Optional[str] = None, model: Optional[str] = None, skip_cached: bool = True, sections: Optional[List[str]] = None) -> dict:
+        """
+        Estimates one `summarize_paper` run (free when its summary is cached and `skip_cached` is set).
+
+        Returns:
+            dict: see `plan_bulk` (a batch of one paper).
+        """
+        return PlannerService.plan_bulk([path], style, provider, model, concurrency=1, skip_cached=skip_cached, kind="summary", sections=sections)
+
+    @staticmethod
+    def plan_comparison(path1: str, path2: str, style: str = "default", provider: Optional[str] = None, model: Optional[str] = None, skip_cached: bool = True, sections: Optional[List[str]] = None) -> dict:
+        """
+        Estimates one `compare_papers` run: both papers are parsed and compressed, then one comparison prompt is sent.
+        A pair with a cached comparison for `style` (and `sections`) costs nothing when `skip_cached` is set.
+
+        Returns:
+            dict: see `plan_bulk`; "papers" holds both papers and the final request is under stage "comparison".
+        """
+        from tools.cache_manager import CacheManager
+
+        provider, model_data = PlannerService._resolve_model(provider, model)
+        routing = PlannerService._routing(provider, model_data)
+        if skip_cached and CacheManager.is_cached(CacheManager.get_combined_hash(path1, path2), CacheManager.style_key(style, sections)):
+            papers = [{"path": path, "cached": True, "plan": [], "parse_seconds": 0.0} for path in (path1, path2)]
+            return PlannerService._summarize("comparison", provider, model_data, papers, [], [0.0, 0.0], concurrency=1)
+
+        papers = [PlannerService._plan_paper(path, style, routing, final=None, sections=sections) for path in (path1, path2)]
+
+        compressed = [paper["compressed_tokens"] for paper in papers]
+        prompt = PlannerService._tokens(build_comparison_prompt("", "", style, sections=sections), model_data["id"]) + sum(compressed)
+        comparison = PlannerService._request("comparison", prompt, Config.PLANNER_SUMMARY_TOKENS, routing["comparison"])
+
+        # compare_papers runs everything on one thread: both papers, then the comparison
+        requests = [r for paper in papers for r in paper["plan"]] + [comparison]
+        durations = [paper["parse_seconds"] + sum(r["seconds"] for r in paper["plan"]) for paper in papers]
+        return PlannerService._summarize("comparison", provider, model_data, papers, requests, durations, concurrency=1, tail_seconds=comparison["seconds"])
+
+    @staticmethod
+    def plan_bulk(
+        paths: List[str],
+        style: str = "default",
+        provider: Optional[str] = None,
+        model: Optional[str] = None,
+        concurrency: Optional[int] = None,
+        skip_cached: bool = True,
+        kind: str = "bulk",
+        sections: Optional[List[str]] = None,
+    ) -> dict:
+        """
+        Estimates summarizing every paper in `paths` the way main.py does.
+
+        Args:
+            paths (List[str]): PDF paths.
+            style (str): Summary style (changes the final prompt and the cache key).
+            provider (str, optional): LLM provider, defaults to Config.LLM_PROVIDER.
+            model (str, optional): Model, defaults to Config.OPENAI_MODEL.
+            concurrency (int, optional): Papers summarized at once, defaults to Config.BULK_CONCURRENCY.
+            skip_cached (bool): Papers with a cached summary for `style` (and `sections`) cost nothing.
+            sections (List[str], optional): Only these sections are compressed (see SectionIndex).
+
+        Returns:
+            dict: {
+                "kind": str, "provider": str, "model": str,
+                "papers": [{"path", "tokens", "chunks", "skipped_chunks", "reused_chunks", "cached", "reused",
+                            "requests", "prompt_tokens", "completion_tokens", "cost", "seconds"}],
+                "stages": {stage: {"model", "requests", "prompt_tokens", "completion_tokens", "cost"}},
+                "requests": int, "prompt_tokens": int, "completion_tokens": int, "total_tokens": int,
+                "cost": float, "wall_time": float, "bottleneck": str, "concurrency": int,
+                "exact_tokens": bool
+            }
+        """
+        from tools.cache_manager import CacheManager
+
+        provider, model_data = PlannerService._resolve_model(provider, model)
+        routing = PlannerService._routing(provider, model_data)
+        concurrency = max(1, concurrency or Config.BULK_CONCURRENCY)
+
+        cache_key = CacheManager.style_key(style, sections)
+        papers = []
+        for path in paths:
+            if skip_cached and CacheManager.is_cached(CacheManager.get_file_hash(path), cache_key):
+                papers.append({"path": path, "cached": True, "plan": [], "parse_seconds": 0.0})
+            else:
+                papers.append(PlannerService._plan_paper(path, style, routing, sections=sections))
+
+        requests = [r for paper in papers for r in paper["plan"]]
+        durations = [paper["parse_seconds"] + sum(r["seconds"] for r in paper["plan"]) for paper in papers]
+        return PlannerService._summarize(kind, provider, model_data, papers, requests, durations, concurrency)
+
+    # --- Simulation ----------------------------------------------------------------
+
+    @staticmethod
+    def _resolve_model(provider: Optional[str], model: Optional[str]):
+        provider = (provider or Config.LLM_PROVIDER or "").lower()
+        model = (model or Config.OPENAI_MODEL or "").lower()
+        model_data = SUPPORTED_MODELS.get(provider, {}).get(model)
+        if not model_data:
+            raise ValueError(f"Unsupported model '{model}' for provider '{provider}'")
+        return provider, model_data
+
+    @staticmethod
+    def _routing(provider: str, model_data: dict) -> Dict[str, dict]:
+        """
+        Model data per pipeline stage: the MODEL_<STAGE> override when set, otherwise the run's model.
+        """
+        overrides = stage_models(provider)
+        return {
+            stage: SUPPORTED_MODELS[provider][overrides[stage]] if stage in overrides else model_data
+            for stage in ("metadata", "compression", "reduction", "summary", "comparison")
+        }
+
+    @staticmethod
+    def _tokens(text: str, model: str) -> int:
+        if not text:
+            return 0
+        encoding = PlannerService._tokenizer(model)
+        if encoding is not None:
+            return len(encoding.encode(text))
+        return max(1, len(text) // 4)
+
+    @staticmethod
+    def _tokenizer(model: str):
+        # None when tiktoken or its encoding files are unavailable (e.g. offline); the caller estimates instead
+        if model not in PlannerService._encodings:
+            try:
+                import tiktoken
+                PlannerService._encodings[model] = tiktoken.encoding_for_model(model)
+            except Exception as e:
+                print(f"[WARN] Tokenizer for '{model}' unavailable, estimating ~4 characters per token: {e}")
+                PlannerService._encodings[model] = None
+        return PlannerService._encodings[model]
+
+    @staticmethod
+    def _chunk_sizes(tokens: int, max_tokens: int = CHUNK_MAX_TOKENS, overlap: int = CHUNK_OVERLAP) -> List[int]:
+        """
+        Token counts of the chunks TextChunker.chunk_text would produce for `tokens` tokens in "fixed" mode.
+        """
+        window = max(10, max_tokens - 5)
+        step = window - overlap
+        return [min(window, tokens - start) for start in range(0, tokens, step)]
+
+    @staticmethod
+    def _filter_chunks(text: str, sizes: List[int], max_tokens: int = CHUNK_MAX_TOKENS, overlap: int = CHUNK_OVERLAP, sections: Optional[List[str]] = None):
+        """
+        Runs the summarizer's chunk selection over character slices standing in for the planned chunks,
+        and returns (sizes of the kept chunks, number of skipped chunks, matched sections).
+        """
+        from domain.text_chunk import Chunk
+        from services.summarizer import SummarizerService
+
+        if len(sizes) < 2 and not sections:
+            return sizes, 0, None
+        step = max(10, max_tokens - 5) - overlap
+        chars = len(text) / max(1, sum(sizes) - overlap * (len(sizes) - 1))
+        chunks = [Chunk(i, text[int(i * step * chars):int((i * step + size) * chars)], size) for i, size in enumerate(sizes)]
+        selection = SummarizerService.select_chunks(chunks, sections)
+        return [chunk.token_count for chunk in selection["kept"]], len(chunks) - len(selection["kept"]), selection.get("sections", {}).get("matched")
+
+    @staticmethod
+    def _text_chunks(text: str, model: str, mode: str, max_tokens: int = CHUNK_MAX_TOKENS, sections: Optional[List[str]] = None):
+        """
+        Structure-aware or content-defined chunks as TextChunker would cut them, after the summarizer's chunk
+        selection (requested sections or ChunkFilter); returns (sizes of the kept chunks, number of skipped
+        chunks, whether each kept chunk's compression is cached, matched sections).
+        """
+        from services.summarizer import SummarizerService
+        from tools.cache_manager import CacheManager
+        from tools.text_chunker import TextChunker
+
+        chunks = TextChunker.chunk_text(text, max_tokens, CHUNK_OVERLAP, mode=mode)
+        selection = SummarizerService.select_chunks(chunks, sections)
+        kept = selection["kept"]
+        # Only content-defined chunks are cached (see SummarizerService.iter_compress_paper)
+        cached = [mode == "content" and CacheManager.load_chunk_compression(build_compression_prompt(chunk.text), model) is not None for chunk in kept]
+        return [chunk.token_count for chunk in kept], len(chunks) - len(kept), cached, selection.get("sections", {}).get("matched")
+
+    @staticmethod
+    def _request(stage: str, prompt_tokens: int, completion_tokens: int, model_data: dict) -> dict:
+        prompt_tokens += MESSAGE_OVERHEAD_TOKENS
+        seconds = Config.PLANNER_REQUEST_LATENCY + completion_tokens / max(Config.PLANNER_TOKENS_PER_SECOND, 1e-6)
+        cost = CostTracker.estimate_cost(
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            cost_per_1k_tokens={"input": model_data["input_cost_per_1k"], "output": model_data["output_cost_per_1k"]}
+        )
+        return {"stage": stage, "model": model_data["id"], "prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "cost": cost, "seconds": seconds}
+
+    @staticmethod
+    def _plan_paper(path: str, style: str, routing: Dict[str, dict], final: Optional[str] = "summary", sections: Optional[List[str]] = None) -> dict:
+        """
+        Parses one paper locally and lists the LLM requests summarize_paper would make for it
+        (without the final prompt when `final` is None, as for each paper of a comparison).
+        """
+        from services.summarizer import SummarizerService
+        from tools.pdf_parser import PDFParser
+
+        model = routing["summary"]["id"]
+        started = time.perf_counter()
+        # Same reuse decision as summarize_paper (compare_papers never reuses near-duplicates)
+        reuse = SummarizerService.find_reuse(path, style, routing["compression"]["id"], sections) if final else {"dedup": None, "summary": None, "compression": None}
+        parsed = reuse["dedup"]["parsed"] if reuse["dedup"] else PDFParser.extract_info(path)
+        tokens = PlannerService._tokens(parsed.raw_text, model)
+        parse_seconds = time.perf_counter() - started
+
+        metadata = PlannerService._request("metadata", min(tokens, METADATA_PROMPT_TOKENS) + METADATA_INSTRUCTION_TOKENS, METADATA_COMPLETION_TOKENS, routing["metadata"])
+        paper = {
+            "path": path,
+            "tokens": tokens,
+            "chunks": 0,
+            "skipped_chunks": 0,
+            "reused_chunks": 0,
+            "cached": False,
+            "exact_tokens": PlannerService._tokenizer(model) is not None,
+            "parse_seconds": parse_seconds,
+        }
+
+        if reuse["summary"]:
+            # A near-duplicate's summary is reused; only this paper's own metadata is extracted
+            return {**paper, "reused": "summary", "compressed_tokens": 0, "plan": [metadata]}
+
+        if reuse["compression"]:
+            # Cached compression (with its metadata): only the final prompt is sent
+            cached = reuse["compression"]
+            compressed = PlannerService._tokens(cached["compressed_text"], model)
+            instruction = PlannerService._tokens(build_compressed_summary_prompt("", style), model)
+            plan = [PlannerService._request(final, instruction + compressed, Config.PLANNER_SUMMARY_TOKENS, routing[final])]
+            return {**paper, "chunks": cached["chunks"], "reused": "compression", "compressed_tokens": compressed, "plan": plan}
+
+        plan = [metadata]
+
+        if Config.CHUNKING == "fixed":
+            chunks = PlannerService._chunk_sizes(tokens)
+            chunks, skipped, matched = PlannerService._filter_chunks(parsed.raw_text, chunks, sections=sections)
+            cached = [False] * len(chunks)
+        else:
+            chunks, skipped, cached, matched = PlannerService._text_chunks(parsed.raw_text, routing["compression"]["id"], Config.CHUNKING, sections=sections)
+        chunk_tokens = sum(chunks)
+        try:
+            from utils.token_counter import TokenCounter
+            context = TokenCounter.get_max_tokens(routing["compression"]["id"])
+        except Exception:
+            context = 4096
+
+        # Same branch as iter_compress_paper: one full-text call if it fits, otherwise one call per chunk
+        ratio = Config.PLANNER_COMPRESSION_RATIO
+        outputs: List[int] = []
+        if not chunks:
+            pass
+        elif chunk_tokens < context:
+            outputs = [max(1, int(chunk_tokens * ratio))]
+            plan.append(PlannerService._request("compression", PlannerService._tokens(FULL_TEXT_INSTRUCTION, model) + chunk_tokens, outputs[0], routing["compression"]))
+        else:
+            instruction = PlannerService._tokens(build_compression_prompt("x"), model) - 1
+            outputs = [max(1, int(size * ratio)) for size in chunks]
+            # Chunks with a cached compression (content-defined chunking) are not sent again
+            plan += [PlannerService._request("compression", instruction + size, output, routing["compression"]) for size, output, hit in zip(chunks, outputs, cached) if not hit]
+
+        # Same rounds as iter_reduce_sections (a comparison gives each paper half the budget)
+        budget = Config.REDUCTION_MAX_TOKENS if final else Config.REDUCTION_MAX_TOKENS // 2
+        fan_in = max(2, Config.REDUCTION_FAN_IN)
+        instruction = PlannerService._tokens(build_reduction_prompt("x"), model) - 1
+        while len(outputs) > 1 and sum(outputs) > budget:
+            merged = []
+            for start in range(0, len(outputs), fan_in):
+                group = outputs[start:start + fan_in]
+                if len(group) == 1:
+                    merged.append(group[0])
+                    continue
+                merged.append(max(1, int(sum(group) * ratio)))
+                plan.append(PlannerService._request("reduction", instruction + sum(group), merged[-1], routing["reduction"]))
+            outputs = merged
+        compressed = sum(outputs)
+
+        if final:
+            instruction = PlannerService._tokens(build_compressed_summary_prompt("", style, sections=matched), model)
+            plan.append(PlannerService._request(final, instruction + compressed, Config.PLANNER_SUMMARY_TOKENS, routing[final]))
+
+        return {
+            **paper,
+            "chunks": len(chunks),
+            "skipped_chunks": skipped,
+            "reused_chunks": sum(cached) if chunk_tokens >= context else 0,
+            "reused": None,
+            "compressed_tokens": compressed,
+            "plan": plan,
+        }
+
+    @staticmethod
+    def _wall_time(durations: List[float], concurrency: int) -> float:
+        """
+        Makespan of the per-paper durations on `concurrency` workers, taking papers in order.
+        """
+        workers = [0.0] * min(concurrency, max(1, len(durations)))
+        for duration in durations:
+            heapq.heappush(workers, heapq.heappop(workers) + duration)
+        return max(workers)
+
+    @staticmethod
+    def _summarize(kind: str, provider: str, model_data: dict, papers: List[dict], requests: List[dict], durations: List[float], concurrency: int, tail_seconds: float = 0.0) -> dict:
+        def cost(plan: List[dict]) -> float:
+            return round(sum(r["cost"] for r in plan), 6)
+
+        stages: Dict[str, dict] = {}
+        for stage in dict.fromkeys(r["stage"] for r in requests):
+            plan = [r for r in requests if r["stage"] == stage]
+            stages[stage] = {
+                "model": plan[0]["model"],
+                "requests": len(plan),
+                "prompt_tokens": sum(r["prompt_tokens"] for r in plan),
+                "completion_tokens": sum(r["completion_tokens"] for r in plan),
+                "cost": cost(plan),
+            }
+
+        prompt_tokens = sum(r["prompt_tokens"] for r in requests)
+        completion_tokens = sum(r["completion_tokens"] for r in requests)
+
+        # Wall time is the slowest of: the work spread over the workers, and each provider limit
+        bounds = {"concurrency": (PlannerService._wall_time(durations, concurrency) if durations else 0.0) + tail_seconds}
+        if Config.LLM_RPM_LIMIT > 0:
+            bounds["rpm"] = len(requests) / Config.LLM_RPM_LIMIT * 60
+        if Config.LLM_TPM_LIMIT > 0:
+            bounds["tpm"] = (prompt_tokens + completion_tokens) / Config.LLM_TPM_LIMIT * 60
+        bottleneck = max(bounds, key=bounds.get)
+
+        return {
+            "kind": kind,
+            "provider": provider,
+            "model": model_data["id"],
+            "papers": [
+                {
+                    "path": paper["path"],
+                    "tokens": paper.get("tokens", 0),
+                    "chunks": paper.get("chunks", 0),
+                    "skipped_chunks": paper.get("skipped_chunks", 0),
+                    "reused_chunks": paper.get("reused_chunks", 0),
+                    "cached": paper["cached"],
+                    "reused": paper.get("reused"),
+                    "requests": len(paper["plan"]),
+                    "prompt_tokens": sum(r["prompt_tokens"] for r in paper["plan"]),
+                    "completion_tokens": sum(r["completion_tokens"] for r in paper["plan"]),
+                    "cost": cost(paper["plan"]),
+                    "seconds": round(duration, 2),
+                }
+                for paper, duration in zip(papers, durations)
+            ],
+            "stages": stages,
+            "requests": len(requests),
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "cost": cost(requests),
+            "wall_time": round(bounds[bottleneck], 2),
+            "bottleneck": bottleneck,
+            "concurrency": concurrency,
+            "exact_tokens": all(paper.get("exact_tokens", True) for paper in papers),
+        }
+
+    # --- Output --------------------------------------------------------------------
+
+    @staticmethod
+    def format_plan(plan: dict) -> str:
+        """
+        Renders a plan as a plain-text report (per paper, per stage, totals).
+        """
+        lines = [f"Model: {plan['provider']}/{plan['model']}  |  concurrency: {plan['concurrency']}"]
+        if not plan["exact_tokens"]:
+            lines.append("Token counts are estimates (~4 characters per token); the tokenizer was unavailable.")
+
+        width = max([12] + [min(50, len(os.path.basename(p["path"])) + 2) for p in plan["papers"]])
+        lines.append("")
+        lines.append(f"{'Paper':<{width}}{'Tokens':>9}{'Chunks':>8}{'Requests':>10}{'Cost $':>10}{'Time s':>9}")
+        for p in plan["papers"]:
+            name = os.path.basename(p["path"])[:width - 2]
+            if p["cached"]:
+                lines.append(f"{name:<{width}}{'cached — no LLM calls':>54}")
+                continue
+            reused = f"  (reuses a cached {p['reused']})" if p.get("reused") else ""
+            lines.append(f"{name:<{width}}{p['tokens']:>9}{p['chunks']:>8}{p['requests']:>10}{p['cost']:>10.4f}{p['seconds']:>9.1f}{reused}")
+
+        lines.append("")
+        lines.append(f"{'Stage':<{width}}{'Model':<22}{'Requests':>10}{'Prompt':>10}{'Completion':>12}{'Cost $':>10}")
+        for stage, s in plan["stages"].items():
+            lines.append(f"{stage:<{width}}{s['model']:<22}{s['requests']:>10}{s['prompt_tokens']:>10}{s['completion_tokens']:>12}{s['cost']:>10.4f}")
+
+        lines.append("")
+        skipped = sum(p["skipped_chunks"] for p in plan["papers"])
+        if skipped:
+            lines.append(f"Chunks skipped before compression (references, acknowledgments, low density): {skipped}")
+        reused = sum(p.get("reused_chunks", 0) for p in plan["papers"])
+        if reused:
+            lines.append(f"Chunks unchanged since a cached version (compression reused): {reused}")
+        lines.append(f"Requests: {plan['requests']}  |  tokens: {plan['prompt_tokens']} prompt + {plan['completion_tokens']} completion")
+        lines.append(f"Estimated cost: ${plan['cost']:.4f}")
+        minutes = math.floor(plan["wall_time"] / 60)
+        lines.append(f"Expected wall time: {minutes}m {plan['wall_time'] - minutes * 60:.0f}s (bound by {plan['bottleneck']})")
+        return "\n".join(lines)
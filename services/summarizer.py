@@ -1,26 +1,44 @@
+import os
+import threading
+import time
+from contextlib import closing
 from domain.paper import Paper
+from domain.section_index import SectionIndex
 from domain.text_chunk import Chunk
-from typing import List, Optional
+from typing import Callable, Iterator, List, Optional
 from infra.config import Config
+from infra.tracing import span
+from tools.chunk_filter import ChunkFilter
+from tools.cache_manager import CacheManager
 from tools.cost_tracker import CostTracker
+from tools.dedup_index import DedupIndex
+from tools.pdf_parser import PDFParser
 from agents.llm_client import LLMClient
-from utils.message_utils import (build_compression_prompt, build_compressed_summary_prompt, build_summary_prompt)
+from utils.message_utils import (build_comparison_prompt, build_compression_prompt, build_compressed_summary_prompt, build_reduction_prompt, build_summary_prompt)
 from utils.token_counter import TokenCounter
 
 
 class SummarizerService:
 
     @staticmethod
-    def summarize_paper(path: str, style: str = "default", llm: Optional[LLMClient] = None, provider: Optional[str] = None, model: Optional[str] = None) -> dict:
+    def summarize_paper(path: str, style: str = "default", llm: Optional[LLMClient] = None, provider: Optional[str] = None, model: Optional[str] = None, on_token: Optional[Callable[[str], None]] = None, cancel_event: Optional[threading.Event] = None, sections: Optional[List[str]] = None) -> dict:
         """
         Summarizes the entire paper by:
         1. Compressing all chunks (preserving technical accuracy),
         2. Generating a styled summary from the full compressed content.
 
+        This is a blocking wrapper around `iter_summarize_paper`.
+
         Args:
             path (str): file path to the paper.
             style (str): Final summary style ('default', 'short', 'layman', etc.).
             llm (LLMClient, optional): Optional shared LLMClient instance.
+            on_token (Callable[[str], None], optional): If given, the final summary is streamed
+                and every text fragment is passed to this callback as it arrives.
+            cancel_event (threading.Event, optional): Set it to stop the run; no further chunks
+                are compressed and an in-flight stream is closed.
+            sections (List[str], optional): Only compress and summarize these sections
+                (e.g. ["methods"]); see domain/section_index.py for how names are matched.
 
         Returns:
             dict: {
@@ -34,91 +52,439 @@ class SummarizerService:
                     "completion_tokens": int,
                     "total_tokens": int
                 },
-                "cost": float
+                "stage_usage": {  # "metadata", "compression", "reduction", "summary"
+                    stage: {"model": str, "prompt_tokens": int, "completion_tokens": int, "total_tokens": int, "cost": float}
+                },
+                "cost": float,  # Sum of the stage costs, each at its own model's price
+                "cancelled": bool,
+                "failed_chunks": int,  # Chunk compressions that failed; their content is missing from the summary
+                "failed_merges": int,  # Section merges that failed; the summary saw unreduced (possibly truncated) input
+                "error": str | None,  # Set when the final summary request failed (the text may be cut off)
+                "sections": {"requested": List[str], "matched": List[str], "missing": List[str]}  # only when sections were given
             }
+
+        Use `is_complete` before caching a result.
+
+        Each stage runs on its MODEL_<STAGE> model when one is configured (see LLMClient.for_stage).
+        """
+        events = SummarizerService.iter_summarize_paper(
+            path, style, llm, provider, model,
+            stream=on_token is not None or cancel_event is not None,
+            cancel_event=cancel_event,
+            sections=sections
+        )
+        return SummarizerService._consume(events, on_token)
+
+    @staticmethod
+    def iter_summarize_paper(path: str, style: str = "default", llm: Optional[LLMClient] = None, provider: Optional[str] = None, model: Optional[str] = None, stream: bool = True, cancel_event: Optional[threading.Event] = None, sections: Optional[List[str]] = None) -> Iterator[dict]:
+        """
+        Summarizes a paper like `summarize_paper`, yielding progress events as each stage finishes.
+
+        Closing the generator (e.g. breaking out of the loop) stops the run: no further
+        chunks are compressed and an in-flight stream is closed.
+
+        Args:
+            path (str): file path to the paper.
+            style (str): Final summary style ('default', 'short', 'layman', etc.).
+            llm (LLMClient, optional): Optional shared LLMClient instance.
+            stream (bool): Stream the final summary as "token" events.
+            cancel_event (threading.Event, optional): Set it to stop the run from another thread.
+            sections (List[str], optional): Only compress and summarize these sections.
+
+        Yields:
+            dict: One of
+                {"event": "parsed", "title": str, "authors": List[str], "normalization": dict, "elapsed": float}
+                {"event": "near_duplicate", "path": str, "similarity": float, "reused": "summary" | "compression"}
+                {"event": "chunked", "chunks": int, "tokens": int, "sections": List[str], "elapsed": float}
+                {"event": "sections", "matched": List[str], "missing": List[str], "kept": int, "tokens_skipped": int, "elapsed": float}  # only when sections were given
+                {"event": "filtered", "kept": int, "skipped": int, "tokens_skipped": int, "elapsed": float}  # only when chunks were skipped
+                {"event": "chunk_compressed", "index": int, "total": int, "usage": dict, "latency": float}
+                {"event": "merged", "round": int, "sections": int, "usage": dict, "latency": float}  # tree reduction
+                {"event": "reduced", "source": str, "usage": dict, "elapsed": float}
+                {"event": "token", "text": str}
+                {"event": "final", "result": dict}  # same dict `summarize_paper` returns
         """
         if not path:
-            return {
-                "final_summary": "",
-                "title": "",
-                "authors": [],
-                "style": "",
-                "source": "full_text",
-                "chunks": 0,
-                "total_usage": {
-                    "prompt_tokens": 0,
-                    "completion_tokens": 0,
-                    "total_tokens": 0
-                },
-                "cost": 0.0
+            yield {
+                "event": "final",
+                "result": {
+                    "final_summary": "",
+                    "title": "",
+                    "authors": [],
+                    "style": "",
+                    "source": "full_text",
+                    "chunks": 0,
+                    "total_usage": {
+                        "prompt_tokens": 0,
+                        "completion_tokens": 0,
+                        "total_tokens": 0
+                    },
+                    "cost": 0.0
 
+                }
             }
+            return
+
+        with span("summarize_paper", path=path, style=style) as root:
+            llm = llm or LLMClient.shared(provider, model)
+            compress_llm = LLMClient.for_stage("compression", llm, provider)
+            reduce_llm = LLMClient.for_stage("reduction", llm, provider)
+            summary_llm = LLMClient.for_stage("summary", llm, provider)
+            stage_usage = {}
+            started = time.perf_counter()
+
+            # Near-duplicates (preprint vs. camera-ready, re-uploads) reuse what was already paid for
+            reuse = SummarizerService.find_reuse(path, style, getattr(compress_llm, "model", None), sections)
+            dedup, match = reuse["dedup"], reuse["summary"]
+            if match:
+                cached = CacheManager.load_cached_summary(match["file_hash"], style)
+                # The summary text is shared, but the title and authors must be this paper's own
+                paper = Paper.from_pdf(path, parsed=dedup["parsed"])
+                SummarizerService._add_stage_usage(stage_usage, "metadata", paper.metadata_usage, model=paper.metadata_usage.get("model"))
+                yield {"event": "parsed", "title": paper.title, "authors": paper.authors, "normalization": paper.normalization, "elapsed": time.perf_counter() - started}
+                DedupIndex.add_paper(dedup["file_hash"], path, dedup["signature"])
+                yield {"event": "near_duplicate", "path": match["path"], "similarity": match["similarity"], "reused": "summary"}
+                total_usage = SummarizerService._total_usage(stage_usage)
+                result = {
+                    **cached,
+                    "title": paper.title,
+                    "authors": paper.authors,
+                    "normalization": paper.normalization,
+                    "near_duplicate_of": {"path": match["path"], "similarity": match["similarity"]},
+                    "total_usage": total_usage,
+                    "stage_usage": stage_usage,
+                    "cost": round(sum(stage["cost"] for stage in stage_usage.values()), 6),
+                }
+                root.set(near_duplicate=True, total_tokens=total_usage["total_tokens"], cost=result["cost"])
+                yield {"event": "final", "result": result}
+                return
+
+            cached_compression = reuse["compression"]
+
+            #Step 1: Compress the full paper
+            if cached_compression:
+                metadata = {"title": cached_compression["title"], "authors": cached_compression["authors"]}
+                paper = Paper.from_pdf(path, metadata=metadata, parsed=dedup["parsed"])
+            elif dedup:
+                paper = Paper.from_pdf(path, parsed=dedup["parsed"])
+            else:
+                paper = Paper.from_pdf(path)
+            SummarizerService._add_stage_usage(stage_usage, "metadata", paper.metadata_usage, model=paper.metadata_usage.get("model"))
+            yield {"event": "parsed", "title": paper.title, "authors": paper.authors, "normalization": paper.normalization, "elapsed": time.perf_counter() - started}
+
+            if cached_compression:
+                near = dedup["match"]
+                if near and cached_compression["file_hash"] == near["file_hash"]:
+                    yield {"event": "near_duplicate", "path": near["path"], "similarity": near["similarity"], "reused": "compression"}
+                compressed_text = cached_compression["compressed_text"]
+                source = cached_compression["source"]
+                selection = {"skipped": cached_compression["skipped_chunks"]}
+                chunk_count = cached_compression["chunks"]
+                reused_chunks = 0
+                failed_chunks = 0
+                failed_merges = 0
+                compression_usage = {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+                root.set(compression_reused=True)
+            else:
+                paper.chunk_text()
+                yield {
+                    "event": "chunked",
+                    "chunks": len(paper.chunks),
+                    "tokens": sum(chunk.token_count for chunk in paper.chunks),
+                    "sections": SectionIndex.names(paper.chunks),
+                    "elapsed": time.perf_counter() - started
+                }
 
-        llm = llm or LLMClient(provider, model)
+                # Keep only the requested sections, or else drop references, acknowledgments,
+                # boilerplate and low-density chunks before any LLM call
+                selection = SummarizerService.select_chunks(paper.chunks, sections)
+                if "sections" in selection:
+                    yield SummarizerService._sections_event(selection, started)
+                    root.set(sections=selection["sections"]["matched"])
+                if selection["skipped"]:
+                    yield SummarizerService._filtered_event(selection, started)
+
+                with span("compress", chunks=len(selection["kept"])):
+                    compression = yield from SummarizerService.iter_compress_paper(selection["kept"], compress_llm, cancel_event=cancel_event)
+                SummarizerService._add_stage_usage(stage_usage, "compression", compression["usage"], compress_llm)
+
+                reduction = yield from SummarizerService.iter_reduce_sections(compression.get("sections") or [compression["compressed_text"]], reduce_llm, cancel_event=cancel_event)
+                SummarizerService._add_stage_usage(stage_usage, "reduction", reduction["usage"], reduce_llm)
+                compressed_text = reduction["compressed_text"]
+                compression_usage = SummarizerService._add_usage(dict(compression["usage"]), reduction["usage"])
+                source = "compressed" if compression.get("used_compression") else "full_text"
+                chunk_count = len(paper.chunks)
+                reused_chunks = compression.get("reused_chunks", 0)
+                failed_chunks = compression.get("failed_chunks", 0)
+                failed_merges = reduction["failed_merges"]
+
+                # A compression with failed chunks has holes, and one with failed merges is oversized;
+                # near-duplicates must not inherit either
+                if dedup and not failed_chunks and not failed_merges and not (cancel_event is not None and cancel_event.is_set()):
+                    CacheManager.save_compression(dedup["file_hash"], compress_llm.model, {
+                        "title": paper.title,
+                        "authors": paper.authors,
+                        "compressed_text": compressed_text,
+                        "source": source,
+                        "chunks": chunk_count,
+                        "skipped_chunks": selection["skipped"],
+                    })
+            if dedup:
+                DedupIndex.add_paper(dedup["file_hash"], path, dedup["signature"])
+            yield {"event": "reduced", "source": source, "usage": compression_usage, "elapsed": time.perf_counter() - started}
+
+
+            #Step 2: Build final prompt from the compressed version
+            final_prompt = build_compressed_summary_prompt(compressed_text, style, sections=selection.get("sections", {}).get("matched"))
 
-        #Step 1: Compress the full paper
-        paper = Paper.from_pdf(path)
-        paper.chunk_text()
-        compression = SummarizerService.compress_paper(paper.chunks, llm)
-        compressed_text = compression["compressed_text"]
-        compression_usage = compression["usage"]
+            try:
+                if cancel_event is not None and cancel_event.is_set():
+                    summary_response = {"text": "", "usage": {}, "cancelled": True, "error": None}
+                else:
+                    with span("final_prompt", stream=stream):
+                        summary_response = yield from SummarizerService._iter_complete(summary_llm, final_prompt, stream, cancel_event)
+                SummarizerService._add_stage_usage(stage_usage, "summary", summary_response["usage"], summary_llm)
+                total_usage = SummarizerService._total_usage(stage_usage)
+
+                result = {
+                    "final_summary": summary_response["text"],
+                    "title": paper.title,
+                    "authors": paper.authors,
+                    "style": style,
+                    "source": source,
+                    "chunks": chunk_count,
+                    "skipped_chunks": selection["skipped"],
+                    "reused_chunks": reused_chunks,
+                    "failed_chunks": failed_chunks,
+                    "failed_merges": failed_merges,
+                    "normalization": paper.normalization,
+                    "total_usage": total_usage,
+                    "stage_usage": stage_usage,
+                    "cost": round(sum(stage["cost"] for stage in stage_usage.values()), 6),
+                    "cancelled": summary_response.get("cancelled", False),
+                    "error": summary_response.get("error")
+                }
+                if match:
+                    result["near_duplicate_of"] = {"path": match["path"], "similarity": match["similarity"]}
+                if "sections" in selection:
+                    result["sections"] = selection["sections"]
+                root.set(total_tokens=total_usage["total_tokens"], cost=result["cost"], chunks=chunk_count)
 
+            except Exception as e:
+                print(f"[ERROR] Failed to summarize compressed paper: {e}")
+                result = {
+                    "final_summary": "",
+                    "title": "",
+                    "authors": [],
+                    "style": "",
+                    "source": "full_text",
+                    "chunks": 0,
+                    "total_usage": {
+                        "prompt_tokens": 0,
+                        "completion_tokens": 0,
+                        "total_tokens": 0
+                    },
+                    "error": f"{type(e).__name__}: {e}"
 
-        #Step 2: Build final prompt from the compressed version
-        final_prompt = build_compressed_summary_prompt(compressed_text, style)
+                }
 
-        try:
-            summary_response = llm.chat_completion(final_prompt)
-            summary_usage = summary_response["usage"]
+            yield {"event": "final", "result": result}
 
-            total_prompt = compression_usage.get("prompt_tokens", 0) + summary_usage.get("prompt_tokens", 0)
-            total_completion = compression_usage.get("completion_tokens", 0) + summary_usage.get("completion_tokens", 0)
-            total_tokens = compression_usage.get("total_tokens", 0) + summary_usage.get("total_tokens", 0)
+    @staticmethod
+    def _consume(events: Iterator[dict], on_token: Optional[Callable[[str], None]] = None) -> dict:
+        """
+        Drains an event generator, forwarding "token" events to `on_token`, and returns the final result.
+        """
+        result = {}
+        with closing(events):
+            # closing() shuts down an in-flight stream even if the callback raised (e.g. a UI rerun)
+            for event in events:
+                if event["event"] == "token":
+                    if on_token is not None:
+                        on_token(event["text"])
+                elif event["event"] == "final":
+                    result = event["result"]
+        return result
 
-            return {
-                "final_summary": summary_response["text"],
-                "title": paper.title,
-                "authors": paper.authors,
-                "style": style,
-                "source": "compressed" if compression.get("used_compression") else "full_text",
-                "chunks": len(paper.chunks),
-                "total_usage": {
-                    "prompt_tokens": total_prompt,
-                    "completion_tokens": total_completion,
-                    "total_tokens": total_tokens,
-                },
-                "cost": CostTracker.estimate_cost(
-                    prompt_tokens=total_prompt,
-                    completion_tokens=total_completion,
-                    cost_per_1k_tokens=llm.costs
-                )
+    @staticmethod
+    def is_complete(result: dict) -> bool:
+        """
+        True when a summary or comparison result is whole and safe to cache: it has text, and was
+        neither cancelled nor cut short by a failed request, failed chunk compressions or failed merges.
+        """
+        text = result.get("final_summary", result.get("comparison"))
+        return (
+            bool(text) and not result.get("error") and not result.get("cancelled")
+            and not result.get("failed_chunks") and not result.get("failed_merges")
+        )
+
+    @staticmethod
+    def find_reuse(path: str, style: str = "default", compression_model: Optional[str] = None, sections: Optional[List[str]] = None) -> dict:
+        """
+        Decides what a run on `path` can reuse from earlier runs instead of calling the LLM
+        (also used by the dry-run planner, so its estimates follow the same decisions).
+        Cached summaries and compressions cover the whole paper, so section-targeted runs reuse neither.
+
+        Args:
+            path (str): PDF path.
+            style (str): Summary style; a near-duplicate's summary is only reused in the same style.
+            compression_model (str, optional): Model id of the compression stage.
+            sections (List[str], optional): Requested sections.
+
+        Returns:
+            dict: {
+                "dedup": dict | None,  # see _dedup_lookup
+                "summary": dict | None,  # Near-duplicate match whose cached summary is reused as is
+                "compression": dict | None  # Cached compression of this file or its near-duplicate
             }
+        """
+        dedup = SummarizerService._dedup_lookup(path) if not sections else None
+        match = dedup["match"] if dedup else None
+        if match and CacheManager.is_cached(match["file_hash"], style):
+            return {"dedup": dedup, "summary": match, "compression": None}
+        return {"dedup": dedup, "summary": None, "compression": SummarizerService._cached_compression(dedup, compression_model)}
 
-        except Exception as e:
-            print(f"[ERROR] Failed to summarize compressed paper: {e}")
-            return {
-                "final_summary": "",
-                "title": "",
-                "authors": [],
-                "style": "",
-                "source": "full_text",
-                "chunks": 0,
-                "total_usage": {
-                    "prompt_tokens": 0,
-                    "completion_tokens": 0,
-                    "total_tokens": 0
-                }
+    @staticmethod
+    def _dedup_lookup(path: str) -> Optional[dict]:
+        """
+        Parses the paper once and looks for an indexed near-duplicate of it.
 
+        Returns:
+            dict | None: {"parsed": ParsedPDF, "file_hash": str, "signature", "match": dict | None},
+            or None when DEDUP is off or `path` is not a file.
+        """
+        if not Config.DEDUP or not os.path.isfile(path):
+            return None
+        parsed = PDFParser.extract_info(path)
+        file_hash = CacheManager.get_file_hash(path)
+        signature = DedupIndex.signature(parsed.raw_text)
+        match = DedupIndex.find_duplicate(signature, exclude=file_hash)
+        return {"parsed": parsed, "file_hash": file_hash, "signature": signature, "match": match}
+
+    @staticmethod
+    def _cached_compression(dedup: Optional[dict], model: Optional[str]) -> Optional[dict]:
+        """
+        Cached compression by the same compression model, for this exact file or else its near-duplicate.
+        """
+        if not dedup:
+            return None
+        for file_hash in filter(None, [dedup["file_hash"], (dedup["match"] or {}).get("file_hash")]):
+            cached = CacheManager.load_compression(file_hash, model)
+            if cached:
+                return {**cached, "file_hash": file_hash}
+        return None
+
+    @staticmethod
+    def select_chunks(chunks: List[Chunk], sections: Optional[List[str]] = None) -> dict:
+        """
+        Chunks to compress: those of the requested `sections`, or else the ones ChunkFilter keeps.
+
+        Returns:
+            dict: ChunkFilter.filter_chunks' dict, plus "sections": {"requested", "matched", "missing"}
+            when sections were requested. When none of them is found, the whole paper is filtered as usual.
+        """
+        if not sections:
+            return ChunkFilter.filter_chunks(chunks)
+
+        with span("select_sections", requested=list(sections)) as stage:
+            selection = SectionIndex.select(chunks, sections)
+            stage.set(matched=selection["matched"], kept=len(selection["kept"]))
+        if selection["kept"]:
+            return {
+                "kept": selection["kept"],
+                "skipped": [],
+                "tokens_skipped": selection["tokens_skipped"],
+                "sections": {"requested": list(sections), "matched": selection["matched"], "missing": selection["missing"]}
             }
 
+        print(f"[WARN] No section matches {', '.join(sections)}; processing the whole paper.")
+        return {**ChunkFilter.filter_chunks(chunks), "sections": {"requested": list(sections), "matched": [], "missing": list(sections)}}
+
+    @staticmethod
+    def _sections_event(selection: dict, started: float) -> dict:
+        return {
+            "event": "sections",
+            "matched": selection["sections"]["matched"],
+            "missing": selection["sections"]["missing"],
+            "kept": len(selection["kept"]),
+            "tokens_skipped": selection["tokens_skipped"],
+            "elapsed": time.perf_counter() - started
+        }
+
     @staticmethod
-    def compress_paper(chunks: List[Chunk], llm: Optional[LLMClient] = None) -> dict:
+    def _filtered_event(selection: dict, started: float) -> dict:
+        return {
+            "event": "filtered",
+            "kept": len(selection["kept"]),
+            "skipped": len(selection["skipped"]),
+            "tokens_skipped": selection["tokens_skipped"],
+            "elapsed": time.perf_counter() - started
+        }
+
+    @staticmethod
+    def _add_usage(total: dict, usage: dict) -> dict:
+        """
+        Adds one call's (or stage's) token usage to `total` in place and returns it.
+        """
+        for key in ("prompt_tokens", "completion_tokens", "total_tokens"):
+            total[key] = total.get(key, 0) + (usage or {}).get(key, 0)
+        return total
+
+    @staticmethod
+    def _add_stage_usage(stages: dict, stage: str, usage: dict, llm: Optional[LLMClient] = None, model: Optional[str] = None):
+        """
+        Adds token usage to `stages[stage]` and re-prices the stage at its own model's rates.
+        """
+        if not usage or not usage.get("total_tokens", usage.get("prompt_tokens", 0)):
+            return
+        entry = stages.setdefault(stage, {"model": model or getattr(llm, "model", None), "prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0})
+        SummarizerService._add_usage(entry, usage)
+        entry["cost"] = CostTracker.estimate_cost(
+            prompt_tokens=entry["prompt_tokens"],
+            completion_tokens=entry["completion_tokens"],
+            cost_per_1k_tokens=getattr(llm, "costs", None),
+            model_name=entry["model"]
+        )
+
+    @staticmethod
+    def _total_usage(stages: dict) -> dict:
+        total = {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+        for stage in stages.values():
+            SummarizerService._add_usage(total, stage)
+        return total
+
+    @staticmethod
+    def _iter_complete(llm: LLMClient, prompt: str, stream: bool = True, cancel_event: Optional[threading.Event] = None) -> Iterator[dict]:
+        """
+        Runs a single completion, yielding "token" events when streaming.
+
+        Returns (as the generator's return value):
+            dict: {"text": str, "usage": dict, "cancelled": bool, "error": str | None}
+        """
+        if not stream:
+            response = llm.chat_completion(prompt)
+            return {"error": None, **response, "cancelled": False}
+
+        with closing(llm.stream_chat_completion(prompt, cancel_event=cancel_event)) as deltas:
+            for delta in deltas:
+                if delta["type"] == "delta":
+                    yield {"event": "token", "text": delta["text"]}
+                else:
+                    return {"text": delta["text"], "usage": delta["usage"], "cancelled": delta["cancelled"], "error": delta.get("error")}
+
+        return {"text": "", "usage": {}, "cancelled": True, "error": None}
+
+    @staticmethod
+    def compress_paper(chunks: List[Chunk], llm: Optional[LLMClient] = None, cancel_event: Optional[threading.Event] = None) -> dict:
         """
         Compresses all chunks of a paper into a single technical representation.
 
+        This is a blocking wrapper around `iter_compress_paper`.
+
         Args:
             chunks (List[Chunk]): The full set of paper chunks.
             llm (LLMClient, optional): Reusable LLM client instance.
+            cancel_event (threading.Event, optional): When set, remaining chunks are skipped.
 
         Returns:
             dict: {
@@ -127,63 +493,197 @@ class SummarizerService:
                     "prompt_tokens": int,
                     "completion_tokens": int,
                     "total_tokens": int
-                }
+                },
+                "failed_chunks": int  # Compressions that failed and are missing from "compressed_text"
             }
         """
+        events = SummarizerService.iter_compress_paper(chunks, llm, cancel_event)
+        while True:
+            try:
+                next(events)
+            except StopIteration as stop:
+                return stop.value
+
+    @staticmethod
+    def iter_compress_paper(chunks: List[Chunk], llm: Optional[LLMClient] = None, cancel_event: Optional[threading.Event] = None) -> Iterator[dict]:
+        """
+        Compresses chunks like `compress_paper`, yielding a "chunk_compressed" event per chunk:
+        {"event": "chunk_compressed", "index": int, "total": int, "usage": dict, "latency": float}
+        In content-defined chunking mode, chunks whose compression is cached are not sent again;
+        their events carry "cached": True and empty usage. Events of failed compressions carry "error".
+
+        Returns (as the generator's return value):
+            dict: same dict `compress_paper` returns.
+        """
         if not chunks:
-            return {"compressed_text": "", "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}, "used_compression": False}
+            return {"compressed_text": "", "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}, "used_compression": False, "failed_chunks": 0}
 
-        llm = llm or LLMClient()
+        llm = llm or LLMClient.shared()
 
         full_text = "\n\n".join(chunk.text for chunk in chunks)
         total_tokens = TokenCounter.count_tokens(full_text)
 
-        if total_tokens < TokenCounter.get_max_tokens():
+        # The window of the model doing the compression, which MODEL_COMPRESSION may route elsewhere
+        if total_tokens < TokenCounter.get_max_tokens(getattr(llm, "model", None)):
             # Summarize the entire raw paper in one go (no compression)
             prompt = "Summarize the following research paper text concisely, preserving all technical detail:\n\n" + full_text
-            response = llm.chat_completion(prompt)
+            started = time.perf_counter()
+            with span("compress_chunk", chunk_index=0, full_text=True):
+                response = llm.chat_completion(prompt)
+            failed = bool(response.get("error")) or not response["text"]
+            yield {"event": "chunk_compressed", "index": 0, "total": 1, "usage": response["usage"], "latency": time.perf_counter() - started, **({"error": response.get("error") or "empty response"} if failed else {})}
             return {
                 "compressed_text": response["text"],
+                "sections": [response["text"]],
                 "usage": response["usage"],
-                "used_compression": False
+                "used_compression": False,
+                "failed_chunks": int(failed)
             }
 
         compressed_sections = []
         total_usage = {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+        # Content-defined chunks survive edits unchanged, so their compressions are worth keeping
+        chunk_cache = Config.CHUNKING == "content"
+        reused = 0
+        failed = 0
+
+        for position, chunk in enumerate(chunks):
+            if cancel_event is not None and cancel_event.is_set():
+                break
 
-        for chunk in chunks:
             prompt = build_compression_prompt(chunk.text)
-            try:
-                response = llm.chat_completion(prompt)
-                compressed_sections.append(response["text"])
+            cached = CacheManager.load_chunk_compression(prompt, llm.model) if chunk_cache else None
+            if cached:
+                reused += 1
+                compressed_sections.append(cached["text"])
+                yield {"event": "chunk_compressed", "index": position, "total": len(chunks), "usage": {}, "latency": 0.0, "cached": True}
+                continue
 
+            try:
+                started = time.perf_counter()
+                with span("compress_chunk", chunk_index=chunk.index):
+                    response = llm.chat_completion(prompt)
                 usage = response["usage"]
                 total_usage["prompt_tokens"] += usage.get("prompt_tokens", 0)
                 total_usage["completion_tokens"] += usage.get("completion_tokens", 0)
                 total_usage["total_tokens"] += usage.get("total_tokens", 0)
+                if response.get("error") or not response["text"]:
+                    raise RuntimeError(response.get("error") or "empty response")
+
+                compressed_sections.append(response["text"])
+                if chunk_cache:
+                    CacheManager.save_chunk_compression(prompt, llm.model, response)
 
             except Exception as e:
                 print(f"[ERROR] Failed to compress chunk: {e}")
+                failed += 1
+                yield {"event": "chunk_compressed", "index": position, "total": len(chunks), "usage": {}, "latency": time.perf_counter() - started, "error": str(e)}
+                continue
+
+            # "index" is the position among the chunks being compressed (filtered chunks leave gaps in chunk.index)
+            yield {"event": "chunk_compressed", "index": position, "total": len(chunks), "usage": usage, "latency": time.perf_counter() - started}
 
         return {
             "compressed_text": "\n\n".join(compressed_sections),
+            "sections": compressed_sections,
             "usage": total_usage,
-            "used_compression": True
+            "used_compression": True,
+            "reused_chunks": reused,
+            "failed_chunks": failed
         }
 
+    @staticmethod
+    def iter_reduce_sections(sections: List[str], llm: Optional[LLMClient] = None, max_tokens: Optional[int] = None, fan_in: Optional[int] = None, cancel_event: Optional[threading.Event] = None) -> Iterator[dict]:
+        """
+        Tree reduction: while the joined compressed sections exceed `max_tokens`, merges every
+        `fan_in` consecutive sections with one LLM call, round after round. Yields a "merged"
+        event per round: {"event": "merged", "round": int, "sections": int, "usage": dict, "latency": float},
+        with "error" when a merge call of that round failed.
+
+        Args:
+            sections (List[str]): Compressed sections in paper order.
+            llm (LLMClient, optional): Client for the merge calls.
+            max_tokens (int, optional): Target size, defaults to Config.REDUCTION_MAX_TOKENS.
+            fan_in (int, optional): Sections per merge call, defaults to Config.REDUCTION_FAN_IN.
+            cancel_event (threading.Event, optional): When set, no further rounds start.
+
+        Returns (as the generator's return value):
+            dict: {
+                "compressed_text": str,
+                "usage": dict,
+                "rounds": int,
+                "failed_merges": int,  # Merges that failed; their input went on unmerged
+                "error": str | None  # Last merge error, when any failed
+            }
+        """
+        max_tokens = max_tokens or Config.REDUCTION_MAX_TOKENS
+        fan_in = max(2, fan_in or Config.REDUCTION_FAN_IN)
+        sections = [section for section in sections if section]
+        usage = {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+        rounds = 0
+        failed = 0
+        error = None
+
+        if len(sections) < 2 or TokenCounter.count_tokens("\n\n".join(sections)) <= max_tokens:
+            return {"compressed_text": "\n\n".join(sections), "usage": usage, "rounds": 0, "failed_merges": 0, "error": None}
+
+        llm = llm or LLMClient.shared()
+        with span("reduce", sections=len(sections)) as stage:
+            while len(sections) > 1:
+                if cancel_event is not None and cancel_event.is_set():
+                    break
+
+                rounds += 1
+                started = time.perf_counter()
+                round_usage = {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+                round_error = None
+                merged = []
+                for start in range(0, len(sections), fan_in):
+                    group = sections[start:start + fan_in]
+                    if len(group) == 1:
+                        merged.append(group[0])
+                        continue
+                    text = "\n\n".join(group)
+                    with span("reduce_group", round=rounds, index=start // fan_in):
+                        response = llm.chat_completion(build_reduction_prompt(text))
+                    if response.get("error") or not response["text"]:
+                        # A failed merge passes its input on unchanged, so the text is kept but not reduced
+                        failed += 1
+                        round_error = response.get("error") or "empty response"
+                        merged.append(text)
+                    else:
+                        merged.append(response["text"])
+                    SummarizerService._add_usage(round_usage, response["usage"])
+
+                sections = merged
+                error = round_error or error
+                SummarizerService._add_usage(usage, round_usage)
+                yield {"event": "merged", "round": rounds, "sections": len(sections), "usage": round_usage, "latency": time.perf_counter() - started, **({"error": round_error} if round_error else {})}
+
+                if TokenCounter.count_tokens("\n\n".join(sections)) <= max_tokens:
+                    break
+            stage.set(rounds=rounds, failed_merges=failed)
+
+        return {"compressed_text": "\n\n".join(sections), "usage": usage, "rounds": rounds, "failed_merges": failed, "error": error}
+
 
     
     @staticmethod
-    def compare_papers(path1: str, path2: str, style: str = "default", llm: Optional[LLMClient] = None, provider: Optional[str] = None, model: Optional[str] = None) -> dict:
+    def compare_papers(path1: str, path2: str, style: str = "default", llm: Optional[LLMClient] = None, provider: Optional[str] = None, model: Optional[str] = None, on_token: Optional[Callable[[str], None]] = None, cancel_event: Optional[threading.Event] = None, sections: Optional[List[str]] = None) -> dict:
         """
         Compares two research papers by compressing their full content
         and generating a comparison based on goals, methods, and conclusions.
 
+        This is a blocking wrapper around `iter_compare_papers`.
+
         Args:
             path1 (str): Path to the first PDF.
             path2 (str): Path to the second PDF.
             style (str): Tone of the final comparison (default, layman, etc.)
             llm (LLMClient, optional): Reusable LLM client.
+            on_token (Callable[[str], None], optional): Streams the comparison text to this callback.
+            cancel_event (threading.Event, optional): Set it to stop compression and close the stream.
+            sections (List[str], optional): Only compare these sections of both papers (e.g. ["evaluation"]).
 
         Returns:
             dict: {
@@ -195,10 +695,18 @@ class SummarizerService:
                     "completion_tokens": int,
                     "total_tokens": int
                 },
+                "stage_usage": {  # "metadata", "compression", "reduction", "comparison"
+                    stage: {"model": str, "prompt_tokens": int, "completion_tokens": int, "total_tokens": int, "cost": float}
+                },
                 "cost": float,
+                "cancelled": bool,
+                "failed_chunks": int,  # Chunk compressions of either paper that failed
+                "failed_merges": int,  # Section merges of either paper that failed
+                "error": str | None,  # Set when the comparison failed or was cut off
                 "paper_1": {
                     "title": str,
-                    "authors": List[str]
+                    "authors": List[str],
+                    "sections": dict  # only when sections were given, as in `summarize_paper`
                 },
                 "paper_2": {
                     "title": str,
@@ -206,84 +714,148 @@ class SummarizerService:
                 }
             }
         """
-        try:
-            llm = llm or LLMClient(provider, model)
-            paper1 = Paper.from_pdf(path1)
-            paper2 = Paper.from_pdf(path2)
+        events = SummarizerService.iter_compare_papers(
+            path1, path2, style, llm, provider, model,
+            stream=on_token is not None or cancel_event is not None,
+            cancel_event=cancel_event,
+            sections=sections
+        )
+        return SummarizerService._consume(events, on_token)
 
-            paper1.chunk_text()
-            paper2.chunk_text()
-
-            #Compress both papers
-            compressed1 = SummarizerService.compress_paper(paper1.chunks, llm)
-            compressed2 = SummarizerService.compress_paper(paper2.chunks, llm)
-
-            total_usage = {
-                "prompt_tokens": 0,
-                "completion_tokens": 0,
-                "total_tokens": 0,
-            }
-
-            total_usage["prompt_tokens"] += compressed1["usage"]["prompt_tokens"]
-            total_usage["completion_tokens"] += compressed1["usage"]["completion_tokens"]
-            total_usage["total_tokens"] += compressed1["usage"]["total_tokens"]
-
-            total_usage["prompt_tokens"] += compressed2["usage"]["prompt_tokens"]
-            total_usage["completion_tokens"] += compressed2["usage"]["completion_tokens"]
-            total_usage["total_tokens"] += compressed2["usage"]["total_tokens"]
-
-            comparison_prompt = (
-                f"You are comparing two full research papers based on their content below.\n\n"
-                f"Paper 1:\n{compressed1['compressed_text']}\n\n"
-                f"Paper 2:\n{compressed2['compressed_text']}\n\n"
-                f"Write a clear comparison covering research focus, methods, technical approach, and conclusions. "
-                f"Point out both similarities and differences. Use a {style} tone."
-            )
-
-            response = llm.chat_completion(comparison_prompt)
-            total_usage["prompt_tokens"] += response["usage"]["prompt_tokens"]
-            total_usage["completion_tokens"] += response["usage"]["completion_tokens"]
-            total_usage["total_tokens"] += response["usage"]["total_tokens"]
-
-            return {
-                "comparison": response["text"],
-                "style": style,
-                "source": "compressed",
-                "total_usage": total_usage,
-                "cost": CostTracker.estimate_cost(
-                    prompt_tokens=total_usage["prompt_tokens"],
-                    completion_tokens=total_usage["completion_tokens"],
-                    cost_per_1k_tokens=llm._costs
-                ),
-                "paper_1": {
-                    "title": paper1.title,
-                    "authors": paper1.authors
-                },
-                "paper_2": {
-                    "title": paper2.title,
-                    "authors": paper2.authors
+    @staticmethod
+    def iter_compare_papers(path1: str, path2: str, style: str = "default", llm: Optional[LLMClient] = None, provider: Optional[str] = None, model: Optional[str] = None, stream: bool = True, cancel_event: Optional[threading.Event] = None, sections: Optional[List[str]] = None) -> Iterator[dict]:
+        """
+        Compares two papers like `compare_papers`, yielding the same progress events as
+        `iter_summarize_paper`. Per-paper events carry a "paper" key (1 or 2); the last
+        event is {"event": "final", "result": dict} with the dict `compare_papers` returns.
+        """
+        with span("compare_papers", paths=[path1, path2], style=style) as root:
+            try:
+                llm = llm or LLMClient.shared(provider, model)
+                compress_llm = LLMClient.for_stage("compression", llm, provider)
+                reduce_llm = LLMClient.for_stage("reduction", llm, provider)
+                compare_llm = LLMClient.for_stage("comparison", llm, provider)
+                stage_usage = {}
+                started = time.perf_counter()
+                papers = []
+                selections = []
+                compressed = []
+                failed_chunks = 0
+                failed_merges = 0
+
+                for number, path in enumerate([path1, path2], start=1):
+                    paper = Paper.from_pdf(path)
+                    SummarizerService._add_stage_usage(stage_usage, "metadata", paper.metadata_usage, model=paper.metadata_usage.get("model"))
+                    yield {"event": "parsed", "paper": number, "title": paper.title, "authors": paper.authors, "normalization": paper.normalization, "elapsed": time.perf_counter() - started}
+
+                    paper.chunk_text()
+                    yield {
+                        "event": "chunked",
+                        "paper": number,
+                        "chunks": len(paper.chunks),
+                        "tokens": sum(chunk.token_count for chunk in paper.chunks),
+                        "sections": SectionIndex.names(paper.chunks),
+                        "elapsed": time.perf_counter() - started
+                    }
+                    selection = SummarizerService.select_chunks(paper.chunks, sections)
+                    if "sections" in selection:
+                        yield {**SummarizerService._sections_event(selection, started), "paper": number}
+                    if selection["skipped"]:
+                        yield {**SummarizerService._filtered_event(selection, started), "paper": number}
+                    papers.append(paper)
+                    selections.append(selection)
+
+                paper1, paper2 = papers
+
+                #Compress both papers (each reduced to half of the comparison prompt budget)
+                for number, selection in enumerate(selections, start=1):
+                    compression = SummarizerService.iter_compress_paper(selection["kept"], compress_llm, cancel_event=cancel_event)
+                    with span("compress", paper=number, chunks=len(selection["kept"])):
+                        while True:
+                            try:
+                                yield {**next(compression), "paper": number}
+                            except StopIteration as stop:
+                                compression = stop.value
+                                break
+                    SummarizerService._add_stage_usage(stage_usage, "compression", compression["usage"], compress_llm)
+                    failed_chunks += compression.get("failed_chunks", 0)
+
+                    reduction = SummarizerService.iter_reduce_sections(compression.get("sections") or [compression["compressed_text"]], reduce_llm, Config.REDUCTION_MAX_TOKENS // 2, cancel_event=cancel_event)
+                    while True:
+                        try:
+                            yield {**next(reduction), "paper": number}
+                        except StopIteration as stop:
+                            reduction = stop.value
+                            break
+                    SummarizerService._add_stage_usage(stage_usage, "reduction", reduction["usage"], reduce_llm)
+                    failed_merges += reduction["failed_merges"]
+
+                    usage = SummarizerService._add_usage(dict(compression["usage"]), reduction["usage"])
+                    compressed.append({"compressed_text": reduction["compressed_text"], "usage": usage})
+                    yield {"event": "reduced", "paper": number, "source": "compressed", "usage": usage, "elapsed": time.perf_counter() - started}
+
+                compressed1, compressed2 = compressed
+
+                comparison_prompt = build_comparison_prompt(compressed1["compressed_text"], compressed2["compressed_text"], style, sections=sections)
+
+                if cancel_event is not None and cancel_event.is_set():
+                    response = {"text": "", "usage": {}, "cancelled": True, "error": None}
+                else:
+                    with span("final_prompt", stream=stream):
+                        response = yield from SummarizerService._iter_complete(compare_llm, comparison_prompt, stream, cancel_event)
+                SummarizerService._add_stage_usage(stage_usage, "comparison", response["usage"], compare_llm)
+                total_usage = SummarizerService._total_usage(stage_usage)
+
+                result = {
+                    "comparison": response["text"],
+                    "style": style,
+                    "source": "compressed",
+                    "total_usage": total_usage,
+                    "stage_usage": stage_usage,
+                    "cost": round(sum(stage["cost"] for stage in stage_usage.values()), 6),
+                    "cancelled": response["cancelled"],
+                    "failed_chunks": failed_chunks,
+                    "failed_merges": failed_merges,
+                    "error": response.get("error"),
+                    "paper_1": {
+                        "title": paper1.title,
+                        "authors": paper1.authors,
+                        "skipped_chunks": selections[0]["skipped"],
+                        "normalization": paper1.normalization
+                    },
+                    "paper_2": {
+                        "title": paper2.title,
+                        "authors": paper2.authors,
+                        "skipped_chunks": selections[1]["skipped"],
+                        "normalization": paper2.normalization
+                    }
                 }
-            }
+                for number, selection in enumerate(selections, start=1):
+                    if "sections" in selection:
+                        result[f"paper_{number}"]["sections"] = selection["sections"]
+                root.set(total_tokens=total_usage["total_tokens"], cost=result["cost"])
 
-        except Exception as e:
-            print(f"[ERROR] Failed to compare papers: {e}")
-            return {
-                "comparison": "Comparison failed due to an internal error.",
-                "style": "",
-                "source": "full_text",
-                "total_usage": {
-                    "prompt_tokens": 0,
-                    "completion_tokens": 0,
-                    "total_tokens": 0
-                },
-                "cost": 0.0,
-                "paper_1": {
-                    "title": "",
-                    "authors": []
-                },
-                "paper_2": {
-                    "title": "",
-                    "authors": []
+            except Exception as e:
+                print(f"[ERROR] Failed to compare papers: {e}")
+                result = {
+                    "comparison": "Comparison failed due to an internal error.",
+                    "error": f"{type(e).__name__}: {e}",
+                    "style": "",
+                    "source": "full_text",
+                    "total_usage": {
+                        "prompt_tokens": 0,
+                        "completion_tokens": 0,
+                        "total_tokens": 0
+                    },
+                    "cost": 0.0,
+                    "paper_1": {
+                        "title": "",
+                        "authors": []
+                    },
+                    "paper_2": {
+                        "title": "",
+                        "authors": []
+                    }
                 }
-            }
 
+            yield {"event": "final", "result": result}
@@ -1,7 +1,10 @@
 import streamlit as st
 import os
-from domain.paper import Paper
+from services.daemon import DaemonClient
 from services.summarizer import SummarizerService
+from tools.usage_ledger import UsageLedger
+
+UsageLedger.install()
 
 st.set_page_config(page_title="AI Research Assistant", layout="wide")
 st.title("🧠 AI Research Assistant (GPT-3.5)")
@@ -11,6 +14,71 @@ task = st.sidebar.selectbox("Select a mode", ["Summarize Paper", "Compare Papers
 
 st.sidebar.markdown("---")
 style = st.sidebar.selectbox("Summary Style", ["layman", "technical", "default"])
+sections_input = st.sidebar.text_input("Only these sections (optional)", placeholder="methods, evaluation")
+sections = [name.strip() for name in sections_input.split(",") if name.strip()] or None
+
+
+def render_events(events, placeholder) -> dict:
+    """
+    Consumes a summarizer event generator, driving a progress bar and rendering the
+    streamed text incrementally into `placeholder`. Returns the final result dict.
+
+    Pressing any widget (e.g. the Stop button) reruns the script, which interrupts this
+    loop; the generator is closed so no further chunks are compressed or tokens billed.
+    """
+    progress = st.progress(0.0, text="Parsing PDF...")
+    buffer = []
+    result = {}
+
+    try:
+        for event in events:
+            kind = event["event"]
+            label = f"Paper {event['paper']}: " if "paper" in event else ""
+
+            if kind == "parsed":
+                progress.progress(0.05, text=f"{label}Parsed '{event['title'] or 'untitled'}'")
+            elif kind == "near_duplicate":
+                progress.progress(0.9, text=f"{label}Near-duplicate of {os.path.basename(event['path'])} ({event['similarity']:.0%} similar), reusing its {event['reused']}")
+            elif kind == "chunked":
+                progress.progress(0.1, text=f"{label}Split into {event['chunks']} chunks ({event['tokens']} tokens)")
+            elif kind == "sections":
+                missing = f", no match for {', '.join(event['missing'])}" if event["missing"] else ""
+                progress.progress(0.1, text=f"{label}Kept {event['kept']} chunks of {', '.join(event['matched']) or 'the whole paper'}{missing}")
+            elif kind == "filtered":
+                progress.progress(0.1, text=f"{label}Skipped {event['skipped']} low-value chunks ({event['tokens_skipped']} tokens)")
+            elif kind == "chunk_compressed":
+                done = (event["index"] + 1) / event["total"]
+                timing = "reused from cache" if event.get("cached") else f"in {event['latency']:.1f}s"
+                progress.progress(
+                    0.1 + 0.8 * done,
+                    text=f"{label}Compressed chunk {event['index'] + 1}/{event['total']} {timing}"
+                )
+            elif kind == "merged":
+                progress.progress(0.9, text=f"{label}Merged compressed sections (round {event['round']}, {event['sections']} left)")
+            elif kind == "reduced":
+                progress.progress(0.9, text=f"{label}Compression finished, writing final text...")
+            elif kind == "token":
+                buffer.append(event["text"])
+                placeholder.markdown("".join(buffer) + "▌")
+            elif kind == "final":
+                result = event["result"]
+    finally:
+        events.close()
+
+    progress.empty()
+    return result
+
+def summarize_events(path: str):
+    # Thin client: the resident daemon keeps clients and indexes warm between reruns
+    if DaemonClient.available():
+        return DaemonClient().stream("summarize_pdf", path=os.path.abspath(path), style=style, sections=sections)
+    return SummarizerService.iter_summarize_paper(path, style=style, sections=sections)
+
+
+def compare_events(path1: str, path2: str):
+    if DaemonClient.available():
+        return DaemonClient().stream("compare_papers", file_path_1=os.path.abspath(path1), file_path_2=os.path.abspath(path2), style=style, sections=sections)
+    return SummarizerService.iter_compare_papers(path1, path2, style=style, sections=sections)
 
 # --- Summarize Single Paper ---
 if task == "Summarize Paper":
@@ -26,18 +94,17 @@ if task == "Summarize Paper":
         st.success("📄 File uploaded successfully.")
 
         if st.button("Summarize"):
-            with st.spinner("Generating summary..."):
-                paper = Paper.from_pdf(file_path)
-                chunks = paper.chunk_text()
-                result = SummarizerService.summarize_paper(chunks, style=style)
+            st.button("⏹ Stop", key="stop_summary")
+            st.subheader("📑 Summary")
+            placeholder = st.empty()
 
-                st.subheader("📑 Summary")
-                st.write(result["final_summary"])
+            result = render_events(summarize_events(file_path), placeholder)
+            placeholder.markdown(result["final_summary"])
 
-                st.subheader("📊 Token Usage")
-                st.json(result["total_usage"])
+            st.subheader("📊 Token Usage")
+            st.json(result["total_usage"])
 
-                st.metric("💰 Estimated Cost", f"${result['cost']:.6f}")
+            st.metric("💰 Estimated Cost", f"${result.get('cost', 0.0):.6f}")
 
 # --- Compare Two Papers ---
 elif task == "Compare Papers":
@@ -57,13 +124,14 @@ elif task == "Compare Papers":
         st.success("✅ Both files uploaded.")
 
         if st.button("Compare Papers"):
-            with st.spinner("Analyzing and comparing..."):
-                result = SummarizerService.compare_papers(path1, path2, style=style)
+            st.button("⏹ Stop", key="stop_compare")
+            st.subheader("📊 Comparison Summary")
+            placeholder = st.empty()
 
-                st.subheader("📊 Comparison Summary")
-                st.write(result["comparison"])
+            result = render_events(compare_events(path1, path2), placeholder)
+            placeholder.markdown(result["comparison"])
 
-                st.subheader("📊 Token Usage")
-                st.json(result["total_usage"])
+            st.subheader("📊 Token Usage")
+            st.json(result["total_usage"])
 
-                st.metric("💰 Estimated Cost", f"${result['cost']:.6f}")
+            st.metric("💰 Estimated Cost", f"${result.get('cost', 0.0):.6f}")
@@ -0,0 +1,57 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from benchmarks.corpus import generate_corpus
+from benchmarks.pipeline import compare_to_baseline
+
+
+def test_synthetic_corpus_is_deterministic_and_parseable(tmp_path):
+    import fitz
+
+    first = generate_corpus(str(tmp_path / "a"), count=2, pages=3, columns=2, figures_per_page=1.0, seed=7)
+    second = generate_corpus(str(tmp_path / "b"), count=2, pages=3, columns=2, figures_per_page=1.0, seed=7)
+
+    assert [p["title"] for p in first] == [p["title"] for p in second]
+    with fitz.open(first[0]["path"]) as doc:
+        text = "".join(page.get_text() for page in doc)
+        assert len(doc) == 3
+    assert first[0]["title"].split()[0] in text
+    assert "1 Introduction" in text
+
+
+def test_compare_to_baseline_flags_slowdowns_and_new_failures():
+    baseline = {"parse": {"seconds": 1.0}, "hash": {"seconds": 0.001}, "chunk": {"seconds": 0.5}, "summarize": {"error": "offline"}}
+    current = {"parse": {"seconds": 1.5}, "hash": {"seconds": 0.003}, "chunk": {"error": "boom"}, "summarize": {"seconds": 2.0}}
+
+    regressions = compare_to_baseline(current, baseline, tolerance=0.2)
+
+    assert len(regressions) == 2  # hash is below the noise floor, summarize had no baseline number
+    assert regressions[0].startswith("parse:")
+    assert regressions[1].startswith("chunk: now fails")
+
+
+def test_chunk_reuse_benchmark_reports_content_defined_reuse():
+    from benchmarks.chunk_reuse import run
+
+    report = run(documents=2, paragraphs=30, max_tokens=300)
+
+    content = report["modes"]["content"]
+    assert set(content) == {"insert_paragraph", "delete_paragraph", "edit_sentence", "append_paragraph", "mixed"}
+    assert content["insert_paragraph"]["chunks_reused"] > 0.6
+
+
+def test_isolated_run_redirects_every_store_and_restores_it(tmp_path):
+    import domain.paper_index as paper_index
+    import tools.author_cache as author_cache
+    import tools.cache_manager as cache_manager
+    import tools.dedup_index as dedup_index
+    from benchmarks.pipeline import _isolated
+    from infra.config import Config
+
+    before = (cache_manager.CACHE_DIR, paper_index.PAPER_INDEX_FILE, dedup_index.DEDUP_INDEX_FILE, author_cache.CACHE_FILE, Config.USAGE_LEDGER_PATH)
+
+    with _isolated(str(tmp_path), "http://127.0.0.1:1/v1"):
+        during = (cache_manager.CACHE_DIR, paper_index.PAPER_INDEX_FILE, dedup_index.DEDUP_INDEX_FILE, author_cache.CACHE_FILE, Config.USAGE_LEDGER_PATH)
+
+    assert all(path.startswith(str(tmp_path)) for path in during)
+    assert (cache_manager.CACHE_DIR, paper_index.PAPER_INDEX_FILE, dedup_index.DEDUP_INDEX_FILE, author_cache.CACHE_FILE, Config.USAGE_LEDGER_PATH) == before
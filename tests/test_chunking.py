@@ -22,3 +22,43 @@ def test_chunk_overlap():
         curr = chunks[i].text
         overlap_found = any(sentence.strip() in prev for sentence in curr.split("."))
         assert overlap_found, f"Chunk {i} does not overlap with previous chunk."
+
+
+def test_content_defined_chunks_survive_an_early_insertion():
+    paragraphs = [f"Paragraph {i} studies sparse attention variant {i * 7 % 11}. It reports memory use {i} and accuracy {i % 5}." for i in range(120)]
+    original = "\n\n".join(paragraphs)
+    revised = "\n\n".join(paragraphs[:3] + ["An inserted paragraph about a new ablation. It changes nothing else."] + paragraphs[3:])
+
+    before = TextChunker.chunk_text(original, max_tokens=100, mode="content")
+    after = TextChunker.chunk_text(revised, max_tokens=100, mode="content")
+
+    assert len(before) > 5
+    assert all(c.token_count <= 100 for c in before + after)
+    assert all(c.text.endswith(".") for c in before)  # Cuts snap to sentence ends
+    unchanged = {c.text for c in before}
+    assert sum(c.text in unchanged for c in after) >= len(after) - 2
+
+
+def test_structured_chunks_follow_sections_and_paragraphs():
+    paragraph = "Sparse attention keeps memory linear in sequence length. " * 6
+    text = "\n".join([
+        "Sparse Attention Transformers",
+        "Abstract. We study sparse attention.",
+        "1 Introduction",
+        paragraph.strip(),
+        paragraph.strip(),
+        "2 Method",
+        "Local windows plus global tokens.",
+        ("A very long paragraph sentence about windows. " * 40).strip(),
+    ])
+    page_two = text.index("2 Method")
+
+    chunks = TextChunker.chunk_text(text, max_tokens=120, overlap=20, mode="structure", page_starts=[(0, 1), (page_two, 2)])
+
+    assert [c.section for c in chunks[:3]] == ["Front Matter", "Abstract", "Introduction"]
+    assert chunks[2].text.startswith("1 Introduction") and chunks[2].text.endswith("length.")
+    method = [c for c in chunks if c.section == "Method"]
+    assert method[0].text.startswith("2 Method\nLocal windows plus global tokens.")
+    assert len(method) > 1 and all(c.token_count <= 120 for c in chunks)
+    assert all(c.text.endswith(".") for c in chunks[1:])  # Oversized paragraphs split at sentence ends
+    assert chunks[0].page_span == (1, 1) and method[-1].page_span == (2, 2)
@@ -0,0 +1,11 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from benchmarks.import_time import SCENARIOS, loaded_modules
+
+
+def test_local_cli_commands_do_not_import_heavy_modules():
+    for name, scenario in SCENARIOS.items():
+        loaded = loaded_modules(scenario["code"])
+        leaked = [m for m in scenario["forbidden"] if m in loaded]
+        assert not leaked, f"{name} imported {leaked}"
@@ -0,0 +1,67 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import threading
+import time
+import pytest
+from services.daemon import DaemonClient, ResearchDaemon
+
+
+@pytest.fixture
+def daemon(tmp_path):
+    address = str(tmp_path / "daemon.sock")
+    server = ResearchDaemon(address, workers=1)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    for _ in range(100):
+        if DaemonClient.available(address):
+            break
+        time.sleep(0.01)
+
+    yield address
+    server.shutdown()
+
+
+def test_daemon_serves_repeated_requests_on_one_connection(daemon):
+    client = DaemonClient(daemon)
+
+    assert client.call("ping") == "pong"
+    assert isinstance(client.call("search_by_title", query="deep learning"), list)
+    assert client.call("stats")["requests"] == 3
+
+    client.close()
+
+
+def test_daemon_reports_unknown_methods(daemon):
+    client = DaemonClient(daemon)
+
+    with pytest.raises(RuntimeError):
+        client.call("drop_tables")
+
+    client.close()
+
+
+def test_client_detects_missing_daemon(tmp_path):
+    assert DaemonClient.available(str(tmp_path / "missing.sock")) is False
+
+
+def test_daemon_requires_its_token_and_refuses_open_tcp(tmp_path):
+    address = str(tmp_path / "daemon.sock")
+    server = ResearchDaemon(address, workers=1, token="s3cret")
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    for _ in range(100):
+        if DaemonClient.available(address):
+            break
+        time.sleep(0.01)
+
+    try:
+        assert oct(os.stat(address).st_mode & 0o777) == oct(0o600)
+        with pytest.raises(RuntimeError, match="Unauthorized"):
+            DaemonClient(address, token="").call("ping")
+        assert DaemonClient(address, token="s3cret").call("ping") == "pong"
+    finally:
+        server.shutdown()
+
+    with pytest.raises(ValueError, match="DAEMON_TOKEN"):
+        ResearchDaemon("0.0.0.0:8765", token="").serve_forever()
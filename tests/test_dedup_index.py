@@ -0,0 +1,116 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import tools.cache_manager as cache_manager
+import tools.dedup_index as dedup_index
+from infra.config import Config
+from tools.cache_manager import CacheManager
+from tools.dedup_index import DedupIndex
+from tools.pdf_parser import ParsedPDF
+
+WORDS = (
+    "sparse attention lets transformers process long documents with memory that grows linearly in sequence "
+    "length by combining sliding local windows with a few global tokens that attend everywhere and we show "
+    "that this pattern matches dense attention accuracy on question answering summarization and retrieval "
+    "benchmarks while using a fraction of the memory and compute of the quadratic baseline model"
+).split()
+PAPER = " ".join(WORDS * 3)
+CAMERA_READY = "Proceedings of Examples 2024. " + PAPER.replace("we show", "we demonstrate", 1)
+UNRELATED = " ".join(reversed(WORDS)) + " graph neural networks for molecule property prediction"
+
+
+def _use_tmp_index(monkeypatch, tmp_path):
+    monkeypatch.setattr(dedup_index, "DEDUP_INDEX_FILE", str(tmp_path / "dedup_index.json"))
+    monkeypatch.setattr(DedupIndex, "_cache", None)
+    monkeypatch.setattr(DedupIndex, "_cache_stamp", None)
+
+
+def test_near_duplicate_papers_are_found(monkeypatch, tmp_path):
+    _use_tmp_index(monkeypatch, tmp_path)
+    DedupIndex.add_paper("preprint", "tmp/preprint.pdf", DedupIndex.signature(PAPER))
+
+    match = DedupIndex.find_duplicate(DedupIndex.signature(CAMERA_READY), exclude="camera_ready", threshold=0.8)
+    assert match["file_hash"] == "preprint" and match["path"] == "tmp/preprint.pdf"
+    assert match["similarity"] >= 0.8
+
+    assert DedupIndex.find_duplicate(DedupIndex.signature(UNRELATED), threshold=0.8) is None
+    assert DedupIndex.find_duplicate(DedupIndex.signature(PAPER), exclude="preprint", threshold=0.8) is None
+
+
+def test_duplicate_chunks_within_a_paper():
+    footer = "This work is licensed under a Creative Commons Attribution 4.0 International License and may be shared."
+    texts = [PAPER, footer, UNRELATED, footer + " Page 3", "too short"]
+
+    assert DedupIndex.duplicate_chunks(texts, threshold=0.5) == {3: 1}
+
+
+def test_near_duplicate_upload_reuses_cached_summary(monkeypatch, tmp_path):
+    import services.summarizer as summarizer
+
+    _use_tmp_index(monkeypatch, tmp_path)
+    monkeypatch.setattr(cache_manager, "CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(Config, "DEDUP", True)
+    monkeypatch.setattr(Config, "DEDUP_THRESHOLD", 0.8)
+    texts = {"preprint.pdf": PAPER, "camera_ready.pdf": CAMERA_READY}
+    monkeypatch.setattr(summarizer.PDFParser, "extract_info", staticmethod(lambda path: ParsedPDF(texts[os.path.basename(path)])))
+    monkeypatch.setattr(summarizer.Paper, "from_pdf", classmethod(lambda cls, path, metadata=None, parsed=None: cls("Sparse (camera-ready)", ["Ada Lovelace"], path, parsed.raw_text)))
+
+    preprint, camera_ready = tmp_path / "preprint.pdf", tmp_path / "camera_ready.pdf"
+    preprint.write_bytes(b"%PDF preprint")
+    camera_ready.write_bytes(b"%PDF camera-ready")
+    preprint_hash = CacheManager.get_file_hash(str(preprint))
+    CacheManager.save_summary(preprint_hash, "default", {"final_summary": "Sparse attention scales.", "title": "Sparse", "cost": 0.02})
+    DedupIndex.add_paper(preprint_hash, str(preprint), DedupIndex.signature(PAPER))
+
+    events = list(summarizer.SummarizerService.iter_summarize_paper(str(camera_ready), llm=object(), stream=False))
+
+    assert [e["event"] for e in events] == ["parsed", "near_duplicate", "final"]
+    result = events[-1]["result"]
+    assert result["final_summary"] == "Sparse attention scales."
+    # The summary is shared, but the title and authors are the new paper's own
+    assert result["title"] == "Sparse (camera-ready)" and result["authors"] == ["Ada Lovelace"]
+    assert result["near_duplicate_of"]["path"] == str(preprint)
+    assert result["cost"] == 0.0
+
+
+def test_compression_with_failed_chunks_is_not_cached_and_cache_key_tracks_settings(monkeypatch, tmp_path):
+    import services.summarizer as summarizer
+    from domain.text_chunk import Chunk
+
+    _use_tmp_index(monkeypatch, tmp_path)
+    monkeypatch.setattr(cache_manager, "CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(Config, "DEDUP", True)
+    monkeypatch.setattr(Config, "CHUNK_FILTER", False)
+    monkeypatch.setattr(summarizer.PDFParser, "extract_info", staticmethod(lambda path: ParsedPDF(PAPER)))
+    monkeypatch.setattr(summarizer.TokenCounter, "count_tokens", staticmethod(lambda text: 10_000))
+    monkeypatch.setattr(summarizer.TokenCounter, "get_max_tokens", staticmethod(lambda model=None: 1_000))
+
+    class FlakyLLM:
+        model = "gpt-3.5-turbo"
+        costs = {"input": 0.001, "output": 0.002}
+
+        def chat_completion(self, prompt):
+            if "chunk 1" in prompt:
+                return {"text": "", "usage": {}, "error": "APITimeoutError: timed out"}
+            return {"text": "compressed", "usage": {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15}}
+
+    class ThreeChunkPaper(summarizer.Paper):
+        def chunk_text(self, max_tokens=500, overlap=50):
+            self._chunks = [Chunk(index=i, text=f"chunk {i}", token_count=100) for i in range(3)]
+            return self._chunks
+
+    monkeypatch.setattr(summarizer.Paper, "from_pdf", classmethod(lambda cls, path, metadata=None, parsed=None: ThreeChunkPaper("Sparse", [], path, parsed.raw_text)))
+    paper = tmp_path / "paper.pdf"
+    paper.write_bytes(b"%PDF paper")
+    file_hash = CacheManager.get_file_hash(str(paper))
+
+    result = summarizer.SummarizerService.summarize_paper(str(paper), llm=FlakyLLM())
+
+    assert result["failed_chunks"] == 1
+    assert not summarizer.SummarizerService.is_complete(result)
+    assert CacheManager.load_compression(file_hash, "gpt-3.5-turbo") is None
+
+    CacheManager.save_compression(file_hash, "gpt-3.5-turbo", {"compressed_text": "compressed"})
+    assert CacheManager.load_compression(file_hash, "gpt-3.5-turbo") is not None
+    monkeypatch.setattr(Config, "CHUNKING", "fixed")
+    assert CacheManager.load_compression(file_hash, "gpt-3.5-turbo") is None
@@ -0,0 +1,118 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import json
+import threading
+import pytest
+from agents.endpoint_pool import Endpoint, EndpointPool
+from agents.llm_client import LLMClient
+from infra.config import Config
+from tools.stub_llm_server import StubLLMServer
+
+
+@pytest.fixture
+def pooled(monkeypatch):
+    monkeypatch.setattr(Config, "OPENAI_API_KEY", "test-key")
+    monkeypatch.setattr(Config, "OPENAI_BASE_URL", None)
+    monkeypatch.setattr(Config, "LLM_ENDPOINT_EJECT_AFTER", 2)
+    monkeypatch.setattr(Config, "LLM_ENDPOINT_EJECT_SECONDS", 60)
+    monkeypatch.setattr(Config, "LLM_ENDPOINT_BACKOFF", 0)
+
+    def configure(*servers, **options):
+        entries = [{"base_url": s.base_url, "name": f"stub{i}", **options} for i, s in enumerate(servers)]
+        monkeypatch.setattr(Config, "LLM_ENDPOINTS", json.dumps(entries))
+        LLMClient.close_shared()
+        return LLMClient("openai", "gpt-3.5-turbo")
+
+    yield configure
+    LLMClient.close_shared()
+
+
+def test_requests_spread_across_endpoints(pooled):
+    with StubLLMServer([{"content": "a", "delay": 0.2}]) as first, StubLLMServer([{"content": "b", "delay": 0.2}]) as second:
+        client = pooled(first, second)
+        threads = [threading.Thread(target=client.chat_completion, args=("hi",)) for _ in range(6)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+    assert len(first.requests) == 3
+    assert len(second.requests) == 3
+    assert all(e["outstanding"] == 0 for e in LLMClient.endpoint_stats())
+
+
+def test_failing_endpoint_is_ejected_and_requests_fail_over(pooled):
+    with StubLLMServer([{"status": 500}]) as broken, StubLLMServer([{"content": "ok"}]) as healthy:
+        client = pooled(broken, healthy)
+        texts = [client.chat_completion("hi")["text"] for _ in range(6)]
+        stream = list(client.stream_chat_completion("hi"))
+
+    assert texts == ["ok"] * 6
+    assert stream[-1]["text"] == "ok"
+    # Two failures eject it; afterwards nothing more is sent there
+    assert len(broken.requests) == 2
+    stats = {e["name"]: e for e in LLMClient.endpoint_stats()}
+    assert stats["stub0"]["ejected"] and stats["stub0"]["errors"] == 2
+    assert stats["stub1"]["errors"] == 0
+
+
+def test_max_concurrency_is_respected():
+    endpoints = [Endpoint("http://a", name="a", max_concurrency=1), Endpoint("http://b", name="b", max_concurrency=2)]
+    pool = EndpointPool(endpoints)
+    held = [pool.acquire() for _ in range(3)]
+
+    assert sorted(e.name for e in held) == ["a", "b", "b"]
+    with pytest.raises(TimeoutError):
+        pool.acquire(timeout=0.05)
+
+    pool.release(held[0])
+    assert pool.acquire(timeout=0.05).name == held[0].name
+
+
+def test_cancelled_release_is_neutral_and_open_claims_before_the_request():
+    endpoints = [Endpoint("http://a", name="a"), Endpoint("http://b", name="b")]
+    pool = EndpointPool(endpoints, eject_after=3)
+    endpoints[0].consecutive_failures = 2
+
+    claimed = []
+    seen_claims = []
+    _, endpoint = pool.open(None, lambda e: seen_claims.append(list(claimed)), exclude=("b",), claimed=claimed)
+    assert endpoint.name == "a" and seen_claims == [["a"]]
+
+    pool.release(endpoint, latency=99.0, cancelled=True)
+    assert endpoint.outstanding == 0
+    assert endpoint.consecutive_failures == 2 and endpoint.latency_ewma is None
+
+    # A hedge opened while the first attempt is still sending avoids its endpoint
+    _, first = pool.open(None, lambda e: None, claimed=claimed)
+    _, hedge = pool.open(None, lambda e: None, exclude=tuple(claimed))
+    assert hedge.name != first.name
+
+
+def test_invalid_requests_are_not_retried_and_rate_limits_back_off(pooled, monkeypatch):
+    import time
+    import openai
+
+    monkeypatch.setattr(Config, "LLM_ENDPOINT_BACKOFF", 0.2)
+    with StubLLMServer([{"status": 400}]) as rejecting, StubLLMServer([{"content": "ok"}]) as healthy:
+        client = pooled(rejecting, healthy)
+        pool = LLMClient.endpoint_pool()
+        with pytest.raises(openai.BadRequestError):
+            pool.call("gpt-3.5-turbo", lambda e: e.client.chat.completions.create(model="gpt-3.5-turbo", messages=[{"role": "user", "content": "hi"}]), exclude=("stub1",))
+
+    assert len(rejecting.requests) == 1 and len(healthy.requests) == 0
+    stats = {e["name"]: e for e in LLMClient.endpoint_stats()}
+    assert stats["stub0"]["errors"] == 0 and stats["stub0"]["outstanding"] == 0
+
+    with StubLLMServer([{"status": 429}]) as limited, StubLLMServer([{"content": "ok"}]) as healthy:
+        client = pooled(limited, healthy)
+        pool = LLMClient.endpoint_pool()
+        started = time.perf_counter()
+        result = pool.call("gpt-3.5-turbo", lambda e: e.client.chat.completions.create(model="gpt-3.5-turbo", messages=[{"role": "user", "content": "hi"}]), exclude=("stub1",))
+        elapsed = time.perf_counter() - started
+
+    assert result.choices[0].message.content == "ok"
+    assert elapsed >= 0.1  # Backed off before failing over
+    stats = {e["name"]: e for e in LLMClient.endpoint_stats()}
+    assert stats["stub0"]["errors"] == 1
@@ -0,0 +1,123 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import json
+import threading
+import tools.prototype_figure_analyzer as figure_analyzer
+from infra.config import Config
+from tools.prototype_figure_analyzer import FigureAnalyzer
+
+CAPTIONS = {f"Figure {i}": f"Page {i}: Figure {i}. Attention pattern number {i}." for i in range(1, 7)}
+
+
+class BatchLLM:
+    model = "gpt-3.5-turbo"
+
+    def __init__(self, broken_batches=()):
+        self.prompts = []
+        self.broken_batches = broken_batches
+        self._lock = threading.Lock()
+
+    def chat_completion(self, prompt):
+        with self._lock:
+            self.prompts.append(prompt)
+        labels = [label for label in CAPTIONS if f"[{label}]" in prompt]
+        if not labels:
+            return {"text": "single explanation", "usage": {}}
+        if labels[0] in self.broken_batches:
+            return {"text": "Sorry, here are the explanations: ...", "usage": {}}
+        return {"text": "```json\n" + json.dumps({label: f"explains {label}" for label in labels}) + "\n```", "usage": {}}
+
+
+def _analyzer(monkeypatch, llm):
+    analyzer = FigureAnalyzer.__new__(FigureAnalyzer)
+    analyzer.pdf_path, analyzer.llm = "paper.pdf", llm
+    monkeypatch.setattr(analyzer, "extract_visual_captions", lambda: dict(CAPTIONS))
+    monkeypatch.setattr(figure_analyzer.TokenCounter, "count_tokens", staticmethod(lambda text: len(text) // 4))
+    # Room for three captions (and their answers) per request
+    monkeypatch.setattr(figure_analyzer.TokenCounter, "get_max_tokens", staticmethod(lambda model=None: 100 + 3 * 160))
+    monkeypatch.setattr(Config, "FIGURE_EXPLANATION_TOKENS", 150)
+    return analyzer
+
+
+def test_captions_are_explained_in_concurrent_batches(monkeypatch):
+    llm = BatchLLM()
+    explanations = _analyzer(monkeypatch, llm).explain_figures(batch=True)
+
+    assert len(llm.prompts) == 2
+    assert explanations == {label: f"explains {label}" for label in sorted(CAPTIONS)}
+
+
+def test_unparseable_batch_falls_back_to_one_call_per_caption(monkeypatch):
+    llm = BatchLLM(broken_batches=("Figure 4",))
+    explanations = _analyzer(monkeypatch, llm).explain_figures(batch=True)
+
+    assert len(llm.prompts) == 2 + 3
+    assert [explanations[f"Figure {i}"] for i in (1, 4)] == ["explains Figure 1", "single explanation"]
+
+
+def test_document_scan_finds_references_and_captions_in_one_pass():
+    from collections import defaultdict
+    from tools.pdf_parser import ParsedPDF, PDFParser
+
+    page = (
+        "As Fig. 2 shows, sparse attention lists tokens; see also Table II.\n"
+        "Figure 2: Memory use of dense and sparse attention\n"
+        "across sequence lengths.\n"
+        "Body text resumes here and mentions figure 3a in passing.\n"
+        "TABLE II\n"
+        "Accuracy on long-document question answering benchmarks."
+    )
+    references, captions = defaultdict(set), {}
+    PDFParser._scan_figures(page, 4, references, captions)
+
+    assert sorted(references) == ["Figure 2", "Figure 3A", "Table II"]
+    assert references["Figure 2"] == {"Page 4: As Fig. 2 shows, sparse attention lists tokens; see also Table II.", "Page 4: Figure 2: Memory use of dense and sparse attention"}
+    assert captions == {
+        "Figure 2": "Page 4: Figure 2: Memory use of dense and sparse attention across sequence lengths.",
+        "Table II": "Page 4: TABLE II. Accuracy on long-document question answering benchmarks.",
+    }
+
+    # An already parsed paper is reused instead of opening the PDF again
+    parsed = ParsedPDF("text", figure_references={k: sorted(v) for k, v in references.items()}, captions=captions)
+    analyzer = FigureAnalyzer.__new__(FigureAnalyzer)
+    analyzer.pdf_path, analyzer.parsed = "missing.pdf", parsed
+    assert analyzer.extract_visual_captions() == captions
+    assert analyzer.extract_figure_references()["Table II"] == ["Page 4: As Fig. 2 shows, sparse attention lists tokens; see also Table II.", "Page 4: TABLE II"]
+
+
+def test_captions_of_a_two_column_page_stay_in_their_column(tmp_path):
+    import fitz
+    from tools.pdf_parser import PDFParser
+
+    left = [
+        "Figure 1: Memory use of dense and",
+        "sparse attention across lengths.",
+        "",
+        "Body text of the left column goes",
+        "on after the figure with more words.",
+    ]
+    right = [
+        "Results on the benchmark suite are",
+        "strong, as the next table confirms.",
+        "",
+        "Table 2: Accuracy of every model on",
+        "long-document question answering.",
+    ]
+    path = str(tmp_path / "two_columns.pdf")
+    doc = fitz.open()
+    page = doc.new_page(width=595, height=842)
+    page.insert_text((56, 60), "A Full Width Title Spanning Both Columns Of The Page", fontsize=14)
+    for row, (left_line, right_line) in enumerate(zip(left, right)):
+        page.insert_text((56, 100 + 12 * row), left_line, fontsize=9)
+        page.insert_text((310, 100 + 12 * row), right_line, fontsize=9)
+    doc.save(path)
+    doc.close()
+
+    parsed = PDFParser.extract_info(path, normalize=False, cache=False)
+
+    assert "Figure 1: Memory use of dense and Results on the benchmark suite are" in parsed.raw_text  # extract_text mixes the columns
+    assert parsed.captions == {
+        "Figure 1": "Page 1: Figure 1: Memory use of dense and sparse attention across lengths.",
+        "Table 2": "Page 1: Table 2: Accuracy of every model on long-document question answering.",
+    }
@@ -0,0 +1,73 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import time
+import pytest
+from agents.hedging import HedgeCancelled, Hedger
+from agents.llm_client import LLMClient
+from infra.config import Config
+from tools.stub_llm_server import StubLLMServer
+
+
+@pytest.fixture
+def hedging(monkeypatch):
+    monkeypatch.setattr(Config, "OPENAI_API_KEY", "test-key")
+    monkeypatch.setattr(Config, "LLM_HEDGE", True)
+    monkeypatch.setattr(Config, "LLM_HEDGE_MIN_SAMPLES", 3)
+    monkeypatch.setattr(Config, "LLM_HEDGE_MIN_DELAY", 0.2)
+    monkeypatch.setattr(Config, "LLM_HEDGE_BUDGET", 0.5)
+    LLMClient.close_shared()
+    yield
+    LLMClient.close_shared()
+
+
+def test_slow_call_is_hedged_and_the_duplicate_wins(hedging):
+    script = [{"content": "fast"}] * 3 + [{"content": "slow", "delay": 3}, {"content": "hedge"}]
+    with StubLLMServer(script) as server:
+        client = LLMClient("openai", "gpt-3.5-turbo", base_url=server.base_url)
+        for _ in range(3):
+            assert client.chat_completion("hi")["text"] == "fast"
+
+        started = time.perf_counter()
+        response = client.chat_completion("hi")
+        elapsed = time.perf_counter() - started
+
+    assert response["text"] == "hedge"
+    assert response["usage"]["total_tokens"] > 0
+    assert elapsed < 2
+    stats = LLMClient.hedge_stats()
+    assert stats["hedged"] == 1 and stats["hedge_wins"] == 1
+
+
+def test_hedges_stay_within_budget():
+    hedger = Hedger(percentile=50, min_samples=2, min_delay=0.01, budget=0.25)
+    for _ in range(2):
+        hedger.run("m", lambda cancel, index: "warm")
+
+    def slow_primary(cancel, index):
+        if index == 1:
+            return "hedge"
+        if cancel.wait(0.3):
+            raise HedgeCancelled()
+        return "slow"
+
+    results = [hedger.run("m", slow_primary) for _ in range(3)]
+    time.sleep(0.4)  # Let the cancelled primary finish
+    stats = hedger.stats()
+
+    # One extra request per four calls: the 4th call may hedge, the 3rd and 5th may not
+    assert results == ["slow", "hedge", "slow"]
+    assert stats["hedged"] == 1 and stats["over_budget"] == 2
+    assert stats["cancelled"] == 1
+
+
+def test_primary_failure_before_the_delay_is_raised():
+    hedger = Hedger(percentile=50, min_samples=1, min_delay=5, budget=1.0)
+    hedger.run("m", lambda cancel, index: "warm")
+
+    def broken(cancel, index):
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        hedger.run("m", broken)
+    assert hedger.stats()["hedged"] == 0
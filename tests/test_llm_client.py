@@ -1,13 +1,29 @@
 import sys, os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
+import pytest
 from agents.llm_client import LLMClient
 from dotenv import load_dotenv
 
 load_dotenv()
 
-def test_llm_chat_completion_returns_expected_structure():
-    client = LLMClient(provider="openai", model="gpt-3.5-turbo")
+# Recorded responses for the live-API checks below, replayed offline (see agents/replay_client.py)
+CASSETTE = os.path.join(os.path.dirname(__file__), "cassettes", "llm_client.jsonl")
+
+
+@pytest.fixture
+def replayed(monkeypatch):
+    from infra.config import Config
+
+    monkeypatch.setattr(Config, "REPLAY_MODE", "replay")
+    monkeypatch.setattr(Config, "REPLAY_CASSETTE", CASSETTE)
+    monkeypatch.setattr(Config, "REPLAY_STRICT", True)
+    LLMClient.close_shared()
+    yield
+    LLMClient.close_shared()
+
+def test_llm_chat_completion_returns_expected_structure(replayed):
+    client = LLMClient(provider="replay", model="gpt-3.5-turbo")
     prompt = "Reply with the word 'pong' only."
     
     response = client.chat_completion(prompt)
@@ -18,10 +34,110 @@ def test_llm_chat_completion_returns_expected_structure():
     assert isinstance(response["text"], str)
     assert isinstance(response["usage"], dict)
     assert "total_tokens" in response["usage"]
+    assert response["text"] == "pong"
 
-def test_llm_health_check_ok():
-    result = LLMClient.health_check(provider="openai", model="gpt-3.5-turbo")
+def test_llm_health_check_ok(replayed):
+    result = LLMClient.health_check(provider="replay", model="gpt-3.5-turbo")
 
     assert isinstance(result, dict)
     assert result["status"] == "ok", f"Health check failed: {result['message']}"
     assert "message" in result
+
+def test_stream_chat_completion_yields_deltas_then_usage(monkeypatch):
+    from infra.config import Config
+    from tools.stub_llm_server import StubLLMServer
+
+    monkeypatch.setattr(Config, "OPENAI_API_KEY", "test-key")
+
+    with StubLLMServer([{"content": "streamed reply text"}]) as server:
+        client = LLMClient(provider="openai", model="gpt-3.5-turbo", base_url=server.base_url)
+        events = list(client.stream_chat_completion("Say something."))
+
+    deltas = [e["text"] for e in events if e["type"] == "delta"]
+    done = events[-1]
+
+    assert "".join(deltas) == "streamed reply text"
+    assert done["type"] == "done"
+    assert done["text"] == "streamed reply text"
+    assert done["cancelled"] is False
+    assert done["usage"]["completion_tokens"] == 3
+
+def test_shared_clients_reuse_instances_and_connections(monkeypatch):
+    from infra.config import Config
+    from tools.stub_llm_server import StubLLMServer
+
+    monkeypatch.setattr(Config, "OPENAI_API_KEY", "test-key")
+    LLMClient.close_shared()
+
+    try:
+        with StubLLMServer([{"content": "pong"}]) as server:
+            first = LLMClient.shared("openai", "gpt-3.5-turbo", base_url=server.base_url)
+            second = LLMClient.shared("OpenAI", "GPT-3.5-Turbo", base_url=server.base_url)
+            other_model = LLMClient.shared("openai", "gpt-4", base_url=server.base_url)
+
+            for client in (first, second, other_model):
+                assert client.chat_completion("ping")["text"] == "pong"
+
+        assert first is second
+        assert other_model is not first
+        assert other_model._client is first._client  # Same endpoint -> same connection pool
+        assert len(set(server.peers)) == 1  # All three requests rode one keep-alive connection
+    finally:
+        LLMClient.close_shared()
+
+def test_stream_failing_midway_reports_error_and_is_not_complete(monkeypatch):
+    from types import SimpleNamespace
+    from infra.config import Config
+    from services.summarizer import SummarizerService
+
+    monkeypatch.setattr(Config, "OPENAI_API_KEY", "test-key")
+    client = LLMClient(provider="openai", model="gpt-3.5-turbo", base_url="http://127.0.0.1:9/v1")
+
+    class BrokenStream:
+        def __iter__(self):
+            yield SimpleNamespace(usage=None, choices=[SimpleNamespace(delta=SimpleNamespace(content="The paper"))])
+            raise ConnectionError("connection reset")
+
+        def close(self):
+            pass
+
+    monkeypatch.setattr(client, "_open_stream", lambda **kwargs: (BrokenStream(), lambda error=None, cancelled=False: None, "stub"))
+    monkeypatch.setattr(LLMClient, "_estimate_usage", staticmethod(lambda prompt, text: {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}))
+
+    done = list(client.stream_chat_completion("Summarize."))[-1]
+
+    assert done["text"] == "The paper"
+    assert done["error"] == "ConnectionError: connection reset"
+    assert not SummarizerService.is_complete({"final_summary": done["text"], "error": done["error"]})
+    assert SummarizerService.is_complete({"final_summary": "The paper proposes X.", "error": None})
+
+def test_closing_stream_midway_is_cancelled_not_a_success(monkeypatch):
+    import json
+    from infra.config import Config
+    from infra.tracing import tracer
+    from tools.stub_llm_server import StubLLMServer
+
+    monkeypatch.setattr(Config, "OPENAI_API_KEY", "test-key")
+    monkeypatch.setattr(Config, "OPENAI_BASE_URL", None)
+    monkeypatch.setattr(LLMClient, "_estimate_usage", staticmethod(lambda prompt, text: {"prompt_tokens": 40, "completion_tokens": 1, "total_tokens": 41}))
+    spans = []
+    listener = tracer.add_listener(None, lambda s: spans.append(s) if s.name == "llm.stream_chat_completion" else None)
+
+    try:
+        with StubLLMServer([{"content": "one two three four five", "token_delay": 0.05}]) as server:
+            monkeypatch.setattr(Config, "LLM_ENDPOINTS", json.dumps([{"base_url": server.base_url, "name": "stub"}]))
+            LLMClient.close_shared()
+            endpoint = LLMClient.endpoint_pool().endpoints[0]
+            endpoint.consecutive_failures = 1
+
+            events = LLMClient("openai", "gpt-3.5-turbo").stream_chat_completion("Summarize.")
+            assert next(events)["type"] == "delta"
+            events.close()  # What closing(events) in the daemon does when the client goes away
+    finally:
+        tracer.remove_listener(listener)
+        LLMClient.close_shared()
+
+    assert endpoint.outstanding == 0
+    assert endpoint.consecutive_failures == 1 and endpoint.latency_ewma is None  # Neither success nor failure
+    assert spans[-1].attrs["cancelled"] is True
+    assert spans[-1].attrs["prompt_tokens"] == 40 and spans[-1].error is None
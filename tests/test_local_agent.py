@@ -0,0 +1,121 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from agents.llm_client import LLMClient
+from agents.local_agent import LocalAgent
+from agents.tool_registry import ToolRegistry
+from infra.config import Config
+from tools.stub_llm_server import StubLLMServer
+
+ADD_TOOL = {
+    "type": "function",
+    "function": {
+        "name": "add",
+        "description": "Adds two numbers.",
+        "parameters": {
+            "type": "object",
+            "properties": {"a": {"type": "number"}, "b": {"type": "number"}},
+            "required": ["a", "b"]
+        }
+    }
+}
+
+
+def test_local_agent_dispatches_tool_calls_through_registry(monkeypatch):
+    monkeypatch.setattr(Config, "OPENAI_API_KEY", "test-key")
+
+    registry = ToolRegistry()
+
+    @registry.register("add")
+    def add(args, context):
+        return str(args["a"] + args["b"])
+
+    script = [
+        {"tool_calls": [{"name": "add", "arguments": {"a": 2, "b": 3}}]},
+        {"content": "The answer is 5."},
+    ]
+
+    with StubLLMServer(script) as server:
+        llm = LLMClient(provider="openai", model="gpt-3.5-turbo", base_url=server.base_url)
+        agent = LocalAgent(llm=llm, tools=[ADD_TOOL], registry=registry)
+
+        reply = agent.run("What is 2 + 3?")
+
+    assert reply == "The answer is 5."
+    assert len(server.requests) == 2
+
+    tool_message = server.requests[1]["messages"][-1]
+    assert tool_message["role"] == "tool"
+    assert tool_message["content"] == "5"
+    assert agent.usage["total_tokens"] > 0
+
+
+def test_registry_reports_unknown_tool():
+    registry = ToolRegistry()
+    assert registry.dispatch("missing", "{}") == "Unknown tool 'missing'."
+
+
+def test_dispatch_all_runs_calls_concurrently_and_keeps_order():
+    import time
+
+    registry = ToolRegistry()
+
+    @registry.register("sleep")
+    def sleep(args, context):
+        time.sleep(args["seconds"])
+        return f"slept {args['seconds']}"
+
+    @registry.register("boom")
+    def boom(args, context):
+        raise RuntimeError("bad input")
+
+    calls = [
+        {"id": "call_a", "name": "sleep", "arguments": '{"seconds": 0.3}'},
+        {"id": "call_b", "name": "boom", "arguments": "{}"},
+        {"id": "call_c", "name": "sleep", "arguments": '{"seconds": 0.3}'},
+        {"id": "call_d", "name": "sleep", "arguments": '{"seconds": 5}'},
+    ]
+
+    started = time.monotonic()
+    outputs = registry.dispatch_all(calls, max_workers=4, timeout=0.5)
+    elapsed = time.monotonic() - started
+
+    assert [o["tool_call_id"] for o in outputs] == ["call_a", "call_b", "call_c", "call_d"]
+    assert outputs[0]["output"] == "slept 0.3"
+    assert "bad input" in outputs[1]["output"]
+    assert "timed out" in outputs[3]["output"]
+    assert elapsed < 1.5
+
+
+def test_timed_out_tool_call_is_cancelled_and_incomplete_summary_not_cached(monkeypatch, tmp_path):
+    import threading
+    import agents.tool_registry as tool_registry
+    from services.summarizer import SummarizerService
+    from tools.cache_manager import CacheManager
+
+    registry = ToolRegistry()
+    seen = {}
+    stopped = threading.Event()
+
+    @registry.register("slow")
+    def slow(args, context):
+        seen["event"] = context.cancel_event
+        if context.cancel_event.wait(5):
+            stopped.set()
+        return "late"
+
+    outputs = registry.dispatch_all([{"id": "call_a", "name": "slow", "arguments": "{}"}], timeout=0.2)
+    assert "timed out" in outputs[0]["output"]
+    assert stopped.wait(2)
+
+    pdf = tmp_path / "paper.pdf"
+    pdf.write_bytes(b"%PDF-1.4 test")
+    saved = []
+    monkeypatch.setattr(SummarizerService, "summarize_paper", staticmethod(lambda *a, **k: {"final_summary": "partial", "error": "stream broke", "total_usage": {}, "cost": 0.0}))
+    monkeypatch.setattr(CacheManager, "is_cached", staticmethod(lambda *a: False))
+    monkeypatch.setattr(CacheManager, "save_summary", staticmethod(lambda *a: saved.append(a)))
+
+    output = tool_registry.summarize_pdf({"path": str(pdf)}, tool_registry.ToolContext(stream_output=False))
+
+    assert output == "partial"
+    assert saved == []
@@ -0,0 +1,101 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import pytest
+from benchmarks.corpus import generate_corpus
+from infra.config import Config
+from services.planner import PlannerService
+from tools.cost_tracker import CostTracker
+
+
+@pytest.fixture
+def offline_planner(monkeypatch):
+    import agents.llm_client as llm_client
+
+    # Character-based token estimate, and any attempt to build an LLM client fails the test
+    monkeypatch.setattr(PlannerService, "_tokenizer", staticmethod(lambda model: None))
+    monkeypatch.setattr(llm_client.LLMClient, "__init__", lambda *a, **k: pytest.fail("dry run created an LLM client"))
+    monkeypatch.setattr(Config, "LLM_PROVIDER", "openai")
+    monkeypatch.setattr(Config, "OPENAI_MODEL", "gpt-3.5-turbo")
+    monkeypatch.setattr(Config, "LLM_RPM_LIMIT", 0)
+    monkeypatch.setattr(Config, "LLM_TPM_LIMIT", 0)
+
+
+def test_plan_matches_pipeline_shape_and_prices(tmp_path, offline_planner, monkeypatch):
+    papers = generate_corpus(str(tmp_path), count=2, pages=4, columns=2)
+    paths = [p["path"] for p in papers]
+    monkeypatch.setattr(PlannerService, "_plan_paper", _no_parse_time(PlannerService._plan_paper))
+
+    plan = PlannerService.plan_bulk(paths, model="gpt-3.5-turbo", concurrency=1, skip_cached=False)
+    paper = plan["papers"][0]
+
+    # Too long for one call (4096-token context): one metadata call, one compression call per chunk, one final prompt
+    assert paper["requests"] == paper["chunks"] + 2
+    assert plan["stages"]["compression"]["requests"] == sum(p["chunks"] for p in plan["papers"])
+    assert plan["cost"] == CostTracker.estimate_cost(plan["prompt_tokens"], plan["completion_tokens"], model_name="gpt-3.5-turbo")
+
+    parallel = PlannerService.plan_bulk(paths, model="gpt-3.5-turbo", concurrency=2, skip_cached=False)
+    assert parallel["wall_time"] == pytest.approx(max(p["seconds"] for p in plan["papers"]), abs=0.01)
+    assert parallel["wall_time"] < plan["wall_time"]
+
+    monkeypatch.setattr(Config, "LLM_RPM_LIMIT", 10)
+    limited = PlannerService.plan_bulk(paths, model="gpt-3.5-turbo", concurrency=2, skip_cached=False)
+    assert limited["bottleneck"] == "rpm"
+    assert limited["wall_time"] == pytest.approx(limited["requests"] / 10 * 60, abs=0.01)
+
+
+def test_stage_routing_prices_compression_on_its_own_model(tmp_path, offline_planner, monkeypatch):
+    from utils.token_counter import TokenCounter
+
+    paths = [p["path"] for p in generate_corpus(str(tmp_path), count=1, pages=4, columns=2)]
+    # Same context window for both models, so only the prices differ
+    monkeypatch.setattr(TokenCounter, "get_max_tokens", staticmethod(lambda model=None: 4096))
+
+    single = PlannerService.plan_bulk(paths, model="gpt-4", skip_cached=False)
+    monkeypatch.setattr(Config, "MODEL_COMPRESSION", "gpt-3.5-turbo")
+    routed = PlannerService.plan_bulk(paths, model="gpt-4", skip_cached=False)
+
+    assert routed["stages"]["compression"]["model"] == "gpt-3.5-turbo"
+    assert routed["stages"]["summary"]["model"] == "gpt-4"
+    assert routed["requests"] == single["requests"]
+    assert routed["cost"] < single["cost"]
+
+
+def test_unsupported_model_is_rejected(offline_planner, monkeypatch):
+    with pytest.raises(ValueError):
+        PlannerService.plan_summary("paper.pdf", model="not-a-model")
+
+    monkeypatch.setattr(Config, "MODEL_SUMMARY", "not-a-model")
+    with pytest.raises(ValueError, match="MODEL_SUMMARY"):
+        PlannerService.plan_summary("paper.pdf")
+
+
+def test_plan_skips_cached_comparisons_and_follows_reuse_and_sections(tmp_path, offline_planner, monkeypatch):
+    from services.summarizer import SummarizerService
+    from tools.cache_manager import CacheManager
+
+    paths = [p["path"] for p in generate_corpus(str(tmp_path), count=2, pages=4, columns=2)]
+    monkeypatch.setattr(Config, "DEDUP", False)
+
+    full = PlannerService.plan_summary(paths[0], skip_cached=False)
+    targeted = PlannerService.plan_summary(paths[0], skip_cached=False, sections=["introduction"])
+    assert 0 < targeted["stages"]["compression"]["requests"] < full["stages"]["compression"]["requests"]
+
+    # Same decision as summarize_paper: a near-duplicate's cached summary leaves only the metadata call
+    match = {"path": paths[1], "file_hash": "other", "similarity": 0.97}
+    monkeypatch.setattr(SummarizerService, "find_reuse", staticmethod(lambda *a, **k: {"dedup": None, "summary": match, "compression": None}))
+    reused = PlannerService.plan_summary(paths[0], skip_cached=False)
+    assert reused["papers"][0]["reused"] == "summary"
+    assert list(reused["stages"]) == ["metadata"]
+
+    monkeypatch.setattr(CacheManager, "is_cached", staticmethod(lambda file_hash, style: style == "default"))
+    cached = PlannerService.plan_comparison(paths[0], paths[1])
+    assert cached["requests"] == 0 and all(p["cached"] for p in cached["papers"])
+    assert PlannerService.plan_comparison(paths[0], paths[1], skip_cached=False)["requests"] > 0
+
+
+def _no_parse_time(plan_paper):
+    # Local parse time varies between runs; zero it so wall times are exact
+    def wrapper(*args, **kwargs):
+        return {**plan_paper(*args, **kwargs), "parse_seconds": 0.0}
+    return staticmethod(wrapper)
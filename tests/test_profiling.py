@@ -0,0 +1,68 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import json
+import pstats
+from infra.profiling import Profiler
+from infra.tracing import tracer
+
+
+def _busy(n: int) -> int:
+    return sum(i * i for i in range(n))
+
+
+def test_profiler_writes_exclusive_stage_profiles_and_memory(tmp_path):
+    with Profiler(str(tmp_path), stages=("compress", "tokenize")):
+        with tracer.span("summarize_paper", path="paper.pdf"):
+            with tracer.span("compress"):
+                with tracer.span("tokenize"):
+                    _busy(20_000)
+                blob = [bytearray(1024) for _ in range(500)]
+            del blob
+
+    assert not tracer.active  # Listener detached
+    tokenize = pstats.Stats(str(tmp_path / "tokenize.prof"))
+    compress = pstats.Stats(str(tmp_path / "compress.prof"))
+
+    def functions(stats):
+        return {name for (_, _, name) in stats.stats}
+
+    assert "_busy" in functions(tokenize)
+    assert "_busy" not in functions(compress)  # Nested stage time is not double counted
+
+    memory = json.loads((tmp_path / "memory.json").read_text())
+    assert memory[0]["paper"] == "paper.pdf"
+    assert memory[0]["peak_mb"] >= 0.4
+    summary = (tmp_path / "profile_summary.txt").read_text()
+    assert summary.startswith("Note: compress")  # Generator stages include consumer time
+    assert "=== compress ===" in summary
+
+
+def test_single_profiler_mode_profiles_one_thread_at_a_time(tmp_path, monkeypatch):
+    import threading
+    import infra.profiling as profiling
+
+    # Python 3.12+ behaviour: a second thread entering a stage must not enable another profiler
+    monkeypatch.setattr(profiling, "SINGLE_PROFILER", True)
+    inside, release = threading.Event(), threading.Event()
+
+    def worker():
+        with tracer.span("parse_pdf"):
+            inside.set()
+            release.wait(2)
+            _busy(1_000)
+
+    with Profiler(str(tmp_path), stages=("parse_pdf",), memory=False) as profiler:
+        thread = threading.Thread(target=worker)
+        thread.start()
+        inside.wait(2)
+        with tracer.span("parse_pdf"):
+            _busy(1_000)
+        release.set()
+        thread.join()
+        with tracer.span("parse_pdf"):  # Profiler is free again once the worker is done
+            _busy(1_000)
+
+    assert profiler.skipped == {"parse_pdf": 1}
+    assert profiler._owner is None
+    assert "parse_pdf x1" in (tmp_path / "profile_summary.txt").read_text()
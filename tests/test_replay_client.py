@@ -0,0 +1,69 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import pytest
+from agents.llm_client import LLMClient
+from infra.config import Config
+
+
+@pytest.fixture
+def replay_config(monkeypatch, tmp_path):
+    def configure(mode, **overrides):
+        monkeypatch.setattr(Config, "REPLAY_MODE", mode)
+        monkeypatch.setattr(Config, "REPLAY_CASSETTE", str(tmp_path / "cassette.jsonl"))
+        for name, value in overrides.items():
+            monkeypatch.setattr(Config, name, value)
+        LLMClient.close_shared()
+
+    monkeypatch.setattr(Config, "OPENAI_API_KEY", "test-key")
+    yield configure
+    LLMClient.close_shared()
+
+
+def test_record_then_replay_offline(replay_config):
+    from tools.stub_llm_server import StubLLMServer
+
+    replay_config("record")
+    with StubLLMServer([{"content": "recorded answer"}, {"content": "streamed answer"}]) as server:
+        client = LLMClient("replay", "gpt-3.5-turbo", base_url=server.base_url)
+        recorded = client.chat_completion("First question")
+        streamed = list(client.stream_chat_completion("Second question"))[-1]
+
+    # Server is gone: everything below must come from the cassette
+    replay_config("replay", REPLAY_STRICT=True)
+    client = LLMClient("replay", "gpt-3.5-turbo")
+
+    assert client.chat_completion("First question") == recorded
+    replayed = list(client.stream_chat_completion("Second question"))
+    assert "".join(e["text"] for e in replayed if e["type"] == "delta") == "streamed answer"
+    assert replayed[-1]["usage"] == streamed["usage"]
+    assert client._client.stats["hits"] == 2
+
+    with pytest.raises(KeyError):
+        client._client.create(model="gpt-3.5-turbo", messages=[{"role": "user", "content": "Never recorded"}])
+
+
+def test_synthetic_mode_is_deterministic_and_sized(replay_config):
+    replay_config("synthetic", REPLAY_SYNTHETIC_TOKENS=120)
+    client = LLMClient("replay", "gpt-4")
+
+    first = client.chat_completion("Summarize the transformer attention paper.")
+    second = client.chat_completion("Summarize the transformer attention paper.")
+
+    assert first == second
+    assert first["text"]
+    assert first["usage"]["total_tokens"] == first["usage"]["prompt_tokens"] + first["usage"]["completion_tokens"]
+    assert len(first["text"].split()) == 90  # ~0.75 words per requested token
+
+
+def test_simulated_rate_limits_surface_as_errors(replay_config):
+    from agents.replay_client import ReplayRateLimitError
+
+    replay_config("synthetic", REPLAY_RATE_LIMIT_RATE=1.0)
+    client = LLMClient("replay", "gpt-3.5-turbo")
+
+    with pytest.raises(ReplayRateLimitError):
+        client._client.create(model="gpt-3.5-turbo", messages=[{"role": "user", "content": "hi"}])
+
+    assert client.chat_completion("hi")["text"] == ""  # Swallowed like any provider error
+    assert client._client.stats["rate_limited"] == 2
@@ -0,0 +1,33 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from domain.section_index import SectionIndex
+from domain.text_chunk import Chunk
+from tools.cache_manager import CacheManager
+
+SECTIONS = ["Front Matter", "Abstract", "Introduction", "Method", "Method", "Sparse Attention", "Training Setup", "Experiments", "Ablations", "Conclusion", "References"]
+CHUNKS = [Chunk(index=i, text=f"chunk {i}", token_count=100, section=section, page_span=(i // 2 + 1, i // 2 + 1)) for i, section in enumerate(SECTIONS)]
+
+
+def test_index_maps_sections_to_chunk_ranges_and_pages():
+    index = SectionIndex.build(CHUNKS)
+
+    assert [entry["name"] for entry in index] == list(dict.fromkeys(SECTIONS))
+    method = index[3]
+    assert method == {"name": "Method", "chunks": [3, 5], "pages": [2, 3], "tokens": 200}
+
+
+def test_select_matches_aliases_and_subsections():
+    methods = SectionIndex.select(CHUNKS, ["methods"])
+    assert methods["matched"] == ["Method", "Sparse Attention", "Training Setup"]
+    assert [chunk.index for chunk in methods["kept"]] == [3, 4, 5, 6]
+    assert methods["tokens_skipped"] == 700
+
+    evaluation = SectionIndex.select(CHUNKS, ["evaluation", "intro", "datasets"])
+    assert evaluation["matched"] == ["Introduction", "Experiments", "Ablations"]
+    assert evaluation["missing"] == ["datasets"]
+
+
+def test_cache_key_depends_on_sections_but_not_their_order():
+    assert CacheManager.style_key("short") == "short"
+    assert CacheManager.style_key("short", ["Evaluation", "methods"]) == CacheManager.style_key("short", ["methods", "evaluation"]) == "short__sections-evaluation+methods"
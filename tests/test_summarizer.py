@@ -15,3 +15,211 @@ def test_summarize_single_chunk():
     assert "summary" in result
     assert isinstance(result["summary"], str)
     assert len(result["summary"]) > 0
+
+
+class FakeLLM:
+    costs = {"input": 0.001, "output": 0.002}
+    _costs = costs
+
+    def chat_completion(self, prompt):
+        return {"text": "compressed", "usage": {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15}}
+
+
+class FakePaper:
+    title = "Test Paper"
+    authors = ["Ada Lovelace"]
+    chunks = []
+    metadata_usage = {}
+    normalization = {}
+
+    def chunk_text(self):
+        self.chunks = [Chunk(index=i, text=f"chunk {i}", token_count=100) for i in range(3)]
+        return self.chunks
+
+
+def test_iter_summarize_paper_emits_progress_events(monkeypatch):
+    import services.summarizer as summarizer
+
+    monkeypatch.setattr(summarizer.Paper, "from_pdf", staticmethod(lambda path: FakePaper()))
+    monkeypatch.setattr(summarizer.TokenCounter, "count_tokens", staticmethod(lambda text: 10_000))
+    monkeypatch.setattr(summarizer.TokenCounter, "get_max_tokens", staticmethod(lambda model=None: 1_000))
+
+    events = list(SummarizerService.iter_summarize_paper("paper.pdf", llm=FakeLLM(), stream=False))
+    kinds = [e["event"] for e in events]
+
+    assert kinds == ["parsed", "chunked", "chunk_compressed", "chunk_compressed", "chunk_compressed", "reduced", "final"]
+    assert [e["index"] for e in events if e["event"] == "chunk_compressed"] == [0, 1, 2]
+    assert events[-1]["result"]["total_usage"]["total_tokens"] == 60
+
+
+class RoutedLLM(FakeLLM):
+    def __init__(self, model, costs):
+        self.model = model
+        self.costs = costs
+        self.calls = 0
+
+    def chat_completion(self, prompt):
+        self.calls += 1
+        return super().chat_completion(prompt)
+
+
+def test_stages_are_routed_and_priced_per_model(monkeypatch):
+    import services.summarizer as summarizer
+
+    cheap = RoutedLLM("gpt-3.5-turbo", {"input": 0.001, "output": 0.002})
+    strong = RoutedLLM("gpt-4", {"input": 0.03, "output": 0.06})
+    monkeypatch.setattr(summarizer.Paper, "from_pdf", staticmethod(lambda path: FakePaper()))
+    monkeypatch.setattr(summarizer.TokenCounter, "count_tokens", staticmethod(lambda text: 10_000))
+    monkeypatch.setattr(summarizer.TokenCounter, "get_max_tokens", staticmethod(lambda model=None: 1_000))
+    monkeypatch.setattr(summarizer.LLMClient, "for_stage", classmethod(lambda cls, stage, llm=None, provider=None, model=None: cheap if stage == "compression" else llm))
+
+    result = SummarizerService.summarize_paper("paper.pdf", llm=strong)
+    stages = result["stage_usage"]
+
+    assert (cheap.calls, strong.calls) == (3, 1)
+    assert stages["compression"]["model"] == "gpt-3.5-turbo" and stages["compression"]["total_tokens"] == 45
+    assert stages["summary"]["model"] == "gpt-4"
+    assert result["cost"] == round(stages["compression"]["cost"] + stages["summary"]["cost"], 6)
+    assert result["total_usage"]["total_tokens"] == 60
+
+
+def test_tree_reduction_merges_sections_in_rounds(monkeypatch):
+    import services.summarizer as summarizer
+
+    monkeypatch.setattr(summarizer.TokenCounter, "count_tokens", staticmethod(lambda text: len(text.split())))
+    llm = RoutedLLM("gpt-3.5-turbo", FakeLLM.costs)
+
+    events = SummarizerService.iter_reduce_sections([f"section {i}" for i in range(5)], llm, max_tokens=1, fan_in=2)
+    merged = []
+    while True:
+        try:
+            merged.append(next(events))
+        except StopIteration as stop:
+            result = stop.value
+            break
+
+    assert [e["sections"] for e in merged] == [3, 2, 1]
+    assert llm.calls == 2 + 1 + 1
+    assert result["compressed_text"] == "compressed"
+    assert result["usage"]["total_tokens"] == 4 * 15
+
+
+def test_failed_merges_are_reported_and_keep_the_result_out_of_the_cache(monkeypatch):
+    import services.summarizer as summarizer
+
+    class FailingMergeLLM(RoutedLLM):
+        def chat_completion(self, prompt):
+            self.calls += 1
+            return {"text": "", "usage": {"prompt_tokens": 10, "completion_tokens": 0, "total_tokens": 10}, "error": "rate limited"}
+
+    monkeypatch.setattr(summarizer.TokenCounter, "count_tokens", staticmethod(lambda text: len(text.split())))
+    llm = FailingMergeLLM("gpt-3.5-turbo", FakeLLM.costs)
+
+    events = SummarizerService.iter_reduce_sections([f"section {i}" for i in range(3)], llm, max_tokens=1, fan_in=2)
+    merged = []
+    while True:
+        try:
+            merged.append(next(events))
+        except StopIteration as stop:
+            result = stop.value
+            break
+
+    assert all(e["error"] == "rate limited" for e in merged)
+    assert result["failed_merges"] == llm.calls == 2
+    assert result["error"] == "rate limited"
+    assert result["compressed_text"] == "section 0\n\nsection 1\n\nsection 2"  # Nothing dropped, just not reduced
+    assert not SummarizerService.is_complete({"final_summary": "summary", "failed_merges": result["failed_merges"]})
+
+
+def test_filtered_chunks_are_not_compressed_and_are_reported(monkeypatch):
+    import services.summarizer as summarizer
+    from infra.config import Config
+
+    class PaperWithReferences(FakePaper):
+        def chunk_text(self):
+            texts = ["Abstract: sparse attention for long documents."] * 3 + ["References\n[1] A. Author et al. Proc. NeurIPS, 2017."]
+            self.chunks = [Chunk(index=i, text=text, token_count=100) for i, text in enumerate(texts)]
+            return self.chunks
+
+    llm = RoutedLLM("gpt-3.5-turbo", {"input": 0.001, "output": 0.002})
+    monkeypatch.setattr(Config, "CHUNK_FILTER", True)
+    monkeypatch.setattr(Config, "DEDUP", False)  # The abstract chunks repeat on purpose; only section filtering is under test
+    monkeypatch.setattr(summarizer.Paper, "from_pdf", staticmethod(lambda path: PaperWithReferences()))
+    monkeypatch.setattr(summarizer.TokenCounter, "count_tokens", staticmethod(lambda text: 10_000))
+    monkeypatch.setattr(summarizer.TokenCounter, "get_max_tokens", staticmethod(lambda model=None: 1_000))
+
+    events = list(SummarizerService.iter_summarize_paper("paper.pdf", llm=llm, stream=False))
+    result = events[-1]["result"]
+
+    assert [e for e in events if e["event"] == "filtered"][0]["skipped"] == 1
+    assert llm.calls == 3 + 1  # three compressions and the final summary
+    assert result["chunks"] == 4
+    assert result["skipped_chunks"][0]["index"] == 3 and result["skipped_chunks"][0]["section"] == "references"
+
+
+def test_content_defined_chunks_reuse_cached_compressions(monkeypatch, tmp_path):
+    import services.summarizer as summarizer
+    import tools.cache_manager as cache_manager
+    from infra.config import Config
+
+    monkeypatch.setattr(Config, "CHUNKING", "content")
+    monkeypatch.setattr(cache_manager, "CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(summarizer.TokenCounter, "count_tokens", staticmethod(lambda text: 10_000))
+    monkeypatch.setattr(summarizer.TokenCounter, "get_max_tokens", staticmethod(lambda model=None: 1_000))
+    llm = RoutedLLM("gpt-3.5-turbo", FakeLLM.costs)
+    version_1 = [Chunk(index=i, text=f"unchanged chunk {i}", token_count=100) for i in range(3)]
+    version_2 = version_1[:2] + [Chunk(index=2, text="revised chunk 2", token_count=100)]
+
+    SummarizerService.compress_paper(version_1, llm)
+    result = SummarizerService.compress_paper(version_2, llm)
+
+    assert llm.calls == 3 + 1
+    assert result["reused_chunks"] == 2
+    assert result["usage"]["total_tokens"] == 15
+    assert result["compressed_text"] == "compressed\n\ncompressed\n\ncompressed"
+
+
+def test_requested_sections_are_the_only_ones_compressed(monkeypatch):
+    import services.summarizer as summarizer
+
+    class PaperWithSections(FakePaper):
+        def chunk_text(self):
+            sections = ["Abstract", "Introduction", "Method", "Method", "Experiments", "Conclusion"]
+            self.chunks = [Chunk(index=i, text=f"{section} text {i}", token_count=100, section=section) for i, section in enumerate(sections)]
+            return self.chunks
+
+    class PromptLLM(RoutedLLM):
+        prompts = []
+
+        def chat_completion(self, prompt):
+            self.prompts.append(prompt)
+            return super().chat_completion(prompt)
+
+    llm = PromptLLM("gpt-3.5-turbo", FakeLLM.costs)
+    monkeypatch.setattr(summarizer.Paper, "from_pdf", staticmethod(lambda path: PaperWithSections()))
+    monkeypatch.setattr(summarizer.TokenCounter, "count_tokens", staticmethod(lambda text: 10_000))
+    monkeypatch.setattr(summarizer.TokenCounter, "get_max_tokens", staticmethod(lambda model=None: 1_000))
+
+    events = list(SummarizerService.iter_summarize_paper("paper.pdf", llm=llm, stream=False, sections=["methods", "datasets"]))
+    selected = [e for e in events if e["event"] == "sections"][0]
+    result = events[-1]["result"]
+
+    assert selected["kept"] == 2 and selected["tokens_skipped"] == 400
+    assert llm.calls == 2 + 1
+    assert all("Method text" in prompt for prompt in llm.prompts[:2])
+    assert "only these sections of the paper: Method" in llm.prompts[-1]
+    assert result["sections"] == {"requested": ["methods", "datasets"], "matched": ["Method"], "missing": ["datasets"]}
+
+
+def test_compression_fits_the_compression_models_context_window(monkeypatch):
+    import services.summarizer as summarizer
+
+    # A 5k-token paper fits the run's 128k model but not the routed 4k compression model
+    monkeypatch.setattr(summarizer.TokenCounter, "count_tokens", staticmethod(lambda text: 5_000))
+    monkeypatch.setattr(summarizer.TokenCounter, "get_max_tokens", staticmethod(lambda model=None: {"gpt-3.5-turbo": 4096}.get(model, 128_000)))
+    llm = RoutedLLM("gpt-3.5-turbo", FakeLLM.costs)
+
+    result = SummarizerService.compress_paper([Chunk(index=i, text=f"chunk {i}", token_count=100) for i in range(3)], llm)
+
+    assert result["used_compression"] is True
+    assert llm.calls == 3
@@ -0,0 +1,62 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from tools.text_normalizer import TextNormalizer
+
+
+def _page(number: int, body: str) -> str:
+    return f"Sparse Attention Transformers\nJournal of Examples, Vol. 3\n{body}\nPreprint under review\n{number}"
+
+
+def test_running_headers_footers_and_page_numbers_are_removed():
+    pages = [
+        "Sparse Attention Transformers\nAda Lovelace\nAbstract. We study sparse attention.\nPreprint under review\n1",
+        _page(2, "Method. Local windows plus global tokens."),
+        _page(3, "Results. Linear memory in sequence length."),
+        _page(4, "Conclusion. Sparse attention scales."),
+    ]
+
+    result = TextNormalizer.normalize_pages(pages)
+    text = result["text"]
+
+    # The title stays on the first page, where it is the title rather than a running header
+    assert text.startswith("Sparse Attention Transformers\nAda Lovelace")
+    assert text.count("Sparse Attention Transformers") == 1
+    assert "Journal of Examples" not in text
+    assert "Preprint under review" not in text
+    assert "\n4" not in text
+    assert "Method. Local windows plus global tokens." in text
+    # First page: footer and page number; every other page: two header lines, footer and page number
+    assert result["stats"]["header_footer_lines"] == 2 + 3 * 4
+
+
+def test_dehyphenation_ligatures_and_whitespace():
+    pages = [
+        "The compres-\nsion stage is state-of-\nthe-art; state-of-the-art results\n"
+        "use ﬁne-tuned eﬃcient   models (cid:12)here.\n\n\n\nNext   paragraph.   "
+    ]
+
+    result = TextNormalizer.normalize_pages(pages)
+
+    assert result["text"] == (
+        "The compression stage is state-of-the-art; state-of-the-art results\n"
+        "use fine-tuned efficient models here.\n\nNext paragraph."
+    )
+    assert result["stats"]["dehyphenated"] == 1
+    assert result["stats"]["ligatures"] == 3
+
+
+def test_token_report_counts_savings():
+    report = TextNormalizer.token_report("a" * 400, "a" * 300)
+
+    assert report["tokens_before"] > report["tokens_after"]
+    assert report["tokens_saved"] == report["tokens_before"] - report["tokens_after"]
+
+
+def test_page_offsets_point_at_each_page_in_the_normalized_text():
+    pages = [_page(1, "Method. Local windows."), _page(2, "Results. Linear memory."), _page(3, "Conclusion. It scales.")]
+
+    result = TextNormalizer.normalize_pages(pages)
+
+    assert len(result["page_offsets"]) == 3
+    assert [result["text"][offset:].split("\n")[0] for offset in result["page_offsets"][1:]] == ["Results. Linear memory.", "Conclusion. It scales."]
@@ -0,0 +1,45 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from types import SimpleNamespace
+from agents import thread_executor
+from agents.thread_executor import ThreadExecutor
+from infra.config import Config
+
+
+def make_run(status, call_ids=()):
+    tool_calls = [SimpleNamespace(id=i, function=SimpleNamespace(name="noop", arguments="{}")) for i in call_ids]
+    return SimpleNamespace(
+        id="run_1",
+        status=status,
+        required_action=SimpleNamespace(submit_tool_outputs=SimpleNamespace(tool_calls=tool_calls))
+    )
+
+
+def test_wait_for_completion_services_every_tool_round(monkeypatch):
+    statuses = iter([
+        make_run("queued"),
+        make_run("requires_action", ["call_1"]),
+        make_run("requires_action", ["call_1"]),  # stale status right after submitting
+        make_run("in_progress"),
+        make_run("requires_action", ["call_2", "call_3"]),
+        make_run("completed"),
+    ])
+
+    fake_runs = SimpleNamespace(retrieve=lambda thread_id, run_id: next(statuses))
+    monkeypatch.setattr(thread_executor.openai, "beta", SimpleNamespace(threads=SimpleNamespace(runs=fake_runs)), raising=False)
+    monkeypatch.setattr(Config, "RUN_POLL_MIN_INTERVAL", 0.001)
+    monkeypatch.setattr(Config, "RUN_POLL_MAX_INTERVAL", 0.002)
+
+    executor = ThreadExecutor.__new__(ThreadExecutor)
+    executor.thread = SimpleNamespace(id="thread_1")
+    executor._reset_timings()
+
+    handled = []
+    monkeypatch.setattr(executor, "handle_tool_calls", lambda run: handled.append([c.id for c in run.required_action.submit_tool_outputs.tool_calls]))
+
+    run = executor.wait_for_completion("run_1")
+
+    assert run.status == "completed"
+    assert handled == [["call_1"], ["call_2", "call_3"]]
+    assert executor.timings["total"] > 0
@@ -0,0 +1,20 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import tiktoken
+from infra.config import Config
+from utils.token_counter import TokenCounter
+
+
+def test_count_tokens_estimates_once_when_the_tokenizer_cannot_load(monkeypatch, capsys):
+    def offline(model):
+        raise ConnectionError("cannot download cl100k_base")
+
+    monkeypatch.setattr(Config, "LLM_PROVIDER", "openai")
+    monkeypatch.setattr(TokenCounter, "_encodings", {})
+    monkeypatch.setattr(tiktoken, "encoding_for_model", offline)
+
+    assert TokenCounter.count_tokens("x" * 40, model="gpt-3.5-turbo") == 10
+    assert TokenCounter.count_tokens("x" * 41, model="gpt-3.5-turbo") == 11  # Rounded up
+    assert capsys.readouterr().out.count("[WARN]") == 1
+    assert TokenCounter._encodings == {"gpt-3.5-turbo": None}
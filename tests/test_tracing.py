@@ -0,0 +1,76 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import json
+import pytest
+from infra.tracing import Tracer, NOOP_SPAN
+
+
+def test_spans_nest_and_export_jsonl_and_prometheus(tmp_path):
+    tracer = Tracer()
+    trace_file = tmp_path / "trace.jsonl"
+    tracer.enable(str(trace_file))
+
+    with tracer.span("summarize_paper") as root:
+        with tracer.span("llm.chat_completion", model="gpt-4") as call:
+            call.set(prompt_tokens=10, completion_tokens=5, retries=1)
+        with tracer.span("cache_lookup") as lookup:
+            lookup.set(cache_hit=True)
+        with pytest.raises(ValueError):
+            with tracer.span("parse_pdf"):
+                raise ValueError("broken pdf")
+    tracer.disable()
+
+    spans = [json.loads(line) for line in trace_file.read_text().splitlines()]
+    by_name = {s["name"]: s for s in spans}
+
+    assert by_name["llm.chat_completion"]["parent_id"] == by_name["summarize_paper"]["span_id"]
+    assert by_name["parse_pdf"]["error"] == "ValueError: broken pdf"
+
+    metrics = tracer.prometheus()
+    assert 'research_llm_tokens_total{model="gpt-4",kind="prompt"} 10' in metrics
+    assert 'research_llm_retries_total{model="gpt-4"} 1' in metrics
+    assert 'research_cache_lookups_total{result="hit"} 1' in metrics
+    assert 'research_span_errors_total{span="parse_pdf"} 1' in metrics
+    assert "summarize_paper" in tracer.summary_table()
+
+
+def test_disabled_tracer_hands_out_noop_spans_but_feeds_listeners():
+    tracer = Tracer()
+
+    with tracer.span("parse_pdf") as span:
+        assert span is NOOP_SPAN
+
+    ended = []
+    listener = tracer.add_listener(on_end=lambda span: ended.append(span.name))
+    with tracer.span("chunk"):
+        pass
+    tracer.remove_listener(listener)
+
+    assert ended == ["chunk"]
+    assert tracer.stats() == {}  # Listeners alone do not record metrics
+
+
+def test_llm_spans_record_usage_and_retries(monkeypatch):
+    from agents.llm_client import LLMClient
+    from infra.config import Config
+    from infra.tracing import tracer
+    from tools.stub_llm_server import StubLLMServer
+
+    monkeypatch.setattr(Config, "OPENAI_API_KEY", "test-key")
+    LLMClient.close_shared()
+    ended = []
+    listener = tracer.add_listener(on_end=ended.append)
+
+    try:
+        with StubLLMServer([{"status": 500}, {"content": "pong"}]) as server:
+            client = LLMClient("openai", "gpt-3.5-turbo", base_url=server.base_url)
+            assert client.chat_completion("ping")["text"] == "pong"
+    finally:
+        tracer.remove_listener(listener)
+        LLMClient.close_shared()
+
+    call = ended[-1]
+    assert call.name == "llm.chat_completion"
+    assert call.attrs["retries"] == 1
+    assert call.attrs["completion_tokens"] == 1
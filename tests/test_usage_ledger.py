@@ -0,0 +1,54 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from infra.tracing import tracer
+from tools.cost_tracker import CostTracker
+from tools.usage_ledger import UsageLedger
+
+
+def test_llm_spans_are_recorded_per_stage_and_paper(tmp_path, monkeypatch):
+    from infra.config import Config
+
+    paper = tmp_path / "paper.pdf"
+    paper.write_bytes(b"%PDF-1.4 fake")
+    monkeypatch.setattr(Config, "USAGE_LEDGER", True)
+    ledger = UsageLedger.install(str(tmp_path / "usage.db"))
+
+    try:
+        with tracer.span("summarize_paper", path=str(paper)):
+            for _ in range(2):
+                with tracer.span("compress"):
+                    with tracer.span("llm.chat_completion", model="gpt-4") as call:
+                        call.set(prompt_tokens=1000, completion_tokens=100)
+            with tracer.span("final_prompt"):
+                with tracer.span("llm.stream_chat_completion", model="gpt-3.5-turbo") as call:
+                    call.set(prompt_tokens=500, completion_tokens=500)
+        with tracer.span("compare_papers", paths=[str(paper), str(paper)]):
+            with tracer.span("final_prompt"):
+                with tracer.span("llm.chat_completion", model="gpt-3.5-turbo") as call:
+                    call.set(prompt_tokens=20, completion_tokens=0)
+        with tracer.span("llm.chat_with_tools", model="gpt-3.5-turbo") as call:
+            call.set(prompt_tokens=10, completion_tokens=0)
+
+        by_stage = {row["group"]: row for row in ledger.report("stage")}
+        by_paper = {row["group"]: row for row in ledger.report("paper")}
+    finally:
+        UsageLedger.uninstall()
+
+    # Stages use the MODEL_<STAGE> names, not the span names
+    assert by_stage["compression"]["calls"] == 2
+    assert by_stage["compression"]["cost"] == round(2 * (0.03 + 0.006), 6)
+    assert by_stage["summary"]["prompt_tokens"] == 500
+    assert by_stage["comparison"]["prompt_tokens"] == 20
+    assert by_stage["agent"]["calls"] == 1
+    assert by_paper[str(paper)]["calls"] == 3
+    assert list(by_stage)[0] == "compression"  # Most expensive first
+
+
+def test_cost_tracker_uses_the_supported_models_price_table():
+    from infra.models import SUPPORTED_MODELS
+
+    gpt35 = SUPPORTED_MODELS["openai"]["gpt-3.5-turbo"]
+    assert CostTracker.MODEL_PRICING["gpt-3.5-turbo"] == {"input": gpt35["input_cost_per_1k"], "output": gpt35["output_cost_per_1k"]}
+    assert CostTracker.pricing_for("gpt-4-turbo-2024-04-09") == CostTracker.MODEL_PRICING["gpt-4-turbo"]
+    assert CostTracker.estimate_cost(1000, 1000, model_name="gpt-4") == 0.09
@@ -1,15 +1,34 @@
 import os
 import json
+import copy
 
 CACHE_FILE = "cache/author_index.json"
 
 class AuthorCache:
+    # In-memory copy of the index, reused until the file changes on disk
+    _cache = None
+    _cache_stamp = None
+
     @staticmethod
-    def _load_cache() -> dict:
-        if os.path.exists(CACHE_FILE):
+    def _index() -> dict:
+        """
+        Returns the shared in-memory index (do not mutate).
+        """
+        if not os.path.exists(CACHE_FILE):
+            return {}
+
+        stat = os.stat(CACHE_FILE)
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        if AuthorCache._cache_stamp != stamp:
             with open(CACHE_FILE, "r") as f:
-                return json.load(f)
-        return {}
+                AuthorCache._cache = json.load(f)
+            AuthorCache._cache_stamp = stamp
+
+        return AuthorCache._cache
+
+    @staticmethod
+    def _load_cache() -> dict:
+        return copy.deepcopy(AuthorCache._index())
 
     @staticmethod
     def _save_cache(cache: dict):
@@ -32,5 +51,4 @@ class AuthorCache:
 
     @staticmethod
     def get_by_author(name: str) -> list:
-        cache = AuthorCache._load_cache()
-        return cache.get(name.lower(), [])
+        return copy.deepcopy(AuthorCache._index().get(name.lower(), []))
@@ -1,6 +1,10 @@
 import os
 import hashlib
 import json
+import re
+from typing import List, Optional
+from infra.config import Config
+from infra.tracing import span
 
 CACHE_DIR = "cache"
 
@@ -31,6 +35,16 @@ class CacheManager:
         """
         return os.path.join(CACHE_DIR, f"{file_hash}__{style}.json")
     
+    @staticmethod
+    def style_key(style: str, sections: Optional[List[str]] = None) -> str:
+        """
+        Cache key for a summary in `style` restricted to `sections` (just `style` for the whole paper).
+        """
+        if not sections:
+            return style
+        names = sorted({re.sub(r"[^a-z0-9]+", "-", section.lower()).strip("-") for section in sections})
+        return f"{style}__sections-{'+'.join(names)}"
+
     @staticmethod
     def get_combined_hash(file_path1: str, file_path2: str) -> str:
         """
@@ -46,7 +60,10 @@ class CacheManager:
         Checks if a cached summary exists for the given hash and style.
         """
         CacheManager._ensure_cache_dir()
-        return os.path.exists(CacheManager._get_cache_path(file_hash, style))
+        with span("cache_lookup", style=style) as lookup:
+            hit = os.path.exists(CacheManager._get_cache_path(file_hash, style))
+            lookup.set(cache_hit=hit)
+        return hit
 
     @staticmethod
     def load_cached_summary(file_hash: str, style: str) -> dict:
@@ -63,4 +80,63 @@ class CacheManager:
         """
         CacheManager._ensure_cache_dir()
         with open(CacheManager._get_cache_path(file_hash, style), "w") as f:
-            json.dump(summary_data, f, indent=2)
\ No newline at end of file
+            json.dump(summary_data, f, indent=2)
+
+    @staticmethod
+    def _get_compression_path(file_hash: str, model: str) -> str:
+        return os.path.join(CACHE_DIR, f"{file_hash}__compressed__{model.replace('/', '_')}__{CacheManager._compression_settings()}.json")
+
+    @staticmethod
+    def _compression_settings() -> str:
+        """
+        Digest of the settings that decide which chunks get compressed, so changing any of them
+        (chunking mode, chunk filter, duplicate-chunk skipping, normalization) misses old compressions.
+        """
+        settings = [Config.CHUNKING, Config.CHUNK_FILTER, Config.CHUNK_FILTER_THRESHOLD, Config.DEDUP, Config.DEDUP_THRESHOLD, Config.TEXT_NORMALIZE]
+        return hashlib.sha256(json.dumps(settings).encode("utf-8")).hexdigest()[:12]
+
+    @staticmethod
+    def load_compression(file_hash: str, model: str) -> Optional[dict]:
+        """
+        Loads a paper's cached compression (style-independent) for the given compression model, if any.
+        """
+        path = CacheManager._get_compression_path(file_hash, model)
+        if not os.path.exists(path):
+            return None
+        with open(path, "r") as f:
+            return json.load(f)
+
+    @staticmethod
+    def save_compression(file_hash: str, model: str, compression: dict):
+        """
+        Saves a paper's compressed text (plus title/authors), so any style can be summarized without recompressing.
+        """
+        CacheManager._ensure_cache_dir()
+        with open(CacheManager._get_compression_path(file_hash, model), "w") as f:
+            json.dump(compression, f, indent=2)
+
+    @staticmethod
+    def _get_chunk_path(prompt: str, model: str) -> str:
+        key = hashlib.sha256(f"{model}\n{prompt}".encode("utf-8")).hexdigest()
+        return os.path.join(CACHE_DIR, "chunks", f"{key}.json")
+
+    @staticmethod
+    def load_chunk_compression(prompt: str, model: str) -> Optional[dict]:
+        """
+        Loads the cached response ({"text", "usage"}) to a chunk compression prompt sent to `model`, if any.
+        """
+        path = CacheManager._get_chunk_path(prompt, model)
+        if not os.path.exists(path):
+            return None
+        with open(path, "r") as f:
+            return json.load(f)
+
+    @staticmethod
+    def save_chunk_compression(prompt: str, model: str, response: dict):
+        """
+        Saves the response to a chunk compression prompt, keyed by the prompt text and model.
+        """
+        path = CacheManager._get_chunk_path(prompt, model)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            json.dump({"text": response["text"], "usage": response["usage"]}, f)
@@ -0,0 +1,194 @@
+import re
+from collections import Counter
+from typing import Dict, List, Optional
+import numpy as np
+from domain.text_chunk import Chunk
+from infra.config import Config
+from infra.tracing import span
+from tools.dedup_index import DedupIndex
+
+# Section headings that start low-value parts of a paper (optionally numbered: "7 References", "A. Appendix")
+HEADING_PATTERN = re.compile(
+    r"^\s*(?:(?:\d+(?:\.\d+)*|[IVX]+|[A-Z])\.?\s+)?"
+    r"(references|bibliography|works cited|literature cited|acknowledge?ments?|appendix(?:\s+[A-Z0-9]+)?|appendices|supplementary materials?)"
+    r"\s*:?\s*$",
+    re.IGNORECASE,
+)
+# Any other numbered heading ("4 Results", "3.2 Setup") returns to the body of the paper
+BODY_HEADING_PATTERN = re.compile(r"^\s*\d+(?:\.\d+)*\.?\s+[A-Z][A-Za-z\- ]{2,60}$")
+
+CITATION_PATTERN = re.compile(r"^\s*(?:\[\d+\]|\d+\.\s)")
+YEAR_PATTERN = re.compile(r"\b(?:19|20)\d{2}[a-z]?\b")
+CITATION_MARKERS = re.compile(r"et al\.|doi|arxiv|proc\.|proceedings|journal|vol\.|pp\.|press", re.IGNORECASE)
+BOILERPLATE_PATTERN = re.compile(
+    r"©|copyright|all rights reserved|creative commons|licensed under|permission to make digital|"
+    r"arxiv:\d|preprint|under review|downloaded from|terms of use",
+    re.IGNORECASE,
+)
+WORD_PATTERN = re.compile(r"[a-z][a-z\-]{2,}")
+
+STOPWORDS = frozenset(
+    "the and for are but not you all any can had her was one our out has him his how its may new now old see two way who "
+    "did get let put say she too use that with have this will your from they been more when were what than then them "
+    "into some such also only other which their there these would could should about after where while between through "
+    "each most over both being does using used based however thus therefore since within without".split()
+)
+
+# What each detected section becomes: always skipped, or kept only above a stricter score
+SKIPPED_SECTIONS = ("references", "acknowledgments", "boilerplate")
+DOWNWEIGHTED_SECTIONS = ("appendix",)
+
+
+class ChunkFilter:
+    """
+    Local, extractive pre-filter that runs between TextChunker.chunk_text and compression, so
+    low-value chunks never reach the LLM.
+
+    1. Sections: headings ("References", "Acknowledgments", "Appendix A", ...) are tracked across
+       chunks; each chunk takes the section covering most of its text. Reference lists without a
+       heading are recognized by citation-like lines, license/copyright footers by boilerplate lines.
+    2. Information density: TF-IDF vectors of all chunks (NumPy) and a TextRank centrality over
+       their cosine similarities, normalized so the average chunk scores 1.0.
+    3. Selection: reference, acknowledgment and boilerplate chunks are skipped, as are chunks
+       that near-duplicate an earlier one (MinHash, when DEDUP is on); appendix chunks need
+       twice the threshold; any other chunk below CHUNK_FILTER_THRESHOLD is skipped. The first
+       chunk (title and abstract) is always kept.
+    """
+
+    @staticmethod
+    def filter_chunks(chunks: List[Chunk], threshold: Optional[float] = None) -> dict:
+        """
+        Args:
+            chunks (List[Chunk]): Chunks in paper order.
+            threshold (float, optional): Minimum relative score, defaults to Config.CHUNK_FILTER_THRESHOLD.
+
+        Returns:
+            dict: {
+                "kept": List[Chunk],
+                "skipped": List[dict],  # [{"index", "section", "reason", "score", "tokens"}]
+                "tokens_skipped": int
+            }
+        """
+        if not Config.CHUNK_FILTER or len(chunks) < 2:
+            return {"kept": list(chunks), "skipped": [], "tokens_skipped": 0}
+
+        threshold = Config.CHUNK_FILTER_THRESHOLD if threshold is None else threshold
+        with span("filter_chunks", chunks=len(chunks)) as stage:
+            sections = ChunkFilter.detect_sections([chunk.text for chunk in chunks])
+            scores = ChunkFilter.score_chunks([chunk.text for chunk in chunks])
+            duplicates = DedupIndex.duplicate_chunks([chunk.text for chunk in chunks]) if Config.DEDUP else {}
+
+            kept, skipped = [], []
+            for position, (chunk, section, score) in enumerate(zip(chunks, sections, scores)):
+                reason = None
+                if position == 0:
+                    pass
+                elif section in SKIPPED_SECTIONS:
+                    reason = section
+                elif position in duplicates:
+                    reason = "duplicate"
+                elif section in DOWNWEIGHTED_SECTIONS and score < 2 * threshold:
+                    reason = "low_density"
+                elif score < threshold:
+                    reason = "low_density"
+
+                if reason is None:
+                    kept.append(chunk)
+                else:
+                    skipped.append({"index": chunk.index, "section": section, "reason": reason, "score": round(float(score), 3), "tokens": chunk.token_count})
+
+            tokens_skipped = sum(s["tokens"] for s in skipped)
+            stage.set(kept=len(kept), skipped=len(skipped), tokens_skipped=tokens_skipped)
+            return {"kept": kept, "skipped": skipped, "tokens_skipped": tokens_skipped}
+
+    # --- Sections ------------------------------------------------------------------
+
+    @staticmethod
+    def detect_sections(texts: List[str]) -> List[str]:
+        """
+        Labels each text as "body", "references", "acknowledgments", "appendix" or "boilerplate".
+        """
+        labels = []
+        current = "body"
+        for text in texts:
+            lines = [line for line in text.splitlines() if line.strip()]
+            chars: Dict[str, int] = Counter()
+            for line in lines:
+                current = ChunkFilter._heading(line, current)
+                chars[current] += len(line)
+            label = max(chars, key=chars.get) if chars else current
+
+            if label == "body" and ChunkFilter._ratio(lines, ChunkFilter._is_citation) >= 0.5:
+                label = "references"
+            elif ChunkFilter._ratio(lines, lambda line: bool(BOILERPLATE_PATTERN.search(line))) >= 0.5:
+                label = "boilerplate"
+            labels.append(label)
+        return labels
+
+    @staticmethod
+    def _heading(line: str, current: str) -> str:
+        if len(line) > 60:
+            return current
+        match = HEADING_PATTERN.match(line)
+        if match:
+            name = match.group(1).lower()
+            if name.startswith(("reference", "bibliography", "works", "literature")):
+                return "references"
+            if name.startswith("acknowledg"):
+                return "acknowledgments"
+            return "appendix"
+        if current == "acknowledgments" and BODY_HEADING_PATTERN.match(line):
+            return "body"
+        return current
+
+    @staticmethod
+    def _is_citation(line: str) -> bool:
+        if CITATION_PATTERN.match(line) and YEAR_PATTERN.search(line):
+            return True
+        return bool(YEAR_PATTERN.search(line) and CITATION_MARKERS.search(line))
+
+    @staticmethod
+    def _ratio(lines: List[str], predicate) -> float:
+        return sum(1 for line in lines if predicate(line)) / len(lines) if lines else 0.0
+
+    # --- Scoring -------------------------------------------------------------------
+
+    @staticmethod
+    def score_chunks(texts: List[str], damping: float = 0.85, iterations: int = 50) -> np.ndarray:
+        """
+        TextRank centrality over TF-IDF cosine similarities, scaled so the mean score is 1.0.
+        """
+        documents = [[w for w in WORD_PATTERN.findall(text.lower()) if w not in STOPWORDS] for text in texts]
+        vocabulary = {word: i for i, word in enumerate(sorted({w for doc in documents for w in doc}))}
+        n = len(texts)
+        if not vocabulary:
+            return np.zeros(n)
+
+        counts = np.zeros((n, len(vocabulary)))
+        for row, doc in enumerate(documents):
+            for word, count in Counter(doc).items():
+                counts[row, vocabulary[word]] = count
+
+        tf = counts / np.maximum(counts.sum(axis=1, keepdims=True), 1)
+        idf = np.log((1 + n) / (1 + (counts > 0).sum(axis=0))) + 1
+        vectors = tf * idf
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+        similarity = vectors @ vectors.T
+        np.fill_diagonal(similarity, 0.0)
+        row_sums = similarity.sum(axis=1, keepdims=True)
+        # Chunks similar to nothing (empty, or all unique tokens) hand their rank out uniformly
+        transition = np.where(row_sums > 0, similarity / np.maximum(row_sums, 1e-12), 1.0 / n)
+
+        rank = np.full(n, 1.0 / n)
+        for _ in range(iterations):
+            updated = (1 - damping) / n + damping * transition.T @ rank
+            if np.abs(updated - rank).sum() < 1e-9:
+                rank = updated
+                break
+            rank = updated
+
+        # Chunks with no content words carry no information at all
+        rank[[not doc for doc in documents]] = 0.0
+        mean = rank.mean()
+        return rank / mean if mean > 0 else rank
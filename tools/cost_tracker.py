@@ -1,15 +1,29 @@
 from typing import Optional
 from infra.config import Config
+from infra.models import SUPPORTED_MODELS
 
 class CostTracker:
-    # Prices in USD per 1K tokens
+    # Prices in USD per 1K tokens, derived from infra/models.py so there is a single price table
     MODEL_PRICING = {
-        "gpt-3.5-turbo": {"input": 0.0005, "output": 0.0015},
-        "gpt-4": {"input": 0.03, "output": 0.06},
-        "gpt-4-0125-preview": {"input": 0.01, "output": 0.03},
-        "gpt-4-turbo": {"input": 0.01, "output": 0.03},
+        model["id"]: {"input": model["input_cost_per_1k"], "output": model["output_cost_per_1k"]}
+        for models in SUPPORTED_MODELS.values()
+        for model in models.values()
     }
 
+    @staticmethod
+    def pricing_for(model_name: Optional[str]) -> Optional[dict]:
+        """
+        Returns {"input": float, "output": float} for a model id (or a dated variant of one), or None.
+        """
+        if not model_name:
+            return None
+        model_name = model_name.lower()
+        if model_name in CostTracker.MODEL_PRICING:
+            return CostTracker.MODEL_PRICING[model_name]
+        # e.g. "gpt-4-turbo-2024-04-09" -> "gpt-4-turbo"; longest known prefix wins
+        prefixes = [m for m in CostTracker.MODEL_PRICING if model_name.startswith(m)]
+        return CostTracker.MODEL_PRICING[max(prefixes, key=len)] if prefixes else None
+
     @staticmethod
     def estimate_cost(
         prompt_tokens: int,
@@ -27,23 +41,16 @@ class CostTracker:
                 "input": float,  # $ per 1k prompt tokens
                 "output": float  # $ per 1k completion tokens
             }
-            model_name (str, optional): Used only if cost dict not provided.
+            model_name (str, optional): Looked up in MODEL_PRICING if no cost dict is provided.
 
         Returns:
             float: Estimated dollar cost for the request.
         """
         if not cost_per_1k_tokens:
-            # fallback to older behavior (basic OpenAI costs from .env)
-            model_name = model_name or "gpt-3.5"
-            if "gpt-4" in model_name:
-                input_cost = 0.03
-                output_cost = 0.06
-            else:
-                input_cost = 0.001
-                output_cost = 0.002
-        else:
-            input_cost = cost_per_1k_tokens.get("input", 0.001)
-            output_cost = cost_per_1k_tokens.get("output", 0.002)
+            cost_per_1k_tokens = CostTracker.pricing_for(model_name or Config.OPENAI_MODEL) or CostTracker.MODEL_PRICING["gpt-3.5-turbo"]
+
+        input_cost = cost_per_1k_tokens.get("input", 0.001)
+        output_cost = cost_per_1k_tokens.get("output", 0.002)
 
         cost = (prompt_tokens / 1000) * input_cost + (completion_tokens / 1000) * output_cost
         return round(cost, 6)
@@ -0,0 +1,203 @@
+import argparse
+import hashlib
+import json
+import os
+import re
+import threading
+import zlib
+from collections import defaultdict
+from typing import Dict, List, Optional
+import numpy as np
+from infra.config import Config
+from infra.tracing import span
+
+DEDUP_INDEX_FILE = "cache/dedup_index.json"
+
+NUM_PERM = 128
+BANDS = 32  # 32 bands of 4 rows: pairs above ~0.5 Jaccard almost always share a bucket
+ROWS = NUM_PERM // BANDS
+SHINGLE_WORDS = 5
+PRIME = np.uint64(4294967311)  # Smallest prime above 2^32, so a * x stays below 2^64
+
+# Fixed seed: signatures are persisted and must be comparable across processes
+_rng = np.random.default_rng(20240601)
+_A = _rng.integers(1, int(PRIME), NUM_PERM, dtype=np.uint64)
+_B = _rng.integers(0, int(PRIME), NUM_PERM, dtype=np.uint64)
+
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+class DedupIndex:
+    """
+    MinHash/LSH index of papers, to recognize near-duplicates (preprint vs. camera-ready,
+    re-uploads with a new cover page) whose bytes, and so SHA-256, differ.
+
+    Each paper is reduced to a 128-value MinHash signature over 5-word shingles of its
+    extracted text. The fraction of equal values estimates the Jaccard similarity of two
+    papers' shingle sets. Signatures are split into 32 bands, and only papers sharing a band
+    are compared, so a lookup touches a handful of candidates instead of the whole index.
+
+    The index is stored in cache/dedup_index.json (file hash -> path and signature).
+    """
+
+    _cache: Optional[Dict[str, dict]] = None
+    _cache_stamp = None
+    _buckets: Dict[str, List[str]] = {}
+    _lock = threading.Lock()
+
+    # --- Signatures ----------------------------------------------------------------
+
+    @staticmethod
+    def signature(text: str) -> Optional[np.ndarray]:
+        """
+        MinHash signature of `text` (None when it has too few words to shingle).
+        """
+        words = WORD_PATTERN.findall(text.lower())
+        if len(words) < SHINGLE_WORDS:
+            return None
+        shingles = {" ".join(words[i:i + SHINGLE_WORDS]) for i in range(len(words) - SHINGLE_WORDS + 1)}
+        hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles), dtype=np.uint64, count=len(shingles))
+        # One universal hash per permutation: (a * x + b) mod p, minimum over all shingles
+        return ((np.outer(_A, hashes) % PRIME + _B[:, None]) % PRIME).min(axis=1)
+
+    @staticmethod
+    def similarity(first: np.ndarray, second: np.ndarray) -> float:
+        return float(np.mean(np.asarray(first) == np.asarray(second)))
+
+    @staticmethod
+    def _band_keys(signature: np.ndarray) -> List[str]:
+        values = np.asarray(signature, dtype=np.uint64)
+        return [f"{band}:{hashlib.blake2b(values[band * ROWS:(band + 1) * ROWS].tobytes(), digest_size=8).hexdigest()}" for band in range(BANDS)]
+
+    # --- Paper index ---------------------------------------------------------------
+
+    @staticmethod
+    def _index() -> Dict[str, dict]:
+        """
+        Returns the shared in-memory index (do not mutate), reloaded when the file changes on disk.
+        """
+        if not os.path.exists(DEDUP_INDEX_FILE):
+            DedupIndex._cache, DedupIndex._buckets, DedupIndex._cache_stamp = {}, {}, None
+            return DedupIndex._cache
+
+        stat = os.stat(DEDUP_INDEX_FILE)
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        if DedupIndex._cache_stamp != stamp:
+            with open(DEDUP_INDEX_FILE, "r") as f:
+                papers = json.load(f)
+            buckets = defaultdict(list)
+            for file_hash, entry in papers.items():
+                for key in DedupIndex._band_keys(entry["signature"]):
+                    buckets[key].append(file_hash)
+            DedupIndex._cache, DedupIndex._buckets, DedupIndex._cache_stamp = papers, dict(buckets), stamp
+        return DedupIndex._cache
+
+    @staticmethod
+    def add_paper(file_hash: str, path: str, signature: Optional[np.ndarray]):
+        """
+        Records a paper's signature; later lookups can match near-duplicates of it.
+        """
+        if signature is None:
+            return
+        with DedupIndex._lock:
+            papers = dict(DedupIndex._index())
+            if file_hash in papers:
+                return
+            papers[file_hash] = {"path": path, "signature": [int(v) for v in signature]}
+            os.makedirs(os.path.dirname(DEDUP_INDEX_FILE), exist_ok=True)
+            with open(DEDUP_INDEX_FILE, "w") as f:
+                json.dump(papers, f)
+            DedupIndex._cache_stamp = None  # Reload with the new buckets on next use
+
+    @staticmethod
+    def find_duplicate(signature: Optional[np.ndarray], exclude: Optional[str] = None, threshold: Optional[float] = None) -> Optional[dict]:
+        """
+        Most similar indexed paper at or above `threshold` (default DEDUP_THRESHOLD).
+
+        Returns:
+            dict | None: {"file_hash": str, "path": str, "similarity": float}
+        """
+        if signature is None:
+            return None
+        threshold = Config.DEDUP_THRESHOLD if threshold is None else threshold
+        with span("dedup_lookup") as lookup:
+            with DedupIndex._lock:
+                papers = DedupIndex._index()
+                buckets = DedupIndex._buckets
+            candidates = {h for key in DedupIndex._band_keys(signature) for h in buckets.get(key, ()) if h != exclude}
+
+            best = None
+            for file_hash in candidates:
+                score = DedupIndex.similarity(signature, papers[file_hash]["signature"])
+                if score >= threshold and (best is None or score > best["similarity"]):
+                    best = {"file_hash": file_hash, "path": papers[file_hash]["path"], "similarity": round(score, 3)}
+            lookup.set(candidates=len(candidates), near_duplicate=best is not None)
+            return best
+
+    # --- Chunks --------------------------------------------------------------------
+
+    @staticmethod
+    def duplicate_chunks(texts: List[str], threshold: Optional[float] = None) -> Dict[int, int]:
+        """
+        Finds texts that near-duplicate an earlier one in the same list (e.g. boilerplate
+        repeated on every page).
+
+        Returns:
+            Dict[int, int]: position of each duplicate -> position of the first text it repeats.
+        """
+        threshold = Config.DEDUP_THRESHOLD if threshold is None else threshold
+        buckets = defaultdict(list)
+        signatures = []
+        duplicates = {}
+        for position, text in enumerate(texts):
+            signature = DedupIndex.signature(text)
+            signatures.append(signature)
+            if signature is None:
+                continue
+            keys = DedupIndex._band_keys(signature)
+            candidates = sorted({other for key in keys for other in buckets[key]})
+            match = next((other for other in candidates if DedupIndex.similarity(signature, signatures[other]) >= threshold), None)
+            if match is not None:
+                duplicates[position] = match
+                continue
+            for key in keys:
+                buckets[key].append(position)
+        return duplicates
+
+    @staticmethod
+    def scan_folder(folder: str, threshold: Optional[float] = None) -> List[List[str]]:
+        """
+        Indexes every PDF in `folder` and groups near-duplicate files together.
+        """
+        from tools.cache_manager import CacheManager
+        from tools.pdf_parser import PDFParser
+
+        roots: Dict[str, str] = {}
+        groups: Dict[str, List[str]] = defaultdict(list)
+        for name in sorted(os.listdir(folder)):
+            if not name.lower().endswith(".pdf"):
+                continue
+            path = os.path.join(folder, name)
+            file_hash = CacheManager.get_file_hash(path)
+            signature = DedupIndex.signature(PDFParser.extract_info(path).raw_text)
+            match = DedupIndex.find_duplicate(signature, exclude=file_hash, threshold=threshold)
+            DedupIndex.add_paper(file_hash, path, signature)
+            root = roots.get(match["path"], match["path"]) if match else path
+            roots[path] = root
+            groups[root].append(path)
+        return [sorted({root, *paths}) for root, paths in groups.items() if len({root, *paths}) > 1]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Index PDFs and list near-duplicate papers.")
+    parser.add_argument("folder", help="Folder with PDFs to index")
+    parser.add_argument("--threshold", type=float, default=Config.DEDUP_THRESHOLD, help="Minimum estimated Jaccard similarity")
+    args = parser.parse_args()
+
+    groups = DedupIndex.scan_folder(args.folder, args.threshold)
+    if not groups:
+        print("✅ No near-duplicate papers found.")
+    for paths in groups:
+        print("\n🔁 Near-duplicates:")
+        for path in paths:
+            print(f"   - {path}")
@@ -1,43 +1,233 @@
-from typing import Optional, List
-import pdfplumber
+import math
+import os
+import re
+import threading
+from collections import OrderedDict, defaultdict
+from itertools import accumulate
+from typing import Dict, Optional, List, Tuple
 import logging
+from infra.config import Config
+from infra.tracing import span
 
 logging.getLogger("pdfminer").setLevel(logging.ERROR)
 
+# Figure/table scan, run on every page's text while the PDF is parsed
+FIGURE_REFERENCE_PATTERN = re.compile(r"\b(Fig\.?|Figure|Table)\s*([IVXLCDM]+|\d+[a-zA-Z]?)\b", re.IGNORECASE)
+CAPTION_PATTERN = re.compile(r"^(Fig\.?|Figure|Table)\s*([IVXLCDM]+|\d+)\s*[.:|]\s*\S", re.IGNORECASE)
+CAPTION_LABEL_PATTERN = re.compile(r"^(Fig\.?|Figure|Table)\s*([IVXLCDM]+|\d+)$", re.IGNORECASE)
+FIG_ABBREVIATION_PATTERN = re.compile(r"\bFig\b\.?", re.IGNORECASE)
+SENTENCE_END_PATTERN = re.compile(r"[.!?][\"')\]]*$")
+CAPTION_MAX_LINES = 6
+COLUMN_GUTTER_WIDTH = 8  # Blank stretch (points) between the words either side of a column gutter
+LINE_TOLERANCE = 3  # Words whose tops differ by at most this many points share a line, as in extract_text
+
+PARSE_CACHE_SIZE = 8  # Parsed PDFs kept in memory, so later stages (figures, planning) don't parse again
+
+
 class PDFParser:
 
+    _cache: "OrderedDict[tuple, ParsedPDF]" = OrderedDict()
+    _lock = threading.Lock()
+
     @staticmethod
-    def extract_info(pdf_path: str) -> Optional["ParsedPDF"]:
+    def extract_info(pdf_path: str, normalize: Optional[bool] = None, cache: bool = True) -> Optional["ParsedPDF"]:
         """
-        Extracts text and (and placeholder figure markers) from a PDF file.
+        Extracts text, figure/table references and captions from a PDF file in one pass.
         :param pdf_path: Path to the PDF file.
-        :return: ParsedPDF object containing the extracted text and simulated figure markers.
+        :param normalize: Clean the text with TextNormalizer (defaults to Config.TEXT_NORMALIZE).
+        :param cache: Reuse the result of an earlier call for the same unchanged file.
+        :return: ParsedPDF object containing the extracted text, figure references and captions.
         """
+        import pdfplumber
+
+        normalize = Config.TEXT_NORMALIZE if normalize is None else normalize
+        key = None
+        if cache and os.path.isfile(pdf_path):
+            stat = os.stat(pdf_path)
+            key = (os.path.abspath(pdf_path), stat.st_mtime_ns, stat.st_size, normalize)
+            with PDFParser._lock:
+                if key in PDFParser._cache:
+                    PDFParser._cache.move_to_end(key)
+                    return PDFParser._cache[key]
+
         raw_text = ""
+        pages = []
+        page_numbers = []
+        page_offsets = []
         figure_markers = []
-        try:
-            with pdfplumber.open(pdf_path) as pdf:
-                for i, page in enumerate(pdf.pages):
-                    page_text = page.extract_text()
+        references = defaultdict(set)
+        captions = {}
+        with span("parse_pdf", path=pdf_path) as stage:
+            try:
+                with pdfplumber.open(pdf_path) as pdf:
+                    for i, page in enumerate(pdf.pages):
+                        page_text = page.extract_text()
+
+                        if page_text:
+                            page_offsets.append(len(raw_text))
+                            raw_text += page_text + "\n"
+                            pages.append(page_text)
+                            page_numbers.append(i + 1)
+                            # extract_text interleaves the lines of two-column pages, so captions
+                            # are read from the page's words, column by column
+                            column_lines = None
+                            if FIGURE_REFERENCE_PATTERN.search(page_text):
+                                column_lines = PDFParser._column_lines(page.extract_words(), page.width)
+                            PDFParser._scan_figures(page_text, i + 1, references, captions, column_lines)
 
-                    if page_text:
-                        raw_text += page_text + "\n"
+                            # Simulate figure markers
+                            if "figure" in page_text.lower():
+                                figure_markers.append(f"Figure detected on Page {i + 1}")
+                    stage.set(pages=len(pdf.pages), chars=len(raw_text), captions=len(captions))
+            except Exception as e:
+                stage.fail(e)
+                print(f"Error reading the PDF file {pdf_path}: {e}")
+                return ParsedPDF(raw_text = "", figure_markers = [])
 
-                        # Simulate figure markers
-                        if "figure" in page_text.lower():
-                            figure_markers.append(f"Figure detected on Page {i + 1}")
-        except Exception as e:
-            print(f"Error reading the PDF file {pdf_path}: {e}")
-            return ParsedPDF(raw_text = "", figure_markers = [])
-        
 
+        normalization = None
+        if normalize:
+            from tools.text_normalizer import TextNormalizer
+
+            normalized = TextNormalizer.normalize_pages(pages)
+            normalization = {**normalized["stats"], **TextNormalizer.token_report(raw_text, normalized["text"])}
+            raw_text = normalized["text"]
+            page_offsets = normalized["page_offsets"]
+
+        parsed = ParsedPDF(
+            raw_text, figure_markers, normalization, list(zip(page_offsets, page_numbers)),
+            figure_references={label: sorted(lines) for label, lines in references.items()},
+            captions=captions
+        )
+        if key is not None:
+            with PDFParser._lock:
+                PDFParser._cache[key] = parsed
+                while len(PDFParser._cache) > PARSE_CACHE_SIZE:
+                    PDFParser._cache.popitem(last=False)
+        return parsed
+
+    @staticmethod
+    def _scan_figures(page_text: str, page_number: int, references: Dict[str, set], captions: Dict[str, str], column_lines: Optional[List[str]] = None):
+        """
+        Adds the page's figure/table mentions to `references` ({"Figure 3": {"Page 2: line", ...}})
+        and its captions to `captions` ({"Figure 3": "Page 5: Figure 3. ..."}, the longest per label).
+        Lines are taken from `column_lines` (see `_column_lines`) when given, else from `page_text`.
+
+        A caption starts with a line like "Figure 3: ..." or "Fig. 3. ...", or with a lone label
+        ("TABLE II") followed by a line of at least four words. It runs until a blank line, a line
+        ending a sentence, the next caption, or CAPTION_MAX_LINES lines (extracted text has no block
+        boundaries, and body text often follows a caption directly).
+        """
+        lines = [line.strip() for line in (page_text.split("\n") if column_lines is None else column_lines)]
+
+        for position, line in enumerate(lines):
+            for kind, number in FIGURE_REFERENCE_PATTERN.findall(line):
+                references[PDFParser._figure_label(kind, number)].add(f"Page {page_number}: {line}")
+
+            match = CAPTION_PATTERN.match(line)
+            if match:
+                text = " ".join(PDFParser._caption_lines(lines, position))
+            else:
+                match = CAPTION_LABEL_PATTERN.match(line)
+                if not match or position + 1 >= len(lines) or len(lines[position + 1].split()) < 4:
+                    continue
+                text = f"{line}. " + " ".join(PDFParser._caption_lines(lines, position + 1))
+
+            label = PDFParser._figure_label(*match.groups()[:2])
+            caption = f"Page {page_number}: {text}"
+            if label not in captions or len(caption) > len(captions[label]):
+                captions[label] = caption
+
+    @staticmethod
+    def _column_lines(words: List[dict], width: float) -> List[str]:
+        """
+        Text lines of a page in reading order, built from pdfplumber `extract_words()`. On a
+        two-column page each run of split lines gives the left column's lines, then the right
+        column's; full-width lines (title block, wide captions) stay whole, in place. A blank line
+        marks the end of each column and every vertical gap of more than half a line.
+
+        The gutter is the x in the middle third of the page where the most lines have a blank
+        stretch of COLUMN_GUTTER_WIDTH points with words on both sides. The page has two columns
+        when at least three lines split there and fewer lines have a word across it.
+        """
+        rows = PDFParser._rows(words)
+
+        # Count, for every x, the lines with a gutter-wide blank stretch centred on it
+        half = COLUMN_GUTTER_WIDTH / 2
+        starts = [0] * (int(width) + 2)
+        for row in rows:
+            for left, right in zip(row, row[1:]):
+                start, end = max(math.ceil(left["x1"] + half), 0), min(math.floor(right["x0"] - half), int(width))
+                if start <= end:
+                    starts[start] += 1
+                    starts[end + 1] -= 1
+        splits = list(accumulate(starts))
+        gutter = max(range(int(width / 3), int(2 * width / 3) + 1), key=lambda x: splits[x], default=0)
+        crossing = [any(word["x0"] < gutter + half and word["x1"] > gutter - half for word in row) for row in rows]
+
+        if splits[gutter] < 3 or splits[gutter] <= sum(crossing):
+            return PDFParser._block_lines(rows)
+
+        lines, column = [], []
+        for row, crosses in zip(rows, crossing):
+            if not crosses:
+                column.extend(row)
+                continue
+            # Columns are regrouped on their own, their baselines need not line up
+            lines += PDFParser._block_lines(PDFParser._rows([word for word in column if word["x1"] <= gutter])) + [""]
+            lines += PDFParser._block_lines(PDFParser._rows([word for word in column if word["x0"] >= gutter])) + [""]
+            lines += PDFParser._block_lines([row])
+            column = []
+        lines += PDFParser._block_lines(PDFParser._rows([word for word in column if word["x1"] <= gutter])) + [""]
+        lines += PDFParser._block_lines(PDFParser._rows([word for word in column if word["x0"] >= gutter]))
+        return lines
+
+    @staticmethod
+    def _rows(words: List[dict]) -> List[List[dict]]:
+        # Words within LINE_TOLERANCE points of a line's first top join that line, left to right
+        rows = []
+        for word in sorted(words, key=lambda word: (word["top"], word["x0"])):
+            if rows and word["top"] - rows[-1][0]["top"] <= LINE_TOLERANCE:
+                rows[-1].append(word)
+            else:
+                rows.append([word])
+        return [sorted(row, key=lambda word: word["x0"]) for row in rows]
+
+    @staticmethod
+    def _block_lines(rows: List[List[dict]]) -> List[str]:
+        lines = []
+        for previous, row in zip([None] + rows, rows):
+            height = row[0]["bottom"] - row[0]["top"]
+            if previous is not None and row[0]["top"] - max(word["bottom"] for word in previous) > height / 2:
+                lines.append("")
+            lines.append(" ".join(word["text"] for word in row))
+        return lines
+
+    @staticmethod
+    def _caption_lines(lines: List[str], start: int) -> List[str]:
+        caption = []
+        for line in lines[start:start + CAPTION_MAX_LINES]:
+            if not line or (caption and (CAPTION_PATTERN.match(line) or CAPTION_LABEL_PATTERN.match(line))):
+                break
+            caption.append(line)
+            if SENTENCE_END_PATTERN.search(line):
+                break
+        return caption
+
+    @staticmethod
+    def _figure_label(kind: str, number: str) -> str:
+        # "Fig. 3a" / "FIG 3A" / "figure 3a" -> "Figure 3A"; "TABLE ii" -> "Table II"
+        return f"{FIG_ABBREVIATION_PATTERN.sub('Figure', kind.strip()).title()} {number.strip().upper()}"
 
-        return ParsedPDF(raw_text, figure_markers)
 
 class ParsedPDF:
-    def __init__(self, raw_text: str, figure_markers: list[str] = None):
+    def __init__(self, raw_text: str, figure_markers: list[str] = None, normalization: Optional[dict] = None, page_starts: Optional[List[Tuple[int, int]]] = None, figure_references: Optional[Dict[str, List[str]]] = None, captions: Optional[Dict[str, str]] = None):
         self._raw_text = raw_text
         self._figure_markers = figure_markers if figure_markers is not None else []
+        self._normalization = normalization or {}
+        self._page_starts = page_starts or []
+        self._figure_references = figure_references or {}
+        self._captions = captions or {}
 
     @property
     def raw_text(self) -> str:
@@ -45,4 +235,32 @@ class ParsedPDF:
     
     @property
     def figure_markers(self) -> List[str]:
-        return self._figure_markers
\ No newline at end of file
+        return self._figure_markers
+
+    @property
+    def normalization(self) -> dict:
+        """
+        TextNormalizer stats with "tokens_before"/"tokens_after"; empty when the text was not normalized.
+        """
+        return self._normalization
+
+    @property
+    def page_starts(self) -> List[Tuple[int, int]]:
+        """
+        (offset in raw_text, page number) where each page with text starts, in order.
+        """
+        return self._page_starts
+
+    @property
+    def figure_references(self) -> Dict[str, List[str]]:
+        """
+        Lines mentioning each figure/table, e.g. {"Figure 3": ["Page 2: ... as Figure 3 shows ..."]}.
+        """
+        return self._figure_references
+
+    @property
+    def captions(self) -> Dict[str, str]:
+        """
+        Caption of each figure/table, e.g. {"Figure 3": "Page 5: Figure 3. Architecture ..."}.
+        """
+        return self._captions
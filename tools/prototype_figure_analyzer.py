@@ -1,110 +1,147 @@
+import json
 import re
-import pdfplumber
-import fitz
-from collections import defaultdict
-from typing import Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple, Union
 from agents.llm_client import LLMClient
-import logging
+from infra.config import Config
+from infra.tracing import span
+from tools.pdf_parser import ParsedPDF, PDFParser
+from utils.token_counter import TokenCounter
 
-logging.getLogger("pdfminer").setLevel(logging.ERROR)
+CODE_FENCE_PATTERN = re.compile(r"^```(?:json)?\s*|\s*```$")
 
 class FigureAnalyzer:
-    def __init__(self, pdf_path: str, llm: Optional[LLMClient] = None):
+    def __init__(self, pdf_path: str, llm: Optional[LLMClient] = None, parsed: Optional[Union[ParsedPDF, "Paper"]] = None):
+        """
+        Args:
+            pdf_path (str): Path to the PDF.
+            llm (LLMClient, optional): Client for the explanations (MODEL_FIGURES when set).
+            parsed (ParsedPDF | Paper, optional): The already parsed paper; its figure references
+                and captions are reused instead of scanning the PDF again.
+        """
         self.pdf_path = pdf_path
-        self.llm = llm or LLMClient()
+        self.llm = LLMClient.for_stage("figures", llm)  # MODEL_FIGURES when set
+        self.parsed = parsed
+
+    def _scan(self) -> Union[ParsedPDF, "Paper"]:
+        # PDFParser keeps recent results in memory, so a paper summarized in this process is not parsed again
+        if self.parsed is None:
+            self.parsed = PDFParser.extract_info(self.pdf_path)
+        return self.parsed
 
     def extract_figure_references(self) -> Dict[str, List[str]]:
         """
-        Scans PDF text for lines mentioning figures/tables.
+        Lines of the PDF text mentioning figures/tables, from the parser's single document scan.
         Returns normalized labels like: {"Figure 3": [line1, line2], ...}
         """
-        figure_refs = defaultdict(set)
-
-        pattern = r"\b(Fig\.?|Figure|Table|TABLE|FIG)\s*([IVXLCDM]+|\d+[a-zA-Z]?)"
-
-        try:
-            with pdfplumber.open(self.pdf_path) as pdf:
-                for i, page in enumerate(pdf.pages):
-                    text = page.extract_text() or ""
-                    for line in text.split("\n"):
-                        matches = re.findall(pattern, line, flags=re.IGNORECASE)
-                        for match in matches:
-                            raw_label = f"{match[0].strip()} {match[1].strip()}"
-                            normalized = re.sub(r"\bFig\.?", "Figure", raw_label, flags=re.IGNORECASE).title()
-                            normalized = re.sub(r"\s+", " ", normalized)
-                            figure_refs[normalized].add(f"Page {i+1}: {line.strip()}")
-        except Exception as e:
-            print(f"[ERROR] Figure reference extraction failed: {e}")
-
-        return {k: sorted(list(v)) for k, v in figure_refs.items()}
+        return self._scan().figure_references
 
-    
     def extract_visual_captions(self) -> Dict[str, str]:
         """
-        Uses PyMuPDF to scan visual captions like 'Figure 2. ...' or 'TABLE II' with multi-line support.
-        Returns: {"Figure 2": "Page 5: Figure 2. Architecture ...", "Table II": "Page 7: TABLE II Description..."}
+        Visual captions like 'Figure 2. ...' or 'TABLE II' (with multi-line support), from the parser's single document scan.
+        Returns: {"Figure 2": "Page 5: Figure 2. Architecture ...", "Table II": "Page 7: TABLE II. Description..."}
         """
-        captions = {}
-        try:
-            doc = fitz.open(self.pdf_path)
-
-            single_line_pattern = re.compile(r"(Fig\.?|Figure|Table)\s*\d+[.:]?\s+.+", re.IGNORECASE)
-            multiline_label_pattern = re.compile(r"^(Fig\.?|Figure|Table)\s*([IVXLCDM]+|\d+)$", re.IGNORECASE)
-
-            for i, page in enumerate(doc):
-                blocks = page.get_text("blocks")
-                for j, block in enumerate(blocks):
-                    text = block[4].strip()
-
-                    # Match single-line captions
-                    if single_line_pattern.match(text):
-                        label_raw = text.split(".")[0].replace(":", "")
-                        normalized = re.sub(r"\bFig\.?", "Figure", label_raw, flags=re.IGNORECASE).title()
-                        normalized = re.sub(r"\s+", " ", normalized)
-                        if normalized not in captions or len(text) > len(captions[normalized]):
-                            captions[normalized] = f"Page {i+1}: {text}"
-
-                    # Match multi-line labels like "TABLE II"
-                    elif multiline_label_pattern.match(text):
-                        next_block_text = ""
-                        if j + 1 < len(blocks):
-                            next_block_text = blocks[j + 1][4].strip()
-                        if len(next_block_text.split()) >= 4:
-                            label_raw = text.strip()
-                            normalized = re.sub(r"\bFig\.?", "Figure", label_raw, flags=re.IGNORECASE).title()
-                            normalized = re.sub(r"\s+", " ", normalized)
-                            full_caption = f"{text}. {next_block_text}"
-                            if normalized not in captions or len(full_caption) > len(captions[normalized]):
-                                captions[normalized] = f"Page {i+1}: {full_caption}"
-
-        except Exception as e:
-            print(f"[ERROR] Caption extraction failed: {e}")
-
-        return captions
+        return self._scan().captions
 
     
-    def explain_figures(self) -> Dict[str, str]:
+    def explain_figures(self, batch: Optional[bool] = None) -> Dict[str, str]:
         """
         Merges figure references and captions, sends to LLM for explanation.
+
+        In batched mode (FIGURE_BATCH, default on), captions are packed into as few requests
+        as fit the model's context, each answered with one JSON object of label -> explanation,
+        and the batches run concurrently. Captions whose batch answer cannot be parsed (or
+        lacks their label) fall back to one request each.
         """
 
         captions = self.extract_visual_captions()
+        batch = Config.FIGURE_BATCH if batch is None else batch
+        if not captions:
+            return {}
+        if not batch:
+            return {label: self._explain_caption(label, caption) for label, caption in sorted(captions.items())}
+
+        batches = self._pack_captions(sorted(captions.items()))
         explanations = {}
+        with ThreadPoolExecutor(max_workers=max(1, min(Config.FIGURE_BATCH_WORKERS, len(batches))), thread_name_prefix="figures") as pool:
+            for result in pool.map(self._explain_batch, batches, range(len(batches))):
+                explanations.update(result)
 
-        for label, caption in sorted(captions.items()):
-            prompt = (
-                f"You are analyzing a research paper.\n"
-                f"Here is a figure or table from the paper:\n\n"
-                f"{caption}\n\n"
-                "Based on this caption, explain what it shows and why it's important."
-            )
-
-            try:
-                result = self.llm.chat_completion(prompt)
-                explanations[label] = result["text"].strip()
-            except Exception as e:
-                print(f"[ERROR] LLM failed for {label}: {e}")
-                explanations[label] = "[Explanation failed]"
+        return dict(sorted(explanations.items()))
 
+    def _pack_captions(self, captions: List[Tuple[str, str]]) -> List[List[Tuple[str, str]]]:
+        """
+        Groups captions, in order, into batches whose prompt plus expected answers fit the model's context.
+        """
+        budget = TokenCounter.get_max_tokens(self.llm.model) - TokenCounter.count_tokens(self._batch_prompt([]))
+        batches: List[List[Tuple[str, str]]] = []
+        used = 0
+        for label, caption in captions:
+            # Each caption costs its own tokens plus room for its explanation in the answer
+            cost = TokenCounter.count_tokens(f"[{label}]\n{caption}\n\n") + Config.FIGURE_EXPLANATION_TOKENS
+            if not batches or used + cost > budget:
+                batches.append([])
+                used = 0
+            batches[-1].append((label, caption))
+            used += cost
+        return batches
+
+    def _explain_batch(self, captions: List[Tuple[str, str]], number: int = 0) -> Dict[str, str]:
+        labels = [label for label, _ in captions]
+        explanations = {}
+        with span("explain_figures", batch=number, captions=len(captions)) as stage:
+            if len(captions) > 1:
+                try:
+                    result = self.llm.chat_completion(self._batch_prompt(captions))
+                    explanations = self._parse_batch(result["text"], labels) or {}
+                except Exception as e:
+                    print(f"[ERROR] LLM failed for figure batch {number + 1}: {e}")
+
+                if len(explanations) < len(labels):
+                    print(f"[WARN] Batched figure explanations incomplete ({len(explanations)}/{len(labels)}); explaining the rest one by one.")
+            stage.set(fallbacks=len(labels) - len(explanations))
+
+            for label, caption in captions:
+                if label not in explanations:
+                    explanations[label] = self._explain_caption(label, caption)
         return explanations
 
+    def _explain_caption(self, label: str, caption: str) -> str:
+        prompt = (
+            f"You are analyzing a research paper.\n"
+            f"Here is a figure or table from the paper:\n\n"
+            f"{caption}\n\n"
+            "Based on this caption, explain what it shows and why it's important."
+        )
+
+        try:
+            result = self.llm.chat_completion(prompt)
+            return result["text"].strip()
+        except Exception as e:
+            print(f"[ERROR] LLM failed for {label}: {e}")
+            return "[Explanation failed]"
+
+    @staticmethod
+    def _batch_prompt(captions: List[Tuple[str, str]]) -> str:
+        listed = "".join(f"[{label}]\n{caption}\n\n" for label, caption in captions)
+        return (
+            "You are analyzing a research paper.\n"
+            "Here are figures and tables from the paper, each caption under its label in brackets.\n"
+            "Based on each caption, explain what it shows and why it's important.\n"
+            "Respond with a valid JSON object mapping every label, exactly as written without brackets, to its explanation (a string).\n\n"
+            f"{listed}"
+        ).strip()
+
+    @staticmethod
+    def _parse_batch(text: str, labels: List[str]) -> Optional[Dict[str, str]]:
+        """
+        Explanations per label from a batched answer; None when it is not a JSON object.
+        """
+        text = CODE_FENCE_PATTERN.sub("", (text or "").strip())
+        try:
+            answer = json.loads(text)
+        except ValueError:
+            return None
+        if not isinstance(answer, dict):
+            return None
+        return {label: answer[label].strip() for label in labels if isinstance(answer.get(label), str) and answer[label].strip()}
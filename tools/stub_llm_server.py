@@ -0,0 +1,169 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional
+
+
+class StubLLMServer:
+    """
+    Minimal OpenAI-compatible chat completions server for local, offline testing.
+
+    Responses are served from a script (a list of dicts) in order; once the script is
+    exhausted the last entry is repeated. Each entry may contain:
+        - "content" (str): assistant text
+        - "tool_calls" (list[dict]): [{"name": str, "arguments": dict}]
+        - "delay" (float): seconds to wait before answering
+        - "status" (int): HTTP error status to return instead of a completion
+
+    Usage:
+        with StubLLMServer([{"content": "pong"}]) as server:
+            client = LLMClient("openai", "gpt-3.5-turbo", base_url=server.base_url)
+    """
+
+    def __init__(self, script: Optional[List[dict]] = None, host: str = "127.0.0.1", port: int = 0):
+        self.script = list(script or [{"content": "ok"}])
+        self.requests: List[dict] = []
+        self.peers: List[tuple] = []  # Client (host, port) per request, to observe connection reuse
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "StubLLMServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "StubLLMServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _next_entry(self, body: dict, peer: tuple = ()) -> dict:
+        with self._lock:
+            self.requests.append(body)
+            self.peers.append(peer)
+            index = min(len(self.requests) - 1, len(self.script) - 1)
+            return self.script[index]
+
+    def _make_handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                entry = stub._next_entry(body, self.client_address)
+
+                if entry.get("delay"):
+                    time.sleep(entry["delay"])
+
+                if entry.get("status"):
+                    self._send_json(entry["status"], {"error": {"message": "stub error", "type": "stub_error"}})
+                    return
+
+                if body.get("stream"):
+                    self._send_stream(body, entry)
+                else:
+                    self._send_json(200, StubLLMServer.build_completion(body, entry))
+
+            def _send_json(self, status: int, payload: dict):
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _send_stream(self, body: dict, entry: dict):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                self.end_headers()
+
+                content = entry.get("content", "")
+                words = content.split(" ")
+                try:
+                    for i, word in enumerate(words):
+                        delta = word if i == 0 else " " + word
+                        chunk = StubLLMServer._chunk(body, {"content": delta}, None)
+                        self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+                        self.wfile.flush()
+                        if entry.get("token_delay"):
+                            time.sleep(entry["token_delay"])
+
+                    final = StubLLMServer._chunk(body, {}, "stop")
+                    self.wfile.write(f"data: {json.dumps(final)}\n\n".encode("utf-8"))
+                    usage = StubLLMServer._chunk(body, None, None)
+                    usage["usage"] = StubLLMServer._usage(body, content)
+                    self.wfile.write(f"data: {json.dumps(usage)}\n\n".encode("utf-8"))
+                    self.wfile.write(b"data: [DONE]\n\n")
+                    self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError):
+                    # Client closed the stream early (cancellation)
+                    pass
+                self.close_connection = True
+
+        return Handler
+
+    @staticmethod
+    def _usage(body: dict, content: str) -> dict:
+        prompt_words = sum(len(str(m.get("content") or "").split()) for m in body.get("messages", []))
+        completion_words = len(content.split())
+        return {
+            "prompt_tokens": prompt_words,
+            "completion_tokens": completion_words,
+            "total_tokens": prompt_words + completion_words
+        }
+
+    @staticmethod
+    def _chunk(body: dict, delta: Optional[dict], finish_reason: Optional[str]) -> dict:
+        return {
+            "id": "chatcmpl-stub",
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": body.get("model", "stub"),
+            "choices": [] if delta is None else [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+        }
+
+    @staticmethod
+    def build_completion(body: dict, entry: dict) -> dict:
+        content = entry.get("content")
+        message = {"role": "assistant", "content": content}
+        finish_reason = "stop"
+
+        if entry.get("tool_calls"):
+            message["tool_calls"] = [
+                {
+                    "id": f"call_{i}",
+                    "type": "function",
+                    "function": {"name": call["name"], "arguments": json.dumps(call.get("arguments", {}))}
+                }
+                for i, call in enumerate(entry["tool_calls"])
+            ]
+            finish_reason = "tool_calls"
+
+        return {
+            "id": "chatcmpl-stub",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "stub"),
+            "choices": [{"index": 0, "message": message, "finish_reason": finish_reason}],
+            "usage": StubLLMServer._usage(body, content or ""),
+        }
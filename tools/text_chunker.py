@@ -1,40 +1,365 @@
-import tiktoken
-from typing import List
+import bisect
+import re
+import statistics
+import zlib
+from typing import Callable, List, Optional, Tuple
 from domain.text_chunk import Chunk
+from infra.config import Config
+from infra.tracing import span
+
+# Content-defined chunking: a cut may only follow a sentence or paragraph end
+BOUNDARY_PATTERN = re.compile(r"(?<=[.!?])[\"')\]]*\s+|\n\s*\n")
+WORD_PATTERN = re.compile(r"\S+")
+
+# Structure-aware chunking: headings start sections, short lines ending a sentence end paragraphs
+NUMBERED_HEADING_PATTERN = re.compile(r"^(?:\d{1,2}(?:\.\d{1,2})*\.?|[IVX]+\.|[A-H]\.)\s+([A-Z][^.!?;,()\[\]]{1,70})$")
+NAMED_HEADING_PATTERN = re.compile(
+    r"^(abstract|introduction|related work|background|methods?|methodology|experiments?|evaluation|results|"
+    r"discussion|conclusions?|references|bibliography|acknowledge?ments?|appendix(?:\s+[A-Z0-9]+)?|appendices)\s*:?$",
+    re.IGNORECASE,
+)
+INLINE_ABSTRACT_PATTERN = re.compile(r"^abstract\s*[.:\u2014\u2013-]", re.IGNORECASE)
+PARAGRAPH_END_PATTERN = re.compile(r"[.!?:][\"')\]]*$")
+FRONT_MATTER = "Front Matter"  # Section label of the title block, before any heading
+
+HASH_WINDOW = 8  # Words in the rolling hash window
+HASH_BASE = 257
+HASH_MODULUS = (1 << 61) - 1  # Mersenne prime, so the hash's residues are well mixed
+
 
 class TextChunker:
 
+    _encoding = None
+    _encoding_loaded = False
+
     @staticmethod
-    def chunk_text(text: str, max_tokens: int = 500, overlap: int = 50) -> List[Chunk]:
+    def chunk_text(text: str, max_tokens: int = 500, overlap: int = 50, mode: Optional[str] = None, page_starts: Optional[List[Tuple[int, int]]] = None) -> List[Chunk]:
         """
         Splits the text into chunks of a specified maximum token count with overlap.
         :param text: The text to be chunked.
         :param max_tokens: The maximum number of tokens per chunk.
         :param overlap: The number of overlapping tokens between chunks.
+        :param mode: "structure" (see chunk_structured), "content" (see chunk_content_defined) or "fixed"
+                     token windows, defaults to Config.CHUNKING.
+        :param page_starts: (offset, page number) of each page in `text`, for the chunks' page spans.
         :return: A list of Chunk objects.
         """
-        try:
-            max_tokens = max(10, max_tokens - 5)  # Token buffer
+        mode = mode or Config.CHUNKING
+        if mode == "structure":
+            return TextChunker.chunk_structured(text, max_tokens, overlap, page_starts)
+        if mode == "content":
+            return TextChunker.chunk_content_defined(text, max_tokens, page_starts=page_starts)
+
+        with span("chunk", chars=len(text), max_tokens=max_tokens) as stage:
+            try:
+                import tiktoken
+
+                max_tokens = max(10, max_tokens - 5)  # Token buffer
+
+                encoding = tiktoken.encoding_for_model("gpt-3.5-turbo")
+                tokens = encoding.encode(text)
+
+                chunks = []
+                start = 0
+                index = 0
+
+                while start < len(tokens):
+                    end = min(start + max_tokens, len(tokens))
+                    chunk_tokens = tokens[start:end]
+                    chunk_text = encoding.decode(chunk_tokens)
+                    token_count = len(chunk_tokens)
+
+                    chunks.append(Chunk(index=index, text=chunk_text, token_count=token_count))
+
+                    index += 1
+                    start += (max_tokens - overlap)
+
+                stage.set(chunks=len(chunks), tokens=len(tokens))
+                return chunks
+            except Exception as e:
+                stage.fail(e)
+                print(f"[ERROR] Text chunking failed: {e}")
+                return []
+
+    @staticmethod
+    def chunk_content_defined(text: str, max_tokens: int = 500, min_tokens: Optional[int] = None, page_starts: Optional[List[Tuple[int, int]]] = None) -> List[Chunk]:
+        """
+        Splits the text where its content says so, not at fixed offsets, so an edit only changes
+        the chunks around it: a revised paper with one paragraph inserted yields the same chunks
+        as before everywhere else, and their cached compressions are reused.
 
-            encoding = tiktoken.encoding_for_model("gpt-3.5-turbo")
-            tokens = encoding.encode(text)
+        A rolling hash over the last 8 words marks a cut point whenever it is divisible by the
+        target spacing; the cut itself is snapped to the next sentence or paragraph end. Chunks
+        are at least `min_tokens` (default max_tokens / 4) and at most `max_tokens` long, and do
+        not overlap.
+
+        :param text: The text to be chunked.
+        :param max_tokens: The maximum number of tokens per chunk.
+        :param min_tokens: No cut point is taken before a chunk has this many tokens.
+        :param page_starts: (offset, page number) of each page in `text`, for the chunks' page spans.
+        :return: A list of Chunk objects.
+        """
+        min_tokens = max_tokens // 4 if min_tokens is None else min(min_tokens, max_tokens)
+        divisor = max(1, (max_tokens - min_tokens) // 4)  # Average words between cut points
+        count = TextChunker._token_counter()
+        sections = [(block["start"], block["section"]) for block in TextChunker._blocks(text) if block["heading"]]
+
+        with span("chunk", chars=len(text), max_tokens=max_tokens, mode="content") as stage:
+            chunks: List[Chunk] = []
+            start = None  # Character offset where the current chunk begins
+            tokens = 0
+            armed = False  # A cut point has passed since the chunk reached min_tokens
+            window = []
+            rolling = 0
+            drop = pow(HASH_BASE, HASH_WINDOW - 1, HASH_MODULUS)
+
+            def emit(end: int):
+                position = bisect.bisect_right(sections, (start, "\uffff")) - 1
+                section = sections[position][1] if position >= 0 else FRONT_MATTER
+                TextChunker._append(chunks, text, start, end, count, section, page_starts)
+
+            for segment_start, segment_end in TextChunker._segments(text):
+                segment = text[segment_start:segment_end]
+                segment_tokens = count(segment)
+                if start is not None and tokens + segment_tokens > max_tokens:
+                    emit(segment_start)
+                    start, tokens, armed = None, 0, False
+                if segment_tokens > max_tokens:
+                    # A single sentence over the limit (e.g. a flattened table) is split by words
+                    for piece_start, piece_end in TextChunker._split_words(text, segment_start, segment_end, segment_tokens, max_tokens):
+                        start = piece_start
+                        emit(piece_end)
+                    start = None
+                    continue
+                if start is None:
+                    start = segment_start
+                tokens += segment_tokens
+
+                for word in WORD_PATTERN.findall(segment):
+                    value = zlib.crc32(word.lower().encode("utf-8"))
+                    if len(window) == HASH_WINDOW:
+                        rolling = (rolling - window.pop(0) * drop) % HASH_MODULUS
+                    window.append(value)
+                    rolling = (rolling * HASH_BASE + value) % HASH_MODULUS
+                    if len(window) == HASH_WINDOW and rolling % divisor == 0 and tokens >= min_tokens:
+                        armed = True
+
+                if armed:
+                    emit(segment_end)
+                    start, tokens, armed = None, 0, False
+
+            if start is not None:
+                emit(len(text))
+
+            stage.set(chunks=len(chunks), tokens=sum(chunk.token_count for chunk in chunks))
+            return chunks
+
+    @staticmethod
+    def chunk_structured(text: str, max_tokens: int = 500, overlap: int = 50, page_starts: Optional[List[Tuple[int, int]]] = None) -> List[Chunk]:
+        """
+        Splits the text along its structure: a heading starts a new chunk, and whole paragraphs
+        of one section are packed into each chunk up to `max_tokens`. Only a paragraph longer
+        than `max_tokens` is split, at sentence ends (or between words for a sentence over the
+        limit). Since chunks end where paragraphs do, they need no overlap, except inside a split
+        paragraph, where each piece repeats the previous piece's last sentence if it is at most
+        `overlap` tokens.
+
+        Each chunk carries its section heading (e.g. "Introduction"; "Front Matter" before the
+        first heading) and, with `page_starts`, the pages it spans.
+
+        :param text: The text to be chunked.
+        :param max_tokens: The maximum number of tokens per chunk.
+        :param overlap: The most tokens repeated between the pieces of a split paragraph.
+        :param page_starts: (offset, page number) of each page in `text`.
+        :return: A list of Chunk objects.
+        """
+        count = TextChunker._token_counter()
 
-            chunks = []
-            start = 0
-            index = 0
+        with span("chunk", chars=len(text), max_tokens=max_tokens, mode="structure") as stage:
+            chunks: List[Chunk] = []
+            start = end = None  # Character range of the chunk being packed
+            tokens = 0
+            heading_only = False  # The chunk so far is just its section heading
+            section = FRONT_MATTER
 
-            while start < len(tokens):
-                end = min(start + max_tokens, len(tokens))
-                chunk_tokens = tokens[start:end]
-                chunk_text = encoding.decode(chunk_tokens)
-                token_count = len(chunk_tokens)
+            def flush():
+                nonlocal start, tokens, heading_only
+                if start is not None:
+                    TextChunker._append(chunks, text, start, end, count, section, page_starts)
+                start, tokens, heading_only = None, 0, False
 
-                chunks.append(Chunk(index=index, text=chunk_text, token_count=token_count))
+            for block in TextChunker._blocks(text):
+                if block["heading"] or block["section"] != section:
+                    flush()
+                    section = block["section"]
+                block_tokens = count(text[block["start"]:block["end"]])
 
-                index += 1
-                start += (max_tokens - overlap)
+                if block_tokens > max_tokens or (heading_only and tokens + block_tokens > max_tokens):
+                    # Split the paragraph; the heading, if the chunk has nothing else yet, stays with its first piece
+                    heading_start = start if heading_only else None
+                    if not heading_only:
+                        flush()
+                    for piece_start, piece_end in TextChunker._split_paragraph(text, block["start"], block["end"], max_tokens - tokens, overlap, count):
+                        start, end = heading_start if heading_start is not None else piece_start, piece_end
+                        heading_start = None
+                        flush()
+                    continue
+                if start is not None and tokens + block_tokens > max_tokens:
+                    flush()
+                heading_only = block["heading"] if start is None else False
+                if start is None:
+                    start = block["start"]
+                end = block["end"]
+                tokens += block_tokens
+            flush()
 
+            stage.set(chunks=len(chunks), tokens=sum(chunk.token_count for chunk in chunks))
             return chunks
-        except Exception as e:
-            print(f"[ERROR] Text chunking failed: {e}")
-            return []
\ No newline at end of file
+
+    @staticmethod
+    def _blocks(text: str) -> List[dict]:
+        """
+        Headings and paragraphs of `text`, in order: [{"start", "end", "section", "heading": bool}].
+
+        Paragraphs end at blank lines, at headings, and after a line that ends a sentence while
+        being clearly shorter than a full line (PDF text rarely keeps blank lines between paragraphs).
+        """
+        lines = []
+        offset = 0
+        for line in text.split("\n"):
+            lines.append((offset, offset + len(line), line.strip()))
+            offset += len(line) + 1
+        full = [len(line) for _, _, line in lines if len(line) > 20]
+        short = 0.85 * statistics.median(full) if full else 0
+
+        blocks: List[dict] = []
+        section = FRONT_MATTER
+        paragraph = None
+
+        def close():
+            nonlocal paragraph
+            if paragraph is not None:
+                blocks.append(paragraph)
+            paragraph = None
+
+        for start, end, line in lines:
+            if not line:
+                close()
+                continue
+            heading = TextChunker._heading(line)
+            if heading:
+                close()
+                section = heading
+                blocks.append({"start": start, "end": end, "section": section, "heading": True})
+                continue
+            if INLINE_ABSTRACT_PATTERN.match(line):
+                close()
+                section = "Abstract"
+            if paragraph is None:
+                paragraph = {"start": start, "end": end, "section": section, "heading": False}
+            paragraph["end"] = end
+            if PARAGRAPH_END_PATTERN.search(line) and len(line) < short:
+                close()
+        close()
+        return blocks
+
+    @staticmethod
+    def _heading(line: str) -> Optional[str]:
+        """
+        Section name if `line` is a heading ("3.2 Training Setup" -> "Training Setup"), else None.
+        """
+        words = line.split()
+        # Two-column extraction glues a heading to body text: long lines and run-together words are not headings
+        if len(line) > 80 or len(words) > 10 or max(len(word) for word in words) > 20:
+            return None
+        match = NUMBERED_HEADING_PATTERN.match(line)
+        name = match.group(1) if match else line if NAMED_HEADING_PATTERN.match(line) else None
+        if name is None:
+            return None
+        name = name.strip().rstrip(":").strip()
+        return name.title() if name.isupper() else name
+
+    @staticmethod
+    def _split_paragraph(text: str, start: int, end: int, max_tokens: int, overlap: int, count: Callable[[str], int]) -> List[Tuple[int, int]]:
+        """
+        Character ranges packing the sentences of an oversized paragraph into pieces of at most `max_tokens`.
+        """
+        sentences = []
+        for sentence_start, sentence_end in TextChunker._segments(text[start:end]):
+            sentence_start, sentence_end = start + sentence_start, start + sentence_end
+            sentence_tokens = count(text[sentence_start:sentence_end])
+            if sentence_tokens > max_tokens:
+                sentences += [(a, b, count(text[a:b])) for a, b in TextChunker._split_words(text, sentence_start, sentence_end, sentence_tokens, max_tokens)]
+            else:
+                sentences.append((sentence_start, sentence_end, sentence_tokens))
+
+        pieces = []
+        current: List[tuple] = []
+        for sentence in sentences:
+            if current and sum(s[2] for s in current) + sentence[2] > max_tokens:
+                pieces.append((current[0][0], current[-1][1]))
+                last = current[-1]
+                # Repeat the last sentence for context, if it is short enough and still fits
+                current = [last] if last[2] <= overlap and last[2] + sentence[2] <= max_tokens else []
+            current.append(sentence)
+        if current:
+            pieces.append((current[0][0], current[-1][1]))
+        return pieces
+
+    @staticmethod
+    def _append(chunks: List[Chunk], text: str, start: int, end: int, count: Callable[[str], int], section: Optional[str], page_starts: Optional[List[Tuple[int, int]]]):
+        piece = text[start:end]
+        stripped = piece.strip()
+        if not stripped:
+            return
+        start += len(piece) - len(piece.lstrip())
+        end = start + len(stripped)
+        chunks.append(Chunk(index=len(chunks), text=stripped, token_count=count(stripped), section=section, page_span=TextChunker._page_span(page_starts, start, end)))
+
+    @staticmethod
+    def _page_span(page_starts: Optional[List[Tuple[int, int]]], start: int, end: int) -> Optional[Tuple[int, int]]:
+        if not page_starts:
+            return None
+        offsets = [offset for offset, _ in page_starts]
+        first = max(0, bisect.bisect_right(offsets, start) - 1)
+        last = max(0, bisect.bisect_right(offsets, end - 1) - 1)
+        return page_starts[first][1], page_starts[last][1]
+
+    @staticmethod
+    def _segments(text: str):
+        """
+        Yields (start, end) offsets of the sentences of `text`, each with its trailing whitespace.
+        """
+        start = 0
+        for match in BOUNDARY_PATTERN.finditer(text):
+            if match.end() > start:
+                yield start, match.end()
+                start = match.end()
+        if start < len(text):
+            yield start, len(text)
+
+    @staticmethod
+    def _split_words(text: str, start: int, end: int, tokens: int, max_tokens: int):
+        words = [match.start() + start for match in WORD_PATTERN.finditer(text[start:end])]
+        pieces = -(-tokens // max_tokens) + 1  # One spare piece, since tokens per word vary
+        size = -(-len(words) // pieces)
+        offsets = words[::size] + [end]
+        return list(zip(offsets, offsets[1:]))
+
+    @staticmethod
+    def _token_counter() -> Callable[[str], int]:
+        """
+        Token counts from the gpt-3.5-turbo tokenizer, or ~4 characters per token when it is unavailable.
+        """
+        if not TextChunker._encoding_loaded:
+            try:
+                import tiktoken
+                TextChunker._encoding = tiktoken.encoding_for_model("gpt-3.5-turbo")
+            except Exception as e:
+                print(f"[WARN] Tokenizer unavailable, estimating ~4 characters per token: {e}")
+            TextChunker._encoding_loaded = True
+
+        encoding = TextChunker._encoding
+        if encoding is None:
+            return lambda text: -(-len(text) // 4)  # Rounded up, so summed sentences never undercount a chunk
+        return lambda text: len(encoding.encode(text))
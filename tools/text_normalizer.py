@@ -0,0 +1,183 @@
+import math
+import re
+from collections import Counter
+from typing import Dict, List, Optional
+from infra.tracing import span
+
+# Ligature glyphs and extraction artifacts pdfplumber passes through verbatim
+LIGATURES = {
+    "\ufb00": "ff", "\ufb01": "fi", "\ufb02": "fl", "\ufb03": "ffi", "\ufb04": "ffl", "\ufb05": "st", "\ufb06": "st",
+    "\u00ad": "",  # soft hyphen
+    "\u200b": "",  # zero-width space
+    "\u00a0": " ",  # no-break space
+}
+LIGATURE_PATTERN = re.compile("|".join(map(re.escape, LIGATURES)))
+CID_PATTERN = re.compile(r"\(cid:\d+\)")  # Glyphs pdfminer could not map to Unicode
+
+PAGE_NUMBER_PATTERN = re.compile(r"^\s*(?:page\s+)?\d{1,4}(?:\s*(?:of|/)\s*\d{1,4})?\s*$", re.IGNORECASE)
+HYPHENATED_PATTERN = re.compile(r"([A-Za-z]+(?:-[A-Za-z]+)*)-\n([a-z]+(?:-[A-Za-z]+)*)")
+SPACES_PATTERN = re.compile(r"[ \t\f\v]+")
+BLANK_LINES_PATTERN = re.compile(r"\n{3,}")
+WORD_PATTERN = re.compile(r"[A-Za-z]+(?:-[A-Za-z]+)*")
+
+# Lines at the top/bottom of a page that are checked for running headers and footers
+EDGE_LINES = 3
+
+# Private-use character marking page starts while the pages are cleaned as one text; removed before returning
+PAGE_MARK = "\ue000"
+
+
+class TextNormalizer:
+    """
+    Cleans pdfplumber page text before it is tokenized, so no LLM call pays for layout noise:
+
+    - Running headers/footers: lines within the first/last few lines of a page that repeat
+      (digits ignored, so "Page 3" matches "Page 4") on at least half of the pages are removed,
+      as are bare page numbers ("7", "Page 7 of 12").
+    - Dehyphenation: "compres-\\nsion" becomes "compression". Compounds keep their hyphen
+      ("state-of-\\nthe-art"), as does any word the paper spells with a hyphen elsewhere.
+    - Ligatures and artifacts: "ﬁ", "ﬂ", "ﬀ", ... become plain letters; soft hyphens, zero-width
+      spaces and "(cid:NN)" glyph codes are dropped.
+    - Whitespace: runs of spaces are folded, lines stripped, and runs of blank lines
+      collapsed. Line breaks are kept, since section detection works line by line.
+    """
+
+    @staticmethod
+    def normalize_pages(pages: List[str]) -> dict:
+        """
+        Args:
+            pages (List[str]): Extracted text of each page, in order.
+
+        Returns:
+            dict: {
+                "text": str,  # Normalized text of the whole document
+                "page_offsets": List[int],  # Where each page starts in "text"
+                "stats": {"chars_before": int, "chars_after": int, "header_footer_lines": int,
+                          "dehyphenated": int, "ligatures": int}
+            }
+        """
+        with span("normalize_text", pages=len(pages)) as stage:
+            chars_before = sum(len(page) + 1 for page in pages)
+            ligatures = 0
+            cleaned_pages = []
+            for page in pages:
+                page, count = LIGATURE_PATTERN.subn(lambda m: LIGATURES[m.group(0)], page)
+                page, cid_count = CID_PATTERN.subn("", page)
+                ligatures += count + cid_count
+                cleaned_pages.append(page)
+
+            cleaned_pages, removed = TextNormalizer.strip_headers_footers(cleaned_pages)
+            text = TextNormalizer.fold_whitespace("\n".join(PAGE_MARK + page for page in cleaned_pages))
+            text, dehyphenated = TextNormalizer.dehyphenate(text)
+            text, page_offsets = TextNormalizer._remove_page_marks(text)
+
+            stats = {
+                "chars_before": chars_before,
+                "chars_after": len(text),
+                "header_footer_lines": removed,
+                "dehyphenated": dehyphenated,
+                "ligatures": ligatures,
+            }
+            stage.set(**stats)
+            return {"text": text, "page_offsets": page_offsets, "stats": stats}
+
+    @staticmethod
+    def strip_headers_footers(pages: List[str]):
+        """
+        Removes running headers/footers and page numbers; returns (pages, number of lines removed).
+        """
+        page_lines = [page.splitlines() for page in pages]
+        if len(page_lines) < 2:
+            return pages, 0
+
+        def edges(lines: List[str]) -> List[int]:
+            filled = [i for i, line in enumerate(lines) if line.strip()]
+            return sorted(set(filled[:EDGE_LINES] + filled[-EDGE_LINES:]))
+
+        # A line counts once per page, however often it appears there
+        seen = Counter()
+        for lines in page_lines:
+            seen.update({TextNormalizer._line_key(lines[i]) for i in edges(lines)})
+        minimum = max(2, math.ceil(len(page_lines) / 2))
+        repeated = {key for key, count in seen.items() if count >= minimum and key}
+
+        removed = 0
+        result = []
+        for number, lines in enumerate(page_lines):
+            candidates = edges(lines)
+            if number == 0:
+                # The title on the first page often doubles as the running header of the others: keep it
+                top = [i for i, line in enumerate(lines) if line.strip()][:EDGE_LINES]
+                candidates = [i for i in candidates if i not in top or PAGE_NUMBER_PATTERN.match(lines[i])]
+            drop = {i for i in candidates if TextNormalizer._line_key(lines[i]) in repeated or PAGE_NUMBER_PATTERN.match(lines[i])}
+            removed += len(drop)
+            result.append("\n".join(line for i, line in enumerate(lines) if i not in drop))
+        return result, removed
+
+    @staticmethod
+    def _remove_page_marks(text: str):
+        """
+        Drops the page marks; returns (text, offset where each page starts in it).
+        """
+        parts = text.split(PAGE_MARK)
+        result = parts[0]
+        offsets = []
+        for part in parts[1:]:
+            if not result or result.endswith("\n"):
+                part = part.lstrip(" \n")
+            offsets.append(len(result))
+            result += part
+        return result.rstrip(), [min(offset, len(result.rstrip())) for offset in offsets]
+
+    @staticmethod
+    def _line_key(line: str) -> str:
+        return re.sub(r"\d+", "#", " ".join(line.split()).lower())
+
+    @staticmethod
+    def dehyphenate(text: str):
+        """
+        Rejoins words split with a hyphen at a line break; returns (text, number of words rejoined).
+        """
+        hyphenated = {word.lower() for word in WORD_PATTERN.findall(text) if "-" in word}
+        joined = 0
+
+        def rejoin(match: re.Match) -> str:
+            nonlocal joined
+            head, tail = match.group(1), match.group(2)
+            # Compounds stay hyphenated: the head already has a hyphen, or the paper spells it that way elsewhere
+            if "-" in head or f"{head}-{tail}".lower() in hyphenated:
+                return f"{head}-{tail}"
+            joined += 1
+            return f"{head}{tail}"
+
+        return HYPHENATED_PATTERN.sub(rejoin, text), joined
+
+    @staticmethod
+    def fold_whitespace(text: str) -> str:
+        text = SPACES_PATTERN.sub(" ", text)
+        text = "\n".join(line.strip() for line in text.split("\n"))
+        return BLANK_LINES_PATTERN.sub("\n\n", text).strip()
+
+    @staticmethod
+    def token_report(before: str, after: str, model: Optional[str] = None) -> Dict[str, object]:
+        """
+        Token counts before and after normalization ({"tokens_before", "tokens_after", "tokens_saved",
+        "exact"}), estimated at ~4 characters per token when the tokenizer is unavailable.
+        """
+        from utils.token_counter import TokenCounter
+
+        try:
+            tokens_before = TokenCounter.count_tokens(before, model)
+            tokens_after = TokenCounter.count_tokens(after, model)
+            exact = tokens_before is not None and tokens_after is not None
+        except Exception:
+            exact = False
+        if not exact:
+            tokens_before, tokens_after = len(before) // 4, len(after) // 4
+
+        return {
+            "tokens_before": tokens_before,
+            "tokens_after": tokens_after,
+            "tokens_saved": tokens_before - tokens_after,
+            "exact": exact,
+        }
@@ -0,0 +1,289 @@
+import argparse
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+from infra.config import Config
+from infra.tracing import Span, tracer
+from tools.cost_tracker import CostTracker
+
+# Spans that name the pipeline stage an LLM call belongs to (innermost wins)
+STAGE_SPANS = ("extract_metadata", "compress", "reduce", "final_prompt", "explain_figures", "tool")
+PAPER_SPANS = ("summarize_paper", "compare_papers")
+# Stage recorded for each of those spans: the MODEL_<STAGE> names of infra/models.py, so ledger
+# rows line up with per-stage model routing and `stage_usage` ("final_prompt" depends on the run)
+STAGE_NAMES = {
+    "extract_metadata": "metadata",
+    "compress": "compression",
+    "reduce": "reduction",
+    "explain_figures": "figures",
+    "tool": "tool",
+}
+
+GROUPINGS = {
+    "day": "day",
+    "model": "model",
+    "stage": "stage",
+    "paper": "COALESCE(paper_path, '-')",
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_calls (
+    ts REAL NOT NULL,
+    day TEXT NOT NULL,
+    provider TEXT,
+    model TEXT,
+    stage TEXT,
+    paper_hash TEXT,
+    paper_path TEXT,
+    prompt_tokens INTEGER NOT NULL DEFAULT 0,
+    completion_tokens INTEGER NOT NULL DEFAULT 0,
+    total_tokens INTEGER NOT NULL DEFAULT 0,
+    latency REAL,
+    cost REAL NOT NULL DEFAULT 0,
+    cancelled INTEGER NOT NULL DEFAULT 0,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_llm_calls_day ON llm_calls(day);
+CREATE INDEX IF NOT EXISTS idx_llm_calls_model ON llm_calls(model);
+CREATE INDEX IF NOT EXISTS idx_llm_calls_stage ON llm_calls(stage);
+CREATE INDEX IF NOT EXISTS idx_llm_calls_paper ON llm_calls(paper_hash);
+"""
+
+
+class UsageLedger:
+    """
+    Append-only SQLite ledger with one row per LLM call (tokens, latency and cost
+    from the unified price table in infra/models.py), attributed to a pipeline stage
+    and paper. Aggregates by day, model, stage or paper are indexed queries.
+
+    `UsageLedger.install()` subscribes the ledger to the tracer's LLM call spans, so
+    every call made by the summarizer, agents and tools is recorded without changes
+    to the callers.
+    """
+
+    _installed: Optional["UsageLedger"] = None
+    _install_lock = threading.Lock()
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or Config.USAGE_LEDGER_PATH
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")  # Daemon, CLI and Streamlit may write at once
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._local = threading.local()
+        self._hashes: Dict[str, str] = {}
+        self._listener = None
+
+    # --- Recording -----------------------------------------------------------------
+
+    def record(
+        self,
+        model: str,
+        prompt_tokens: int,
+        completion_tokens: int,
+        stage: Optional[str] = None,
+        paper_path: Optional[str] = None,
+        paper_hash: Optional[str] = None,
+        latency: Optional[float] = None,
+        provider: Optional[str] = None,
+        cancelled: bool = False,
+        error: Optional[str] = None,
+        ts: Optional[float] = None,
+    ):
+        """
+        Appends one LLM call to the ledger.
+        """
+        ts = ts or time.time()
+        cost = CostTracker.estimate_cost(prompt_tokens, completion_tokens, model_name=model)
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO llm_calls (ts, day, provider, model, stage, paper_hash, paper_path, prompt_tokens, "
+                "completion_tokens, total_tokens, latency, cost, cancelled, error) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    ts, time.strftime("%Y-%m-%d", time.localtime(ts)), provider, model, stage or "other",
+                    paper_hash, paper_path, prompt_tokens, completion_tokens, prompt_tokens + completion_tokens,
+                    latency, cost, int(cancelled), error,
+                ),
+            )
+            self._conn.commit()
+
+    @classmethod
+    def install(cls, path: Optional[str] = None) -> Optional["UsageLedger"]:
+        """
+        Starts recording every LLM call of this process (idempotent). Disabled with USAGE_LEDGER=false.
+        """
+        if not Config.USAGE_LEDGER:
+            return None
+        with cls._install_lock:
+            if cls._installed is None:
+                ledger = cls(path)
+                ledger._listener = tracer.add_listener(ledger._on_start, ledger._on_end)
+                cls._installed = ledger
+            return cls._installed
+
+    @classmethod
+    def uninstall(cls):
+        with cls._install_lock:
+            if cls._installed is not None:
+                tracer.remove_listener(cls._installed._listener)
+                cls._installed.close()
+                cls._installed = None
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _stack(self) -> List[Span]:
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    def _on_start(self, span: Span):
+        if span.name in STAGE_SPANS or span.name in PAPER_SPANS:
+            self._stack().append(span)
+
+    def _on_end(self, span: Span):
+        stack = self._stack()
+        if span in stack:
+            stack.remove(span)
+
+        if not span.name.startswith("llm."):
+            return
+
+        stage = next((s for s in reversed(stack) if s.name in STAGE_SPANS), None)
+        root = next((s for s in reversed(stack) if s.name in PAPER_SPANS), None)
+        paper_path, paper_hash = self._paper(root, stage)
+
+        attrs = span.attrs
+        try:
+            self.record(
+                model=attrs.get("model"),
+                prompt_tokens=attrs.get("prompt_tokens", 0),
+                completion_tokens=attrs.get("completion_tokens", 0),
+                stage=self._stage(stage, root) if stage else ("agent" if span.name == "llm.chat_with_tools" else None),
+                paper_path=paper_path,
+                paper_hash=paper_hash,
+                latency=span.duration,
+                provider=attrs.get("provider"),
+                cancelled=attrs.get("cancelled", False),
+                error=span.error,
+            )
+        except Exception as e:
+            # Accounting must never break a summary
+            print(f"[WARN] Could not record LLM usage: {e}")
+
+    @staticmethod
+    def _stage(stage: Span, root: Optional[Span]) -> str:
+        if stage.name == "final_prompt":
+            return "comparison" if root is not None and root.name == "compare_papers" else "summary"
+        return STAGE_NAMES.get(stage.name, stage.name)
+
+    def _paper(self, root: Optional[Span], stage: Optional[Span]):
+        if root is None:
+            return None, None
+
+        paths = root.attrs.get("paths") or [root.attrs.get("path")]
+        number = stage.attrs.get("paper") if stage is not None else None
+        if number:
+            paths = [paths[number - 1]]  # compare_papers: compression of one of the two papers
+        paths = [p for p in paths if p]
+        if not paths:
+            return None, None
+
+        hashes = [self._hash(p) for p in paths]
+        return " | ".join(paths), "__".join(sorted(h for h in hashes if h)) or None
+
+    def _hash(self, path: str) -> Optional[str]:
+        from tools.cache_manager import CacheManager
+
+        if path not in self._hashes:
+            try:
+                self._hashes[path] = CacheManager.get_file_hash(path)
+            except OSError:
+                self._hashes[path] = None
+        return self._hashes[path]
+
+    # --- Reporting -----------------------------------------------------------------
+
+    def report(self, by: str = "stage", since: Optional[str] = None, until: Optional[str] = None) -> List[dict]:
+        """
+        Aggregates calls by "day", "model", "stage" or "paper" (most expensive first).
+
+        Args:
+            by (str): Grouping column.
+            since (str, optional): First day to include (YYYY-MM-DD).
+            until (str, optional): Last day to include (YYYY-MM-DD).
+
+        Returns:
+            List[dict]: [{"group", "calls", "prompt_tokens", "completion_tokens", "total_tokens",
+                          "cost", "avg_latency", "errors"}]
+        """
+        if by not in GROUPINGS:
+            raise ValueError(f"Unknown grouping '{by}' (use one of: {', '.join(GROUPINGS)})")
+
+        where, params = [], []
+        if since:
+            where.append("day >= ?")
+            params.append(since)
+        if until:
+            where.append("day <= ?")
+            params.append(until)
+
+        query = (
+            f"SELECT {GROUPINGS[by]} AS grp, COUNT(*), SUM(prompt_tokens), SUM(completion_tokens), SUM(total_tokens), "
+            f"SUM(cost), AVG(latency), SUM(error IS NOT NULL) FROM llm_calls "
+            f"{'WHERE ' + ' AND '.join(where) if where else ''} GROUP BY grp "
+            f"ORDER BY {'grp' if by == 'day' else 'SUM(cost) DESC'}"
+        )
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+
+        return [
+            {
+                "group": row[0],
+                "calls": row[1],
+                "prompt_tokens": row[2] or 0,
+                "completion_tokens": row[3] or 0,
+                "total_tokens": row[4] or 0,
+                "cost": round(row[5] or 0.0, 6),
+                "avg_latency": round(row[6] or 0.0, 3),
+                "errors": row[7] or 0,
+            }
+            for row in rows
+        ]
+
+    @staticmethod
+    def format_report(rows: List[dict], by: str) -> str:
+        if not rows:
+            return "No LLM calls recorded yet."
+
+        width = max(12, min(60, max(len(str(r["group"])) for r in rows) + 2))
+        lines = [f"{by.capitalize():<{width}}{'Calls':>8}{'Prompt':>12}{'Completion':>12}{'Cost $':>12}{'Avg s':>8}{'Errors':>8}"]
+        for r in rows:
+            lines.append(
+                f"{str(r['group'])[:width - 2]:<{width}}{r['calls']:>8}{r['prompt_tokens']:>12}{r['completion_tokens']:>12}"
+                f"{r['cost']:>12.4f}{r['avg_latency']:>8.2f}{r['errors']:>8}"
+            )
+        total_cost = sum(r["cost"] for r in rows)
+        total_calls = sum(r["calls"] for r in rows)
+        lines.append(f"{'Total':<{width}}{total_calls:>8}{'':>24}{total_cost:>12.4f}")
+        return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="LLM usage and cost ledger.")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    report_parser = subcommands.add_parser("report", help="Aggregate recorded LLM calls")
+    report_parser.add_argument("--by", choices=list(GROUPINGS), default="stage")
+    report_parser.add_argument("--since", type=str, help="First day (YYYY-MM-DD)")
+    report_parser.add_argument("--until", type=str, help="Last day (YYYY-MM-DD)")
+    report_parser.add_argument("--ledger", type=str, default=Config.USAGE_LEDGER_PATH, help="Ledger database path")
+    args = parser.parse_args()
+
+    ledger = UsageLedger(args.ledger)
+    print(f"\n💸 LLM usage by {args.by} ({args.ledger}):\n")
+    print(UsageLedger.format_report(ledger.report(args.by, args.since, args.until), args.by))
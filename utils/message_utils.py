@@ -28,6 +28,23 @@ def extract_style_from_messages(thread_id: str, default: str = "default") -> str
     return default
 
 
+def extract_style_from_text(text: str, default: str = "default") -> str:
+    """
+    Extracts a 'style' value from a plain user message, e.g. "... [style=layman]".
+
+    Args:
+        text (str): The user message.
+        default (str): Fallback style if none found.
+
+    Returns:
+        str: The extracted or default style in lowercase.
+    """
+    match = re.search(r"style=(\w+)", text or "")
+    if match:
+        return match.group(1).strip().lower()
+    return default
+
+
 def build_summary_prompt(chunk: str, style: str = "default") -> str:
     """
     Builds a prompt to instruct the LLM to summarize a specific text chunk.
@@ -71,13 +88,31 @@ def build_compression_prompt(text: str) -> str:
     )
 
 
-def build_compressed_summary_prompt(compressed_text: str, style: str = "default", title: str = "", authors: List[str] = [], ) -> str:
+def build_reduction_prompt(text: str) -> str:
+    """
+    Builds a prompt to merge several compressed sections of a paper into one shorter representation.
+
+    Args:
+        text (str): Consecutive compressed sections.
+
+    Returns:
+        str: A merge prompt for the LLM.
+    """
+    return (
+        "You are merging consecutive compressed sections of a research paper. "
+        "Combine them into one shorter text, keeping every key method, result, number and term.\n\n"
+        f"{text.strip()}"
+    )
+
+
+def build_compressed_summary_prompt(compressed_text: str, style: str = "default", title: str = "", authors: List[str] = [], sections: Optional[List[str]] = None) -> str:
     """
     Builds a prompt to summarize the full compressed version of a research paper.
 
     Args:
         compressed_text (str): The full compressed representation of the paper.
         style (str): The style of summarization ('default', 'short', 'layman', 'detailed').
+        sections (List[str], optional): When only some sections were compressed, their names.
 
     Returns:
         str: A prompt to instruct the LLM to generate the final summary.
@@ -101,4 +136,38 @@ def build_compressed_summary_prompt(compressed_text: str, style: str = "default"
 
     authors_str = ", ".join(authors) if authors else "Unknown authors"
 
-    return f"You are summarizing a research paper titled: {title}, authored by: {authors_str}, {instruction}\n\n{compressed_text.strip()}"
\ No newline at end of file
+    if sections:
+        instruction += f" The text below contains only these sections of the paper: {', '.join(sections)}. Summarize those sections, not the whole paper."
+
+    return f"You are summarizing a research paper titled: {title}, authored by: {authors_str}, {instruction}\n\n{compressed_text.strip()}"
+
+
+def build_comparison_prompt(compressed_text_1: str, compressed_text_2: str, style: str = "default", sections: Optional[List[str]] = None) -> str:
+    """
+    Builds a prompt to compare two papers from their compressed representations.
+
+    Args:
+        compressed_text_1 (str): Compressed content of the first paper.
+        compressed_text_2 (str): Compressed content of the second paper.
+        style (str): Tone of the comparison.
+        sections (List[str], optional): When only some sections were compressed, the requested section names.
+
+    Returns:
+        str: A prompt to instruct the LLM to write the comparison.
+    """
+    if sections:
+        return (
+            f"You are comparing the {', '.join(sections)} sections of two research papers based on their content below.\n\n"
+            f"Paper 1:\n{compressed_text_1}\n\n"
+            f"Paper 2:\n{compressed_text_2}\n\n"
+            f"Write a clear comparison of these sections only. "
+            f"Point out both similarities and differences. Use a {style} tone."
+        )
+
+    return (
+        f"You are comparing two full research papers based on their content below.\n\n"
+        f"Paper 1:\n{compressed_text_1}\n\n"
+        f"Paper 2:\n{compressed_text_2}\n\n"
+        f"Write a clear comparison covering research focus, methods, technical approach, and conclusions. "
+        f"Point out both similarities and differences. Use a {style} tone."
+    )
@@ -1,15 +1,20 @@
 from infra.config import Config
+from infra.tracing import span
 
 class TokenCounter:
+    _encodings = {}  # model -> tiktoken encoding, or None when it could not be loaded
+
     @staticmethod
     def count_tokens(text: str, model: str = None) -> int:
         provider = Config.LLM_PROVIDER.lower()
         model = model or Config.OPENAI_MODEL
 
         if provider == "openai":
-            import tiktoken
-            encoding = tiktoken.encoding_for_model(model)
-            return len(encoding.encode(text))
+            with span("tokenize", chars=len(text)) as stage:
+                encoding = TokenCounter._encoding(model)
+                tokens = len(encoding.encode(text)) if encoding is not None else -(-len(text) // 4)
+                stage.set(tokens=tokens, estimated=encoding is None)
+                return tokens
 
         elif provider == "gemini":
             # Gemini uses sentencepiece-like tokenizer
@@ -25,6 +30,18 @@ class TokenCounter:
         # fallback (not recommended)
         return len(text.split())
 
+    @staticmethod
+    def _encoding(model: str):
+        # None when tiktoken or its encoding files are unavailable (e.g. offline); count_tokens estimates instead
+        if model not in TokenCounter._encodings:
+            try:
+                import tiktoken
+                TokenCounter._encodings[model] = tiktoken.encoding_for_model(model)
+            except Exception as e:
+                print(f"[WARN] Tokenizer for '{model}' unavailable, estimating ~4 characters per token: {e}")
+                TokenCounter._encodings[model] = None
+        return TokenCounter._encodings[model]
+
     @staticmethod
     def get_max_tokens(model: str = None) -> int:
         provider = Config.LLM_PROVIDER.lower()
@@ -35,6 +52,8 @@ class TokenCounter:
                 "gpt-3.5-turbo": 4096,
                 "gpt-4": 8192,
                 "gpt-4-1106-preview": 128000,
+                "gpt-4-0125-preview": 128000,
+                "gpt-4-turbo": 128000,
             }.get(model, 4096)
 
         elif provider == "gemini":
@@ -60,14 +79,10 @@ class TokenCounter:
         model = model or Config.OPENAI_MODEL
 
         if provider == "openai":
-            try:
-                import tiktoken
-                encoding = tiktoken.encoding_for_model(model)
-                tokens = encoding.encode(text)
-                return encoding.decode(tokens[:token_limit])
-            except Exception as e:
-                print(f"[WARN] OpenAI token chunk fallback: {e}")
-                return " ".join(text.split()[:token_limit])
+            encoding = TokenCounter._encoding(model)
+            if encoding is not None:
+                return encoding.decode(encoding.encode(text)[:token_limit])
+            return " ".join(text.split()[:token_limit])
 
         # Fallback for Claude, Gemini, etc. — rough estimate
         return " ".join(text.split()[:token_limit])